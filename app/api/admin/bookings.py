@@ -2,11 +2,13 @@
 Admin Bookings Management API Endpoints
 Handles booking CRUD operations and status management for admins
 """
+from datetime import date
 from fastapi import APIRouter, Depends, Query
-from typing import Optional
+from typing import Literal, Optional
 from app.core.auth import require_admin, TokenData
 from app.core.database import get_db_client
-from app.services.booking_service import BookingService
+from app.services.booking_service import BookingService, ADMIN_BOOKING_EXPORT_COLUMNS
+from app.utils.export import export_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,4 +40,27 @@ async def get_all_bookings_admin(
         date_to=date_to
     )
 
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/export", operation_id="admin_export_bookings")
+async def export_bookings_admin(
+    format: Literal["csv", "ndjson"] = "csv",
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: TokenData = Depends(require_admin),
+    db = Depends(get_db_client)
+):
+    """
+    Export all bookings matching the filters as CSV or NDJSON
+    - Admin only
+    - Streamed page by page (oldest first), so any size exports in flat memory
+    """
+    booking_service = BookingService(db_client=db)
+    pages = booking_service.iter_admin_booking_export(
+        status_filter=status,
+        date_from=date_from,
+        date_to=date_to
+    )
+    return export_response(pages, format, ADMIN_BOOKING_EXPORT_COLUMNS, "bookings")
@@ -2,10 +2,15 @@
 Admin Dashboard API Endpoints
 Handles admin dashboard statistics and analytics
 """
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
 from app.core.auth import require_admin, TokenData
 from app.core.database import get_db_client
 from app.services.admin_service import AdminService
+from app.services.analytics_service import AnalyticsService, PLATFORM_SCOPE, salon_scope
+from app.schemas import AnalyticsTimeseriesResponse
 from app.services.activity_log_service import ActivityLogService, DASHBOARD_EXCLUDED_ACTIONS
 from supabase import Client
 import logging
@@ -20,6 +25,11 @@ def get_admin_service(db: Client = Depends(get_db_client)) -> AdminService:
     return AdminService(db_client=db)
 
 
+def get_analytics_service(db: Client = Depends(get_db_client)) -> AnalyticsService:
+    """Dependency injection for AnalyticsService"""
+    return AnalyticsService(db_client=db)
+
+
 # =====================================================
 # DASHBOARD STATISTICS
 # =====================================================
@@ -39,23 +49,51 @@ async def get_dashboard_stats(
     return stats.to_dict()
 
 
+@router.get("/analytics/timeseries", response_model=AnalyticsTimeseriesResponse)
+async def get_analytics_timeseries(
+    granularity: Literal["day", "week", "month"] = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    salon_id: Optional[str] = None,
+    current_user: TokenData = Depends(require_admin),
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+):
+    """
+    Get bookings, cancellations, revenue and new customers over time
+    - Admin only
+    - Platform-wide, or for one salon with salon_id
+    - Served from the daily analytics rollups
+    """
+    scope = salon_scope(salon_id) if salon_id else PLATFORM_SCOPE
+    return await analytics_service.get_timeseries(
+        scope,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
 @router.get("/recent-activity")
 async def get_recent_activity(
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     current_user: TokenData = Depends(require_admin)
 ):
     """
     Get recent activity logs for dashboard
     - Admin only
-    - Returns last N activity logs with user details
+    - Returns the newest N activity logs with user details; pass next_cursor
+      back as cursor for older ones
     """
-    activities = await ActivityLogService.get_recent(
+    activities, next_cursor = await ActivityLogService.get_recent(
         limit=limit,
         exclude_actions=DASHBOARD_EXCLUDED_ACTIONS,
+        cursor=cursor,
     )
     
     return {
         "success": True,
         "data": activities,
-        "count": len(activities)
+        "count": len(activities),
+        "next_cursor": next_cursor
     }
\ No newline at end of file
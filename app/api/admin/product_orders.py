@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional
 from app.core.database import get_db_client
-from app.services.product_order_service import ProductOrderService
+from app.services.product_order_service import ProductOrderService, ORDER_EXPORT_COLUMNS
+from app.utils.export import export_response
 from supabase import Client
 
 router = APIRouter()
@@ -16,10 +18,33 @@ def get_product_order_service(db: Client = Depends(get_db_client)) -> ProductOrd
 
 @router.get("/")
 async def get_all_orders(
+    limit: int = Query(50, ge=1, le=100, description="Results per page (max 100)"),
+    cursor: Optional[str] = Query(None, description="pagination.next_cursor of the previous page"),
+    status: Optional[Literal["pending", "paid", "shipped", "delivered", "cancelled"]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user_id: Optional[str] = None,
     product_order_service: ProductOrderService = Depends(get_product_order_service)
 ):
-    """Get all product orders for admin"""
-    return await product_order_service.get_all_orders()
+    """Get product orders for admin, newest first, one cursor page at a time"""
+    return await product_order_service.get_all_orders(
+        limit=limit,
+        cursor=cursor,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+        user_id=user_id
+    )
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["csv", "ndjson"] = "csv",
+    status: Optional[Literal["pending", "paid", "shipped", "delivered", "cancelled"]] = None,
+    product_order_service: ProductOrderService = Depends(get_product_order_service)
+):
+    """Export all product orders (with customer and line items) as CSV or NDJSON, streamed"""
+    pages = product_order_service.iter_order_export(status=status)
+    return export_response(pages, format, ORDER_EXPORT_COLUMNS, "product-orders")
 
 @router.patch("/{order_id}/status")
 async def update_order_status(
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import Optional
+from typing import Literal, Optional
 from supabase import Client
 from app.core.auth import require_admin, TokenData
 from app.core.database import get_db_client
-from app.services.user_service import UserService, CreateUserRequest
+from app.services.user_service import UserService, CreateUserRequest, USER_EXPORT_COLUMNS
+from app.utils.export import export_response
 from app.schemas.user import UserCreate, UserUpdate
 from app.services.activity_log_service import ActivityLogger
 import logging
@@ -46,6 +47,23 @@ async def get_all_users(
     return result
 
 
+@router.get("/export", operation_id="admin_export_users")
+async def export_users(
+    format: Literal["csv", "ndjson"] = "csv",
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    current_user: TokenData = Depends(require_admin),
+    user_service: UserService = Depends(get_user_service)
+):
+    """Export all users matching the filters as CSV or NDJSON, streamed"""
+    pages = user_service.iter_user_export(
+        role=role,
+        is_active=is_active,
+        include_internal=current_user.is_internal
+    )
+    return export_response(pages, format, USER_EXPORT_COLUMNS, "users")
+
+
 @router.post("/", operation_id="admin_create_user")
 async def create_user(
     user_data: UserCreate,
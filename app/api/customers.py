@@ -19,7 +19,7 @@ from app.services.customer_service import CustomerService
 from app.services.booking_service import BookingService
 from app.services.product_cart_service import ProductCartService
 from app.schemas import (
-    CartResponse, CartOperationResponse, SuccessResponse, CartClearResponse,
+    CartResponse, CartOperationResponse, CartClearResponse,
     CustomerBookingsResponse, BookingCancelResponse, BookingResponse,
     FavoritesResponse, FavoriteOperationResponse, CustomerReviewsResponse,
     ReviewOperationResponse, CartItemCreate, CartItemUpdate, ReviewCreate, ReviewUpdate,
@@ -104,7 +104,7 @@ async def update_cart_item(
     )
 
 
-@router.delete("/cart/{item_id}", response_model=SuccessResponse)
+@router.delete("/cart/{item_id}", response_model=CartOperationResponse)
 async def remove_from_cart(
     item_id: str,
     current_user: TokenData = Depends(get_current_user),
@@ -279,7 +279,9 @@ async def list_available_coupons(
     `salon_id` is supplied (e.g. on the checkout screen), that salon's active
     vendor coupons are added too. Ineligible coupons — expired, usage-exhausted,
     already used, or first-time offers the customer no longer qualifies for — are
-    filtered out. The authoritative eligibility check still runs on apply.
+    filtered out. When the customer's cart is at `salon_id`, each coupon carries
+    `estimated_savings` and the priced `breakdown` for that cart. The
+    authoritative eligibility check still runs on apply.
     """
     return await customer_service.list_available_coupons(current_user.user_id, salon_id)
 
@@ -4,15 +4,17 @@ Payment API Endpoints - Thin Layer
 Handles Razorpay payment routing:
 - Cart checkout convenience fee orders
 - Vendor registration fee orders and verification
+- Razorpay webhook ingestion (applied in the background)
 
-All business logic in PaymentService (service layer pattern)
+All business logic in PaymentService / PaymentWebhookService (service layer pattern)
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Request
 
 from app.core.auth import get_current_user_id, TokenData, get_current_user
 from app.core.database import get_db_client
 from supabase import Client
 from app.services.payment_service import PaymentService
+from app.services.payment_webhook_service import PaymentWebhookService
 from app.schemas import (
     PaymentVerification, RazorpayOrderResponse,
     VendorRegistrationVerificationResponse, CartOrderCreate,
@@ -27,6 +29,11 @@ def get_payment_service(db: Client = Depends(get_db_client)) -> PaymentService:
     return PaymentService(db_client=db)
 
 
+def get_payment_webhook_service(db: Client = Depends(get_db_client)) -> PaymentWebhookService:
+    """Dependency injection for payment webhook service"""
+    return PaymentWebhookService(db_client=db)
+
+
 # =====================================================
 # CART CHECKOUT PAYMENT (Main Flow)
 # =====================================================
@@ -85,3 +92,27 @@ async def verify_vendor_registration_payment(
         razorpay_signature=payment.razorpay_signature,
         user_id=user_id
     )
+
+
+# =====================================================
+# RAZORPAY WEBHOOK
+# =====================================================
+
+@router.post("/webhook")
+async def razorpay_webhook(
+    request: Request,
+    x_razorpay_signature: Optional[str] = Header(None),
+    x_razorpay_event_id: Optional[str] = Header(None),
+    webhook_service: PaymentWebhookService = Depends(get_payment_webhook_service)
+):
+    """
+    Receive a Razorpay webhook (no user auth; authenticated by signature).
+
+    Verifies X-Razorpay-Signature against the raw body, queues the event in
+    the webhook inbox and acknowledges immediately. The payment state change
+    is applied by the background webhook worker. Redeliveries of a queued
+    event are acknowledged without being queued twice.
+    """
+    body = await request.body()
+    await webhook_service.ingest(body, x_razorpay_signature, x_razorpay_event_id)
+    return {"status": "ok"}
@@ -3,7 +3,7 @@ Relationship Manager (RM) API Endpoints using Service Layer
 All business logic in RMService for testability
 """
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional
+from typing import List, Literal, Optional
 import logging
 from supabase import Client
 
@@ -213,10 +213,13 @@ async def get_rm_dashboard(
 @router.get("/leaderboard", response_model=RMLeaderboardResponse)
 async def get_rm_leaderboard(
     limit: int = Query(20, ge=1, le=100, description="Results per page (max 100)"),
+    period: Literal["week", "month", "all_time"] = Query(
+        "all_time", description="week / month: points earned this week / month; all_time: total score"
+    ),
     rm_service: RMService = Depends(get_rm_service)
 ):
-    """Get RM leaderboard - top RMs by score"""
-    leaderboard = await rm_service.get_leaderboard(limit=limit)
+    """Get RM leaderboard - top RMs by score (served from memory)"""
+    leaderboard = await rm_service.get_leaderboard(limit=limit, period=period)
     
     return {
         "success": True,
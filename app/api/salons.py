@@ -14,7 +14,7 @@ from supabase import Client
 import logging
 
 from app.core.database import get_db_client
-from app.services.salon_service import SalonService
+from app.services.salon_service import SalonService, POPULAR_CITIES_MAX
 from app.utils.scheduling import generate_slots, parse_date
 from app.schemas import (
     PublicSalonsResponse,
@@ -105,17 +105,19 @@ async def get_public_salons(
 
 @router.get("/popular-cities", response_model=PopularCitiesResponse)
 async def get_popular_cities(
-    limit: int = Query(8, ge=1, le=20, description="Number of cities to return"),
-    db: Client = Depends(get_db_client)
+    limit: int = Query(8, ge=1, le=POPULAR_CITIES_MAX, description="Number of cities to return"),
+    salon_service: SalonService = Depends(get_salon_service)
 ):
     """
-    Get top cities by salon count (aggregated at database level).
+    Get top cities by salon count.
     
     **Performance:**
-    - Uses database-level aggregation (efficient for large datasets)
-    - Returns only aggregated counts, not full salon data
-    - Case-insensitive city matching (Mumbai = mumbai = MUMBAI)
-    - Automatic whitespace trimming
+    - Served from an in-process cache; a miss reads the popular_cities_mv
+      materialised view, so no request ever aggregates over salons
+    - The view is refreshed by the database whenever a salon's visibility or
+      city changes, and on a background schedule
+    - Counts are grouped by canonical city_id, so casing, whitespace and
+      known aliases (Mumbai = mumbai = Bombay) collapse into one entry
     
     **Use Cases:**
     - Homepage popular locations section
@@ -128,13 +130,10 @@ async def get_popular_cities(
     - registration_fee_paid = true
     
     **Returns:**
-    - cities: Array of {city: string, salon_count: int}
+    - cities: Array of {city_id: int, city: string, salon_count: int}
     - total: Number of cities returned
     """
-    # Call database function for efficient aggregation
-    response = db.rpc('get_popular_cities', {'result_limit': limit}).execute()
-    
-    cities = response.data if response.data else []
+    cities = await salon_service.get_popular_cities(limit=limit)
     
     return {
         "cities": cities,
@@ -3,7 +3,8 @@ Vendor API Endpoints
 Handles vendor registration completion, salon management, services, and bookings
 """
 from fastapi import APIRouter, Depends, Body
-from typing import List, Optional
+from datetime import date
+from typing import List, Literal, Optional
 from supabase import Client
 
 from app.core.auth import (
@@ -24,6 +25,7 @@ from app.schemas import (
     CompleteRegistrationResponse,
     SalonResponse,
     VendorAnalyticsResponse,
+    AnalyticsTimeseriesResponse,
     VendorCouponCreate,
     CouponUpdate,
     CouponResponse
@@ -379,13 +381,42 @@ async def update_booking_status(
 
 @router.get("/analytics", response_model=VendorAnalyticsResponse)
 async def get_vendor_analytics(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     current_user: TokenData = Depends(require_vendor),
     vendor_service: VendorService = Depends(get_vendor_service)
 ):
     """
     Get vendor analytics for dashboard.
     
-    Returns bookings, revenue, active services, and ratings.
+    Returns bookings, revenue, active services, and ratings. With both
+    date_from and date_to, also a `period` breakdown for that range.
     """
-    return await vendor_service.get_analytics(vendor_id=current_user.user_id)
+    return await vendor_service.get_analytics(
+        vendor_id=current_user.user_id,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+
+@router.get("/analytics/timeseries", response_model=AnalyticsTimeseriesResponse)
+async def get_vendor_analytics_timeseries(
+    granularity: Literal["day", "week", "month"] = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: TokenData = Depends(require_vendor),
+    vendor_service: VendorService = Depends(get_vendor_service)
+):
+    """
+    Get bookings, cancellations, revenue and new customers over time.
+
+    One bucket per day, week (starting Monday) or month between date_from and
+    date_to (default: the last 30 days / 12 weeks / 12 months to today).
+    """
+    return await vendor_service.get_analytics_timeseries(
+        vendor_id=current_user.user_id,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to
+    )
 
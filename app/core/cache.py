@@ -5,8 +5,9 @@ Provides time-based caching for expensive operations like database config fetche
 Thread-safe implementation with automatic expiration.
 """
 
+import asyncio
 import time
-from typing import Any, Optional, Callable
+from typing import Any, Awaitable, Optional, Callable
 from threading import Lock
 import logging
 
@@ -64,6 +65,19 @@ class TTLCache:
             
             return self._cache
     
+    def peek(self) -> Optional[Any]:
+        """Return the cached value, or None if empty or expired (never loads)."""
+        with self._lock:
+            if self._cache is not None and time.time() < self._expiry_time:
+                return self._cache
+            return None
+
+    def set(self, value: Any) -> None:
+        """Cache `value` for ttl_seconds, replacing any current value."""
+        with self._lock:
+            self._cache = value
+            self._expiry_time = time.time() + self.ttl_seconds
+
     def clear(self):
         """Clear the cache manually."""
         with self._lock:
@@ -76,3 +90,102 @@ class TTLCache:
         return self._cache is None or time.time() >= self._expiry_time
 
 
+
+
+class KeyedTTLCache:
+    """
+    Per-key TTL cache (e.g. one entry per user).
+
+    Unlike TTLCache there is no loader: callers `get` and, on a miss, load and
+    `set` themselves, because the loaders here are usually async. Expired
+    entries are swept once the cache grows past `max_entries`.
+
+    Thread-safe for concurrent access.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict = {}
+        self._lock = Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value for `key`, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Cache `value` under `key` for ttl_seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            if len(self._entries) > self.max_entries:
+                self._sweep(now)
+
+    def pop(self, key: Any) -> None:
+        """Forget `key` (no-op when absent)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every key."""
+        with self._lock:
+            self._entries.clear()
+
+    def _sweep(self, now: float) -> None:
+        # Caller holds the lock.
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        if len(self._entries) > self.max_entries:
+            self._entries.clear()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Single-value async cache that answers from memory while it refreshes.
+
+    Fresh for `ttl_seconds`. After that, and up to `max_stale_seconds`, the
+    old value is returned immediately and one background task reloads it; a
+    failed reload keeps the old value. A cold cache, or one staler than
+    `max_stale_seconds`, loads inline.
+    """
+
+    def __init__(self, ttl_seconds: float, max_stale_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._value: Optional[Any] = None
+        self._loaded_at: float = 0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def get(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value, reloading through `loader` as needed."""
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None and age < self.max_stale_seconds:
+            if age >= self.ttl_seconds and (self._refresh is None or self._refresh.done()):
+                self._refresh = asyncio.create_task(self._reload(loader))
+            return self._value
+
+        self._store(await loader())
+        return self._value
+
+    def clear(self) -> None:
+        """Forget the value (an in-flight refresh may still store its result)."""
+        self._value = None
+        self._loaded_at = 0
+
+    def _store(self, value: Any) -> None:
+        self._value = value
+        self._loaded_at = time.monotonic()
+
+    async def _reload(self, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            self._store(await loader())
+        except Exception as e:
+            logger.warning(f"Background cache refresh failed, serving stale value: {str(e)}")
@@ -83,6 +83,19 @@ class Settings(BaseSettings):
     WORKERS: int
     TOKEN_CLEANUP_INTERVAL_SECONDS: int
     BACKGROUND_SHUTDOWN_TIMEOUT_SECONDS: float
+    # How often the popular-cities materialised view is refreshed and each
+    # worker's cached copy re-warmed (app.core.tasks).
+    POPULAR_CITIES_REFRESH_INTERVAL_SECONDS: int = 900
+    # How often queued booking changes are folded into the analytics
+    # rollups (app.core.tasks); bounds how stale the time-series charts are.
+    ANALYTICS_ROLLUP_REFRESH_INTERVAL_SECONDS: int = 300
+    # How often the RM leaderboard materialised view is refreshed and each
+    # worker's cached rankings re-warmed (app.core.tasks).
+    RM_LEADERBOARD_REFRESH_INTERVAL_SECONDS: int = 300
+    # Activity log partitions (app.core.tasks): how often upcoming months are
+    # created and old ones archived, and how many whole months stay live.
+    ACTIVITY_LOG_MAINTENANCE_INTERVAL_SECONDS: int = 86400
+    ACTIVITY_LOG_RETENTION_MONTHS: int = 12
     ALLOWED_HOSTS: str
     
     # =====================================================
@@ -108,6 +121,21 @@ class Settings(BaseSettings):
     # =====================================================
     RAZORPAY_KEY_ID: str
     RAZORPAY_KEY_SECRET: str
+    # Shared gateway HTTP session (app.services.payment.get_razorpay_gateway):
+    # keep-alive pool size per worker and per-request timeout.
+    RAZORPAY_HTTP_POOL_SIZE: int = 10
+    RAZORPAY_HTTP_TIMEOUT_SECONDS: float = 15.0
+    # Webhook inbox worker (app.core.tasks): poll interval when the queue is
+    # empty and events applied per claim.
+    PAYMENT_WEBHOOK_POLL_INTERVAL_SECONDS: float = 5.0
+    PAYMENT_WEBHOOK_BATCH_SIZE: int = 50
+    # Nightly reconciliation against Razorpay (app.core.tasks): whether it is
+    # scheduled (scripts/reconcile_payments.py works either way), the UTC hour
+    # it starts, and the gateway budget it may use.
+    PAYMENT_RECONCILIATION_ENABLED: bool = True
+    PAYMENT_RECONCILIATION_HOUR_UTC: int = 21
+    PAYMENT_RECONCILIATION_CONCURRENCY: int = 5
+    PAYMENT_RECONCILIATION_RATE_PER_SECOND: float = 5.0
     
     # =====================================================
     # EMAIL CONFIGURATION
@@ -11,6 +11,7 @@ Final request flow (outer -> inner):
       -> TrustedHostMiddleware      (production only)
       -> SlowAPIMiddleware          (rate limiting)
       -> LoggingMiddleware          (per-request timing logs)
+      -> RequestMemoMiddleware      (request-scoped profile + coupon memos)
       -> application
 
 Note: we deliberately do NOT use HTTPSRedirectMiddleware. Our platforms
@@ -29,6 +30,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from app.core.config import settings
+from app.core.request_scope import begin_request_scope, end_request_scope
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,29 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             raise
 
 
+class RequestMemoMiddleware:
+    """
+    Give every HTTP request its own memos (app.core.request_scope): profile
+    lookups, coupon eligibility checks.
+
+    Plain ASGI rather than BaseHTTPMiddleware so the context variable is set in
+    the same task that runs the endpoint and its dependencies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = begin_request_scope()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request_scope(token)
+
+
 def _resolve_cors_origins() -> list[str]:
     """Resolve CORS origins and fail fast on missing production config."""
     origins = settings.allowed_origins_list
@@ -101,7 +126,8 @@ def setup_middleware(app):
     so it can attach headers to every response, including those produced by
     exception handlers.
     """
-    # Innermost: per-request logging
+    # Innermost: request-scoped lookup memo, then per-request logging
+    app.add_middleware(RequestMemoMiddleware)
     app.add_middleware(LoggingMiddleware)
 
     # Rate limiting
@@ -0,0 +1,35 @@
+"""
+Request-scoped memos.
+
+``RequestMemoMiddleware`` (app.core.middleware) opens one scope per HTTP
+request. Services keep per-request lookups in it under their own name - the
+profile reads of app.services.profile_lookup, the coupon eligibility checks of
+app.services.coupon_service - so one request never repeats the same read.
+
+Outside a request (background tasks, scripts) no scope is open and
+``request_memo`` returns None: callers then simply don't memoise.
+"""
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+_request_memos: ContextVar[Optional[Dict[str, Dict[Any, Any]]]] = ContextVar(
+    "request_memos", default=None
+)
+
+
+def begin_request_scope() -> Token:
+    """Open a fresh set of request memos. Pair with ``end_request_scope``."""
+    return _request_memos.set({})
+
+
+def end_request_scope(token: Token) -> None:
+    """Close the memos opened by ``begin_request_scope``."""
+    _request_memos.reset(token)
+
+
+def request_memo(name: str) -> Optional[Dict[Any, Any]]:
+    """The current request's memo called ``name``, or None outside a request scope."""
+    memos = _request_memos.get()
+    if memos is None:
+        return None
+    return memos.setdefault(name, {})
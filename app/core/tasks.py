@@ -5,6 +5,7 @@ Handles graceful startup and shutdown with background task orchestration.
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
 from app.core.database import get_db
@@ -12,15 +13,29 @@ from app.core.database import get_db
 logger = logging.getLogger(__name__)
 
 
+async def _wait_for_shutdown(shutdown_event: asyncio.Event, interval: float) -> bool:
+    """
+    Sleep for `interval` seconds, waking early on shutdown.
+
+    Returns True when shutdown was signalled (the caller should exit its loop).
+    """
+    try:
+        await asyncio.wait_for(shutdown_event.wait(), timeout=interval)
+        return True
+    except asyncio.TimeoutError:
+        # Timeout means continue the loop (interval passed)
+        return False
+
+
 async def cleanup_expired_tokens_task(shutdown_event: asyncio.Event):
     """
     Background task to cleanup expired tokens periodically with graceful shutdown.
     Runs indefinitely until shutdown_event is set.
     """
     from app.core.auth import cleanup_expired_tokens
-    
+
     db = get_db()
-    
+
     while not shutdown_event.is_set():
         try:
             logger.debug("Running scheduled token cleanup...")
@@ -31,20 +46,182 @@ async def cleanup_expired_tokens_task(shutdown_event: asyncio.Event):
                 logger.debug("No expired tokens to clean up")
         except Exception as e:
             logger.error(f"Token cleanup task error: {str(e)}", exc_info=True)
-        
+
         # Run every N seconds, but allow graceful shutdown
+        if await _wait_for_shutdown(shutdown_event, settings.TOKEN_CLEANUP_INTERVAL_SECONDS):
+            break
+
+    logger.info("Cleanup task shutdown gracefully")
+
+
+async def refresh_popular_cities_task(shutdown_event: asyncio.Event):
+    """
+    Periodically refresh the popular_cities_mv materialised view and re-warm
+    this worker's cached copy, so the home page never pays for the aggregate.
+
+    The database also refreshes the view on every visibility-changing salon
+    write; this schedule is the backstop for other workers' caches.
+    """
+    from app.services.salon_service import SalonService
+
+    salon_service = SalonService(db_client=get_db())
+
+    while not shutdown_event.is_set():
         try:
-            await asyncio.wait_for(
-                shutdown_event.wait(),
-                timeout=settings.TOKEN_CLEANUP_INTERVAL_SECONDS
+            logger.debug("Refreshing popular cities...")
+            await salon_service.refresh_popular_cities()
+        except Exception as e:
+            logger.error(f"Popular cities refresh error: {str(e)}", exc_info=True)
+
+        if await _wait_for_shutdown(shutdown_event, settings.POPULAR_CITIES_REFRESH_INTERVAL_SECONDS):
+            break
+
+    logger.info("Popular cities refresh task shutdown gracefully")
+
+
+async def refresh_rm_leaderboard_task(shutdown_event: asyncio.Event):
+    """
+    Periodically refresh the rm_leaderboard_mv materialised view and re-warm
+    this worker's cached rankings.
+
+    Score changes refresh the view straight away; this schedule rolls the
+    week / month windows over and re-warms other workers' caches.
+    """
+    from app.services.rm_service import RMService
+
+    rm_service = RMService(db_client=get_db())
+
+    while not shutdown_event.is_set():
+        try:
+            logger.debug("Refreshing RM leaderboard...")
+            await rm_service.refresh_leaderboard()
+        except Exception as e:
+            logger.error(f"RM leaderboard refresh error: {str(e)}", exc_info=True)
+
+        if await _wait_for_shutdown(shutdown_event, settings.RM_LEADERBOARD_REFRESH_INTERVAL_SECONDS):
+            break
+
+    logger.info("RM leaderboard refresh task shutdown gracefully")
+
+
+async def refresh_analytics_rollups_task(shutdown_event: asyncio.Event):
+    """
+    Fold booking changes queued by the database into the daily analytics
+    rollups behind the time-series endpoints.
+
+    Every worker runs it; refresh_analytics_rollups() holds an advisory lock,
+    so overlapping runs skip instead of queueing up.
+    """
+    from app.services.analytics_service import AnalyticsService
+
+    analytics_service = AnalyticsService(db_client=get_db())
+
+    while not shutdown_event.is_set():
+        try:
+            rows = await analytics_service.refresh_rollups()
+            if rows > 0:
+                logger.debug(f"Refreshed {rows} analytics rollup rows")
+        except Exception as e:
+            logger.error(f"Analytics rollup refresh error: {str(e)}", exc_info=True)
+
+        if await _wait_for_shutdown(shutdown_event, settings.ANALYTICS_ROLLUP_REFRESH_INTERVAL_SECONDS):
+            break
+
+    logger.info("Analytics rollup refresh task shutdown gracefully")
+
+
+async def maintain_activity_logs_task(shutdown_event: asyncio.Event):
+    """
+    Keep activity_logs' monthly partitions ahead of the clock and archive the
+    ones past ACTIVITY_LOG_RETENTION_MONTHS (detached into the
+    activity_log_archive schema).
+
+    Every worker runs it; maintain_activity_log_partitions() holds an advisory
+    lock, so overlapping runs skip.
+    """
+    from app.services.activity_log_service import ActivityLogService
+
+    while not shutdown_event.is_set():
+        try:
+            archived = await ActivityLogService.maintain_partitions(
+                retain_months=settings.ACTIVITY_LOG_RETENTION_MONTHS
             )
-            # If we reach here, shutdown was signaled
+            if archived > 0:
+                logger.info(f"Archived {archived} activity log partition(s)")
+        except Exception as e:
+            logger.error(f"Activity log partition maintenance error: {str(e)}", exc_info=True)
+
+        if await _wait_for_shutdown(shutdown_event, settings.ACTIVITY_LOG_MAINTENANCE_INTERVAL_SECONDS):
             break
-        except asyncio.TimeoutError:
-            # Timeout means continue the loop (interval passed)
-            pass
-    
-    logger.info("Cleanup task shutdown gracefully")
+
+    logger.info("Activity log maintenance task shutdown gracefully")
+
+
+async def process_payment_webhooks_task(shutdown_event: asyncio.Event):
+    """
+    Drain the Razorpay webhook inbox (payment_webhook_events).
+
+    A full batch is followed straight away by the next claim so a burst is
+    cleared quickly; an empty or partial batch waits for the poll interval.
+    """
+    from app.services.payment_webhook_service import PaymentWebhookService
+
+    webhook_service = PaymentWebhookService(db_client=get_db())
+    batch_size = settings.PAYMENT_WEBHOOK_BATCH_SIZE
+
+    while not shutdown_event.is_set():
+        claimed = 0
+        try:
+            claimed = await webhook_service.process_pending(batch_size)
+            if claimed:
+                logger.info(f"Applied {claimed} Razorpay webhook events")
+        except Exception as e:
+            logger.error(f"Payment webhook worker error: {str(e)}", exc_info=True)
+
+        if claimed >= batch_size:
+            continue
+        if await _wait_for_shutdown(shutdown_event, settings.PAYMENT_WEBHOOK_POLL_INTERVAL_SECONDS):
+            break
+
+    logger.info("Payment webhook worker shutdown gracefully")
+
+
+def _seconds_until_hour_utc(hour: int) -> float:
+    """Seconds from now until the next HH:00 UTC."""
+    now = datetime.now(timezone.utc)
+    target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def reconcile_payments_task(shutdown_event: asyncio.Event):
+    """
+    Nightly reconciliation of pending / recent payments against Razorpay.
+
+    Every worker schedules it; PaymentReconciliationService.run_nightly lets
+    only the first one per UTC day actually run.
+    """
+    from app.services.payment_reconciliation_service import PaymentReconciliationService
+
+    db = get_db()
+
+    while not shutdown_event.is_set():
+        if await _wait_for_shutdown(
+            shutdown_event, _seconds_until_hour_utc(settings.PAYMENT_RECONCILIATION_HOUR_UTC)
+        ):
+            break
+        try:
+            service = await PaymentReconciliationService.from_config(
+                db,
+                concurrency=settings.PAYMENT_RECONCILIATION_CONCURRENCY,
+                rate_per_second=settings.PAYMENT_RECONCILIATION_RATE_PER_SECOND,
+            )
+            await service.run_nightly()
+        except Exception as e:
+            logger.error(f"Payment reconciliation error: {str(e)}", exc_info=True)
+
+    logger.info("Payment reconciliation task shutdown gracefully")
 
 
 @asynccontextmanager
@@ -55,31 +232,40 @@ async def lifespan(app):
     """
     # Create shutdown event for graceful task termination
     shutdown_event = asyncio.Event()
-    
+
     # Startup: Start background tasks
     logger.info("Starting background tasks")
-    cleanup_task = asyncio.create_task(cleanup_expired_tokens_task(shutdown_event))
+    tasks = [
+        asyncio.create_task(cleanup_expired_tokens_task(shutdown_event)),
+        asyncio.create_task(refresh_popular_cities_task(shutdown_event)),
+        asyncio.create_task(refresh_analytics_rollups_task(shutdown_event)),
+        asyncio.create_task(refresh_rm_leaderboard_task(shutdown_event)),
+        asyncio.create_task(maintain_activity_logs_task(shutdown_event)),
+        asyncio.create_task(process_payment_webhooks_task(shutdown_event)),
+    ]
+    if settings.PAYMENT_RECONCILIATION_ENABLED:
+        tasks.append(asyncio.create_task(reconcile_payments_task(shutdown_event)))
     logger.info("Background tasks started")
-    
+
     yield
-    
+
     # Shutdown: Signal tasks to stop gracefully
     logger.info("Shutting down background tasks...")
-    shutdown_event.set()  # Signal the task to stop
-    
+    shutdown_event.set()  # Signal the tasks to stop
+
     try:
-        # Wait for task to finish gracefully (with timeout)
+        # Wait for tasks to finish gracefully (with timeout)
         await asyncio.wait_for(
-            cleanup_task,
+            asyncio.gather(*tasks),
             timeout=settings.BACKGROUND_SHUTDOWN_TIMEOUT_SECONDS
         )
         logger.info("All background tasks stopped gracefully")
     except asyncio.TimeoutError:
-        logger.warning("Cleanup task didn't stop in time, forcing cancellation")
-        cleanup_task.cancel()
-        try:
-            await cleanup_task
-        except asyncio.CancelledError:
-            logger.info("Cleanup task force-cancelled")
+        logger.warning("Background tasks didn't stop in time, forcing cancellation")
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if any(isinstance(r, asyncio.CancelledError) for r in results):
+            logger.info("Background tasks force-cancelled")
     except Exception as e:
         logger.error(f"Error during task shutdown: {e}", exc_info=True)
@@ -79,7 +79,7 @@ from .response.auth import (
 from .response.vendor import (
     VendorJoinRequestResponse, SalonResponse, SalonListResponse,
     ServiceCategoryResponse, ServiceResponse, SalonPromoResponse,
-    CompleteRegistrationResponse, VendorAnalyticsResponse,
+    CompleteRegistrationResponse, VendorAnalyticsResponse, VendorAnalyticsPeriod,
     PublicSalonsResponse, SalonDetailResponse, AvailableSlotsResponse,
     SearchSalonsResponse, SalonServicesResponse,
     PublicConfigResponse, ImageUploadResponse
@@ -101,6 +101,9 @@ from .response.admin import (
 from .response.location import (
     GeocodeResponse, NearbySalonsResponse
 )
+from .response.analytics import (
+    AnalyticsBucket, AnalyticsTimeseriesResponse
+)
 from .response.city import (
     PopularCityResponse, PopularCitiesResponse
 )
@@ -129,7 +132,7 @@ from .response.customer import (
 from .response.rm import (
     VendorRequestOperationResponse, VendorRequestsListResponse,
     RMSalonsListResponse, RMProfileUpdateResponse, RMDashboardStatistics,
-    RMDashboardResponse, RMLeaderboardResponse
+    RMDashboardResponse, RMLeaderboardEntry, RMLeaderboardResponse
 )
 
 # Public schema surface. This package is an intentional aggregator: every name
@@ -168,7 +171,7 @@ __all__ = [
     "PhoneVerificationSendOTPResponse", "PhoneVerificationConfirmResponse",
     "VendorJoinRequestResponse", "SalonResponse", "SalonListResponse",
     "ServiceCategoryResponse", "ServiceResponse", "SalonPromoResponse",
-    "CompleteRegistrationResponse", "VendorAnalyticsResponse",
+    "CompleteRegistrationResponse", "VendorAnalyticsResponse", "VendorAnalyticsPeriod",
     "PublicSalonsResponse", "SalonDetailResponse", "AvailableSlotsResponse",
     "NearbySalonsResponse", "SearchSalonsResponse", "SalonServicesResponse",
     "PublicConfigResponse", "ImageUploadResponse",
@@ -179,6 +182,7 @@ __all__ = [
     "AvailableCouponResponse",
     "SystemConfigResponse", "SystemConfigListResponse",
     "GeocodeResponse",
+    "AnalyticsBucket", "AnalyticsTimeseriesResponse",
     "PopularCityResponse", "PopularCitiesResponse",
     "CareerApplicationResponse",
     "PartnerRequestResponse", "PartnerRequestUpdateResponse",
@@ -192,6 +196,6 @@ __all__ = [
     "ReviewFeedbackContextResponse", "PublicSalonReviewsResponse",
     "VendorRequestOperationResponse", "VendorRequestsListResponse",
     "RMSalonsListResponse", "RMProfileUpdateResponse", "RMDashboardStatistics",
-    "RMDashboardResponse", "RMLeaderboardResponse",
+    "RMDashboardResponse", "RMLeaderboardEntry", "RMLeaderboardResponse",
 ]
 
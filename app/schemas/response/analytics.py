@@ -0,0 +1,38 @@
+"""
+Response schemas for time-series analytics endpoints
+"""
+
+from datetime import date
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class AnalyticsBucket(BaseModel):
+    """One day / week / month of booking analytics"""
+    bucket_start: date = Field(..., description="First day of the bucket (weeks start on Monday)")
+    bookings: int = Field(0, description="Bookings with a booking_date in the bucket")
+    cancellations: int = Field(0, description="Of those, cancelled")
+    revenue: float = Field(0.0, description="Total amount of those completed")
+    new_customers: int = Field(0, description="Customers whose first booking falls in the bucket")
+
+
+class AnalyticsTimeseriesResponse(BaseModel):
+    """Response for the analytics time-series endpoints"""
+    granularity: Literal["day", "week", "month"]
+    date_from: date
+    date_to: date
+    buckets: List[AnalyticsBucket] = Field(..., description="Every bucket in the range, oldest first")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "granularity": "week",
+                "date_from": "2026-09-07",
+                "date_to": "2026-10-18",
+                "buckets": [
+                    {"bucket_start": "2026-09-07", "bookings": 42, "cancellations": 3,
+                     "revenue": 18450.0, "new_customers": 11}
+                ]
+            }
+        }
@@ -3,17 +3,19 @@ Response schemas for location/city-related endpoints
 """
 
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 
 class PopularCityResponse(BaseModel):
     """Single city with salon count"""
-    city: str = Field(..., description="City name (normalized to Title Case)")
+    city_id: Optional[int] = Field(None, description="Canonical city id (cities.id)")
+    city: str = Field(..., description="Canonical city name")
     salon_count: int = Field(..., description="Number of salons in this city")
 
     class Config:
         json_schema_extra = {
             "example": {
+                "city_id": 1,
                 "city": "Mumbai",
                 "salon_count": 124
             }
@@ -29,9 +31,9 @@ class PopularCitiesResponse(BaseModel):
         json_schema_extra = {
             "example": {
                 "cities": [
-                    {"city": "Mumbai", "salon_count": 124},
-                    {"city": "Delhi", "salon_count": 98},
-                    {"city": "Bangalore", "salon_count": 87}
+                    {"city_id": 1, "city": "Mumbai", "salon_count": 124},
+                    {"city_id": 14, "city": "Delhi", "salon_count": 98},
+                    {"city_id": 2, "city": "Bengaluru", "salon_count": 87}
                 ],
                 "total": 3
             }
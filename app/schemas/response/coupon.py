@@ -71,3 +71,5 @@ class AvailableCouponResponse(BaseModel):
     valid_until: Optional[datetime] = None
     summary: str                           # headline label, e.g. "10% OFF up to ₹100"
     subtitle: Optional[str] = None         # eligibility condition, e.g. "On orders above ₹499"
+    estimated_savings: Optional[float] = None             # vs. no coupon, for the current cart
+    breakdown: Optional[CouponDiscountBreakdown] = None   # cart priced with this coupon
@@ -59,6 +59,7 @@ class CartOperationResponse(BaseModel):
     success: bool
     message: str
     cart_item: Optional[Dict[str, Any]] = None  # Changed from 'cart' to 'cart_item'
+    cart: Optional[CartResponse] = None  # Whole cart after the operation
 
     class Config:
         from_attributes = True
@@ -69,6 +70,7 @@ class CartClearResponse(BaseModel):
     success: bool
     message: str
     deleted_count: int
+    cart: Optional[CartResponse] = None
 
     class Config:
         from_attributes = True
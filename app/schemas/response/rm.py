@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 from .common import SuccessResponse
@@ -64,7 +64,16 @@ class RMDashboardResponse(BaseModel):
 # LEADERBOARD
 # =====================================================
 
+class RMLeaderboardEntry(BaseModel):
+    """One RM's position on the leaderboard (public: name only, no contact details)"""
+    rank: int = Field(..., description="1-based position")
+    rm_id: str = Field(..., description="RM profile ID")
+    full_name: Optional[str] = Field(None, description="RM display name")
+    score: int = Field(..., description="Points in the period")
+    period: Literal["week", "month", "all_time"] = Field(..., description="Ranking period")
+
+
 class RMLeaderboardResponse(SuccessResponse):
     """Response for RM leaderboard"""
-    data: List[Dict[str, Any]] = Field(..., description="List of top RMs with rankings")
+    data: List[RMLeaderboardEntry] = Field(..., description="List of top RMs with rankings")
     total: int = Field(..., description="Total number of RMs in leaderboard")
@@ -4,7 +4,7 @@ All vendor response models should be defined here for consistency
 """
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, Dict, Any, List
-from datetime import datetime, time
+from datetime import date, datetime, time
 from ..domain.common import BusinessType, RequestStatus
 from .coupon import AvailableCouponResponse
 
@@ -217,6 +217,21 @@ class SalonPromoResponse(BaseModel):
 # DASHBOARD RESPONSE SCHEMAS
 # =====================================================
 
+class VendorAnalyticsPeriod(BaseModel):
+    """Date-range breakdown of vendor analytics (bookings by booking_date)"""
+    date_from: date
+    date_to: date
+    bookings: int = 0
+    pending_bookings: int = 0
+    confirmed_bookings: int = 0
+    completed_bookings: int = 0
+    cancelled_bookings: int = 0
+    no_show_bookings: int = 0
+    revenue: float = 0.0
+    product_orders: int = 0
+    product_spending: float = 0.0
+
+
 class VendorAnalyticsResponse(BaseModel):
     """Response for vendor analytics endpoint"""
     total_bookings: int
@@ -228,6 +243,7 @@ class VendorAnalyticsResponse(BaseModel):
     total_product_orders: int = 0
     pending_product_orders: int = 0
     total_product_spending: float = 0.0
+    period: Optional[VendorAnalyticsPeriod] = None
 
     class Config:
         extra = "allow"
@@ -3,12 +3,16 @@ Activity Log Service - Track critical admin actions and system events
 Simple implementation for audit trail on dashboard
 """
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import HTTPException, status
 from app.core.database import get_db
+from app.utils.keyset import keyset_page
+from app.utils.rpc import rpc_result
 
 logger = logging.getLogger(__name__)
 
 # Auth login events are excluded from the admin dashboard feed (too noisy).
+# Keep in step with the predicate of idx_activity_logs_feed, which serves it.
 DASHBOARD_EXCLUDED_ACTIONS = ("phone_login", "email_login")
 
 
@@ -65,16 +69,21 @@ class ActivityLogService:
     async def get_recent(
         limit: int = 10,
         exclude_actions: Optional[tuple] = None,
-    ) -> List[Dict[str, Any]]:
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Get recent activity logs
+        Get recent activity logs, newest first, one cursor page at a time
         
         Args:
             limit: Number of recent logs to fetch
             exclude_actions: Action names to omit (e.g. login noise on dashboard)
+            cursor: next_cursor of the previous page
             
         Returns:
-            List of activity log entries with user details
+            (activity log entries with user details, next page cursor or None)
+
+        Raises:
+            HTTPException: 400 if the cursor is invalid
         """
         try:
             db = get_db()
@@ -84,20 +93,21 @@ class ActivityLogService:
             )
             if exclude_actions:
                 query = query.not_.in_("action", list(exclude_actions))
-            response = query.order("created_at", desc=True).limit(limit).execute()
-            
-            return response.data or []
+            return keyset_page(query, limit, cursor)
             
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
         except Exception as e:
             logger.error(f"Failed to fetch activity logs: {str(e)}")
-            return []
+            return [], None
     
     @staticmethod
     async def get_by_entity(
         entity_type: str,
         entity_id: str,
-        limit: int = 20
-    ) -> List[Dict[str, Any]]:
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
         Get activity logs for a specific entity (e.g., all actions on a salon)
         
@@ -105,24 +115,43 @@ class ActivityLogService:
             entity_type: Type of entity
             entity_id: ID of entity
             limit: Max number of logs
+            cursor: next_cursor of the previous page
             
         Returns:
-            List of activity logs
+            (activity logs, next page cursor or None)
+
+        Raises:
+            HTTPException: 400 if the cursor is invalid
         """
         try:
             db = get_db()
             
-            response = db.table("activity_logs").select(
+            query = db.table("activity_logs").select(
                 "*, profiles(full_name, email)"
-            ).eq("entity_type", entity_type).eq(
-                "entity_id", entity_id
-            ).order("created_at", desc=True).limit(limit).execute()
-            
-            return response.data or []
+            ).eq("entity_type", entity_type).eq("entity_id", entity_id)
+            return keyset_page(query, limit, cursor)
             
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
         except Exception as e:
             logger.error(f"Failed to fetch entity activity logs: {str(e)}")
-            return []
+            return [], None
+
+    @staticmethod
+    async def maintain_partitions(months_ahead: int = 3, retain_months: int = 12) -> int:
+        """
+        Create the coming months' activity_logs partitions and archive the
+        ones older than ``retain_months``.
+
+        Returns the number of partitions archived, or -1 when another
+        worker's run was already in progress.
+        """
+        db = get_db()
+        response = db.rpc("maintain_activity_log_partitions", {
+            "p_months_ahead": months_ahead,
+            "p_retain_months": retain_months,
+        }).execute()
+        return int(rpc_result(response) or 0)
 
 
 # Convenience functions for common actions
@@ -3,11 +3,26 @@ Admin Service
 Handles admin-specific operations including dashboard statistics and vendor request management
 """
 from typing import List, Optional, Dict, Any
-from datetime import date, datetime
 import logging
 
+from app.core.cache import StaleWhileRevalidateCache
+from app.utils.rpc import rpc_result
+
 logger = logging.getLogger(__name__)
 
+# Dashboard counters are fine a little behind. Past the TTL the last value is
+# served while one background refresh runs; past MAX_STALE it loads inline.
+DASHBOARD_STATS_TTL_SECONDS = 30
+DASHBOARD_STATS_MAX_STALE_SECONDS = 300
+_DASHBOARD_STATS_CACHE = StaleWhileRevalidateCache(
+    ttl_seconds=DASHBOARD_STATS_TTL_SECONDS,
+    max_stale_seconds=DASHBOARD_STATS_MAX_STALE_SECONDS,
+)
+
+
+def invalidate_dashboard_stats_cache() -> None:
+    """Drop the cached admin dashboard statistics. Called after vendor reviews and salon status changes."""
+    _DASHBOARD_STATS_CACHE.clear()
 
 
 class DashboardStats:
@@ -62,138 +77,41 @@ class AdminService:
     async def get_dashboard_stats(self) -> DashboardStats:
         """
         Get comprehensive admin dashboard statistics
-        
+
+        Every counter and both revenue figures come from one
+        admin_dashboard_stats() call, cached per process for
+        DASHBOARD_STATS_TTL_SECONDS and served stale while it refreshes.
+
         Returns:
             DashboardStats: Complete dashboard statistics
-            
+
         Raises:
             Exception: If database queries fail
         """
         try:
-            stats = DashboardStats()
-            
-            # Count pending vendor requests
-            pending_requests_response = self.db.table("vendor_join_requests").select(
-                "id", count="exact"
-            ).eq("status", "pending").execute()
-            stats.pending_requests = pending_requests_response.count if pending_requests_response.count is not None else 0
-            
-            # Count total salons
-            total_salons_response = self.db.table("salons").select(
-                "id", count="exact"
-            ).execute()
-            stats.total_salons = total_salons_response.count if total_salons_response.count is not None else 0
-            
-            # Count active salons (is_active = true)
-            active_salons_response = self.db.table("salons").select(
-                "id", count="exact"
-            ).eq("is_active", True).execute()
-            stats.active_salons = active_salons_response.count if active_salons_response.count is not None else 0
-            
-            # Count salons with pending payment (registration_fee_paid = false)
-            pending_payment_response = self.db.table("salons").select(
-                "id", count="exact"
-            ).eq("registration_fee_paid", False).execute()
-            stats.pending_payment_salons = pending_payment_response.count if pending_payment_response.count is not None else 0
-            
-            # Count total active RMs from profiles table
-            total_rms_response = self.db.table("profiles").select(
-                "id", count="exact"
-            ).eq("user_role", "relationship_manager").eq("is_active", True).execute()
-            stats.total_rms = total_rms_response.count if total_rms_response.count is not None else 0
-            
-            # Count total bookings
-            total_bookings_response = self.db.table("bookings").select(
-                "id", count="exact"
-            ).execute()
-            stats.total_bookings = total_bookings_response.count if total_bookings_response.count is not None else 0
-            
-            # Count today's bookings
-            today = date.today().isoformat()
-            today_bookings_response = self.db.table("bookings").select(
-                "id", count="exact"
-            ).gte("booking_date", today).lte("booking_date", today).execute()
-            stats.today_bookings = today_bookings_response.count if today_bookings_response.count is not None else 0
-            
-            # Calculate revenue
-            revenue_stats = await self._calculate_revenue()
-            stats.total_revenue = revenue_stats["total"]
-            stats.this_month_revenue = revenue_stats["this_month"]
-            
-            logger.info(f"Dashboard stats calculated: {stats.total_salons} salons, {stats.total_rms} RMs, {stats.total_bookings} bookings")
-            
-            return stats
-            
+            return await _DASHBOARD_STATS_CACHE.get(self._load_dashboard_stats)
         except Exception as e:
             logger.error(f"Failed to calculate dashboard stats: {str(e)}")
             raise Exception(f"Failed to fetch dashboard stats: {str(e)}")
-    
-    async def _calculate_revenue(self) -> Dict[str, float]:
-        """
-        Calculate total and monthly revenue from completed payments.
-        
-        Sources:
-        - 'payments' table: booking convenience fees (status = 'success')
-        - 'vendor_registration_payments' table: registration fees (status = 'success')
-        
-        Returns:
-            Dict with 'total' and 'this_month' revenue amounts
-        """
-        total_revenue = 0.0
-        this_month_revenue = 0.0
-        
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-
-        def _add_payments(records):
-            nonlocal total_revenue, this_month_revenue
-            for payment in records:
-                amount = float(payment.get("amount", 0))
-                total_revenue += amount
-                
-                # Check if payment is from current month
-                created_at = payment.get("created_at") or payment.get("payment_completed_at")
-                if created_at:
-                    try:
-                        payment_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        if payment_date.month == current_month and payment_date.year == current_year:
-                            this_month_revenue += amount
-                    except (ValueError, AttributeError):
-                        logger.warning(f"Invalid payment date format: {created_at}")
-        
-        try:
-            # 1. Booking convenience fee payments (status = 'success')
-            payments_response = self.db.table("payments").select(
-                "amount, created_at"
-            ).eq("status", "success").execute()
-            
-            if payments_response.data:
-                _add_payments(payments_response.data)
-        
-        except Exception as rev_error:
-            logger.error(f"Failed to calculate booking payments revenue: {str(rev_error)}")
 
-        try:
-            # 2. Vendor registration fee payments (status = 'success')
-            reg_payments_response = self.db.table("vendor_registration_payments").select(
-                "amount, payment_completed_at"
-            ).eq("status", "success").execute()
-            
-            if reg_payments_response.data:
-                # Map payment_completed_at -> created_at for uniform processing
-                for p in reg_payments_response.data:
-                    p["created_at"] = p.get("payment_completed_at")
-                _add_payments(reg_payments_response.data)
-
-        except Exception as reg_error:
-            logger.error(f"Failed to calculate registration payments revenue: {str(reg_error)}")
-        
-        logger.info(f"Revenue calculated: total={total_revenue}, this_month={this_month_revenue}")
-        return {
-            "total": total_revenue,
-            "this_month": this_month_revenue
-        }
-    
+    async def _load_dashboard_stats(self) -> DashboardStats:
+        response = self.db.rpc("admin_dashboard_stats", {}).execute()
+        row = rpc_result(response) or {}
+
+        stats = DashboardStats(
+            pending_requests=row.get("pending_requests") or 0,
+            total_salons=row.get("total_salons") or 0,
+            active_salons=row.get("active_salons") or 0,
+            pending_payment_salons=row.get("pending_payment_salons") or 0,
+            total_rms=row.get("total_rms") or 0,
+            total_bookings=row.get("total_bookings") or 0,
+            today_bookings=row.get("today_bookings") or 0,
+            total_revenue=float(row.get("total_revenue") or 0),
+            this_month_revenue=float(row.get("this_month_revenue") or 0),
+        )
+        logger.info(f"Dashboard stats calculated: {stats.total_salons} salons, {stats.total_rms} RMs, {stats.total_bookings} bookings")
+        return stats
+
     # =====================================================
     # VENDOR REQUEST MANAGEMENT
     # =====================================================
@@ -0,0 +1,126 @@
+"""
+Time-series analytics for the admin and vendor dashboards.
+
+Charts are read from ``analytics_daily_rollups`` through
+``analytics_timeseries()``, which folds the per-day rows of one scope
+(``platform`` or ``salon:<id>``) into day / week / month buckets and fills
+gaps with zeros - never from raw bookings.
+
+The rollups are kept current by ``refresh_rollups``, run on a schedule by
+app.core.tasks: a trigger queues every changed booking and the refresh
+recomputes only the days those changes touch.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.utils.rpc import rpc_result
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_GRANULARITIES = ("day", "week", "month")
+
+# Window used when the caller gives no start date (ending at date_to).
+_DEFAULT_SPAN_DAYS = {"day": 29, "week": 7 * 12 - 1, "month": 365}
+
+# Longest range per granularity, so a chart read stays a few hundred rows.
+_MAX_SPAN_DAYS = {"day": 366, "week": 7 * 156, "month": 366 * 10}
+
+
+def salon_scope(salon_id: str) -> str:
+    """Rollup scope key for one salon (matches the SQL side)."""
+    return f"salon:{salon_id}"
+
+
+PLATFORM_SCOPE = "platform"
+
+
+class AnalyticsService:
+    """Read and maintain the booking analytics rollups."""
+
+    def __init__(self, db_client):
+        self.db = db_client
+
+    async def get_timeseries(
+        self,
+        scope: str,
+        granularity: str = "day",
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Bucketed bookings, cancellations, revenue and new customers for a scope.
+
+        Args:
+            scope: PLATFORM_SCOPE or salon_scope(salon_id)
+            granularity: day, week or month
+            date_from: First booking day included (default: a window ending at date_to)
+            date_to: Last booking day included (default: today)
+
+        Returns:
+            granularity, the resolved range and one bucket per period, oldest first
+
+        Raises:
+            HTTPException: 400 on an unknown granularity or an invalid / too long
+                range, 500 if the query fails
+        """
+        if granularity not in ANALYTICS_GRANULARITIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"granularity must be one of: {', '.join(ANALYTICS_GRANULARITIES)}"
+            )
+
+        date_to = date_to or date.today()
+        date_from = date_from or date_to - timedelta(days=_DEFAULT_SPAN_DAYS[granularity])
+        if date_from > date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must be on or before date_to"
+            )
+        if (date_to - date_from).days > _MAX_SPAN_DAYS[granularity]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range too long for {granularity} buckets"
+            )
+
+        try:
+            response = self.db.rpc("analytics_timeseries", {
+                "p_scope": scope,
+                "p_granularity": granularity,
+                "p_from": date_from.isoformat(),
+                "p_to": date_to.isoformat(),
+            }).execute()
+        except Exception as e:
+            logger.error(f"Failed to fetch analytics timeseries for {scope}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch analytics"
+            )
+
+        return {
+            "granularity": granularity,
+            "date_from": date_from,
+            "date_to": date_to,
+            "buckets": [
+                {
+                    "bucket_start": row["bucket_start"],
+                    "bookings": row.get("bookings") or 0,
+                    "cancellations": row.get("cancellations") or 0,
+                    "revenue": float(row.get("revenue") or 0),
+                    "new_customers": row.get("new_customers") or 0,
+                }
+                for row in response.data or []
+            ],
+        }
+
+    async def refresh_rollups(self) -> int:
+        """
+        Fold queued booking changes into the rollups.
+
+        Returns the number of rollup rows rewritten, or -1 when another
+        worker's refresh was already running.
+        """
+        response = self.db.rpc("refresh_analytics_rollups", {}).execute()
+        return int(rpc_result(response) or 0)
@@ -13,6 +13,7 @@ import httpx
 from app.core.auth import create_access_token, create_refresh_token, revoke_token, verify_refresh_token
 from app.core.config import settings
 from app.services.activity_log_service import ActivityLogService
+from app.services.profile_lookup import invalidate_profile_lookup
 
 logger = logging.getLogger(__name__)
 
@@ -932,6 +933,7 @@ class AuthService:
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to update profile"
                 )
+            invalidate_profile_lookup(user_id)
             
             profile = response.data[0]
             # Add 'role' field for frontend backward compatibility
@@ -1359,6 +1361,7 @@ class AuthService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Could not delete your account. Please contact support@lubist.com."
             )
+        invalidate_profile_lookup(user_id)
 
         # 5. Kill the credentials and free the email/phone for reuse. The auth row
         #    itself must stay because profiles.id -> auth.users.id CASCADEs.
@@ -1873,6 +1876,7 @@ class AuthService:
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to update phone number"
                 )
+            invalidate_profile_lookup(user_id)
 
             profile = update_response.data[0]
 
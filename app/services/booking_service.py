@@ -3,8 +3,7 @@ Booking Service - Business Logic Layer
 Handles booking CRUD, cancellations, completions, and email notifications
 """
 import logging
-import random
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 from datetime import datetime, date
 from fastapi import HTTPException, status
 
@@ -14,9 +13,21 @@ from app.schemas import BookingCreate
 from app.services.email import email_service
 from app.services.activity_log_service import ActivityLogService
 from app.services.pricing_service import PricingService, LineItem
+from app.services.profile_lookup import ProfileLookup
+from app.utils.export import EXPORT_PAGE_SIZE
+from app.utils.keyset import iter_keyset_pages
 
 logger = logging.getLogger(__name__)
 
+# Fields of GET /admin/bookings/export, in CSV column order
+ADMIN_BOOKING_EXPORT_COLUMNS = (
+    "id", "booking_number", "booking_date", "time_slots", "status",
+    "customer_id", "customer_name", "customer_email", "customer_phone",
+    "salon_id", "salon_name", "salon_city", "services",
+    "service_price", "discount_amount", "convenience_fee", "total_amount",
+    "coupon_code", "is_convenience_fee_paid", "is_service_paid", "created_at",
+)
+
 
 class BookingService:
     """
@@ -132,6 +143,44 @@ class BookingService:
                 detail="Failed to fetch bookings"
             )
     
+    def iter_admin_booking_export(
+        self,
+        status_filter: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        page_size: int = EXPORT_PAGE_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield every booking matching the admin filters, a page at a time,
+        oldest first (keyset on created_at, id), flattened to
+        ADMIN_BOOKING_EXPORT_COLUMNS.
+
+        Synchronous on purpose: the export response iterates it in a worker
+        thread while streaming.
+        """
+        view_columns = ", ".join(
+            c for c in ADMIN_BOOKING_EXPORT_COLUMNS if c not in ("salon_name", "salon_city")
+        )
+
+        def build_query():
+            query = self.db.from_("bookings_with_payments").select(
+                f"{view_columns}, salons(business_name, city)"
+            )
+            if status_filter:
+                query = query.eq("status", status_filter)
+            if date_from:
+                query = query.gte("booking_date", date_from.isoformat())
+            if date_to:
+                query = query.lte("booking_date", date_to.isoformat())
+            return query
+
+        for page in iter_keyset_pages(build_query, page_size):
+            for booking in page:
+                salon = booking.pop("salons", None) or {}
+                booking["salon_name"] = salon.get("business_name")
+                booking["salon_city"] = salon.get("city")
+            yield page
+
     # =====================================================
     # BOOKING CREATION
     # =====================================================
@@ -302,9 +351,6 @@ class BookingService:
                 "total_amount": pricing["total_amount"],
             }
 
-            # Generate unique booking number
-            booking_number = self._generate_booking_number()
-
             # Prepare services jsonb data
             services_jsonb = []
             for svc in processed_services:
@@ -331,8 +377,9 @@ class BookingService:
                 raise ValidationError("Maximum 3 time slots allowed", "time_slots")
 
             # Prepare database data (customer info fetched via JOIN, not stored redundantly)
+            # booking_number is left unset: the set_booking_number trigger
+            # assigns it from booking_number_seq (unique, creation-ordered).
             db_booking_data = {
-                "booking_number": booking_number,
                 "customer_id": current_user_id,
                 "salon_id": booking.salon_id,
                 "services": services_jsonb,
@@ -369,6 +416,7 @@ class BookingService:
             
             # Create payment records in new unified payments table
             booking_id = created_booking["id"]
+            booking_number = created_booking.get("booking_number")
 
             # Record coupon redemption atomically (enforces usage limits). Only
             # redeem once the booking is paid — an unpaid/pending booking must not
@@ -575,10 +623,7 @@ class BookingService:
 
             # Load related profile and salon for notification emails
             try:
-                profile_response = self.db.table("profiles").select(
-                    "email, full_name, phone"
-                ).eq("id", booking_data["customer_id"]).single().execute()
-                booking_data["profiles"] = profile_response.data or {}
+                booking_data["profiles"] = ProfileLookup(self.db).get(booking_data["customer_id"]) or {}
             except Exception as profile_error:
                 logger.warning(f"Could not load customer profile for booking {booking_id}: {profile_error}")
                 booking_data["profiles"] = {}
@@ -662,20 +707,18 @@ class BookingService:
     
     async def _get_customer_profile(self, user_id: str) -> Dict[str, Any]:
         """Get customer profile data."""
-        response = self.db.table("profiles").select("email, full_name, phone").eq(
-            "id", user_id
-        ).single().execute()
+        profile = ProfileLookup(self.db).get(user_id)
         
-        if not response.data:
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Customer profile not found"
             )
         
         return {
-            "full_name": response.data.get("full_name", "Customer"),
-            "email": response.data.get("email", ""),
-            "phone": response.data.get("phone", "")
+            "full_name": profile.get("full_name", "Customer"),
+            "email": profile.get("email", ""),
+            "phone": profile.get("phone", "")
         }
 
     async def _send_review_request_email(self, booking_id: str) -> None:
@@ -757,12 +800,9 @@ class BookingService:
             vendor_email = None
             if salon.get("vendor_id"):
                 try:
-                    vendor_response = self.db.table("profiles").select(
-                        "email"
-                    ).eq("id", salon["vendor_id"]).execute()
-                    
-                    if vendor_response.data and len(vendor_response.data) > 0:
-                        vendor_email = vendor_response.data[0].get("email")
+                    vendor = ProfileLookup(self.db).get(salon["vendor_id"])
+                    if vendor:
+                        vendor_email = vendor.get("email")
                 except Exception as vendor_error:
                     logger.warning(f"Could not fetch vendor email for salon {salon_id}: {vendor_error}")
             
@@ -812,12 +852,6 @@ class BookingService:
         
         return services_lookup
     
-    def _generate_booking_number(self) -> str:
-        """Generate unique booking number."""
-        date_part = datetime.now().strftime('%Y%m%d')
-        random_part = random.randint(1000, 9999)
-        return f"BK{date_part}{random_part}"
-    
     def _extract_booking_services(self, booking_data: Dict[str, Any]) -> tuple[str, List[Dict[str, Any]]]:
         """Extract service summary from booking JSONB services field."""
         services = booking_data.get("services") or []
@@ -891,9 +925,9 @@ class BookingService:
         vendor_id = salon.get("vendor_id")
         if vendor_id:
             try:
-                vendor_response = self.db.table("profiles").select("email").eq("id", vendor_id).execute()
-                if vendor_response.data:
-                    vendor_email = vendor_response.data[0].get("email")
+                vendor = ProfileLookup(self.db).get(vendor_id)
+                if vendor:
+                    vendor_email = vendor.get("email")
             except Exception as vendor_error:
                 logger.warning(f"Could not fetch vendor email for booking {booking_id}: {vendor_error}")
 
@@ -0,0 +1,89 @@
+"""
+Canonical city resolution.
+
+Salons carry an integer ``city_id`` pointing at the ``cities`` table, resolved
+by a database trigger from whatever free-text city was written (see the
+20261018000003_create_cities migration). ``city_aliases`` maps every known
+normalised spelling — including historic names like "bombay" or "bangalore" —
+to its city.
+
+This module keeps that alias map in memory so a city filter turns "  MUMBAI",
+"mumbai" or "Bombay" into one integer key without a round-trip. The map only
+grows when a salon is saved with a city nobody has used before; a miss falls
+back to a single point lookup, so a stale map is never wrong, only one query
+slower.
+"""
+import logging
+from typing import Dict, Optional, Set
+
+from app.core.cache import TTLCache
+from app.utils.location_text import city_key
+
+logger = logging.getLogger(__name__)
+
+# Aliases are written roughly never (new city on salon approval), so an hour
+# is plenty; misses are resolved individually in the meantime.
+_CITY_ALIAS_CACHE = TTLCache(ttl_seconds=3600)
+
+# Misses come from unauthenticated ?city= values, so remembering them is
+# capped: past this many, further unknown keys are just looked up each time
+# instead of growing the set without limit.
+MAX_CACHED_CITY_MISSES = 1024
+
+
+class _AliasIndex:
+    """alias_key -> city_id, plus keys already confirmed unknown."""
+
+    def __init__(self, aliases: Dict[str, int]):
+        self.aliases = aliases
+        self.missing: Set[str] = set()
+
+
+def invalidate_city_cache() -> None:
+    """Drop the cached alias map (e.g. after merging two cities)."""
+    _CITY_ALIAS_CACHE.clear()
+
+
+class CityResolver:
+    """Resolve free-text city names to canonical ``cities.id`` values."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def _index(self) -> _AliasIndex:
+        def _load() -> _AliasIndex:
+            response = self.db.table("city_aliases").select("alias_key, city_id").execute()
+            aliases = {row["alias_key"]: row["city_id"] for row in (response.data or [])}
+            logger.info(f"Loaded {len(aliases)} city aliases")
+            return _AliasIndex(aliases)
+
+        return _CITY_ALIAS_CACHE.get(_load)
+
+    def resolve(self, city: Optional[str]) -> Optional[int]:
+        """
+        Return the city_id for a typed city name, or None when no salon has
+        ever been saved with that spelling.
+        """
+        key = city_key(city)
+        if not key:
+            return None
+
+        index = self._index()
+        city_id = index.aliases.get(key)
+        if city_id is not None or key in index.missing:
+            return city_id
+
+        # Not in the loaded map: the city may have been created since.
+        response = (
+            self.db.table("city_aliases")
+            .select("city_id")
+            .eq("alias_key", key)
+            .limit(1)
+            .execute()
+        )
+        if response.data:
+            city_id = response.data[0]["city_id"]
+            index.aliases[key] = city_id
+        elif len(index.missing) < MAX_CACHED_CITY_MISSES:
+            index.missing.add(key)
+        return city_id
@@ -6,6 +6,7 @@ from typing import List, Dict, Any, Optional
 from app.schemas.request.admin import SystemConfigUpdate
 from app.core.encryption import get_encryption_service
 from app.core.config import settings
+from app.services.payment import RAZORPAY_CONFIG_KEYS, invalidate_razorpay_gateway
 import logging
 
 logger = logging.getLogger(__name__)
@@ -67,6 +68,12 @@ AVAILABLE_SYSTEM_CONFIGS = [
         "label": "Razorpay Key Secret",
         "config_type": "string",
         "description": "Private Key Secret for Razorpay signature verification. Protected and encrypted."
+    },
+    {
+        "config_key": "razorpay_webhook_secret",
+        "label": "Razorpay Webhook Secret",
+        "config_type": "string",
+        "description": "Secret set on the Razorpay webhook; used to verify events posted to /payments/webhook. Protected and encrypted."
     }
 ]
 
@@ -77,6 +84,12 @@ class ConfigService:
     def __init__(self, db_client):
         self.db = db_client
     
+    @staticmethod
+    def _invalidate_dependents(config_key: str) -> None:
+        """Drop in-process state built from a config that just changed."""
+        if config_key in RAZORPAY_CONFIG_KEYS:
+            invalidate_razorpay_gateway()
+
     # =====================================================
     # CONFIGURATION CRUD OPERATIONS
     # =====================================================
@@ -250,6 +263,7 @@ class ConfigService:
                 except Exception as e:
                     logger.error(f"Failed to decrypt response for {config_key}: {e}")
             
+            self._invalidate_dependents(config_key)
             logger.info(f"Updated configuration: {config_key}")
             
             return updated_config
@@ -333,6 +347,7 @@ class ConfigService:
                 except Exception:
                     logger.debug(f"Failed to decrypt created config {config_key}")
 
+            self._invalidate_dependents(config_key)
             logger.info(f"Created new configuration: {config_key}")
 
             return created_config
@@ -368,6 +383,7 @@ class ConfigService:
             
             # Delete config
             self.db.table("system_config").delete().eq("config_key", config_key).execute()
+            self._invalidate_dependents(config_key)
             
             logger.info(f"Deleted configuration: {config_key}")
             
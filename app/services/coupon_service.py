@@ -3,19 +3,26 @@ Coupon Service - Business Logic Layer
 
 Owns coupon lifecycle and validation:
 - Admin / vendor CRUD for coupons
-- Eligibility validation against a cart (scope, window, min-order, first-time, limits)
+- Eligibility validation against a cart (scope, window, min-order, first-time, limits),
+  one code via the check_coupon_eligibility() Postgres function or many at once
+  via check_coupons()
 - Atomic redemption via the redeem_coupon() Postgres function
 
 Pricing math (best-of vs salon sale, fee waivers) lives in PricingService, which
 calls get_valid_coupon() here. Keeping the two separate mirrors the existing
 service-layer split (e.g. PaymentService vs BookingService).
 """
+from bisect import bisect_left
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 import logging
 
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
+from app.core.request_scope import request_memo
+from app.utils.rpc import rpc_result
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,12 +57,92 @@ _REASON_MESSAGES = {
 }
 
 
+# Request memo (app.core.request_scope) of get_valid_coupon results, keyed by
+# (code, salon, customer, subtotal), so one checkout flow never validates the
+# same code for the same cart twice.
+_COUPON_CHECKS_MEMO = "coupon_checks"
+
+
+# Active-coupon catalogue shared by every discovery surface (available-offers
+# list, salon cards, salon detail). Coupon CRUD on this worker rebuilds it; the
+# TTL bounds staleness for other workers and for used_count, which redemptions
+# bump without invalidating (the exhausted check is a display filter only).
+COUPON_CATALOGUE_TTL_SECONDS = 60
+_COUPON_CATALOGUE = TTLCache(ttl_seconds=COUPON_CATALOGUE_TTL_SECONDS)
+
+
+def invalidate_coupon_catalogue() -> None:
+    """Drop the cached active-coupon catalogue (call after any coupon write)."""
+    _COUPON_CATALOGUE.clear()
+
+
+class _CouponCatalogue:
+    """
+    Active coupons bucketed by scope (platform) and salon (vendor). Each bucket
+    is ordered by valid_until, open-ended coupons last, so the already-expired
+    prefix is skipped with a bisect and listings come out "ending soonest" first.
+    """
+
+    _OPEN_ENDED = float("inf")
+
+    def __init__(self, coupons: List[Dict[str, Any]], now: datetime):
+        platform: List[Dict[str, Any]] = []
+        by_salon: Dict[str, List[Dict[str, Any]]] = {}
+        for coupon in coupons:
+            if self._ends_at(coupon) < now.timestamp():
+                continue
+            if coupon.get("scope") == "platform":
+                platform.append(coupon)
+            elif coupon.get("scope") == "vendor" and coupon.get("salon_id"):
+                by_salon.setdefault(coupon["salon_id"], []).append(coupon)
+        self.platform = self._bucket(platform)
+        self.by_salon = {sid: self._bucket(rows) for sid, rows in by_salon.items()}
+
+    @classmethod
+    def _ends_at(cls, coupon: Dict[str, Any]) -> float:
+        valid_until = _parse_dt(coupon.get("valid_until"))
+        return valid_until.timestamp() if valid_until else cls._OPEN_ENDED
+
+    @classmethod
+    def _bucket(cls, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[float]]:
+        rows = sorted(rows, key=cls._ends_at)
+        return rows, [cls._ends_at(c) for c in rows]
+
+    @staticmethod
+    def _live(bucket, now: datetime) -> List[Dict[str, Any]]:
+        rows, ends = bucket
+        start = bisect_left(ends, now.timestamp())
+        live = []
+        for coupon in rows[start:]:
+            valid_from = _parse_dt(coupon.get("valid_from"))
+            if valid_from and now < valid_from:
+                continue
+            live.append(coupon)
+        return live
+
+    def platform_coupons(self, now: datetime) -> List[Dict[str, Any]]:
+        """In-window platform coupons."""
+        return self._live(self.platform, now)
+
+    def vendor_coupons(self, salon_id: str, now: datetime) -> List[Dict[str, Any]]:
+        """In-window vendor coupons of one salon."""
+        bucket = self.by_salon.get(salon_id)
+        return self._live(bucket, now) if bucket else []
+
+
 class CouponService:
     """Service for coupon CRUD, validation and redemption."""
 
     def __init__(self, db_client):
         self.db = db_client
 
+    def _catalogue(self) -> _CouponCatalogue:
+        def _load() -> _CouponCatalogue:
+            resp = self.db.table("coupons").select("*").eq("is_active", True).execute()
+            return _CouponCatalogue(resp.data or [], datetime.now(timezone.utc))
+
+        return _COUPON_CATALOGUE.get(_load)
+
     # =====================================================
     # VALIDATION (used by PricingService)
     # =====================================================
@@ -77,73 +164,62 @@ class CouponService:
             return None, None
 
         normalized = code.strip().upper()
+        subtotal = round(float(service_subtotal or 0), 2)
+        memo_key = (normalized, str(salon_id), str(customer_id), subtotal)
+        memo = request_memo(_COUPON_CHECKS_MEMO)
+
+        if memo is None or memo_key not in memo:
+            # Lookup, window, scope, min-order, first-time and usage limits in
+            # one round-trip.
+            resp = self.db.rpc("check_coupon_eligibility", {
+                "p_codes": [normalized],
+                "p_salon_id": salon_id,
+                "p_user_id": customer_id,
+                "p_service_subtotal": subtotal,
+            }).execute()
+            row = rpc_result(resp) or {}
+            reason_code = row.get("reason")
+            if row.get("coupon") and not reason_code:
+                result = (row["coupon"], None)
+            else:
+                result = (None, self.reason_message(reason_code or "not_found"))
+            if memo is None:
+                return result
+            memo[memo_key] = result
 
-        # Active coupon for this code. Codes are stored uppercase (enforced on
-        # create), and idx_coupons_active_code guarantees at most one active row
-        # per code — so this is an indexed point lookup, not a full scan.
-        resp = (
-            self.db.table("coupons")
-            .select("*")
-            .eq("is_active", True)
-            .eq("code", normalized)
-            .execute()
-        )
-        coupon = (resp.data or [None])[0]
-        if not coupon:
-            return None, _REASON_MESSAGES["not_found"]
-
-        # Validity window
-        now = datetime.now(timezone.utc)
-        valid_from = _parse_dt(coupon.get("valid_from"))
-        valid_until = _parse_dt(coupon.get("valid_until"))
-        if valid_from and now < valid_from:
-            return None, _REASON_MESSAGES["not_started"]
-        if valid_until and now > valid_until:
-            return None, _REASON_MESSAGES["expired"]
-
-        # Scope: platform coupons work anywhere; vendor coupons only at their salon
-        if coupon.get("scope") == "vendor" and coupon.get("salon_id") != salon_id:
-            return None, _REASON_MESSAGES["wrong_salon"]
-
-        # Minimum order amount (checked against the service subtotal)
-        min_order = coupon.get("min_order_amount")
-        if min_order is not None and service_subtotal < float(min_order):
-            return None, _REASON_MESSAGES["min_order_not_met"]
-
-        # First-time-user restriction
-        first_time_scope = coupon.get("first_time_scope")
-        if first_time_scope and not await self._is_first_time(customer_id, salon_id, first_time_scope):
-            return None, _REASON_MESSAGES["not_first_time"]
-
-        # Usage limits (soft pre-check)
-        total_limit = coupon.get("usage_limit_total")
-        if total_limit is not None and int(coupon.get("used_count") or 0) >= int(total_limit):
-            return None, _REASON_MESSAGES["total_limit_reached"]
-
-        per_user_limit = coupon.get("usage_limit_per_user")
-        if per_user_limit is not None:
-            used_by_user = self.db.table("coupon_redemptions").select(
-                "id", count="exact"
-            ).eq("coupon_id", coupon["id"]).eq("user_id", customer_id).execute()
-            if (used_by_user.count or 0) >= int(per_user_limit):
-                return None, _REASON_MESSAGES["per_user_limit_reached"]
-
-        return coupon, None
+        coupon, reason = memo[memo_key]
+        return (dict(coupon) if coupon else None), reason
 
-    async def _is_first_time(self, customer_id: str, salon_id: str, scope: str) -> bool:
+    async def check_coupons(
+        self,
+        coupons: List[Dict[str, Any]],
+        salon_id: Optional[str],
+        customer_id: str,
+        service_subtotal: Optional[float] = None,
+    ) -> List[Tuple[Dict[str, Any], Optional[str]]]:
         """
-        True if the customer has no prior *non-cancelled* bookings (platform-wide
-        or with this salon). Cancelled bookings are excluded so a cancellation
-        does not permanently disqualify a customer from first-time offers (D3).
-        This is a UX pre-check; redeem_coupon() enforces the same rule atomically.
+        Check many active coupon rows against one cart/customer.
+
+        Returns [(coupon, reason_code)] in input order, reason_code None when
+        usable. The rules live in check_coupon_eligibility() (the same check
+        get_valid_coupon runs), which takes every code in one call.
+        `service_subtotal=None` skips the min-order rule (discovery lists show
+        it as a condition instead).
         """
-        query = self.db.table("bookings").select("id", count="exact").eq(
-            "customer_id", customer_id
-        ).is_("deleted_at", "null").neq("status", "cancelled")
-        if scope == "vendor":
-            query = query.eq("salon_id", salon_id)
-        result = query.execute()
-        return (result.count or 0) == 0
+        if not coupons:
+            return []
+
+        resp = self.db.rpc("check_coupon_eligibility", {
+            "p_codes": [c["code"] for c in coupons],
+            "p_salon_id": salon_id,
+            "p_user_id": customer_id,
+            "p_service_subtotal": service_subtotal,
+        }).execute()
+        reasons = {row["coupon_code"]: row.get("reason") for row in (resp.data or [])}
+        return [
+            (coupon, reasons.get(coupon["code"].strip().upper(), "not_found"))
+            for coupon in coupons
+        ]
 
     @staticmethod
     def reason_message(reason_code: str) -> str:
@@ -210,6 +286,8 @@ class CouponService:
         self,
         customer_id: str,
         salon_id: Optional[str] = None,
+        line_items: Optional[List[Any]] = None,
+        convenience_fee_percentage: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
         Coupons a customer can currently discover and apply.
@@ -220,77 +298,45 @@ class CouponService:
         total-limit exhausted, per-user-limit reached, and first-time offers the
         customer is no longer eligible for. Min-order stays in (surfaced as a
         condition) — the authoritative check still runs on apply (validate_coupon).
+
+        When the customer's cart at `salon_id` is passed (`line_items` +
+        `convenience_fee_percentage`), every listed coupon also carries
+        `estimated_savings` and its `breakdown`, priced in one
+        PricingService.quote_coupons pass.
         """
         now = datetime.now(timezone.utc)
-        resp = self.db.table("coupons").select("*").eq("is_active", True).execute()
-        all_active = resp.data or []
-
-        # Scope + validity window + total-usage pre-filter
-        candidates: List[Dict[str, Any]] = []
-        for coupon in all_active:
-            scope = coupon.get("scope")
-            if scope == "platform":
-                pass
-            elif scope == "vendor":
-                if not salon_id or coupon.get("salon_id") != salon_id:
-                    continue
-            else:
-                continue
-
-            valid_from = _parse_dt(coupon.get("valid_from"))
-            valid_until = _parse_dt(coupon.get("valid_until"))
-            if valid_from and now < valid_from:
-                continue
-            if valid_until and now > valid_until:
-                continue
-
-            total_limit = coupon.get("usage_limit_total")
-            if total_limit is not None and int(coupon.get("used_count") or 0) >= int(total_limit):
-                continue
-
-            candidates.append(coupon)
+        catalogue = self._catalogue()
+        candidates = catalogue.platform_coupons(now)
+        if salon_id:
+            candidates = candidates + catalogue.vendor_coupons(salon_id, now)
 
         if not candidates:
             return []
 
-        # Per-user redemption counts in one query
-        coupon_ids = [c["id"] for c in candidates]
-        used_by_user: Dict[str, int] = {}
-        redemptions = (
-            self.db.table("coupon_redemptions")
-            .select("coupon_id")
-            .eq("user_id", customer_id)
-            .in_("coupon_id", coupon_ids)
-            .execute()
-        )
-        for row in (redemptions.data or []):
-            cid = row.get("coupon_id")
-            used_by_user[cid] = used_by_user.get(cid, 0) + 1
+        if line_items is None or convenience_fee_percentage is None or not salon_id:
+            checked = await self.check_coupons(candidates, salon_id, customer_id)
+            return [self._to_public_coupon(c) for c, reason in checked if reason is None]
 
-        # First-time eligibility is the same for all coupons of a given scope —
-        # compute at most once per scope.
-        first_time_cache: Dict[str, bool] = {}
+        from app.services.pricing_service import PricingService
+
+        quotes = await PricingService(self.db).quote_coupons(
+            line_items=line_items,
+            convenience_fee_percentage=convenience_fee_percentage,
+            salon_id=salon_id,
+            customer_id=customer_id,
+            coupons=candidates,
+        )
 
         available: List[Dict[str, Any]] = []
         for coupon in candidates:
-            per_user_limit = coupon.get("usage_limit_per_user")
-            if per_user_limit is not None and used_by_user.get(coupon["id"], 0) >= int(per_user_limit):
+            quote = quotes[coupon["id"]]
+            # Min-order misses stay listed (with zero savings) like the cart-less list
+            if quote["reason_code"] not in (None, "min_order_not_met"):
                 continue
-
-            first_time_scope = coupon.get("first_time_scope")
-            if first_time_scope:
-                # A vendor-scoped first-time check needs a salon context.
-                if first_time_scope == "vendor" and not salon_id:
-                    continue
-                if first_time_scope not in first_time_cache:
-                    first_time_cache[first_time_scope] = await self._is_first_time(
-                        customer_id, salon_id, first_time_scope
-                    )
-                if not first_time_cache[first_time_scope]:
-                    continue
-
-            available.append(self._to_public_coupon(coupon))
-
+            public = self._to_public_coupon(coupon)
+            public["estimated_savings"] = quote["savings"]
+            public["breakdown"] = quote["pricing"]
+            available.append(public)
         return available
 
     def _is_publicly_listable(self, coupon: Dict[str, Any], now: datetime) -> bool:
@@ -316,26 +362,22 @@ class CouponService:
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Active, in-window vendor coupons grouped by salon id, projected to public
-        display fields. One query for the whole set (no N+1 for salon lists).
-        Public/unfiltered — usable by logged-out browsers.
+        display fields. Served from the in-process catalogue (no query per
+        salon list). Public/unfiltered — usable by logged-out browsers.
         """
         if not salon_ids:
             return {}
         now = datetime.now(timezone.utc)
-        resp = (
-            self.db.table("coupons")
-            .select("*")
-            .eq("is_active", True)
-            .eq("scope", "vendor")
-            .in_("salon_id", salon_ids)
-            .execute()
-        )
+        catalogue = self._catalogue()
         grouped: Dict[str, List[Dict[str, Any]]] = {}
-        for coupon in (resp.data or []):
-            if not self._is_publicly_listable(coupon, now):
-                continue
-            sid = coupon.get("salon_id")
-            grouped.setdefault(sid, []).append(self._to_public_coupon(coupon))
+        for sid in salon_ids:
+            coupons = [
+                self._to_public_coupon(c)
+                for c in catalogue.vendor_coupons(sid, now)
+                if self._is_publicly_listable(c, now)
+            ]
+            if coupons:
+                grouped[sid] = coupons
         return grouped
 
     def public_platform_coupons(self) -> List[Dict[str, Any]]:
@@ -344,16 +386,9 @@ class CouponService:
         public display fields. Public/unfiltered.
         """
         now = datetime.now(timezone.utc)
-        resp = (
-            self.db.table("coupons")
-            .select("*")
-            .eq("is_active", True)
-            .eq("scope", "platform")
-            .execute()
-        )
         return [
             self._to_public_coupon(c)
-            for c in (resp.data or [])
+            for c in self._catalogue().platform_coupons(now)
             if self._is_publicly_listable(c, now)
         ]
 
@@ -386,7 +421,13 @@ class CouponService:
                     gross_discount if gross_discount is not None else (discount_amount or 0)
                 ), 2),
             }).execute()
-            row = resp.data[0] if resp.data else {}
+            row = rpc_result(resp) or {}
+            if row.get("success"):
+                # A redeemed coupon may have hit its per-user limit; don't let a
+                # later check in this request reuse the pre-redemption answer.
+                memo = request_memo(_COUPON_CHECKS_MEMO)
+                if memo is not None:
+                    memo.clear()
             return {
                 "success": bool(row.get("success")),
                 "reason": row.get("reason"),
@@ -434,6 +475,7 @@ class CouponService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create coupon.",
             )
+        invalidate_coupon_catalogue()
         return resp.data[0]
 
     async def list_coupons(
@@ -475,6 +517,7 @@ class CouponService:
         if not clean:
             return existing
         resp = self.db.table("coupons").update(clean).eq("id", coupon_id).execute()
+        invalidate_coupon_catalogue()
         return resp.data[0] if resp.data else existing
 
     async def deactivate_coupon(
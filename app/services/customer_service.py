@@ -3,6 +3,7 @@ Customer Service - Business Logic Layer
 Handles all customer-facing operations: cart, bookings, salons, favorites, reviews
 Separated from HTTP layer for better testability and reusability
 """
+import copy
 import logging
 from typing import Dict, Any, Optional, List
 from app.schemas.request.customer import CartItemCreate, ReviewCreate, ReviewUpdate
@@ -10,10 +11,66 @@ from datetime import datetime
 from fastapi import HTTPException, status
 
 from app.core.auth import verify_review_feedback_token
+from app.core.cache import KeyedTTLCache
 from app.services.salon_service import SalonService
+from app.utils.rpc import rpc_result
 
 logger = logging.getLogger(__name__)
 
+# Per-customer cart aggregates (GET /customers/cart is polled by the header
+# badge and every cart screen). Cart mutations on this worker replace the
+# entry with the aggregate built from the lines the cart_* function returned;
+# the short TTL bounds how stale another worker's copy can be. Checkout always
+# reads the cart from the database.
+_CART_CACHE = KeyedTTLCache(ttl_seconds=30)
+
+
+def invalidate_cart_cache(customer_id: Optional[str] = None) -> None:
+    """Drop one customer's cached cart, or every cart when no id is given."""
+    if customer_id is None:
+        _CART_CACHE.clear()
+    else:
+        _CART_CACHE.pop(customer_id)
+
+
+def _empty_cart() -> Dict[str, Any]:
+    return {
+        "success": True,
+        "items": [],
+        "salon_id": None,
+        "salon_name": None,
+        "salon_details": None,
+        "total_amount": 0.0,
+        "item_count": 0
+    }
+
+
+# Reason codes returned by the cart_* database functions
+# (20261018000005_add_cart_upsert_functions.sql).
+_CART_RPC_ERRORS = {
+    "invalid_quantity": (status.HTTP_400_BAD_REQUEST, "Quantity must be greater than 0"),
+    "service_not_found": (status.HTTP_404_NOT_FOUND, "Service not available"),
+    "service_inactive": (status.HTTP_400_BAD_REQUEST, "Service is inactive"),
+    "salon_not_found": (status.HTTP_404_NOT_FOUND, "Salon not found"),
+    "salon_inactive": (status.HTTP_400_BAD_REQUEST, "Salon is currently inactive"),
+    "salon_not_accepting": (
+        status.HTTP_400_BAD_REQUEST,
+        "This salon is not accepting bookings at this time"
+    ),
+    "different_salon": (
+        status.HTTP_400_BAD_REQUEST,
+        "Cannot add services from different salons. Please clear cart first."
+    ),
+    "item_not_found": (status.HTTP_404_NOT_FOUND, "Cart item not found"),
+}
+
+
+def _raise_cart_error(reason: Optional[str]) -> None:
+    status_code, detail = _CART_RPC_ERRORS.get(
+        reason, (status.HTTP_500_INTERNAL_SERVER_ERROR, "Cart update failed")
+    )
+    raise HTTPException(status_code=status_code, detail=detail)
+
 
 class CustomerService:
     """
@@ -29,12 +86,14 @@ class CustomerService:
     # CART OPERATIONS
     # =====================================================
     
-    async def get_cart(self, customer_id: str) -> Dict[str, Any]:
+    async def get_cart(self, customer_id: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Get all cart items for a customer from normalized cart_items table.
         
         Args:
             customer_id: Customer user ID
+            use_cache: Serve this worker's cached aggregate when fresh. Pass
+                False where the cart must be authoritative (checkout).
             
         Returns:
             Dict with cart items, totals, and salon info
@@ -42,6 +101,17 @@ class CustomerService:
         Raises:
             HTTPException: If query fails
         """
+        if use_cache:
+            cached = _CART_CACHE.get(customer_id)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
+        cart = await self._load_cart(customer_id)
+        _CART_CACHE.set(customer_id, cart)
+        return copy.deepcopy(cart)
+
+    async def _load_cart(self, customer_id: str) -> Dict[str, Any]:
+        """Build the cart aggregate from cart_items (uncached)."""
         try:
             # Query cart_items with service and salon details
             response = self.db.table("cart_items")\
@@ -53,64 +123,9 @@ class CustomerService:
                 .eq("user_id", customer_id)\
                 .execute()
             
-            if not response.data:
-                # Return empty cart if no cart items exist
-                return {
-                    "success": True,
-                    "items": [],
-                    "salon_id": None,
-                    "salon_name": None,
-                    "salon_details": None,
-                    "total_amount": 0.0,
-                    "item_count": 0
-                }
-            
-            # Process cart items
-            items_with_details: List[Dict[str, Any]] = []
-            total_amount = 0.0
-            item_count = 0
-            salon_id = None
-            salon_name = None
-            
-            for item in response.data:
-                service_details = item.get("services", {})
-                salon_details = item.get("salons", {})
-                
-                # Set salon info from first item
-                if salon_id is None:
-                    salon_id = item.get("salon_id")
-                    salon_name = salon_details.get("business_name")
-                
-                unit_price = self._get_effective_service_price(service_details)
-                quantity = item.get("quantity", 1)
-                line_total = unit_price * quantity
-                total_amount += line_total
-                item_count += quantity
-                
-                items_with_details.append({
-                    "id": item.get("id"),
-                    "service_id": item.get("service_id"),
-                    "salon_id": item.get("salon_id"),
-                    "quantity": quantity,
-                    "metadata": item.get("metadata", {}),
-                    "service_details": service_details,
-                    "salon_details": salon_details,
-                    "unit_price": unit_price,
-                    "line_total": line_total,
-                    "created_at": item.get("created_at")
-                })
-            
-            logger.info(f"Retrieved cart for customer {customer_id}: {item_count} items")
-            
-            return {
-                "success": True,
-                "items": items_with_details,
-                "salon_id": salon_id,
-                "salon_name": salon_name,
-                "salon_details": None,
-                "total_amount": total_amount,
-                "item_count": item_count
-            }
+            cart = self._build_cart(response.data or [])
+            logger.info(f"Retrieved cart for customer {customer_id}: {cart['item_count']} items")
+            return cart
         
         except Exception as e:
             logger.error(f"Failed to get cart for {customer_id}: {str(e)}")
@@ -119,6 +134,69 @@ class CustomerService:
                 detail="Failed to retrieve cart"
             )
 
+    def _build_cart(self, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the cart aggregate from cart_items lines with their services(...)
+        and salons(...) details - the _load_cart select or a cart_* function's
+        cart_snapshot.
+        """
+        if not lines:
+            return _empty_cart()
+
+        items_with_details: List[Dict[str, Any]] = []
+        total_amount = 0.0
+        item_count = 0
+        salon_id = None
+        salon_name = None
+        
+        for item in lines:
+            service_details = item.get("services", {})
+            salon_details = item.get("salons", {})
+            
+            # Set salon info from first item
+            if salon_id is None:
+                salon_id = item.get("salon_id")
+                salon_name = salon_details.get("business_name")
+            
+            unit_price = self._get_effective_service_price(service_details)
+            quantity = item.get("quantity", 1)
+            line_total = unit_price * quantity
+            total_amount += line_total
+            item_count += quantity
+            
+            items_with_details.append({
+                "id": item.get("id"),
+                "service_id": item.get("service_id"),
+                "salon_id": item.get("salon_id"),
+                "quantity": quantity,
+                "metadata": item.get("metadata", {}),
+                "service_details": service_details,
+                "salon_details": salon_details,
+                "unit_price": unit_price,
+                "line_total": line_total,
+                "created_at": item.get("created_at")
+            })
+        
+        return {
+            "success": True,
+            "items": items_with_details,
+            "salon_id": salon_id,
+            "salon_name": salon_name,
+            "salon_details": None,
+            "total_amount": total_amount,
+            "item_count": item_count
+        }
+
+    def _refresh_cart(self, customer_id: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the cached cart after a mutation and return the new aggregate,
+        so clients don't need a follow-up GET. Built from the cart lines the
+        cart_* function returned, so a mutation stays one round-trip.
+        """
+        cart = self._build_cart(row.get("cart") or [])
+        _CART_CACHE.set(customer_id, cart)
+        return copy.deepcopy(cart)
+
     async def validate_coupon(self, customer_id: str, code: str) -> Dict[str, Any]:
         """
         Preview a coupon against the customer's current cart (the "Apply coupon" button).
@@ -127,7 +205,7 @@ class CustomerService:
         coupon_code, breakdown}. Uses the same PricingService as checkout, so the
         previewed discount matches what will actually be charged.
         """
-        from app.services.pricing_service import PricingService, LineItem
+        from app.services.pricing_service import PricingService
 
         cart = await self.get_cart(customer_id)
         if not cart.get("items"):
@@ -135,28 +213,8 @@ class CustomerService:
                     "coupon_code": None, "breakdown": None}
 
         salon_id = cart["salon_id"]
-        line_items = [
-            LineItem(
-                float(item["service_details"].get("price", 0) or 0),
-                float(item["unit_price"]),
-                item["quantity"],
-            )
-            for item in cart["items"]
-        ]
-
-        # Convenience fee % (admin-managed; required)
-        config_response = self.db.table("system_config")\
-            .select("config_value")\
-            .eq("config_key", "convenience_fee_percentage")\
-            .single()\
-            .execute()
-        try:
-            convenience_fee_percentage = float(config_response.data["config_value"])
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Payment configuration not available. Please contact support."
-            )
+        line_items = self._cart_line_items(cart)
+        convenience_fee_percentage = self._convenience_fee_percentage()
 
         pricing = await PricingService(self.db).compute_booking_pricing(
             line_items=line_items,
@@ -194,15 +252,60 @@ class CustomerService:
 
         Platform coupons are always included; that salon's vendor coupons are added
         when `salon_id` is provided (e.g. at checkout). Ineligible coupons are
-        filtered out — see CouponService.list_available_coupons.
+        filtered out — see CouponService.list_available_coupons. When the
+        customer's cart is at `salon_id`, each coupon also carries the exact
+        savings it would give on that cart.
         """
         from app.services.coupon_service import CouponService
 
+        line_items = None
+        convenience_fee_percentage = None
+        if salon_id:
+            cart = await self.get_cart(customer_id)
+            if cart.get("items") and cart.get("salon_id") == salon_id:
+                try:
+                    convenience_fee_percentage = self._convenience_fee_percentage()
+                    line_items = self._cart_line_items(cart)
+                except HTTPException:
+                    # Savings are decoration; the list itself doesn't need the fee
+                    logger.warning("Listing coupons without savings: fee config unavailable")
+
         return await CouponService(self.db).list_available_coupons(
             customer_id=customer_id,
             salon_id=salon_id,
+            line_items=line_items,
+            convenience_fee_percentage=convenience_fee_percentage,
         )
 
+    @staticmethod
+    def _cart_line_items(cart: Dict[str, Any]) -> List[Any]:
+        """PricingService line items for a get_cart() aggregate."""
+        from app.services.pricing_service import LineItem
+
+        return [
+            LineItem(
+                float(item["service_details"].get("price", 0) or 0),
+                float(item["unit_price"]),
+                item["quantity"],
+            )
+            for item in cart["items"]
+        ]
+
+    def _convenience_fee_percentage(self) -> float:
+        """Convenience fee % (admin-managed; required)."""
+        try:
+            config_response = self.db.table("system_config")\
+                .select("config_value")\
+                .eq("config_key", "convenience_fee_percentage")\
+                .single()\
+                .execute()
+            return float(config_response.data["config_value"])
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Payment configuration not available. Please contact support."
+            )
+
     async def add_to_cart(
         self,
         customer_id: str,
@@ -230,116 +333,31 @@ class CustomerService:
                     detail="service_id is required"
                 )
 
-            # Get service details to validate and get salon_id
-            service_response = self.db.table("services")\
-                .select("id, name, price, duration_minutes, salon_id, is_active, image_url")\
-                .eq("id", service_id)\
-                .maybe_single()\
-                .execute()
-
-            if not service_response or not service_response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Service not available"
-                )
-
-            service_details = service_response.data
-            if not service_details.get("is_active", True):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Service is inactive"
-                )
+            # Validation + upsert in one transaction (cart_add_service)
+            response = self.db.rpc("cart_add_service", {
+                "p_user_id": customer_id,
+                "p_service_id": service_id,
+                "p_quantity": cart_item.quantity,
+                "p_metadata": cart_item.metadata or {}
+            }).execute()
+            row = rpc_result(response) or {}
 
-            service_salon_id = service_details['salon_id']
-            
-            # Check if salon is accepting bookings
-            salon_response = self.db.table("salons")\
-                .select("id, business_name, accepting_bookings, is_active")\
-                .eq("id", service_salon_id)\
-                .maybe_single()\
-                .execute()
+            if not row.get("success"):
+                _raise_cart_error(row.get("reason"))
 
-            if not salon_response or not salon_response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Salon not found"
-                )
-            
-            salon = salon_response.data
-            if not salon.get("is_active", True):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Salon is currently inactive"
-                )
-            
-            if not salon.get("accepting_bookings", True):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="This salon is not accepting bookings at this time"
-                )
-            
-            # Check if user has cart items from a different salon
-            existing_cart = self.db.table("cart_items")\
-                .select("salon_id")\
-                .eq("user_id", customer_id)\
-                .limit(1)\
-                .execute()
-            
-            if existing_cart.data:
-                existing_salon_id = existing_cart.data[0].get("salon_id")
-                if existing_salon_id != service_salon_id:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Cannot add services from different salons. Please clear cart first."
-                    )
-            
-            # Check if item already exists in cart
-            check_response = self.db.table("cart_items")\
-                .select("id, quantity")\
-                .eq("user_id", customer_id)\
-                .eq("service_id", service_id)\
-                .execute()
-            
-            quantity = cart_item.quantity
-            
-            if check_response.data:
-                # Item exists - update quantity
-                existing_item = check_response.data[0]
-                new_quantity = existing_item.get("quantity", 1) + quantity
-                
-                response = self.db.table("cart_items")\
-                    .update({"quantity": new_quantity})\
-                    .eq("id", existing_item["id"])\
-                    .execute()
-                
+            if row.get("was_existing"):
                 logger.info(f"Updated cart item quantity for customer {customer_id}")
-                
-                return {
-                    "success": True,
-                    "message": "Cart item quantity updated",
-                    "cart_item": response.data[0] if response.data else None
-                }
+                message = "Cart item quantity updated"
             else:
-                # Item doesn't exist - insert new
-                cart_item_data = {
-                    "user_id": customer_id,
-                    "salon_id": service_salon_id,
-                    "service_id": service_id,
-                    "quantity": quantity,
-                    "metadata": cart_item.metadata or {}
-                }
-                
-                response = self.db.table("cart_items")\
-                    .insert(cart_item_data)\
-                    .execute()
-                
                 logger.info(f"Added new item to cart for customer {customer_id}")
-                
-                return {
-                    "success": True,
-                    "message": "Item added to cart",
-                    "cart_item": response.data[0] if response.data else None
-                }
+                message = "Item added to cart"
+
+            return {
+                "success": True,
+                "message": message,
+                "cart_item": row.get("cart_item"),
+                "cart": self._refresh_cart(customer_id, row)
+            }
         
         except HTTPException:
             raise
@@ -378,38 +396,23 @@ class CustomerService:
                     detail="Quantity must be greater than 0"
                 )
 
-            # Verify cart item exists and belongs to user
-            check_response = self.db.table("cart_items")\
-                .select("id")\
-                .eq("id", item_id)\
-                .eq("user_id", customer_id)\
-                .execute()
-
-            if not check_response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Cart item not found"
-                )
-
-            # Update quantity
-            response = self.db.table("cart_items")\
-                .update({"quantity": quantity})\
-                .eq("id", item_id)\
-                .eq("user_id", customer_id)\
-                .execute()
+            response = self.db.rpc("cart_set_quantity", {
+                "p_user_id": customer_id,
+                "p_item_id": item_id,
+                "p_quantity": quantity
+            }).execute()
+            row = rpc_result(response) or {}
 
-            if not response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to update cart item"
-                )
+            if not row.get("success"):
+                _raise_cart_error(row.get("reason"))
 
             logger.info(f"Updated cart item {item_id} quantity to {quantity} for customer {customer_id}")
 
             return {
                 "success": True,
                 "message": "Cart item updated successfully",
-                "cart_item": response.data[0]
+                "cart_item": row.get("cart_item"),
+                "cart": self._refresh_cart(customer_id, row)
             }
 
         except HTTPException:
@@ -440,24 +443,21 @@ class CustomerService:
             HTTPException: If item not found
         """
         try:
-            # Delete cart item (user_id ensures ownership)
-            response = self.db.table("cart_items")\
-                .delete()\
-                .eq("id", item_id)\
-                .eq("user_id", customer_id)\
-                .execute()
+            response = self.db.rpc("cart_remove_item", {
+                "p_user_id": customer_id,
+                "p_item_id": item_id
+            }).execute()
+            row = rpc_result(response) or {}
 
-            if not response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Cart item not found"
-                )
+            if not row.get("success"):
+                _raise_cart_error(row.get("reason"))
 
             logger.info(f"Removed cart item {item_id} for customer {customer_id}")
 
             return {
                 "success": True,
-                "message": "Item removed from cart"
+                "message": "Item removed from cart",
+                "cart": self._refresh_cart(customer_id, row)
             }
 
         except HTTPException:
@@ -496,13 +496,15 @@ class CustomerService:
                 .execute()
 
             deleted_count = count_response.count if count_response.count else 0
+            _CART_CACHE.set(customer_id, _empty_cart())
 
             logger.info(f"Cleared cart for customer {customer_id}: {deleted_count} items")
 
             return {
                 "success": True,
                 "message": "Cart cleared",
-                "deleted_count": deleted_count
+                "deleted_count": deleted_count,
+                "cart": _empty_cart()
             }
 
         except Exception as e:
@@ -557,8 +559,8 @@ class CustomerService:
             HTTPException 500: Booking creation failed
         """
         try:
-            # Get cart items
-            cart_response = await self.get_cart(customer_id)
+            # Get cart items (never the cached copy: this is what gets booked)
+            cart_response = await self.get_cart(customer_id, use_cache=False)
             
             if not cart_response.get("items") or len(cart_response["items"]) == 0:
                 raise HTTPException(
@@ -648,8 +650,8 @@ class CustomerService:
                     }
             
             # Coupon applied at order-creation time is the authoritative one (it's
-            # what the convenience fee was charged on). Read it from the order notes
-            # below; fall back to whatever the client sent.
+            # what the convenience fee was charged on). Read it from the stored
+            # payment order below; fall back to whatever the client sent.
             applied_coupon_code = checkout_data.get("coupon_code")
             # Pinned pricing from the order (authoritative — what was charged). When
             # present, the booking records these exact amounts instead of recomputing,
@@ -659,69 +661,67 @@ class CustomerService:
             # CART VALIDATION: Verify cart hasn't changed since payment order creation
             # This prevents race conditions where cart is modified between payment and checkout
             if checkout_data.get("razorpay_order_id"):
-                try:
-                    # Fetch the Razorpay order to get the cart + pricing snapshot
-                    from app.services.payment_service import PaymentService
-                    payment_service = PaymentService(db_client=self.db)
-                    await payment_service._initialize_razorpay()
-
-                    import json
-                    razorpay_order = payment_service.razorpay.client.order.fetch(checkout_data["razorpay_order_id"])
-                    stored_snapshot = razorpay_order.get("notes", {}).get("cart_snapshot")
-                    stored_item_count = razorpay_order.get("notes", {}).get("cart_item_count")
+                order_response = self.db.table("payment_orders")\
+                    .select("customer_id, coupon_code, cart_snapshot, pricing")\
+                    .eq("razorpay_order_id", checkout_data["razorpay_order_id"])\
+                    .limit(1)\
+                    .execute()
+                payment_order = order_response.data[0] if order_response.data else None
+
+                if payment_order is None:
+                    # Order created before payment_orders existed (or by another
+                    # flow). Nothing to pin, so create_booking recomputes pricing
+                    # server-side (and still re-validates the coupon).
+                    logger.warning(
+                        f"No stored payment order for {checkout_data['razorpay_order_id']}; "
+                        "skipping cart validation"
+                    )
+                else:
+                    if str(payment_order.get("customer_id")) != str(customer_id):
+                        logger.warning(
+                            f"Payment order {checkout_data['razorpay_order_id']} does not belong to {customer_id}"
+                        )
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Payment order does not match this account."
+                        )
+
                     # Use the coupon that was actually priced into this order
-                    note_coupon = razorpay_order.get("notes", {}).get("coupon_code")
-                    if note_coupon:
-                        applied_coupon_code = note_coupon
-                    # Parse the pinned pricing breakdown (authoritative for the booking)
-                    stored_pricing = razorpay_order.get("notes", {}).get("pricing")
-                    if stored_pricing:
-                        try:
-                            pinned_pricing = json.loads(stored_pricing)
-                        except (ValueError, TypeError) as parse_err:
-                            logger.warning(f"Could not parse pinned pricing note: {parse_err}")
-
-                    if stored_snapshot and stored_item_count:
-                        stored_cart = json.loads(stored_snapshot)
-                        current_item_count = len(cart_response["items"])
-
-                        # Quick check: item count mismatch
-                        if int(stored_item_count) != current_item_count:
-                            logger.warning(f"Cart modified: expected {stored_item_count} items, found {current_item_count}")
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Your cart has been modified since payment. Please try checkout again."
+                    if payment_order.get("coupon_code"):
+                        applied_coupon_code = payment_order["coupon_code"]
+                    pinned_pricing = payment_order.get("pricing") or None
+
+                    stored_cart = payment_order.get("cart_snapshot") or []
+                    current_item_count = len(cart_response["items"])
+
+                    # Quick check: item count mismatch
+                    if len(stored_cart) != current_item_count:
+                        logger.warning(f"Cart modified: expected {len(stored_cart)} items, found {current_item_count}")
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Your cart has been modified since payment. Please try checkout again."
+                        )
+
+                    # Detailed validation: compare service IDs, quantities AND unit
+                    # price (a price change since the order also invalidates the
+                    # charged amount — fail closed).
+                    def _cart_key(items):
+                        return {
+                            item["service_id"]: (
+                                item["quantity"],
+                                round(float(item.get("unit_price", 0) or 0), 2),
                             )
+                            for item in items
+                        }
 
-                        # Detailed validation: compare service IDs, quantities AND unit
-                        # price (a price change since the order also invalidates the
-                        # charged amount — fail closed).
-                        def _cart_key(items):
-                            return {
-                                item["service_id"]: (
-                                    item["quantity"],
-                                    round(float(item.get("unit_price", 0) or 0), 2),
-                                )
-                                for item in items
-                            }
-                        current_cart = _cart_key(cart_response["items"])
-                        stored_cart_dict = _cart_key(stored_cart)
-
-                        if current_cart != stored_cart_dict:
-                            logger.warning("Cart contents/prices changed since payment order creation")
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Your cart has changed since payment. Please try checkout again."
-                            )
+                    if _cart_key(cart_response["items"]) != _cart_key(stored_cart):
+                        logger.warning("Cart contents/prices changed since payment order creation")
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Your cart has changed since payment. Please try checkout again."
+                        )
 
-                        logger.info("Cart validation passed: snapshot matches current cart")
-                except HTTPException:
-                    raise
-                except Exception as e:
-                    # Network/parse error fetching the order. We can't pin, so fall
-                    # back to a fresh server-side recompute in create_booking (which
-                    # still re-validates the coupon). Cart-mismatch above is a hard 400.
-                    logger.warning(f"Cart validation skipped due to error: {str(e)}")
+                    logger.info("Cart validation passed: snapshot matches current cart")
 
             # Verify Razorpay payment signature if payment details provided
             if checkout_data.get("razorpay_payment_id") and checkout_data.get("razorpay_signature"):
@@ -896,9 +896,7 @@ class CustomerService:
             salons_response = self.db.table("salons")\
                 .select("*, vendor_join_requests(business_type)")\
                 .in_("id", salon_ids)\
-                .eq("is_active", True)\
-                .eq("is_verified", True)\
-                .eq("registration_fee_paid", True)\
+                .eq("is_public", True)\
                 .execute()
 
             favorites = salons_response.data or []
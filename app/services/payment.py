@@ -3,15 +3,98 @@ Razorpay Payment Integration Service
 Low-level gateway client. Handles:
 - Razorpay order creation
 - Payment signature verification
+- Order payment lookups for reconciliation
+- Webhook signature verification (``verify_webhook_signature``)
+
+One gateway is shared per worker process (``get_razorpay_gateway``). The
+decrypted credentials it was built from are cached alongside it and both are
+dropped when an admin changes a ``razorpay_key_*`` config
+(``invalidate_razorpay_gateway``, called by ConfigService); the webhook secret
+is cached and invalidated the same way. The gateway keeps a
+pooled keep-alive HTTP session; callers run its network calls with
+``asyncio.to_thread`` so they never block the event loop.
 """
+import hashlib
+import hmac
 import razorpay
-from typing import Dict, Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from threading import Lock
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException, status
+from app.core.cache import TTLCache
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# system_config keys the gateway and webhook check are built from; writes to
+# these invalidate them.
+RAZORPAY_CONFIG_KEYS = {"razorpay_key_id", "razorpay_key_secret", "razorpay_webhook_secret"}
+
+# Config writes invalidate this worker immediately; the TTL bounds how long
+# other workers keep using rotated keys.
+_RAZORPAY_CREDENTIALS_CACHE = TTLCache(ttl_seconds=600)
+_RAZORPAY_WEBHOOK_SECRET_CACHE = TTLCache(ttl_seconds=600)
+
+_gateway: Optional["RazorpayService"] = None
+_gateway_credentials: Optional[Tuple[str, str]] = None
+_gateway_lock = Lock()
+
+
+def invalidate_razorpay_gateway() -> None:
+    """Forget cached credentials and the shared gateway (after a key change)."""
+    global _gateway, _gateway_credentials
+    _RAZORPAY_CREDENTIALS_CACHE.clear()
+    _RAZORPAY_WEBHOOK_SECRET_CACHE.clear()
+    with _gateway_lock:
+        _gateway = None
+        _gateway_credentials = None
+
+
+class _TimeoutSession(requests.Session):
+    """requests.Session with a default timeout (the SDK never passes one)."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self._timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self._timeout)
+        return super().request(*args, **kwargs)
+
+
+def _build_http_session() -> requests.Session:
+    session = _TimeoutSession(timeout=settings.RAZORPAY_HTTP_TIMEOUT_SECONDS)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.RAZORPAY_HTTP_POOL_SIZE,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def get_razorpay_gateway(key_id: str, key_secret: str) -> "RazorpayService":
+    """
+    Return this worker's shared RazorpayService for the given credentials,
+    building it (and its pooled session) only when the credentials change.
+    """
+    global _gateway, _gateway_credentials
+    credentials = (key_id, key_secret)
+    gateway = _gateway
+    if gateway is not None and _gateway_credentials == credentials:
+        return gateway
+
+    with _gateway_lock:
+        if _gateway is None or _gateway_credentials != credentials:
+            _gateway = RazorpayService(
+                razorpay_key_id=key_id,
+                razorpay_key_secret=key_secret,
+                session=_build_http_session(),
+            )
+            _gateway_credentials = credentials
+        return _gateway
+
 
 async def resolve_razorpay_credentials(config_service, *, allow_env_fallback: bool = False):
     """
@@ -20,7 +103,9 @@ async def resolve_razorpay_credentials(config_service, *, allow_env_fallback: bo
     Single source of truth for credential lookup, shared by all services that
     talk to Razorpay. Reads from the `system_config` table via ConfigService;
     missing/unreadable values come back as ``None`` (ConfigService swallows the
-    not-found/DB errors and returns the default).
+    not-found/DB errors and returns the default). A complete pair is cached
+    per process, so the config reads and Fernet decryption happen once, not
+    on every payment request.
 
     Args:
         config_service: A ConfigService instance bound to the request db client.
@@ -32,8 +117,16 @@ async def resolve_razorpay_credentials(config_service, *, allow_env_fallback: bo
     Returns:
         Tuple of (key_id, key_secret); either may be None if unresolved.
     """
-    key_id = await config_service.get_config_value("razorpay_key_id")
-    key_secret = await config_service.get_config_value("razorpay_key_secret")
+    cached = _RAZORPAY_CREDENTIALS_CACHE.peek()
+    if cached:
+        key_id, key_secret = cached
+    else:
+        key_id = await config_service.get_config_value("razorpay_key_id")
+        key_secret = await config_service.get_config_value("razorpay_key_secret")
+        # Only cache a usable pair, so configuring missing keys takes effect
+        # on the next request.
+        if key_id and key_secret:
+            _RAZORPAY_CREDENTIALS_CACHE.set((key_id, key_secret))
 
     if allow_env_fallback:
         key_id = key_id or settings.RAZORPAY_KEY_ID
@@ -42,16 +135,50 @@ async def resolve_razorpay_credentials(config_service, *, allow_env_fallback: bo
     return key_id, key_secret
 
 
+async def resolve_razorpay_webhook_secret(config_service) -> Optional[str]:
+    """
+    Resolve the Razorpay webhook secret (``razorpay_webhook_secret`` in
+    system_config), cached per process like the API credentials.
+
+    Returns None when it is not configured; that value is not cached.
+    """
+    cached = _RAZORPAY_WEBHOOK_SECRET_CACHE.peek()
+    if cached:
+        return cached
+
+    secret = await config_service.get_config_value("razorpay_webhook_secret")
+    if secret:
+        _RAZORPAY_WEBHOOK_SECRET_CACHE.set(secret)
+    return secret
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """
+    Check an ``X-Razorpay-Signature`` header: hex HMAC-SHA256 of the raw
+    request body keyed with the webhook secret (local, no network call).
+    """
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
 class RazorpayService:
     """Service class for Razorpay payment operations"""
     
-    def __init__(self, razorpay_key_id: Optional[str] = None, razorpay_key_secret: Optional[str] = None):
+    def __init__(
+        self,
+        razorpay_key_id: Optional[str] = None,
+        razorpay_key_secret: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
         """
         Initialize Razorpay client
         
         Args:
             razorpay_key_id: Razorpay key ID (from database or env)
             razorpay_key_secret: Razorpay key secret (from database or env)
+            session: Optional HTTP session to reuse (see get_razorpay_gateway)
         """
         # Use provided keys or fall back to environment variables
         key_id = razorpay_key_id or settings.RAZORPAY_KEY_ID
@@ -67,7 +194,7 @@ class RazorpayService:
                 masked_key_id = f"{key_id[:4]}...{key_id[-4:]}" if len(key_id) > 8 else "***"
                 logger.info(f"Initializing Razorpay client with key_id: {masked_key_id}")
                 
-                self.client = razorpay.Client(auth=(key_id, key_secret))
+                self.client = razorpay.Client(session=session, auth=(key_id, key_secret))
                 logger.info("Razorpay client initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize Razorpay client: {str(e)}")
@@ -189,3 +316,20 @@ class RazorpayService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Payment verification failed"
             )
+
+    def fetch_order_payments(self, razorpay_order_id: str) -> List[Dict[str, Any]]:
+        """
+        List the payment attempts Razorpay holds for an order (network call;
+        run with ``asyncio.to_thread``). Used by payment reconciliation.
+
+        Returns:
+            Payment entities (id, status, method, error_code, ...), oldest first
+        """
+        if not self.client:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Payment service not configured"
+            )
+
+        response = self.client.order.payments(razorpay_order_id)
+        return list(response.get("items") or [])
@@ -0,0 +1,320 @@
+"""
+Payment reconciliation against Razorpay.
+
+Compares ``payments`` and ``vendor_registration_payments`` with what the
+gateway actually holds for each order:
+
+* **pending** rows older than a short grace period - the client never came
+  back to verify and no webhook applied them. A captured payment at the
+  gateway completes the row; an order with no live attempt after
+  ``ABANDON_AFTER`` is marked failed; anything else is left for next time.
+* **recently completed** rows (since ``since``) are the suspicious side: the
+  recorded payment id should be a captured payment on the order. Mismatches
+  (refunded, never captured, unknown id) are reported, never auto-changed.
+
+Rows are read in keyset pages (``id > last_id``), each page's orders are
+fetched from the gateway concurrently - at most ``concurrency`` in flight and
+no more than ``rate_per_second`` call starts - and the page's verdicts are
+written with one ``apply_payment_reconciliation`` call, which only touches rows
+that are still pending.
+
+Run nightly by app.core.tasks (``run_nightly``, one worker per day) or on
+demand with ``scripts/reconcile_payments.py``.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.services.salon_service import invalidate_popular_cities_cache
+from app.utils.rpc import rpc_result
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_PAGE_SIZE = 200
+
+# Leave in-flight checkouts alone: the client or the webhook is still likely
+# to complete them.
+PENDING_GRACE = timedelta(minutes=30)
+
+# Razorpay orders accept new attempts for a while; after this a pending row
+# with no captured or in-flight attempt is treated as abandoned.
+ABANDON_AFTER = timedelta(hours=24)
+
+# A nightly claim that has not finished after this is taken to be from a
+# worker that died mid-run, and another worker may take it over.
+NIGHTLY_CLAIM_TIMEOUT = timedelta(hours=2)
+
+# Gateway payment states
+_CAPTURED = "captured"
+_IN_FLIGHT = {"created", "authorized"}
+_REFUNDED = "refunded"
+
+_RECONCILED_TABLES = ("vendor_registration_payments", "payments")
+_ROW_COLUMNS = "id, razorpay_order_id, razorpay_payment_id, status, created_at"
+
+
+def _parse_ts(value: Any) -> datetime:
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class _RateLimiter:
+    """Spaces call starts at least ``1 / per_second`` apart across tasks."""
+
+    def __init__(self, per_second: float):
+        self._interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class PaymentReconciliationService:
+    """Reconcile local payment rows with the Razorpay gateway."""
+
+    def __init__(
+        self,
+        db_client,
+        gateway,
+        *,
+        concurrency: int = 5,
+        rate_per_second: float = 5.0,
+        page_size: int = RECONCILIATION_PAGE_SIZE,
+        dry_run: bool = False,
+    ):
+        """
+        Args:
+            db_client: Supabase client (service role)
+            gateway: Object with a blocking ``fetch_order_payments(order_id)``
+                (RazorpayService, or a stub in tests)
+            concurrency: Max gateway calls in flight
+            rate_per_second: Max gateway call starts per second
+            page_size: Rows read (and verdicts written) per round
+            dry_run: Compute and report verdicts without writing them
+        """
+        self.db = db_client
+        self.gateway = gateway
+        self.page_size = page_size
+        self.dry_run = dry_run
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._rate_limiter = _RateLimiter(rate_per_second)
+        self._attempts: Dict[str, Optional[list]] = {}
+
+    @classmethod
+    async def from_config(cls, db_client, **options) -> "PaymentReconciliationService":
+        """Build the service on this worker's shared gateway (DB credentials)."""
+        from app.services.config_service import ConfigService
+        from app.services.payment import get_razorpay_gateway, resolve_razorpay_credentials
+
+        key_id, key_secret = await resolve_razorpay_credentials(ConfigService(db_client))
+        if not key_id or not key_secret:
+            raise RuntimeError("Razorpay credentials missing in system configuration")
+        return cls(db_client, get_razorpay_gateway(key_id, key_secret), **options)
+
+    # =====================================================
+    # ENTRY POINTS
+    # =====================================================
+
+    async def run(self, since: datetime, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Reconcile every pending row and every row completed since ``since``.
+
+        Returns a summary: rows checked, verdicts (captured / failed /
+        unchanged), rows actually updated, gateway errors and mismatches.
+        """
+        now = now or datetime.now(timezone.utc)
+        self._attempts = {}
+        summary: Dict[str, Any] = {
+            "checked": 0, "captured": 0, "failed": 0, "unchanged": 0,
+            "gateway_errors": 0, "payments_updated": 0,
+            "registrations_updated": 0, "salons_activated": 0,
+            "mismatches": [],
+        }
+
+        def pending(query):
+            return query.eq("status", "pending").lt("created_at", (now - PENDING_GRACE).isoformat())
+
+        def completed(query):
+            return query.eq("status", "success").gte("created_at", since.isoformat())
+
+        for table in _RECONCILED_TABLES:
+            for page in self._pages(table, pending):
+                verdicts = await self._check_pending(table, page, now, summary)
+                self._apply(verdicts, summary)
+
+            for page in self._pages(table, completed):
+                await self._check_completed(table, page, summary)
+
+        if summary["salons_activated"]:
+            invalidate_popular_cities_cache()
+
+        logger.info(
+            f"Payment reconciliation: checked={summary['checked']} captured={summary['captured']} "
+            f"failed={summary['failed']} mismatches={len(summary['mismatches'])} "
+            f"gateway_errors={summary['gateway_errors']}"
+        )
+        return summary
+
+    async def run_nightly(self, lookback: timedelta = timedelta(days=2)) -> Optional[Dict[str, Any]]:
+        """
+        Run once per UTC day across all workers.
+
+        The first worker to insert today's ``payment_reconciliation_runs`` row
+        runs and stores the summary there; the others return None. A claim
+        left unfinished for ``NIGHTLY_CLAIM_TIMEOUT`` (the worker crashed) is
+        taken over, so a failed run is retried the same day.
+        """
+        now = datetime.now(timezone.utc)
+        run_date = now.date().isoformat()
+        try:
+            self.db.table("payment_reconciliation_runs").insert({
+                "run_date": run_date,
+                "started_at": now.isoformat(),
+            }).execute()
+        except Exception as e:
+            if "duplicate key" not in str(e).lower():
+                raise
+            # Conditional update: only one worker can move a stale started_at
+            reclaimed = self.db.table("payment_reconciliation_runs").update({
+                "started_at": now.isoformat(),
+            }).eq("run_date", run_date).is_("finished_at", "null").lt(
+                "started_at", (now - NIGHTLY_CLAIM_TIMEOUT).isoformat()
+            ).execute()
+            if not reclaimed.data:
+                logger.debug(f"Payment reconciliation for {run_date} already claimed")
+                return None
+            logger.warning(f"Retrying unfinished payment reconciliation for {run_date}")
+
+        summary = await self.run(since=now - lookback, now=now)
+        self.db.table("payment_reconciliation_runs").update({
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "summary": summary,
+        }).eq("run_date", run_date).execute()
+        return summary
+
+    # =====================================================
+    # PAGING + GATEWAY
+    # =====================================================
+
+    def _pages(self, table: str, scope):
+        """Yield keyset pages of ``table`` rows (with an order id) matching ``scope``."""
+        last_id = None
+        while True:
+            query = self.db.table(table).select(_ROW_COLUMNS).not_.is_("razorpay_order_id", "null")
+            if table == "payments":
+                query = query.is_("deleted_at", "null")
+            query = scope(query)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(self.page_size).execute().data or []
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    async def _fetch_attempts(self, order_ids: List[str], summary: Dict[str, Any]) -> Dict[str, Optional[list]]:
+        """
+        Gateway attempts per order id (None when the lookup failed).
+
+        Answers are kept for the run, so a row completed by the pending pass
+        is not fetched again when the completed pass cross-checks it.
+        """
+        async def _one(order_id: str):
+            async with self._semaphore:
+                await self._rate_limiter.wait()
+                try:
+                    return order_id, await asyncio.to_thread(self.gateway.fetch_order_payments, order_id)
+                except Exception as e:
+                    logger.warning(f"Gateway lookup failed for order {order_id}: {str(e)}")
+                    summary["gateway_errors"] += 1
+                    return order_id, None
+
+        missing = [oid for oid in dict.fromkeys(order_ids) if oid not in self._attempts]
+        self._attempts.update(await asyncio.gather(*(_one(oid) for oid in missing)))
+        return {oid: self._attempts[oid] for oid in order_ids}
+
+    # =====================================================
+    # VERDICTS
+    # =====================================================
+
+    async def _check_pending(
+        self, table: str, rows: List[Dict[str, Any]], now: datetime, summary: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        attempts_by_order = await self._fetch_attempts([r["razorpay_order_id"] for r in rows], summary)
+        verdicts = []
+        for row in rows:
+            summary["checked"] += 1
+            attempts = attempts_by_order.get(row["razorpay_order_id"])
+            verdict = None if attempts is None else self._pending_verdict(row, attempts, now)
+            if verdict is None:
+                summary["unchanged"] += 1
+                continue
+            summary["captured" if verdict["status"] == "success" else "failed"] += 1
+            verdicts.append({"table": table, "id": row["id"], **verdict})
+        return verdicts
+
+    @staticmethod
+    def _pending_verdict(row: Dict[str, Any], attempts: List[Dict[str, Any]], now: datetime) -> Optional[Dict[str, Any]]:
+        captured = next((p for p in attempts if p.get("status") == _CAPTURED), None)
+        if captured:
+            return {
+                "status": "success",
+                "razorpay_payment_id": captured["id"],
+                "payment_method": captured.get("method"),
+            }
+
+        # Money moved and came back, or an attempt is still open: a human
+        # (or a later run) decides.
+        if any(p.get("status") in _IN_FLIGHT or p.get("status") == _REFUNDED for p in attempts):
+            return None
+        if now - _parse_ts(row["created_at"]) < ABANDON_AFTER:
+            return None
+
+        last_failure = next((p for p in reversed(attempts) if p.get("status") == "failed"), {})
+        return {
+            "status": "failed",
+            "error_code": last_failure.get("error_code"),
+            "error_description": last_failure.get("error_description"),
+            "failure_reason": "No captured payment at gateway (reconciliation)",
+        }
+
+    async def _check_completed(self, table: str, rows: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
+        attempts_by_order = await self._fetch_attempts([r["razorpay_order_id"] for r in rows], summary)
+        for row in rows:
+            summary["checked"] += 1
+            attempts = attempts_by_order.get(row["razorpay_order_id"])
+            if attempts is None:
+                continue
+            recorded = next((p for p in attempts if p.get("id") == row.get("razorpay_payment_id")), None)
+            if recorded and recorded.get("status") == _CAPTURED:
+                continue
+            mismatch = {
+                "table": table,
+                "id": row["id"],
+                "razorpay_order_id": row["razorpay_order_id"],
+                "razorpay_payment_id": row.get("razorpay_payment_id"),
+                "gateway_status": recorded.get("status") if recorded else None,
+            }
+            logger.warning(f"Payment reconciliation mismatch: {mismatch}")
+            summary["mismatches"].append(mismatch)
+
+    def _apply(self, verdicts: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
+        if not verdicts or self.dry_run:
+            return
+        response = self.db.rpc("apply_payment_reconciliation", {"p_results": verdicts}).execute()
+        counts = rpc_result(response) or {}
+        summary["payments_updated"] += counts.get("payments_updated") or 0
+        summary["registrations_updated"] += counts.get("registrations_updated") or 0
+        summary["salons_activated"] += counts.get("salons_activated") or 0
@@ -10,18 +10,20 @@ Handles all payment-related database operations and business logic:
 Follows service layer pattern - no direct DB calls in API layer
 
 CREDENTIALS MANAGEMENT:
-- Razorpay credentials are fetched fresh from database on each payment request
-- Ensures credentials are always up-to-date
-- No caching layer - changes take effect immediately
+- Razorpay credentials are read from the database once per worker and cached
+- The gateway client is shared per worker (app.services.payment.get_razorpay_gateway)
+- Changing a razorpay_key_* config invalidates both, so new keys apply on the next request
 """
 
+import asyncio
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, status
 import logging
 
-from app.services.payment import RazorpayService, resolve_razorpay_credentials
+from app.services.payment import get_razorpay_gateway, resolve_razorpay_credentials
 from app.services.config_service import ConfigService
 from app.services.pricing_service import PricingService, LineItem
+from app.services.salon_service import invalidate_popular_cities_cache
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +40,8 @@ class PaymentService:
     
     async def _initialize_razorpay(self):
         """
-        Initialize Razorpay client with credentials from database.
-        Credentials are fetched fresh from database on each payment request.
+        Attach the worker's shared Razorpay gateway, resolved from the cached
+        database credentials.
         """
         if self._razorpay_initialized:
             return
@@ -63,11 +65,8 @@ class PaymentService:
                 detail="Payment service is not configured. Please contact support."
             )
 
-        # Initialize Razorpay service with database credentials only
-        self.razorpay = RazorpayService(
-            razorpay_key_id=razorpay_key_id,
-            razorpay_key_secret=razorpay_key_secret
-        )
+        # Shared per worker; rebuilt only when the credentials change
+        self.razorpay = get_razorpay_gateway(razorpay_key_id, razorpay_key_secret)
 
         if not self.razorpay or not self.razorpay.client:
             logger.error("Razorpay initialization failed with configured database credentials")
@@ -78,7 +77,6 @@ class PaymentService:
 
         self._razorpay_key_id = razorpay_key_id
         self._razorpay_initialized = True
-        logger.info("Razorpay initialized with credentials from database")
     
     async def verify_cart_payment(
         self,
@@ -156,7 +154,8 @@ class PaymentService:
         5. Returns order details for frontend to open Razorpay modal
         
         Important: This does NOT create a booking or payment record.
-        It only initiates the payment process with Razorpay.
+        It only initiates the payment process with Razorpay and stores the
+        priced snapshot in payment_orders for checkout to validate against.
         The actual booking is created in CustomerService.checkout_cart()
         after payment verification.
         
@@ -277,11 +276,12 @@ class PaymentService:
                 "coupon_gross_discount": pricing.get("coupon_gross_discount", 0.0),
             }
 
-            # Create Razorpay order with cart + pinned-pricing snapshot. Checkout
-            # trusts these values (after re-validating the cart hasn't changed)
-            # instead of recomputing.
+            # Create Razorpay order. The cart + pinned-pricing snapshot also goes
+            # into the notes for the Razorpay dashboard; checkout reads it from
+            # payment_orders (below) and trusts it after re-validating the cart.
             import json
-            order = self.razorpay.create_order(
+            order = await asyncio.to_thread(
+                self.razorpay.create_order,
                 amount=total_payment,
                 currency="INR",
                 receipt=f"cart_{user_id[:8]}",
@@ -299,6 +299,20 @@ class PaymentService:
                 }
             )
 
+            # Local copy of the snapshot: checkout validates against this row
+            # instead of fetching the order back from Razorpay.
+            self.db.table("payment_orders").insert({
+                "razorpay_order_id": order["order_id"],
+                "customer_id": user_id,
+                "salon_id": salon_id,
+                "order_type": "cart_checkout",
+                "amount": round(total_payment, 2),
+                "currency": "INR",
+                "coupon_code": pricing["coupon_code"],
+                "cart_snapshot": cart_snapshot,
+                "pricing": pinned_pricing,
+            }).execute()
+
             logger.info(f"Created cart payment order: {order['order_id']} for user {user_id}")
 
             return {
@@ -406,7 +420,8 @@ class PaymentService:
             registration_fee = float(registration_fee_config.get("config_value"))
             
             # Create Razorpay order
-            order = self.razorpay.create_order(
+            order = await asyncio.to_thread(
+                self.razorpay.create_order,
                 amount=registration_fee,
                 currency="INR",
                 receipt=f"vendor_reg_{vendor_request_id[:8]}",
@@ -488,111 +503,139 @@ class PaymentService:
                     detail="Invalid payment signature"
                 )
             
-            # IDEMPOTENCY CHECK: Fetch payment record first
-            payment_record = self.db.table("vendor_registration_payments").select(
-                "*, vendor_id, salon_id, vendor_request_id"
+            return await self.complete_vendor_registration_payment(
+                razorpay_order_id, razorpay_payment_id, razorpay_signature
+            )
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Vendor registration payment verification failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Payment verification failed: {str(e)}"
+            )
+
+    async def complete_vendor_registration_payment(
+        self,
+        razorpay_order_id: str,
+        razorpay_payment_id: str,
+        razorpay_signature: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Mark a vendor registration payment successful and activate its salon.
+
+        Shared by the client verify endpoint (after the signature check) and
+        the webhook worker (payment.captured / order.paid, no checkout
+        signature). Safe to call repeatedly for the same order.
+
+        Implements idempotency and race condition protection through:
+        1. Atomic UPDATE with status check (prevents double-processing)
+        2. Idempotency check for already-completed payments
+        3. UNIQUE razorpay_payment_id (a payment can complete one order only)
+        """
+        # IDEMPOTENCY CHECK: Fetch payment record first
+        payment_record = self.db.table("vendor_registration_payments").select(
+            "*, vendor_id, salon_id, vendor_request_id"
+        ).eq("razorpay_order_id", razorpay_order_id).single().execute()
+        
+        if not payment_record.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Payment record not found"
+            )
+        
+        payment_data = payment_record.data
+        
+        # Check if payment is already processed (idempotent behavior)
+        if payment_data.get("status") == "success":
+            logger.warning(f"Vendor registration payment already processed (idempotent return): {razorpay_order_id}")
+            return {
+                "success": True,
+                "message": "Payment already verified.",
+                "payment_id": payment_data.get("razorpay_payment_id"),
+                "salon_id": payment_data.get("salon_id")
+            }
+        
+        vendor_request_id = payment_data.get("vendor_request_id")  # Direct column access
+        
+        # ATOMIC UPDATE with status check to prevent race conditions
+        # Only update if status is still 'pending' (optimistic locking pattern)
+        completion = {
+            "razorpay_payment_id": razorpay_payment_id,
+            "status": "success",
+            "payment_completed_at": "now()",
+            "updated_at": "now()"
+        }
+        if razorpay_signature:
+            completion["razorpay_signature"] = razorpay_signature
+        payment_update = self.db.table("vendor_registration_payments").update(
+            completion
+        ).eq("razorpay_order_id", razorpay_order_id).eq("status", "pending").execute()
+        
+        # Check if update succeeded (no rows affected = payment already processed by concurrent request)
+        if not payment_update.data or len(payment_update.data) == 0:
+            logger.warning(f"Vendor registration payment already processed by concurrent request: {razorpay_order_id}")
+            # Re-fetch the completed payment data
+            completed_payment = self.db.table("vendor_registration_payments").select(
+                "*, salon_id"
             ).eq("razorpay_order_id", razorpay_order_id).single().execute()
             
-            if not payment_record.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Payment record not found"
-                )
-            
-            payment_data = payment_record.data
-            
-            # Check if payment is already processed (idempotent behavior)
-            if payment_data.get("status") == "success":
-                logger.warning(f"Vendor registration payment already processed (idempotent return): {razorpay_order_id}")
-                return {
-                    "success": True,
-                    "message": "Payment already verified.",
-                    "payment_id": payment_data.get("razorpay_payment_id"),
-                    "salon_id": payment_data.get("salon_id")
-                }
-            
-            vendor_request_id = payment_data.get("vendor_request_id")  # Direct column access
-            
-            # ATOMIC UPDATE with status check to prevent race conditions
-            # Only update if status is still 'pending' (optimistic locking pattern)
-            payment_update = self.db.table("vendor_registration_payments").update({
-                "razorpay_payment_id": razorpay_payment_id,
-                "razorpay_signature": razorpay_signature,
-                "status": "success",
-                "payment_completed_at": "now()",
-                "updated_at": "now()"
-            }).eq("razorpay_order_id", razorpay_order_id).eq("status", "pending").execute()
-            
-            # Check if update succeeded (no rows affected = payment already processed by concurrent request)
-            if not payment_update.data or len(payment_update.data) == 0:
-                logger.warning(f"Vendor registration payment already processed by concurrent request: {razorpay_order_id}")
-                # Re-fetch the completed payment data
-                completed_payment = self.db.table("vendor_registration_payments").select(
-                    "*, salon_id"
-                ).eq("razorpay_order_id", razorpay_order_id).single().execute()
-                
-                return {
-                    "success": True,
-                    "message": "Payment already verified.",
-                    "payment_id": completed_payment.data.get("razorpay_payment_id"),
-                    "salon_id": completed_payment.data.get("salon_id")
-                }
+            return {
+                "success": True,
+                "message": "Payment already verified.",
+                "payment_id": completed_payment.data.get("razorpay_payment_id"),
+                "salon_id": completed_payment.data.get("salon_id")
+            }
+        
+        # Get vendor join request to find salon
+        salon_data = None
+        if vendor_request_id:
+            vendor_request = self.db.table("vendor_join_requests").select(
+                "id, owner_name, owner_email"
+            ).eq("id", vendor_request_id).single().execute()
             
-            # Get vendor join request to find salon
-            salon_data = None
-            if vendor_request_id:
-                vendor_request = self.db.table("vendor_join_requests").select(
-                    "id, owner_name, owner_email"
-                ).eq("id", vendor_request_id).single().execute()
+            if vendor_request.data:
+                # Find salon created from this request
+                salon_response = self.db.table("salons").select(
+                    "id, business_name, vendor_id"
+                ).eq("join_request_id", vendor_request_id).single().execute()
                 
-                if vendor_request.data:
-                    # Find salon created from this request
-                    salon_response = self.db.table("salons").select(
-                        "id, business_name, vendor_id"
-                    ).eq("join_request_id", vendor_request_id).single().execute()
+                if salon_response.data:
+                    salon_data = salon_response.data
+                    salon_id = salon_data["id"]
                     
-                    if salon_response.data:
-                        salon_data = salon_response.data
-                        salon_id = salon_data["id"]
-                        
-                        # Activate salon and update registration payment
-                        self.db.table("salons").update({
-                            "is_active": True,
-                            "registration_fee_paid": True,
-                            "updated_at": "now()"
-                        }).eq("id", salon_id).execute()
-                        
-                        # Link payment to salon
-                        self.db.table("vendor_registration_payments").update({
-                            "salon_id": salon_id
-                        }).eq("razorpay_order_id", razorpay_order_id).execute()
-                        
-                        logger.info(f"Vendor registration payment verified: {razorpay_payment_id}, salon activated: {salon_id}")
-            
-            if not salon_data:
-                # Payment successful but salon not yet created
-                return {
-                    "success": True,
-                    "message": "Payment verified successfully! Please complete your salon profile.",
-                    "payment_id": razorpay_payment_id,
-                    "vendor_request_id": vendor_request_id
-                }
-            
-            # TODO: Send payment receipt and welcome emails
-            
+                    # Activate salon and update registration payment
+                    self.db.table("salons").update({
+                        "is_active": True,
+                        "registration_fee_paid": True,
+                        "updated_at": "now()"
+                    }).eq("id", salon_id).execute()
+                    invalidate_popular_cities_cache()
+                    
+                    # Link payment to salon
+                    self.db.table("vendor_registration_payments").update({
+                        "salon_id": salon_id
+                    }).eq("razorpay_order_id", razorpay_order_id).execute()
+                    
+                    logger.info(f"Vendor registration payment verified: {razorpay_payment_id}, salon activated: {salon_id}")
+        
+        if not salon_data:
+            # Payment successful but salon not yet created
             return {
                 "success": True,
-                "message": "Payment verified successfully! Your salon is now active.",
+                "message": "Payment verified successfully! Please complete your salon profile.",
                 "payment_id": razorpay_payment_id,
-                "salon_id": salon_data["id"],
-                "salon_name": salon_data["business_name"]
+                "vendor_request_id": vendor_request_id
             }
         
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Vendor registration payment verification failed: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Payment verification failed: {str(e)}"
-            )
+        # TODO: Send payment receipt and welcome emails
+        
+        return {
+            "success": True,
+            "message": "Payment verified successfully! Your salon is now active.",
+            "payment_id": razorpay_payment_id,
+            "salon_id": salon_data["id"],
+            "salon_name": salon_data["business_name"]
+        }
+
@@ -0,0 +1,258 @@
+"""
+Razorpay webhook inbox.
+
+``POST /payments/webhook`` does the minimum on the request path: check the
+``X-Razorpay-Signature`` HMAC, store the raw event in
+``payment_webhook_events`` and return 200, so Razorpay's delivery never waits
+on our writes. ``process_pending`` (run by the background loop in
+app.core.tasks) claims due events in batches and applies them:
+
+* ``payment.captured`` / ``order.paid`` complete whichever local record owns
+  the Razorpay order - a vendor registration fee, a booking convenience fee
+  (``verify_payment_and_confirm_booking``), a product order or a cart
+  payment order;
+* ``payment.failed`` records the gateway error on a pending registration fee
+  (the row stays pending: the customer may retry on the same order);
+* anything else is kept for audit and marked ``ignored``.
+
+Every application is idempotent - each target moves only from its pending
+state and carries a UNIQUE ``razorpay_payment_id`` - so Razorpay redeliveries
+and a client verifying the same payment concurrently resolve to one write.
+Failed applications are retried with backoff up to ``WEBHOOK_MAX_ATTEMPTS``.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.services.config_service import ConfigService
+from app.services.payment import resolve_razorpay_webhook_secret, verify_webhook_signature
+from app.services.payment_service import PaymentService
+
+logger = logging.getLogger(__name__)
+
+# After this many failed applications an event is parked as 'failed' for a
+# human (or the reconciliation job) to look at.
+WEBHOOK_MAX_ATTEMPTS = 8
+
+# Retry delay doubles per attempt, capped.
+WEBHOOK_RETRY_MAX_DELAY_SECONDS = 900
+
+_CAPTURE_EVENTS = {"payment.captured", "order.paid"}
+_FAILURE_EVENTS = {"payment.failed"}
+
+
+def _is_unique_violation(error: Exception) -> bool:
+    message = str(error).lower()
+    return "duplicate key" in message or "23505" in message
+
+
+def _payment_entity(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return ((payload.get("payload") or {}).get("payment") or {}).get("entity") or {}
+
+
+def _order_entity(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return ((payload.get("payload") or {}).get("order") or {}).get("entity") or {}
+
+
+def _retry_delay(attempts: int) -> int:
+    return min(2 ** attempts, WEBHOOK_RETRY_MAX_DELAY_SECONDS)
+
+
+class PaymentWebhookService:
+    """Ingest Razorpay webhook events and apply them in the background."""
+
+    def __init__(self, db_client):
+        self.db = db_client
+
+    # =====================================================
+    # INGEST (request path)
+    # =====================================================
+
+    async def ingest(
+        self,
+        raw_body: bytes,
+        signature: Optional[str],
+        event_id: Optional[str] = None
+    ) -> bool:
+        """
+        Verify and store one webhook delivery.
+
+        Returns True when the event was new, False for a redelivery of an
+        event already in the inbox.
+
+        Raises:
+            HTTPException: 503 when no webhook secret is configured, 400 on a
+                bad signature or a body that is not a JSON event.
+        """
+        secret = await resolve_razorpay_webhook_secret(ConfigService(self.db))
+        if not secret:
+            logger.error("Razorpay webhook secret missing in system configuration")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Payment webhook is not configured"
+            )
+
+        if not verify_webhook_signature(raw_body, signature, secret):
+            logger.warning("Rejected Razorpay webhook with invalid signature")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid webhook signature"
+            )
+
+        try:
+            payload = json.loads(raw_body)
+            event_type = payload["event"]
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Malformed webhook payload"
+            )
+
+        payment = _payment_entity(payload)
+        order = _order_entity(payload)
+        row = {
+            # Razorpay sends a stable id per event across retries; fall back
+            # to the body hash so a retried delivery still dedupes.
+            "event_id": event_id or hashlib.sha256(raw_body).hexdigest()[:64],
+            "event_type": event_type,
+            "payload": payload,
+            "razorpay_order_id": payment.get("order_id") or order.get("id"),
+            "razorpay_payment_id": payment.get("id"),
+        }
+
+        try:
+            self.db.table("payment_webhook_events").insert(row).execute()
+        except Exception as e:
+            if _is_unique_violation(e):
+                logger.info(f"Duplicate Razorpay webhook delivery ignored: {row['event_id']}")
+                return False
+            raise
+
+        logger.info(f"Queued Razorpay webhook {event_type} for order {row['razorpay_order_id']}")
+        return True
+
+    # =====================================================
+    # PROCESS (background worker)
+    # =====================================================
+
+    async def process_pending(self, limit: int = 50) -> int:
+        """Claim and apply up to ``limit`` due events. Returns how many were claimed."""
+        response = self.db.rpc("claim_payment_webhook_events", {"p_limit": limit}).execute()
+        events = response.data or []
+        for event in events:
+            await self._process(event)
+        return len(events)
+
+    async def _process(self, event: Dict[str, Any]) -> None:
+        try:
+            outcome = await self._apply(event)
+        except Exception as e:
+            attempts = event.get("attempts") or 1
+            give_up = attempts >= WEBHOOK_MAX_ATTEMPTS
+            logger.error(
+                f"Razorpay webhook {event.get('event_id')} failed (attempt {attempts}): {str(e)}",
+                exc_info=give_up
+            )
+            retry_at = datetime.now(timezone.utc) + timedelta(seconds=_retry_delay(attempts))
+            self.db.table("payment_webhook_events").update({
+                "status": "failed" if give_up else "pending",
+                "last_error": str(e)[:1000],
+                "available_at": retry_at.isoformat(),
+            }).eq("id", event["id"]).execute()
+            return
+
+        self.db.table("payment_webhook_events").update({
+            "status": outcome,
+            "last_error": None,
+            "processed_at": "now()",
+        }).eq("id", event["id"]).execute()
+
+    async def _apply(self, event: Dict[str, Any]) -> str:
+        """Apply one event; returns the final inbox status ('processed' / 'ignored')."""
+        event_type = event.get("event_type")
+        order_id = event.get("razorpay_order_id")
+        if not order_id:
+            return "ignored"
+
+        if event_type in _CAPTURE_EVENTS:
+            payment_id = event.get("razorpay_payment_id")
+            if not payment_id:
+                return "ignored"
+            try:
+                return await self._apply_capture(order_id, payment_id)
+            except Exception as e:
+                # The payment id is already recorded elsewhere: the client
+                # (or an earlier delivery) got there first.
+                if _is_unique_violation(e):
+                    logger.info(f"Payment {payment_id} already applied, skipping webhook")
+                    return "processed"
+                raise
+
+        if event_type in _FAILURE_EVENTS:
+            return self._apply_failure(order_id, _payment_entity(event.get("payload") or {}))
+
+        return "ignored"
+
+    async def _apply_capture(self, order_id: str, payment_id: str) -> str:
+        # Vendor registration fee: same transition as /payments/registration/verify
+        registration = self.db.table("vendor_registration_payments").select(
+            "id"
+        ).eq("razorpay_order_id", order_id).execute()
+        if registration.data:
+            await PaymentService(self.db).complete_vendor_registration_payment(order_id, payment_id)
+            return "processed"
+
+        # Booking convenience fee: the atomic payment + booking RPC
+        booking_payment = self.db.table("payments").select(
+            "id, status"
+        ).eq("razorpay_order_id", order_id).eq(
+            "payment_type", "convenience_fee"
+        ).is_("deleted_at", "null").execute()
+        if booking_payment.data:
+            if booking_payment.data[0].get("status") == "pending":
+                self.db.rpc("verify_payment_and_confirm_booking", {
+                    "p_razorpay_order_id": order_id,
+                    "p_razorpay_payment_id": payment_id,
+                    "p_razorpay_signature": None,
+                }).execute()
+            return "processed"
+
+        # Product order
+        product_order = self.db.table("product_orders").select(
+            "id"
+        ).eq("razorpay_order_id", order_id).execute()
+        if product_order.data:
+            self.db.table("product_orders").update({
+                "status": "paid",
+                "payment_status": "completed",
+                "razorpay_payment_id": payment_id,
+                "updated_at": "now()",
+            }).eq("razorpay_order_id", order_id).eq("payment_status", "pending").execute()
+            return "processed"
+
+        # Cart checkout order: record the capture; checkout creates the booking
+        cart_order = self.db.table("payment_orders").select(
+            "razorpay_order_id"
+        ).eq("razorpay_order_id", order_id).execute()
+        if cart_order.data:
+            self.db.table("payment_orders").update({
+                "status": "paid",
+                "razorpay_payment_id": payment_id,
+                "paid_at": "now()",
+            }).eq("razorpay_order_id", order_id).eq("status", "created").execute()
+            return "processed"
+
+        logger.warning(f"Razorpay webhook for unknown order {order_id}")
+        return "ignored"
+
+    def _apply_failure(self, order_id: str, payment: Dict[str, Any]) -> str:
+        updated = self.db.table("vendor_registration_payments").update({
+            "error_code": payment.get("error_code"),
+            "error_description": payment.get("error_description"),
+            "updated_at": "now()",
+        }).eq("razorpay_order_id", order_id).eq("status", "pending").execute()
+        return "processed" if updated.data else "ignored"
@@ -49,6 +49,100 @@ def _discount(base: float, discount_type: str, value: float, cap: Optional[float
     return round(max(amount, 0.0), 2)
 
 
+def _base_totals(line_items: List[LineItem], convenience_fee_percentage: float) -> Dict[str, float]:
+    """Coupon-independent sums for a cart: original/sale totals and the fee base."""
+    original_service_price = round(
+        sum(li.original_unit_price * li.quantity for li in line_items), 2
+    )
+    subtotal_service_price = round(
+        sum(li.effective_unit_price * li.quantity for li in line_items), 2
+    )
+    return {
+        "original_service_price": original_service_price,
+        "subtotal_service_price": subtotal_service_price,
+        "sale_discount": round(max(original_service_price - subtotal_service_price, 0.0), 2),
+        "convenience_fee_base": round(
+            original_service_price * float(convenience_fee_percentage) / 100.0, 2
+        ),
+    }
+
+
+def _apply_coupon(
+    base: Dict[str, float],
+    coupon: Optional[Dict[str, Any]],
+    coupon_reason: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Price a cart (given its base totals) with an already-validated coupon or none."""
+    original_service_price = base["original_service_price"]
+    subtotal_service_price = base["subtotal_service_price"]
+    sale_discount = base["sale_discount"]
+    convenience_fee_base = base["convenience_fee_base"]
+
+    # Defaults: no coupon applied
+    service_total_due = subtotal_service_price
+    discount_amount = 0.0
+    convenience_fee_discount = 0.0
+    convenience_fee_due = convenience_fee_base
+    coupon_id: Optional[str] = None
+    applied_code: Optional[str] = None
+    discount_source: Optional[str] = "sale" if sale_discount > 0 else None
+    # Gross coupon discount: the full value of the coupon, independent of any
+    # salon sale. Used for settlement/reporting (coupon_redemptions.gross_discount);
+    # `discount_amount` stays the net delta recorded against the booking.
+    coupon_gross_discount = 0.0
+
+    if coupon and coupon["applies_to"] == "service":
+        # Best-of against the active salon sale (no stacking)
+        coupon_discount = _discount(
+            original_service_price,
+            coupon["discount_type"],
+            coupon["discount_value"],
+            coupon.get("max_discount_cap"),
+        )
+        if coupon_discount > sale_discount:
+            service_total_due = round(original_service_price - coupon_discount, 2)
+            discount_amount = round(subtotal_service_price - service_total_due, 2)
+            discount_source = "coupon"
+            coupon_id = coupon["id"]
+            applied_code = coupon["code"]
+            coupon_gross_discount = coupon_discount
+        else:
+            coupon_reason = "A better discount is already applied at this salon."
+    elif coupon and coupon["applies_to"] == "convenience_fee":
+        fee_discount = _discount(
+            convenience_fee_base,
+            coupon["discount_type"],
+            coupon["discount_value"],
+            coupon.get("max_discount_cap"),
+        )
+        if fee_discount > 0:
+            convenience_fee_discount = fee_discount
+            convenience_fee_due = round(convenience_fee_base - fee_discount, 2)
+            coupon_id = coupon["id"]
+            applied_code = coupon["code"]
+            coupon_gross_discount = fee_discount
+
+    total_amount = round(service_total_due + convenience_fee_due, 2)
+
+    return {
+        "original_service_price": original_service_price,
+        "subtotal_service_price": subtotal_service_price,
+        "discount_amount": discount_amount,
+        "service_total_due": service_total_due,
+        "convenience_fee_base": convenience_fee_base,
+        "convenience_fee_discount": convenience_fee_discount,
+        "convenience_fee_due": convenience_fee_due,
+        "total_amount": total_amount,
+        "pay_now": convenience_fee_due,
+        "pay_at_salon": service_total_due,
+        "coupon_id": coupon_id,
+        "coupon_code": applied_code,
+        "coupon_gross_discount": round(coupon_gross_discount, 2),
+        "discount_source": discount_source,
+        "coupon_reason": coupon_reason,
+    }
+
+
 class PricingService:
     def __init__(self, db_client):
         self.db = db_client
@@ -71,88 +165,59 @@ class PricingService:
           convenience_fee_due, total_amount, pay_now, pay_at_salon,
           coupon_id, coupon_code, discount_source, coupon_reason
         """
-        original_service_price = round(
-            sum(li.original_unit_price * li.quantity for li in line_items), 2
-        )
-        subtotal_service_price = round(
-            sum(li.effective_unit_price * li.quantity for li in line_items), 2
-        )
-        sale_discount = round(max(original_service_price - subtotal_service_price, 0.0), 2)
-
-        convenience_fee_base = round(
-            original_service_price * float(convenience_fee_percentage) / 100.0, 2
-        )
+        base = _base_totals(line_items, convenience_fee_percentage)
 
-        # Defaults: no coupon applied
-        service_total_due = subtotal_service_price
-        discount_amount = 0.0
-        convenience_fee_discount = 0.0
-        convenience_fee_due = convenience_fee_base
-        coupon_id: Optional[str] = None
-        applied_code: Optional[str] = None
-        discount_source: Optional[str] = "sale" if sale_discount > 0 else None
+        coupon: Optional[Dict[str, Any]] = None
         coupon_reason: Optional[str] = None
-        # Gross coupon discount: the full value of the coupon, independent of any
-        # salon sale. Used for settlement/reporting (coupon_redemptions.gross_discount);
-        # `discount_amount` stays the net delta recorded against the booking.
-        coupon_gross_discount = 0.0
-
         if coupon_code:
-            coupon, reason = await self.coupon_service.get_valid_coupon(
+            coupon, coupon_reason = await self.coupon_service.get_valid_coupon(
                 code=coupon_code,
                 salon_id=salon_id,
                 customer_id=customer_id,
-                service_subtotal=subtotal_service_price,
+                service_subtotal=base["subtotal_service_price"],
             )
-            if not coupon:
-                coupon_reason = reason
-            elif coupon["applies_to"] == "service":
-                # Best-of against the active salon sale (no stacking)
-                coupon_discount = _discount(
-                    original_service_price,
-                    coupon["discount_type"],
-                    coupon["discount_value"],
-                    coupon.get("max_discount_cap"),
-                )
-                if coupon_discount > sale_discount:
-                    service_total_due = round(original_service_price - coupon_discount, 2)
-                    discount_amount = round(subtotal_service_price - service_total_due, 2)
-                    discount_source = "coupon"
-                    coupon_id = coupon["id"]
-                    applied_code = coupon["code"]
-                    coupon_gross_discount = coupon_discount
-                else:
-                    coupon_reason = "A better discount is already applied at this salon."
-            elif coupon["applies_to"] == "convenience_fee":
-                fee_discount = _discount(
-                    convenience_fee_base,
-                    coupon["discount_type"],
-                    coupon["discount_value"],
-                    coupon.get("max_discount_cap"),
-                )
-                if fee_discount > 0:
-                    convenience_fee_discount = fee_discount
-                    convenience_fee_due = round(convenience_fee_base - fee_discount, 2)
-                    coupon_id = coupon["id"]
-                    applied_code = coupon["code"]
-                    coupon_gross_discount = fee_discount
-
-        total_amount = round(service_total_due + convenience_fee_due, 2)
-
-        return {
-            "original_service_price": original_service_price,
-            "subtotal_service_price": subtotal_service_price,
-            "discount_amount": discount_amount,
-            "service_total_due": service_total_due,
-            "convenience_fee_base": convenience_fee_base,
-            "convenience_fee_discount": convenience_fee_discount,
-            "convenience_fee_due": convenience_fee_due,
-            "total_amount": total_amount,
-            "pay_now": convenience_fee_due,
-            "pay_at_salon": service_total_due,
-            "coupon_id": coupon_id,
-            "coupon_code": applied_code,
-            "coupon_gross_discount": round(coupon_gross_discount, 2),
-            "discount_source": discount_source,
-            "coupon_reason": coupon_reason,
-        }
+
+        return _apply_coupon(base, coupon, coupon_reason)
+
+    async def quote_coupons(
+        self,
+        line_items: List[LineItem],
+        convenience_fee_percentage: float,
+        salon_id: str,
+        customer_id: str,
+        coupons: List[Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Price one cart against many candidate coupon rows in a single pass.
+
+        The cart sums are computed once and eligibility for every coupon comes
+        from one CouponService.check_coupons call (one check_coupon_eligibility
+        round-trip), so a coupon picker can show exact savings without one
+        compute_booking_pricing round per coupon.
+
+        Returns {coupon_id: {reason_code, pricing, savings}} where `pricing` has
+        the compute_booking_pricing shape and `savings` is how much less the
+        customer pays than with no coupon (0.0 when the coupon would not apply).
+        """
+        base = _base_totals(line_items, convenience_fee_percentage)
+        baseline_total = _apply_coupon(base, None)["total_amount"]
+
+        checked = await self.coupon_service.check_coupons(
+            coupons,
+            salon_id=salon_id,
+            customer_id=customer_id,
+            service_subtotal=base["subtotal_service_price"],
+        )
+
+        quotes: Dict[str, Dict[str, Any]] = {}
+        for coupon, reason_code in checked:
+            if reason_code:
+                pricing = _apply_coupon(base, None, CouponService.reason_message(reason_code))
+            else:
+                pricing = _apply_coupon(base, coupon)
+            quotes[coupon["id"]] = {
+                "reason_code": reason_code,
+                "pricing": pricing,
+                "savings": round(max(baseline_total - pricing["total_amount"], 0.0), 2),
+            }
+        return quotes
@@ -4,9 +4,24 @@ from fastapi import HTTPException, status
 from supabase import Client
 
 from app.services.product_service import is_b2b_role, effective_unit_price
+from app.utils.rpc import rpc_result
 
 logger = logging.getLogger(__name__)
 
+# Reason codes returned by product_cart_add / product_cart_set_quantity
+# (20261018000005_add_cart_upsert_functions.sql).
+_CART_RPC_ERRORS = {
+    "invalid_quantity": (400, "Quantity must be greater than 0"),
+    "product_not_found": (404, "Product not found"),
+    "item_not_found": (404, "Cart item not found"),
+    "insufficient_stock": (400, "Requested quantity exceeds available stock"),
+}
+
+
+def _raise_cart_error(reason: Optional[str]) -> None:
+    status_code, detail = _CART_RPC_ERRORS.get(reason, (500, "Failed to update cart"))
+    raise HTTPException(status_code=status_code, detail=detail)
+
 class ProductCartService:
     def __init__(self, db_client: Client):
         self.db = db_client
@@ -68,35 +83,16 @@ class ProductCartService:
     async def add_to_cart(self, user_id: str, product_id: str, quantity: int = 1) -> Dict[str, Any]:
         """Add a product to the cart or increment quantity"""
         try:
-            # 1. Check that the product exists and read its available stock
-            product_resp = self.db.table("products").select("id, stock_quantity").eq("id", product_id).maybe_single().execute()
-            if not product_resp or not product_resp.data:
-                raise HTTPException(status_code=404, detail="Product not found")
+            # Stock check + upsert in one transaction (product_cart_add)
+            response = self.db.rpc("product_cart_add", {
+                "p_user_id": user_id,
+                "p_product_id": product_id,
+                "p_quantity": quantity
+            }).execute()
+            row = rpc_result(response) or {}
+            if not row.get("success"):
+                _raise_cart_error(row.get("reason"))
 
-            stock = product_resp.data.get("stock_quantity") or 0
-
-            # 2. Check if already in cart
-            existing = self.db.table("product_cart_items")\
-                .select("id, quantity")\
-                .eq("user_id", user_id)\
-                .eq("product_id", product_id)\
-                .execute()
-
-            # 3. Resulting quantity must not exceed available stock
-            if existing.data:
-                new_qty = existing.data[0]["quantity"] + quantity
-                if new_qty > stock:
-                    raise HTTPException(status_code=400, detail="Requested quantity exceeds available stock")
-                self.db.table("product_cart_items").update({"quantity": new_qty}).eq("id", existing.data[0]["id"]).execute()
-            else:
-                if quantity > stock:
-                    raise HTTPException(status_code=400, detail="Requested quantity exceeds available stock")
-                self.db.table("product_cart_items").insert({
-                    "user_id": user_id,
-                    "product_id": product_id,
-                    "quantity": quantity
-                }).execute()
-                
             return {"success": True, "message": "Product added to cart"}
         except HTTPException:
             raise
@@ -110,29 +106,14 @@ class ProductCartService:
             if quantity <= 0:
                 return await self.remove_item(user_id, item_id)
 
-            # Resolve the cart item (and its product) so we can validate stock
-            item_resp = self.db.table("product_cart_items")\
-                .select("id, product_id")\
-                .eq("id", item_id)\
-                .eq("user_id", user_id)\
-                .maybe_single().execute()
-            if not item_resp or not item_resp.data:
-                raise HTTPException(status_code=404, detail="Cart item not found")
-
-            product_resp = self.db.table("products")\
-                .select("stock_quantity")\
-                .eq("id", item_resp.data["product_id"])\
-                .maybe_single().execute()
-            stock = (product_resp.data.get("stock_quantity") or 0) if (product_resp and product_resp.data) else 0
-            if quantity > stock:
-                raise HTTPException(status_code=400, detail="Requested quantity exceeds available stock")
-
-            response = self.db.table("product_cart_items").update({"quantity": quantity})\
-                .eq("id", item_id)\
-                .eq("user_id", user_id).execute()
-
-            if not response.data:
-                raise HTTPException(status_code=404, detail="Cart item not found")
+            response = self.db.rpc("product_cart_set_quantity", {
+                "p_user_id": user_id,
+                "p_item_id": item_id,
+                "p_quantity": quantity
+            }).execute()
+            row = rpc_result(response) or {}
+            if not row.get("success"):
+                _raise_cart_error(row.get("reason"))
 
             return {"success": True, "message": "Cart updated"}
         except HTTPException:
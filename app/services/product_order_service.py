@@ -1,23 +1,37 @@
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 from fastapi import HTTPException, status
 import uuid
 import datetime
 
 from app.services.product_service import effective_unit_price
+from app.utils.export import EXPORT_PAGE_SIZE
+from app.utils.keyset import iter_keyset_pages, keyset_page
 
 logger = logging.getLogger(__name__)
 
+# Fields of GET /admin/product-orders/export, in CSV column order
+ORDER_EXPORT_COLUMNS = (
+    "id", "order_number", "created_at", "status", "payment_status",
+    "user_id", "customer_name", "customer_phone",
+    "subtotal", "discount_total", "total_amount", "items",
+    "shipping_address", "razorpay_order_id", "razorpay_payment_id",
+)
+
 # Allowed order lifecycle states (kept in sync with the admin route's Literal
 # and the product_orders table comment).
 VALID_ORDER_STATUSES = {"pending", "paid", "shipped", "delivered", "cancelled"}
 
+# Line item fields embedded in the admin listing
+ORDER_ITEM_COLUMNS = "id, product_id, product_name, quantity, unit_price, total_price, image_url"
+
 class ProductOrderService:
     def __init__(self, db_client):
         self.db = db_client
 
     async def _get_razorpay_creds(self):
-        """Fetch Razorpay credentials from database (with env fallback for dev mode)"""
+        """Resolve Razorpay credentials (cached per worker, with env fallback for dev mode)"""
         from app.services.config_service import ConfigService
         from app.services.payment import resolve_razorpay_credentials
 
@@ -81,7 +95,7 @@ class ProductOrderService:
         order_number = f"ORD-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{str(uuid.uuid4())[:4].upper()}"
 
         try:
-            from app.services.payment import RazorpayService
+            from app.services.payment import get_razorpay_gateway
 
             key_id, key_secret, is_dev_mode = await self._get_razorpay_creds()
 
@@ -96,10 +110,11 @@ class ProductOrderService:
                 razorpay_order_id = f"dev_order_{uuid.uuid4().hex[:16]}"
                 rzp_currency = "INR"
             else:
-                # Real Razorpay mode: Initialize service with current keys
-                temp_rzp_service = RazorpayService(razorpay_key_id=key_id, razorpay_key_secret=key_secret)
+                # Real Razorpay mode: the worker's shared gateway for these keys
+                gateway = get_razorpay_gateway(key_id, key_secret)
 
-                rzp_order = temp_rzp_service.create_order(
+                rzp_order = await asyncio.to_thread(
+                    gateway.create_order,
                     amount=float(total_amount),
                     receipt=order_number,
                     notes={
@@ -202,14 +217,14 @@ class ProductOrderService:
         """Verify Razorpay payment signature and update order status"""
         
         try:
-            from app.services.payment import RazorpayService
+            from app.services.payment import get_razorpay_gateway
             
             # Use same credentials as creation
             key_id, key_secret, _ = await self._get_razorpay_creds()
-            temp_rzp_service = RazorpayService(razorpay_key_id=key_id, razorpay_key_secret=key_secret)
+            gateway = get_razorpay_gateway(key_id, key_secret)
 
-            # 1. Verify signature with Razorpay
-            is_valid = temp_rzp_service.verify_payment_signature(
+            # 1. Verify signature (local HMAC check, no network call)
+            is_valid = gateway.verify_payment_signature(
                 razorpay_order_id=razorpay_order_id,
                 razorpay_payment_id=razorpay_payment_id,
                 razorpay_signature=razorpay_signature
@@ -271,54 +286,123 @@ class ProductOrderService:
             logger.error(f"Error fetching user orders: {e}")
             return []
 
-    async def get_all_orders(self) -> List[Dict[str, Any]]:
-        """Get all product orders for admin"""
-        try:
-            logger.info("Fetching all product orders for admin...")
-            # 1. Fetch all orders
-            orders_response = self.db.table("product_orders")\
-                .select("*")\
-                .order("created_at", desc=True)\
-                .execute()
-            
-            orders = orders_response.data or []
-            logger.info(f"Found {len(orders)} orders in database")
-            
-            if not orders:
-                return []
+    async def get_all_orders(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of product orders for admin, newest first.
+
+        Keyset-paginated on (created_at, id): pass pagination.next_cursor back
+        as ``cursor`` for the following page. Line items are embedded in the
+        orders query; customer profiles are read for this page's users only.
+
+        Args:
+            limit: Orders per page
+            cursor: next_cursor of the previous page
+            status: Filter by order status
+            date_from: Orders created on or after this day (UTC)
+            date_to: Orders created on or before this day (UTC)
+            user_id: Orders of one customer
+
+        Raises:
+            HTTPException: 400 on an invalid cursor or date range, 500 if the query fails
+        """
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from must be on or before date_to")
 
-            # 2. Collect all unique user IDs
-            user_ids = list(set(order['user_id'] for order in orders))
-            
-            # 3. Fetch profiles for these users
-            profiles_response = self.db.table("profiles")\
-                .select("id, full_name, phone, user_role")\
-                .in_("id", user_ids)\
-                .execute()
-            
-            profiles_map = {p['id']: p for p in profiles_response.data or []}
-
-            # 4. Fetch all line items in one query, then group by order_id
-            order_ids = [order['id'] for order in orders]
-            items_response = self.db.table("product_order_items")\
-                .select("*")\
-                .in_("order_id", order_ids)\
-                .execute()
-            items_by_order: Dict[str, List[Dict[str, Any]]] = {}
-            for it in items_response.data or []:
-                items_by_order.setdefault(it['order_id'], []).append(it)
-
-            result = []
+        try:
+            query = self.db.table("product_orders").select(
+                f"*, product_order_items({ORDER_ITEM_COLUMNS})"
+            )
+            if status:
+                query = query.eq("status", status)
+            if user_id:
+                query = query.eq("user_id", user_id)
+            if date_from:
+                query = query.gte("created_at", date_from.isoformat())
+            if date_to:
+                query = query.lt("created_at", (date_to + datetime.timedelta(days=1)).isoformat())
+
+            try:
+                orders, next_cursor = keyset_page(query, limit, cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+            # user_id references auth.users, so profiles can't be embedded
+            profiles_map = self._page_profiles(orders, "id, full_name, phone, user_role")
             for order in orders:
                 order['profiles'] = profiles_map.get(order['user_id'])
-                order['items'] = items_by_order.get(order['id'], [])
-                result.append(order)
+                order['items'] = order.pop('product_order_items', None) or []
 
-            return result
+            return {
+                "success": True,
+                "data": orders,
+                "pagination": {
+                    "limit": limit,
+                    "next_cursor": next_cursor,
+                    "has_next": next_cursor is not None
+                }
+            }
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching all orders: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch orders")
 
+    def _page_profiles(self, orders: List[Dict[str, Any]], columns: str) -> Dict[str, Dict[str, Any]]:
+        """Profiles of one page's customers, keyed by id."""
+        user_ids = list({o["user_id"] for o in orders})
+        if not user_ids:
+            return {}
+        profiles = self.db.table("profiles").select(columns).in_("id", user_ids).execute().data or []
+        return {p["id"]: p for p in profiles}
+
+    def iter_order_export(
+        self,
+        status: Optional[str] = None,
+        page_size: int = EXPORT_PAGE_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield every product order, a page at a time, oldest first (keyset on
+        created_at, id), with the customer and line items of that page only.
+
+        Synchronous on purpose: the export response iterates it in a worker
+        thread while streaming.
+        """
+        def build_query():
+            query = self.db.table("product_orders").select(
+                "id, order_number, created_at, status, payment_status, user_id, "
+                "subtotal, discount_total, total_amount, shipping_address, "
+                "razorpay_order_id, razorpay_payment_id"
+            )
+            if status:
+                query = query.eq("status", status)
+            return query
+
+        for orders in iter_keyset_pages(build_query, page_size):
+            profiles_map = self._page_profiles(orders, "id, full_name, phone")
+
+            items = self.db.table("product_order_items").select(
+                "order_id, product_name, quantity, unit_price, total_price"
+            ).in_("order_id", [o["id"] for o in orders]).execute().data or []
+            items_by_order: Dict[str, List[Dict[str, Any]]] = {}
+            for it in items:
+                order_id = it.pop("order_id")
+                items_by_order.setdefault(order_id, []).append(it)
+
+            for order in orders:
+                profile = profiles_map.get(order["user_id"]) or {}
+                order["customer_name"] = profile.get("full_name")
+                order["customer_phone"] = profile.get("phone")
+                order["items"] = items_by_order.get(order["id"], [])
+            yield orders
+
     async def update_order_status(self, order_id: str, status: str) -> Dict[str, Any]:
         """Update order status (e.g., shipped, delivered, cancelled)"""
         if status not in VALID_ORDER_STATUSES:
@@ -0,0 +1,109 @@
+"""
+Shared profile lookups.
+
+Several services decorate their rows with a person's name, email or phone
+(salon owners and RMs on the admin salon list, customers and vendors on booking
+emails, ...). Each used to issue its own ``profiles`` query, so one request
+could read the same profile two or three times.
+
+Lookups go through two layers:
+
+* a request memo (app.core.request_scope), so a profile is fetched at most
+  once per request no matter how many services ask for it;
+* a short process-wide TTL cache, so consecutive admin page loads don't
+  re-read the same owners. Writes to the looked-up columns call
+  ``invalidate_profile_lookup``; the TTL bounds staleness for other workers.
+
+Every lookup reads the same small column set, so entries are interchangeable
+between callers.
+"""
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.cache import KeyedTTLCache
+from app.core.request_scope import request_memo
+
+logger = logging.getLogger(__name__)
+
+PROFILE_LOOKUP_COLUMNS = "id, full_name, email, phone"
+
+# Names and emails change rarely; a few seconds of staleness on another worker
+# is fine for display and notification purposes.
+PROFILE_LOOKUP_TTL_SECONDS = 30
+
+_PROFILES_MEMO = "profiles"
+
+_PROFILE_CACHE = KeyedTTLCache(ttl_seconds=PROFILE_LOOKUP_TTL_SECONDS)
+
+
+def invalidate_profile_lookup(user_id: Optional[str] = None) -> None:
+    """
+    Forget cached profiles. Call after updating full_name / email / phone.
+
+    With no ``user_id`` the whole process cache is dropped.
+    """
+    memo = request_memo(_PROFILES_MEMO)
+    if user_id is None:
+        _PROFILE_CACHE.clear()
+        if memo is not None:
+            memo.clear()
+        return
+    _PROFILE_CACHE.pop(str(user_id))
+    if memo is not None:
+        memo.pop(str(user_id), None)
+
+
+class ProfileLookup:
+    """Batched, cached ``profiles`` reads by id."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_many(self, user_ids: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return ``{id: profile}`` for the given ids.
+
+        Unknown ids are simply absent from the result. All ids that neither
+        cache layer holds are fetched with one ``in_`` query.
+        """
+        wanted = {str(uid) for uid in user_ids if uid}
+        if not wanted:
+            return {}
+
+        memo = request_memo(_PROFILES_MEMO)
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        if memo is not None:
+            for uid in wanted:
+                if uid in memo:
+                    found[uid] = memo[uid]
+
+        for uid in wanted - found.keys():
+            cached = _PROFILE_CACHE.get(uid)
+            if cached is not None:
+                found[uid] = cached
+
+        missing = wanted - found.keys()
+        if missing:
+            response = self.db.table("profiles").select(
+                PROFILE_LOOKUP_COLUMNS
+            ).in_("id", sorted(missing)).execute()
+            fetched = {str(p["id"]): p for p in (response.data or [])}
+
+            for uid in missing:
+                found[uid] = fetched.get(uid)
+                # Misses stay request-local: the profile may be created a
+                # moment later (signup racing an admin page load).
+                if found[uid] is not None:
+                    _PROFILE_CACHE.set(uid, found[uid])
+
+        if memo is not None:
+            memo.update(found)
+
+        return {uid: dict(p) for uid, p in found.items() if p is not None}
+
+    def get(self, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Single-id convenience wrapper around ``get_many``."""
+        if not user_id:
+            return None
+        return self.get_many([user_id]).get(str(user_id))
@@ -2,19 +2,52 @@
 Relationship Manager (RM) Service - Business Logic Layer
 Handles RM profile management, scoring, and vendor request tracking
 """
+import asyncio
 import logging
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from fastapi import HTTPException, status
 
+from app.core.cache import KeyedTTLCache
 from app.schemas import VendorJoinRequestCreate
 from app.schemas.request.rm import RMProfileUpdate
 from app.services.activity_log_service import ActivityLogService
 from app.services.email import email_service
+from app.services.profile_lookup import invalidate_profile_lookup
 from app.utils.location_text import normalize_city_name
+from app.utils.rpc import rpc_result
 
 logger = logging.getLogger(__name__)
 
+# The dashboard is reloaded on every RM app focus; a few seconds of staleness
+# is fine. The RM's own writes and score changes drop the entry.
+RM_DASHBOARD_TTL_SECONDS = 30
+
+_RM_DASHBOARD_CACHE = KeyedTTLCache(ttl_seconds=RM_DASHBOARD_TTL_SECONDS)
+
+
+# Leaderboard rows per period, refreshed by update_rm_score on this worker and
+# by the scheduled refresh in app.core.tasks; the TTL bounds how long other
+# workers serve the previous ranking.
+RM_LEADERBOARD_PERIODS = ("week", "month", "all_time")
+RM_LEADERBOARD_MAX = 100
+RM_LEADERBOARD_TTL_SECONDS = 300
+
+_RM_LEADERBOARD_CACHE = KeyedTTLCache(ttl_seconds=RM_LEADERBOARD_TTL_SECONDS)
+
+
+def invalidate_rm_leaderboard() -> None:
+    """Drop the cached leaderboard for every period."""
+    _RM_LEADERBOARD_CACHE.clear()
+
+
+def invalidate_rm_dashboard(rm_id: Optional[str] = None) -> None:
+    """Drop one RM's cached dashboard, or every dashboard when no id is given."""
+    if rm_id is None:
+        _RM_DASHBOARD_CACHE.clear()
+    else:
+        _RM_DASHBOARD_CACHE.pop(rm_id)
+
 
 @dataclass
 class RMScoreUpdate:
@@ -70,48 +103,28 @@ class RMService:
     
     async def get_rm_stats(self, rm_id: str) -> VendorRequestStats:
         """
-        Get comprehensive stats for RM's vendor requests using efficient database aggregations.
-        Uses COUNT queries with indexes instead of loading all records into memory.
-        
+        Get stats for RM's vendor requests.
+
+        One rm_dashboard_stats() call: request counts come from a single
+        GROUP BY status, the score from rm_profiles.
+
         Args:
             rm_id: RM profile ID
-            
+
         Returns:
             VendorRequestStats with all metrics
         """
-        # Get counts directly from database using Supabase aggregation
-        # These queries use indexes (idx_vendor_join_requests_rm_status) for O(1) performance
-        total_response = self.db.table("vendor_join_requests").select(
-            "id", count="exact"
-        ).eq("rm_id", rm_id).execute()
-        
-        pending_response = self.db.table("vendor_join_requests").select(
-            "id", count="exact"
-        ).eq("rm_id", rm_id).eq("status", "pending").execute()
-        
-        approved_response = self.db.table("vendor_join_requests").select(
-            "id", count="exact"
-        ).eq("rm_id", rm_id).eq("status", "approved").execute()
-        
-        rejected_response = self.db.table("vendor_join_requests").select(
-            "id", count="exact"
-        ).eq("rm_id", rm_id).eq("status", "rejected").execute()
-        
-        # Get performance score from rm_profiles
-        rm_profile_response = self.db.table("rm_profiles").select(
-            "performance_score"
-        ).eq("id", rm_id).execute()
-        
-        performance_score = 0
-        if rm_profile_response.data and len(rm_profile_response.data) > 0:
-            performance_score = rm_profile_response.data[0].get("performance_score", 0)
-        
+        response = self.db.rpc("rm_dashboard_stats", {"p_rm_id": rm_id}).execute()
+        return self._stats_from_row(rpc_result(response) or {})
+
+    @staticmethod
+    def _stats_from_row(row: Dict[str, Any]) -> VendorRequestStats:
         return VendorRequestStats(
-            total_requests=total_response.count or 0,
-            pending_requests=pending_response.count or 0,
-            approved_requests=approved_response.count or 0,
-            rejected_requests=rejected_response.count or 0,
-            total_score=performance_score
+            total_requests=row.get("total_requests") or 0,
+            pending_requests=row.get("pending_requests") or 0,
+            approved_requests=row.get("approved_requests") or 0,
+            rejected_requests=row.get("rejected_requests") or 0,
+            total_score=row.get("total_score") or 0
         )
     
     async def list_rm_profiles(
@@ -215,7 +228,15 @@ class RMService:
             
             self.db.table("rm_score_history").insert(history_data).execute()
             
+            invalidate_rm_dashboard(rm_id)
             logger.info(f"RM {rm_id} score updated: {current_score} -> {new_score} ({score_change:+d})")
+
+            # The score is saved; a failed re-rank only delays the leaderboard
+            # until the next scheduled refresh.
+            try:
+                await self.refresh_leaderboard()
+            except Exception as e:
+                logger.warning(f"RM leaderboard refresh failed after score update: {str(e)}")
             
             return RMScoreUpdate(
                 success=True,
@@ -355,6 +376,7 @@ class RMService:
             
             if not profile_response.data:
                 raise ValueError("Profile not found or update failed")
+            invalidate_profile_lookup(rm_id)
             
             logger.info(f"Profile {rm_id} updated: {list(profile_updates.keys())}")
         
@@ -371,6 +393,7 @@ class RMService:
         
         if not profile_updates and not rm_updates:
             raise ValueError("No valid fields to update")
+        invalidate_rm_dashboard(rm_id)
         
         # Return combined data
         return await self.get_rm_profile(rm_id)
@@ -381,27 +404,51 @@ class RMService:
         period: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
-        Get RM leaderboard by total score.
+        Get RM leaderboard, served from the in-process cache.
+
+        Backed by the rm_leaderboard_mv materialised view (via the
+        get_rm_leaderboard RPC), so a cache miss is an index scan over the
+        pre-ranked rows.
         
         Args:
-            limit: Number of top RMs to return
-            period: Optional time period filter (not implemented yet)
+            limit: Number of top RMs to return (at most RM_LEADERBOARD_MAX)
+            period: week, month or all_time (default)
             
         Returns:
-            List of top RMs with rankings
+            List of {rank, rm_id, full_name, score, period}
+
+        Raises:
+            HTTPException: 400 on an unknown period
         """
-        # Public endpoint: expose name only, never email (PII)
-        response = self.db.table("rm_profiles").select(
-            "*, profiles(full_name)"
-        ).order("performance_score", desc=True).limit(limit).execute()
-        
-        rms = response.data or []
-        
-        # Add rankings
-        for idx, rm in enumerate(rms, start=1):
-            rm["rank"] = idx
-        
-        return rms
+        period = period or "all_time"
+        if period not in RM_LEADERBOARD_PERIODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"period must be one of: {', '.join(RM_LEADERBOARD_PERIODS)}"
+            )
+
+        rows = _RM_LEADERBOARD_CACHE.get(period)
+        if rows is None:
+            # Public endpoint: the view holds the name only, never email (PII)
+            response = self.db.rpc("get_rm_leaderboard", {
+                "p_period": period,
+                "p_limit": RM_LEADERBOARD_MAX,
+            }).execute()
+            rows = [{**row, "period": period} for row in response.data or []]
+            _RM_LEADERBOARD_CACHE.set(period, rows)
+
+        return [dict(row) for row in rows[:limit]]
+
+    async def refresh_leaderboard(self) -> None:
+        """
+        Recompute the materialised leaderboard, then re-warm this worker's
+        cache for every period. Run on a schedule by app.core.tasks and after
+        every score change.
+        """
+        self.db.rpc("refresh_rm_leaderboard", {}).execute()
+        invalidate_rm_leaderboard()
+        for period in RM_LEADERBOARD_PERIODS:
+            await self.get_leaderboard(period=period)
     
     # =====================================================
     # VENDOR REQUEST CRUD
@@ -453,6 +500,7 @@ class RMService:
 
             # Create request
             response = self.db.table("vendor_join_requests").insert(db_data).execute()
+            invalidate_rm_dashboard(rm_id)
             
             if not response.data:
                 raise HTTPException(
@@ -575,6 +623,7 @@ class RMService:
             response = self.db.table("vendor_join_requests").update(
                 update_data
             ).eq("id", request_id).execute()
+            invalidate_rm_dashboard(rm_id)
             
             if not response.data:
                 raise HTTPException(
@@ -667,6 +716,7 @@ class RMService:
             self.db.table("vendor_join_requests").delete().eq(
                 "id", request_id
             ).execute()
+            invalidate_rm_dashboard(rm_id)
             
             logger.info(f"Successfully deleted draft request {request_id}")
             
@@ -727,6 +777,10 @@ class RMService:
     async def get_rm_dashboard(self, rm_id: str) -> Dict[str, Any]:
         """
         Get comprehensive dashboard statistics for RM.
+
+        The profile, the rm_dashboard_stats() row (request counts, score and
+        active salon count) and the recent score history are fetched
+        concurrently; the result is cached per RM for RM_DASHBOARD_TTL_SECONDS.
         
         Args:
             rm_id: RM profile ID
@@ -737,21 +791,32 @@ class RMService:
         Raises:
             HTTPException: If RM profile not found
         """
+        cached = _RM_DASHBOARD_CACHE.get(rm_id)
+        if cached is not None:
+            return cached
+
         try:
-            # Get RM profile
-            profile = await self.get_rm_profile(rm_id)
-            
-            # Get stats
-            stats = await self.get_rm_stats(rm_id)
-            
-            # Get active salons count
-            salons = await self.get_rm_salons(rm_id, include_inactive=False)
-            
-            # Get recent score changes
-            recent_scores = await self.get_rm_score_history(rm_id, limit=5)
-            
-            return {
-                "profile": profile,
+            profile_response, stats_response, scores_response = await asyncio.gather(
+                asyncio.to_thread(self.db.table("rm_profiles").select(
+                    "*, profiles(id, full_name, email, phone, is_active, avatar_url, user_role, created_at, updated_at, phone_verified)"
+                ).eq("id", rm_id).execute),
+                asyncio.to_thread(self.db.rpc("rm_dashboard_stats", {"p_rm_id": rm_id}).execute),
+                asyncio.to_thread(self.db.table("rm_score_history").select(
+                    "*"
+                ).eq("rm_id", rm_id).order("created_at", desc=True).limit(5).execute),
+            )
+
+            if not profile_response.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"RM profile {rm_id} not found"
+                )
+
+            row = stats_response.data[0] if stats_response.data else {}
+            stats = self._stats_from_row(row)
+
+            dashboard = {
+                "profile": profile_response.data[0],
                 "statistics": {
                     "total_score": stats.total_score,
                     "total_salons_added": stats.total_requests,
@@ -759,11 +824,15 @@ class RMService:
                     "pending_requests": stats.pending_requests,
                     "approved_requests": stats.approved_requests,
                     "rejected_requests": stats.rejected_requests,
-                    "active_salons": len(salons)
+                    "active_salons": row.get("active_salons") or 0
                 },
-                "recent_scores": recent_scores
+                "recent_scores": scores_response.data or []
             }
+            _RM_DASHBOARD_CACHE.set(rm_id, dashboard)
+            return dashboard
         
+        except HTTPException:
+            raise
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
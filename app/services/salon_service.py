@@ -7,10 +7,58 @@ from typing import Dict, Any, Optional, List, Union
 from fastapi import HTTPException, status
 from app.schemas.request.vendor import SalonUpdate
 from dataclasses import dataclass
+from app.core.cache import TTLCache
+from app.services.admin_service import invalidate_dashboard_stats_cache
+from app.services.city_index import CityResolver
+from app.services.profile_lookup import ProfileLookup
 from app.utils.location_text import normalize_city_name
 
 logger = logging.getLogger(__name__)
 
+# Largest `limit` the popular-cities endpoint accepts. The cache holds this many
+# rows and smaller requests are served by slicing, so one entry covers them all.
+POPULAR_CITIES_MAX = 20
+
+# Column projections for salon list queries. Listings never need the
+# geography blob, so it isn't transferred; the public list also leaves out KYC
+# numbers and audit columns. Everything a listing card shows (facilities,
+# outlet, GST badge) must be listed here: SalonListResponse passes through
+# only what is selected.
+PUBLIC_SALON_LIST_COLUMNS = (
+    "id, business_name, description, address, city, city_id, state, pincode, "
+    "phone, email, latitude, longitude, average_rating, total_reviews, "
+    "logo_url, cover_images, opening_time, closing_time, working_days, "
+    "business_hours, accepting_bookings, salon_type, vendor_id, "
+    "is_active, is_verified, registration_fee_paid, is_public, "
+    "has_discount, max_discount_pct, facilities, outlet, is_gst, created_at, "
+    "vendor_join_requests(business_type), cities(name)"
+)
+
+# GET /admin/salons/ has no detail route behind it: the admin UI reads every
+# field it shows (KYC, hours, location, agreement) from this list.
+ADMIN_SALON_LIST_COLUMNS = (
+    "id, business_name, description, email, phone, address, city, city_id, "
+    "state, pincode, latitude, longitude, gst_number, pan_number, "
+    "logo_url, cover_images, opening_time, closing_time, working_days, "
+    "business_hours, facilities, outlet, is_gst, average_rating, "
+    "total_reviews, salon_type, vendor_id, assigned_rm, join_request_id, "
+    "is_active, is_verified, verified_at, verified_by, "
+    "registration_fee_paid, registration_payment_id, "
+    "agreement_document_url, accepting_bookings, is_public, "
+    "created_at, updated_at, deleted_at"
+)
+
+# Read on every home page load, changed only when a salon is approved,
+# deactivated or moves city. Those writes invalidate this process immediately;
+# the TTL bounds how long *other* workers can serve the previous ranking, and
+# the scheduled refresh in app.core.tasks re-warms it in the background.
+_POPULAR_CITIES_CACHE = TTLCache(ttl_seconds=300)
+
+
+def invalidate_popular_cities_cache() -> None:
+    """Drop the cached popular-cities ranking. Called after visibility changes."""
+    _POPULAR_CITIES_CACHE.clear()
+
 
 @dataclass
 class SalonSearchParams:
@@ -47,7 +95,13 @@ class SalonService:
         self.db = db_client
 
     def _apply_city_filter(self, query, city: Optional[str]):
-        """Apply case-insensitive exact city filter."""
+        """
+        Filter by city on the canonical integer `city_id`.
+
+        The typed name (any casing, spacing or known alias) is resolved in
+        memory by CityResolver. A name no salon has ever used falls back to the
+        old case-insensitive text match, which is correct but unindexed.
+        """
         if not city:
             return query
 
@@ -55,12 +109,22 @@ class SalonService:
         if not normalized_city:
             return query
 
+        city_id = CityResolver(self.db).resolve(normalized_city)
+        if city_id is not None:
+            return query.eq("city_id", city_id)
+
         return query.ilike("city", normalized_city)
 
     def _normalize_salon_cities(self, salons: List[Dict[str, Any]]) -> None:
-        """Ensure salon city values use consistent Title Case in API responses."""
+        """
+        Show the canonical city name from the embedded `cities(name)` join, so
+        aliases render consistently; rows without it fall back to Title Case.
+        """
         for salon in salons:
-            if salon.get("city"):
+            canonical = salon.pop("cities", None)
+            if isinstance(canonical, dict) and canonical.get("name"):
+                salon["city"] = canonical["name"]
+            elif salon.get("city"):
                 salon["city"] = normalize_city_name(salon["city"])
 
     @staticmethod
@@ -86,47 +150,22 @@ class SalonService:
             if isinstance(vjr, dict):
                 salon["business_type"] = vjr.get("business_type")
 
-    async def _attach_discount_flags(self, salons: List[Dict[str, Any]]) -> None:
+    @staticmethod
+    def _attach_discount_flags(salons: List[Dict[str, Any]]) -> None:
         """
-        Enrich salons with `has_discounted_services` and `max_discount_percentage`.
+        Expose the precomputed discount summary as `has_discounted_services`
+        and `max_discount_percentage` (drives the "UPTO X% OFF" card badge).
 
-        `has_discounted_services` is true when at least one active service for the
-        salon has either discounted_price set or discount_percentage > 0.
-        `max_discount_percentage` is the largest service discount % for the salon
-        (drives the "UPTO X% OFF" card badge); derived from discount_percentage,
-        or from price vs discounted_price when only the absolute price is set.
+        Both come from salons.has_discount / salons.max_discount_pct, which a
+        trigger on services keeps current (see the
+        20261018000001_add_salon_discount_summary migration), so listings no
+        longer download every service row of the page to aggregate here.
+        The raw columns are popped so the response keeps its existing shape.
         """
-        if not salons:
-            return
-
-        salon_ids = [s.get("id") for s in salons if s.get("id")]
-        if not salon_ids:
-            return
-
-        discounted_response = self.db.table("services").select(
-            "salon_id, price, discounted_price, discount_percentage"
-        ).in_("salon_id", salon_ids).eq("is_active", True).execute()
-
-        discounted_salon_ids = set()
-        max_pct_by_salon: Dict[str, float] = {}
-        for service in (discounted_response.data or []):
-            sid = service.get("salon_id")
-            pct = float(service.get("discount_percentage") or 0)
-            # Fall back to deriving a % from an absolute discounted_price.
-            if pct <= 0 and service.get("discounted_price") is not None:
-                price = float(service.get("price") or 0)
-                discounted = float(service.get("discounted_price") or 0)
-                if price > 0 and 0 <= discounted < price:
-                    pct = (price - discounted) / price * 100
-            if pct > 0 or service.get("discounted_price") is not None:
-                discounted_salon_ids.add(sid)
-            if pct > max_pct_by_salon.get(sid, 0):
-                max_pct_by_salon[sid] = pct
-
         for salon in salons:
-            sid = salon.get("id")
-            salon["has_discounted_services"] = sid in discounted_salon_ids
-            max_pct = max_pct_by_salon.get(sid, 0)
+            has_discount = salon.pop("has_discount", None)
+            max_pct = float(salon.pop("max_discount_pct", None) or 0)
+            salon["has_discounted_services"] = bool(has_discount)
             salon["max_discount_percentage"] = round(max_pct) if max_pct > 0 else None
 
     async def _attach_vendor_coupons(self, salons: List[Dict[str, Any]]) -> None:
@@ -153,7 +192,7 @@ class SalonService:
         """
         if not salon:
             return
-        await self._attach_discount_flags([salon])
+        self._attach_discount_flags([salon])
         await self._attach_vendor_coupons([salon])
         from app.services.coupon_service import CouponService
         salon["platform_coupons"] = CouponService(self.db).public_platform_coupons()
@@ -161,27 +200,37 @@ class SalonService:
     @staticmethod
     def is_publicly_visible(salon: Dict[str, Any]) -> bool:
         """
-        The three gates a salon must pass to be shown publicly:
-        active, admin-verified, and registration fee paid.
+        Whether a salon may be shown publicly: active, admin-verified,
+        registration fee paid, not soft-deleted and not a regular_buyer
+        (product-only) account.
+
+        Reads the generated `is_public` column when the row carries it, so the
+        rule lives in one place (the 20261018000002_add_salons_is_public
+        migration); partial rows fall back to evaluating the same gates.
         """
+        if "is_public" in salon:
+            return bool(salon["is_public"])
         return bool(
             salon.get("is_active")
             and salon.get("is_verified")
             and salon.get("registration_fee_paid")
+            and not salon.get("deleted_at")
+            and salon.get("salon_type") != "regular_buyer"
         )
 
-    def _public_salons_query(self, select: str = "*, vendor_join_requests(business_type)"):
+    def _public_salons_query(
+        self,
+        select: str = PUBLIC_SALON_LIST_COLUMNS
+    ):
         """
-        Base query for public salon listings: active + verified + paid, and
-        excluding regular_buyer (product-only) accounts that don't offer services.
+        Base query for public salon listings, filtered on the generated
+        `is_public` flag so it is served by the partial `WHERE is_public`
+        indexes on city / state / created_at / average_rating.
         """
         return (
             self.db.table("salons")
             .select(select)
-            .eq("is_active", True)
-            .eq("is_verified", True)
-            .eq("registration_fee_paid", True)
-            .neq("salon_type", "regular_buyer")
+            .eq("is_public", True)
         )
 
     async def _finalize_public_salons(self, salons: List[Dict[str, Any]]) -> None:
@@ -191,9 +240,34 @@ class SalonService:
         """
         self.flatten_business_type(salons)
         self._normalize_salon_cities(salons)
-        await self._attach_discount_flags(salons)
+        self._attach_discount_flags(salons)
         await self._attach_vendor_coupons(salons)
 
+    async def get_popular_cities(self, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Top cities by public salon count, served from the in-process cache.
+
+        Backed by the popular_cities_mv materialised view (via the
+        get_popular_cities RPC), so a cache miss is an index scan, never an
+        aggregate over salons.
+        """
+        def _load() -> List[Dict[str, Any]]:
+            response = self.db.rpc(
+                "get_popular_cities", {"result_limit": POPULAR_CITIES_MAX}
+            ).execute()
+            return response.data or []
+
+        return _POPULAR_CITIES_CACHE.get(_load)[:limit]
+
+    async def refresh_popular_cities(self) -> None:
+        """
+        Recompute the materialised view, then re-warm this worker's cache.
+        Run on a schedule by app.core.tasks.
+        """
+        self.db.rpc("refresh_popular_cities", {}).execute()
+        invalidate_popular_cities_cache()
+        await self.get_popular_cities()
+
     async def get_salon(
         self,
         salon_id: str,
@@ -252,9 +326,9 @@ class SalonService:
         Returns:
             List of salons matching criteria
         """
-        # Select salon data with related RM and vendor profiles
-        # Using simpler approach - fetch profiles separately if needed
-        query = self.db.table("salons").select("*")
+        # Vendor and RM profiles are attached afterwards from the shared
+        # profile lookup rather than joined here.
+        query = self.db.table("salons").select(ADMIN_SALON_LIST_COLUMNS)
         
         # Apply filters
         if params.city:
@@ -300,34 +374,39 @@ class SalonService:
         if not salons:
             return
         
-        # Collect unique vendor and RM IDs
-        vendor_ids = [s.get("vendor_id") for s in salons if s.get("vendor_id")]
-        rm_ids = [s.get("rm_id") for s in salons if s.get("rm_id")]
-        
-        # Fetch vendor profiles
-        vendor_profiles = {}
-        if vendor_ids:
-            vendor_response = self.db.table("profiles").select("id, full_name").in_("id", vendor_ids).execute()
-            vendor_profiles = {p["id"]: p for p in (vendor_response.data or [])}
-        
-        # Fetch RM profiles with user data in single query
-        rm_profiles = {}
+        # Collect unique vendor and RM IDs (RMs are linked via assigned_rm)
+        vendor_ids = {s.get("vendor_id") for s in salons if s.get("vendor_id")}
+        rm_ids = {s.get("assigned_rm") for s in salons if s.get("assigned_rm")}
+
+        # One deduplicated, cached profiles read covers owners and RMs alike.
+        people = ProfileLookup(self.db).get_many(vendor_ids | rm_ids)
+
+        # Only the RM-specific column is left to fetch
+        employee_ids = {}
         if rm_ids:
             rm_response = self.db.table("rm_profiles").select(
-                "id, employee_id, profiles(id, full_name, email)"
-            ).in_("id", rm_ids).execute()
-            
-            # Map RM ID to profile data
-            for rm in (rm_response.data or []):
-                rm_profiles[rm["id"]] = rm
-        
+                "id, employee_id"
+            ).in_("id", list(rm_ids)).execute()
+            employee_ids = {rm["id"]: rm.get("employee_id") for rm in (rm_response.data or [])}
+
         # Enrich each salon
         for salon in salons:
-            if salon.get("vendor_id") and salon["vendor_id"] in vendor_profiles:
-                salon["profiles"] = vendor_profiles[salon["vendor_id"]]
-            
-            if salon.get("rm_id") and salon["rm_id"] in rm_profiles:
-                salon["rm_profiles"] = rm_profiles[salon["rm_id"]]
+            vendor = people.get(str(salon.get("vendor_id")))
+            if vendor:
+                salon["profiles"] = {"id": vendor["id"], "full_name": vendor.get("full_name")}
+
+            rm_id = salon.get("assigned_rm")
+            if rm_id and rm_id in employee_ids:
+                rm_person = people.get(str(rm_id))
+                salon["rm_profiles"] = {
+                    "id": rm_id,
+                    "employee_id": employee_ids[rm_id],
+                    "profiles": {
+                        "id": rm_person["id"],
+                        "full_name": rm_person.get("full_name"),
+                        "email": rm_person.get("email"),
+                    } if rm_person else None,
+                }
     
     async def get_nearby_salons(self, params: NearbySearchParams) -> List[Dict[str, Any]]:
         """
@@ -349,31 +428,31 @@ class SalonService:
         
         salons = response.data or []
         
-        # The RPC function returns neither salon_type nor the joined business_type,
-        # so one secondary lookup covers both: excluding regular_buyer salons (they
-        # can only buy products, not offer services) and giving the nearby cards the
-        # same business_type badge as every other listing.
+        # The RPC filters on salons.is_public, so regular_buyer and other
+        # non-public salons never come back. It returns neither the joined
+        # business_type nor the discount summary, so one secondary lookup gives
+        # the nearby cards the same badges as every other listing.
         if salons:
             salon_ids = [s["id"] for s in salons if s.get("id")]
             if salon_ids:
                 type_response = (
                     self.db.table("salons")
-                    .select("id, salon_type, vendor_join_requests(business_type)")
+                    .select(
+                        "id, has_discount, max_discount_pct, "
+                        "vendor_join_requests(business_type)"
+                    )
                     .in_("id", salon_ids)
                     .execute()
                 )
                 type_rows = type_response.data or []
                 self.flatten_business_type(type_rows)
+                rows_by_id = {row["id"]: row for row in type_rows}
 
-                regular_buyer_ids = {
-                    row["id"] for row in type_rows
-                    if row.get("salon_type") == "regular_buyer"
-                }
-                business_types = {row["id"]: row.get("business_type") for row in type_rows}
-
-                salons = [s for s in salons if s["id"] not in regular_buyer_ids]
                 for salon in salons:
-                    salon["business_type"] = business_types.get(salon["id"])
+                    row = rows_by_id.get(salon["id"], {})
+                    salon["business_type"] = row.get("business_type")
+                    salon["has_discount"] = row.get("has_discount")
+                    salon["max_discount_pct"] = row.get("max_discount_pct")
 
         # Apply additional filters if provided
         if params.filters:
@@ -386,7 +465,7 @@ class SalonService:
             # Note: business_type column doesn't exist in salons table
             # Removed filter for business_type
         
-        await self._attach_discount_flags(salons)
+        self._attach_discount_flags(salons)
         return salons
     
     async def update_salon(
@@ -438,6 +517,8 @@ class SalonService:
             raise ValueError("Salon not found or update failed")
         
         logger.info(f"Salon {salon_id} updated: {list(safe_updates.keys())}")
+        invalidate_popular_cities_cache()
+        invalidate_dashboard_stats_cache()
         
         return response.data[0]
     
@@ -463,6 +544,8 @@ class SalonService:
             raise ValueError("Salon not found")
         
         logger.info(f"Salon {salon_id} deactivated")
+        invalidate_popular_cities_cache()
+        invalidate_dashboard_stats_cache()
         
         return response.data[0]
     
@@ -480,6 +563,8 @@ class SalonService:
         if hard_delete:
             # Hard delete - remove from database
             self.db.table("salons").delete().eq("id", salon_id).execute()
+            invalidate_popular_cities_cache()
+            invalidate_dashboard_stats_cache()
             
             logger.warning(f"Salon {salon_id} permanently deleted")
             
@@ -644,8 +729,11 @@ class SalonService:
             response = query.execute()
             return response.data or []
 
-        # Tier 1: same city.
-        if city:
+        # Tier 1: same city (by canonical id when the source row has one).
+        city_id = base.get("city_id")
+        if city_id is not None:
+            _take(await _fetch_tier(lambda q: q.eq("city_id", city_id)))
+        elif city:
             _take(await _fetch_tier(lambda q: self._apply_city_filter(q, city)))
 
         # Tier 2: same state.
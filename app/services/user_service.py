@@ -7,13 +7,23 @@ Uses the injected Supabase service-role client for all access (DB tables + the
 GoTrue admin auth API), consistent with the other service classes.
 """
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 from dataclasses import dataclass
 
 from app.schemas.user import UserUpdate
+from app.services.profile_lookup import invalidate_profile_lookup
+from app.utils.export import EXPORT_PAGE_SIZE
+from app.utils.keyset import iter_keyset_pages
+from app.utils.rpc import rpc_result
 
 logger = logging.getLogger(__name__)
 
+# Fields of GET /admin/users/export, in CSV column order
+USER_EXPORT_COLUMNS = (
+    "id", "full_name", "email", "phone", "user_role", "is_active",
+    "phone_verified", "city", "state", "created_at",
+)
+
 
 @dataclass
 class CreateUserRequest:
@@ -277,6 +287,7 @@ class UserService:
             response = self.db.table("profiles").update(filtered_updates).eq("id", user_id).execute()
             if not response.data:
                 raise Exception("Update failed - no data returned")
+            invalidate_profile_lookup(user_id)
 
             updated_user = response.data[0]
 
@@ -320,50 +331,56 @@ class UserService:
         the client did not publish themselves.
         """
         try:
-            offset = (page - 1) * limit
-            query = self.db.table("profiles").select("*", count="exact")
-
-            if not include_internal:
-                query = query.eq("is_internal", False)
-
-            # Search: per-column .ilike() (or_() is unreliable in supabase-py URL encoding)
-            if search and search.strip():
-                pattern = f"%{search.strip()}%"
-                matching_ids = set()
-                for column in ("email", "full_name", "phone"):
-                    try:
-                        id_query = self.db.table("profiles").select("id").ilike(column, pattern)
-                        if not include_internal:
-                            # This lookup bypasses the query above, so it needs
-                            # its own filter or search would surface staff.
-                            id_query = id_query.eq("is_internal", False)
-                        id_rows = id_query.execute()
-                        for row in id_rows.data or []:
-                            matching_ids.add(row["id"])
-                    except Exception as col_err:
-                        logger.warning("User search skipped column %s: %s", column, col_err)
-                if not matching_ids:
-                    return {"success": True, "data": [], "total": 0, "page": page, "limit": limit}
-                query = query.in_("id", list(matching_ids))
-
-            if role:
-                query = query.eq("user_role", role)
-            if is_active is not None:
-                query = query.eq("is_active", is_active)
-
-            response = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+            # One statement: trigram-indexed match over email / full_name /
+            # phone, the filters, the page and the total
+            response = self.db.rpc("search_profiles", {
+                "p_search": search.strip() if search and search.strip() else None,
+                "p_role": role,
+                "p_is_active": is_active,
+                "p_include_internal": include_internal,
+                "p_limit": limit,
+                "p_offset": (page - 1) * limit,
+            }).execute()
+            result = rpc_result(response) or {}
 
             logger.info(
-                f"Admin users query - Page: {page}, Total: {response.count}, "
+                f"Admin users query - Page: {page}, Total: {result.get('total')}, "
                 f"Filters: search={search}, role={role}, is_active={is_active}"
             )
             return {
                 "success": True,
-                "data": response.data or [],
-                "total": response.count or 0,
+                "data": result.get("data") or [],
+                "total": result.get("total") or 0,
                 "page": page,
                 "limit": limit,
             }
         except Exception as e:
             logger.error(f"Failed to list users: {str(e)}")
             raise Exception(f"Failed to fetch users: {str(e)}")
+
+    def iter_user_export(
+        self,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        include_internal: bool = False,
+        page_size: int = EXPORT_PAGE_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield every profile matching the admin filters, a page at a time,
+        oldest first (keyset on created_at, id). Internal staff are left out
+        unless include_internal, as in list_users.
+
+        Synchronous on purpose: the export response iterates it in a worker
+        thread while streaming.
+        """
+        def build_query():
+            query = self.db.table("profiles").select(", ".join(USER_EXPORT_COLUMNS))
+            if not include_internal:
+                query = query.eq("is_internal", False)
+            if role:
+                query = query.eq("user_role", role)
+            if is_active is not None:
+                query = query.eq("is_active", is_active)
+            return query
+
+        yield from iter_keyset_pages(build_query, page_size)
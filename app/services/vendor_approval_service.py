@@ -6,6 +6,7 @@ import logging
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
+from app.services.admin_service import invalidate_dashboard_stats_cache
 from app.services.geocoding import geocoding_service
 from app.services.email import email_service
 from app.core.auth import create_registration_token
@@ -136,6 +137,7 @@ class VendorApprovalService:
         except Exception as e:
             warnings.append(f"Failed to update RM score: {str(e)}")
 
+        invalidate_dashboard_stats_cache()
         logger.info(f"Vendor request {request_id} approved. Salon: {salon_id}")
 
         return ApprovalResult(
@@ -731,6 +733,7 @@ class VendorApprovalService:
         except Exception as e:
             logger.warning(f"Could not send RM rejection notification: {str(e)}")
         
+        invalidate_dashboard_stats_cache()
         logger.info(f"Vendor request {request_id} rejected")
         
         return {
@@ -21,7 +21,9 @@ from app.schemas import (
 )
 from app.services.booking_service import BookingService
 from app.services.activity_log_service import ActivityLogService
+from app.services.analytics_service import AnalyticsService, salon_scope
 from app.services.config_service import ConfigService
+from app.services.salon_service import invalidate_popular_cities_cache
 from app.services.service_taxonomy import ServiceTaxonomyResolver
 
 logger = logging.getLogger(__name__)
@@ -604,66 +606,64 @@ class VendorService:
     # DASHBOARD & ANALYTICS
     # =====================================================
     
-    async def get_analytics(self, vendor_id: str) -> Dict[str, Any]:
+    async def get_analytics(
+        self,
+        vendor_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict[str, Any]:
         """
         Get vendor analytics for dashboard.
-        
+
+        Every figure comes from one vendor_analytics() call; booking totals are
+        read from the salon's platform counters, the rest is aggregated in SQL.
+
         Args:
             vendor_id: Vendor user ID
-            
+            date_from: Optional start of a breakdown range (inclusive)
+            date_to: Optional end of a breakdown range (inclusive)
+
         Returns:
-            Analytics data (bookings, revenue, ratings)
-            
+            Analytics data (bookings, revenue, ratings), plus a `period`
+            breakdown when both dates are given
+
         Raises:
-            HTTPException: If salon not found or query fails
+            HTTPException: If salon not found, the range is invalid or the query fails
         """
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must be on or before date_to"
+            )
+
         try:
-            # Get salon
-            salon = await self.get_vendor_salon(vendor_id)
-            salon_id = salon["id"]
-            
-            # Check if regular_buyer
-            is_regular_buyer = salon.get("salon_type") == "regular_buyer"
-            
-            # Get product order stats
-            orders_response = self.db.table("product_orders").select("id, total_amount", count="exact").eq("user_id", vendor_id).execute()
-            pending_orders_response = self.db.table("product_orders").select("id", count="exact").eq("user_id", vendor_id).eq("status", "pending").execute()
-            completed_orders = self.db.table("product_orders").select("total_amount").eq("user_id", vendor_id).eq("payment_status", "completed").execute()
-            total_spending = sum([o.get("total_amount", 0) for o in completed_orders.data]) if completed_orders.data else 0
-
-            if is_regular_buyer:
-                return {
-                    "total_bookings": 0,
-                    "total_revenue": 0.0,
-                    "active_services": 0,
-                    "average_rating": 0.0,
-                    "pending_bookings": 0,
-                    "total_product_orders": orders_response.count if orders_response else 0,
-                    "pending_product_orders": pending_orders_response.count if pending_orders_response else 0,
-                    "total_product_spending": total_spending
-                }
-            
-            # Original salon logic
-            # Get counts
-            services_response = self.db.table("services").select("id", count="exact").eq("salon_id", salon_id).eq("is_active", True).execute()
-            bookings_response = self.db.table("bookings").select("id, total_amount", count="exact").eq("salon_id", salon_id).execute()
-            pending_response = self.db.table("bookings").select("id", count="exact").eq("salon_id", salon_id).eq("status", "pending").execute()
-            
-            # Calculate total revenue from completed bookings
-            completed_bookings = self.db.table("bookings").select("total_amount").eq("salon_id", salon_id).eq("status", "completed").execute()
-            total_revenue = sum([b.get("total_amount", 0) for b in completed_bookings.data]) if completed_bookings.data else 0
-            
-            return {
-                "total_bookings": bookings_response.count if bookings_response else 0,
-                "total_revenue": total_revenue,
-                "active_services": services_response.count if services_response else 0,
-                "average_rating": salon.get("average_rating", 0.0),
-                "pending_bookings": pending_response.count if pending_response else 0,
-                "total_product_orders": orders_response.count if orders_response else 0,
-                "pending_product_orders": pending_orders_response.count if pending_orders_response else 0,
-                "total_product_spending": total_spending
+            response = self.db.rpc("vendor_analytics", {
+                "p_vendor_id": vendor_id,
+                "p_date_from": date_from.isoformat() if date_from else None,
+                "p_date_to": date_to.isoformat() if date_to else None,
+            }).execute()
+
+            if not response.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Salon not found"
+                )
+
+            row = response.data[0]
+            analytics = {
+                "total_bookings": row.get("total_bookings") or 0,
+                "total_revenue": float(row.get("total_revenue") or 0),
+                "active_services": row.get("active_services") or 0,
+                "average_rating": float(row.get("average_rating") or 0),
+                "pending_bookings": row.get("pending_bookings") or 0,
+                "total_product_orders": row.get("total_product_orders") or 0,
+                "pending_product_orders": row.get("pending_product_orders") or 0,
+                "total_product_spending": float(row.get("total_product_spending") or 0)
             }
-        
+            if row.get("period") is not None:
+                analytics["period"] = row["period"]
+            return analytics
+
         except HTTPException:
             raise
         except Exception as e:
@@ -672,7 +672,38 @@ class VendorService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to fetch vendor analytics"
             )
-    
+
+    async def get_analytics_timeseries(
+        self,
+        vendor_id: str,
+        granularity: str = "day",
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the vendor's salon bookings, cancellations, revenue and new
+        customers bucketed by day, week or month (from the analytics rollups).
+
+        Args:
+            vendor_id: Vendor user ID
+            granularity: day, week or month
+            date_from: Optional start of the range (inclusive)
+            date_to: Optional end of the range (inclusive, default today)
+
+        Returns:
+            Time series (see AnalyticsService.get_timeseries)
+
+        Raises:
+            HTTPException: If salon not found or the range is invalid
+        """
+        salon_id = await self.get_vendor_salon_id(vendor_id)
+        return await AnalyticsService(self.db).get_timeseries(
+            salon_scope(salon_id),
+            granularity=granularity,
+            date_from=date_from,
+            date_to=date_to,
+        )
+
     # =====================================================
     # HELPER METHODS
     # =====================================================
@@ -813,6 +844,7 @@ class VendorService:
         }
         
         response = self.db.table("salons").update(update_data).eq("id", salon_id).execute()
+        invalidate_popular_cities_cache()
         
         logger.info(f"Vendor {user_id} linked to salon {salon_id}")
         logger.info("Salon automatically verified upon vendor registration")
@@ -854,6 +886,7 @@ class VendorService:
         
         # Update salon with payment info
         self.db.table("salons").update(payment_data).eq("id", salon_id).execute()
+        invalidate_popular_cities_cache()
         
         logger.info(f"Payment processed successfully for salon: {business_name}")
         
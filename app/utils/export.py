@@ -0,0 +1,103 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Services yield their rows a page at a time (see app.utils.keyset); each page
+is serialised and sent as one chunk, so memory stays at one page whatever the
+size of the export. Starlette runs the synchronous page generator in its
+threadpool, so the blocking database reads never stall the event loop.
+"""
+import csv
+import io
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Rows read and sent per chunk
+EXPORT_PAGE_SIZE = 1000
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# Leading characters spreadsheets read as a formula (CSV injection); text
+# cells starting with one are written with a ' so they stay literal.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value: Any) -> Any:
+    """Flatten a cell: JSON for nested values, empty for NULL, formulas escaped."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str, separators=(",", ":"))
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_chunks(pages: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in page:
+            writer.writerow([_csv_value(row.get(c)) for c in columns])
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(pages: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[str]:
+    for page in pages:
+        yield "".join(
+            json.dumps({c: row.get(c) for c in columns}, default=str) + "\n"
+            for row in page
+        )
+
+
+def _guarded(chunks: Iterator[str], name: str) -> Iterator[str]:
+    # Headers are already sent once streaming starts; a failure can only end
+    # the body early, so make sure it is at least logged.
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error(f"Export {name} aborted: {str(e)}", exc_info=True)
+        raise
+
+
+def export_response(
+    pages: Iterable[List[Dict[str, Any]]],
+    export_format: str,
+    columns: Sequence[str],
+    name: str
+) -> StreamingResponse:
+    """
+    Stream pages of rows as a CSV or NDJSON attachment.
+
+    Args:
+        pages: Row pages, consumed lazily while the response is sent
+        export_format: csv or ndjson
+        columns: Fields written per row, in order (the CSV header)
+        name: File name stem; today's date and the extension are appended
+    """
+    if export_format == "csv":
+        chunks = _csv_chunks(pages, columns)
+    else:
+        chunks = _ndjson_chunks(pages, columns)
+
+    filename = f"{name}-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        _guarded(chunks, filename),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,16 @@
+"""
+Helpers for reading Supabase RPC (database function) responses.
+"""
+from typing import Any
+
+
+def rpc_result(response: Any) -> Any:
+    """
+    The single value of an RPC response: the scalar or object a function
+    returned, or the first row of a table-returning one. PostgREST hands
+    these back either bare or as a one-element list. None when empty.
+    """
+    data = response.data if response else None
+    if isinstance(data, list):
+        return data[0] if data else None
+    return data
@@ -0,0 +1,73 @@
+"""
+Reconcile payments against Razorpay on demand.
+
+Same job the API runs nightly (app.core.tasks.reconcile_payments_task), for
+catching up after an incident or checking a longer window by hand:
+
+  * pending `payments` / `vendor_registration_payments` rows whose order was
+    captured at Razorpay are completed (salon activated for registration
+    fees); orders abandoned for over a day are marked failed;
+  * rows completed in the lookback window whose payment is not captured at
+    Razorpay are listed as mismatches and left alone.
+
+Credentials come from system_config, exactly as in the API.
+
+Usage (venv active, .env pointing at the target environment):
+    python scripts/reconcile_payments.py --dry-run
+    python scripts/reconcile_payments.py --days 14
+    python scripts/reconcile_payments.py --concurrency 2 --rate 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Allow `from app...` imports when run as `python scripts/reconcile_payments.py`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase import create_client
+
+from app.core.config import settings
+from app.services.payment_reconciliation_service import PaymentReconciliationService
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    try:
+        service = await PaymentReconciliationService.from_config(
+            db,
+            concurrency=args.concurrency,
+            rate_per_second=args.rate,
+            dry_run=args.dry_run,
+        )
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    summary = await service.run(since=since)
+
+    if args.dry_run:
+        print("DRY RUN - nothing was written.")
+    mismatches = summary.pop("mismatches")
+    for key, value in summary.items():
+        print(f"  {key:<24} {value}")
+    if mismatches:
+        print(f"\nMismatches ({len(mismatches)}) - check these in the Razorpay dashboard:")
+        for mismatch in mismatches:
+            print(f"  - {json.dumps(mismatch)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=2,
+                        help="Lookback for completed rows to cross-check (default: 2)")
+    parser.add_argument("--concurrency", type=int, default=settings.PAYMENT_RECONCILIATION_CONCURRENCY,
+                        help="Gateway calls in flight")
+    parser.add_argument("--rate", type=float, default=settings.PAYMENT_RECONCILIATION_RATE_PER_SECOND,
+                        help="Gateway calls started per second")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report verdicts without writing them")
+    asyncio.run(main(parser.parse_args()))
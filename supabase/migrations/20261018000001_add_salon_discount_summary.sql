@@ -0,0 +1,116 @@
+-- =====================================================
+-- Migration: Per-salon discount summary columns
+-- Purpose: Every public salon listing used to download every active service
+--          row of the listed salons just to work out the "UPTO X% OFF" badge
+--          (SalonService._attach_discount_flags). Keep the two values the
+--          cards need on the salon row instead, maintained by a trigger on
+--          services. VendorService's service CRUD and salon promotions both
+--          write through the services table, so they are covered without any
+--          application-side bookkeeping.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Columns
+-- =====================================================
+ALTER TABLE public.salons
+    ADD COLUMN IF NOT EXISTS has_discount BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS max_discount_pct NUMERIC(5,2);
+
+COMMENT ON COLUMN public.salons.has_discount IS
+    'True when any active service has a discount (auto-updated by trigger on services)';
+COMMENT ON COLUMN public.salons.max_discount_pct IS
+    'Largest active service discount %, NULL when none (auto-updated by trigger on services)';
+
+
+-- =====================================================
+-- 2. Recompute one salon's summary
+-- =====================================================
+-- Same rules the API applied in Python: a service counts as discounted when
+-- discount_percentage > 0 or discounted_price is set; when only the absolute
+-- discounted_price is set the % is derived from price.
+CREATE OR REPLACE FUNCTION refresh_salon_discount_summary(p_salon_id UUID)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE public.salons s
+    SET
+        has_discount = COALESCE(agg.has_discount, false),
+        max_discount_pct = agg.max_pct
+    FROM (
+        SELECT
+            BOOL_OR(
+                COALESCE(sv.discount_percentage, 0) > 0
+                OR sv.discounted_price IS NOT NULL
+            ) AS has_discount,
+            NULLIF(MAX(
+                CASE
+                    WHEN COALESCE(sv.discount_percentage, 0) > 0
+                        THEN sv.discount_percentage
+                    WHEN sv.discounted_price IS NOT NULL
+                         AND sv.price > 0
+                         AND sv.discounted_price >= 0
+                         AND sv.discounted_price < sv.price
+                        THEN ROUND((sv.price - sv.discounted_price) / sv.price * 100, 2)
+                    ELSE 0
+                END
+            ), 0) AS max_pct
+        FROM public.services sv
+        WHERE sv.salon_id = p_salon_id
+          AND sv.is_active = true
+          AND sv.deleted_at IS NULL
+    ) agg
+    WHERE s.id = p_salon_id
+      AND (
+          s.has_discount IS DISTINCT FROM COALESCE(agg.has_discount, false)
+          OR s.max_discount_pct IS DISTINCT FROM agg.max_pct
+      );
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION refresh_salon_discount_summary(UUID) IS
+    'Recompute salons.has_discount / max_discount_pct from the salon''s active services';
+
+
+-- =====================================================
+-- 3. Trigger on services
+-- =====================================================
+CREATE OR REPLACE FUNCTION trigger_refresh_salon_discount_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_salon_discount_summary(NEW.salon_id);
+    END IF;
+
+    -- A delete, or a service moved to another salon, changes the old salon too.
+    IF TG_OP = 'DELETE'
+       OR (TG_OP = 'UPDATE' AND OLD.salon_id IS DISTINCT FROM NEW.salon_id) THEN
+        PERFORM refresh_salon_discount_summary(OLD.salon_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_services_discount_summary ON public.services;
+CREATE TRIGGER trigger_services_discount_summary
+    AFTER INSERT OR DELETE
+    OR UPDATE OF price, discounted_price, discount_percentage, is_active, deleted_at, salon_id
+    ON public.services
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_refresh_salon_discount_summary();
+
+COMMENT ON TRIGGER trigger_services_discount_summary ON public.services IS
+    'Keeps salons.has_discount / max_discount_pct in step with service discounts';
+
+
+-- =====================================================
+-- 4. Backfill
+-- =====================================================
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN SELECT DISTINCT salon_id FROM public.services WHERE salon_id IS NOT NULL LOOP
+        PERFORM refresh_salon_discount_summary(r.salon_id);
+    END LOOP;
+END $$;
@@ -0,0 +1,142 @@
+-- =====================================================
+-- Migration: Precomputed public-visibility flag for salons
+-- Purpose: Every public salon read combined the same five predicates
+--          (active, verified, fee paid, not soft-deleted, not a
+--          regular_buyer account), and get_nearby_salons left the last one
+--          to Python after fetch. Fold them into one generated column and
+--          give the listing sort/filter keys partial indexes over public rows
+--          only, so catalogue reads are range scans over a small index that
+--          never touches unapproved or product-only salons.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Generated column
+-- =====================================================
+-- STORED so it can be indexed. COALESCE keeps legacy NULL flags from making
+-- the whole expression NULL (NULL is neither public nor filterable by eq).
+ALTER TABLE public.salons
+    ADD COLUMN IF NOT EXISTS is_public BOOLEAN
+    GENERATED ALWAYS AS (
+        COALESCE(is_active, false)
+        AND COALESCE(is_verified, false)
+        AND COALESCE(registration_fee_paid, false)
+        AND deleted_at IS NULL
+        AND salon_type IS DISTINCT FROM 'regular_buyer'
+    ) STORED;
+
+COMMENT ON COLUMN public.salons.is_public IS
+    'Shown to customers: active + verified + fee paid + not deleted + not regular_buyer (generated)';
+
+
+-- =====================================================
+-- 2. Partial indexes for public listings
+-- =====================================================
+-- One per key the public endpoints filter or order by:
+--   city / state     -> get_public_salons, search, related-salon tiers
+--   created_at DESC  -> default listing order
+--   average_rating   -> related salons ("highest-rated first")
+CREATE INDEX IF NOT EXISTS idx_salons_public_city
+    ON public.salons (city) WHERE is_public;
+
+CREATE INDEX IF NOT EXISTS idx_salons_public_state
+    ON public.salons (state) WHERE is_public;
+
+CREATE INDEX IF NOT EXISTS idx_salons_public_created_at
+    ON public.salons (created_at DESC) WHERE is_public;
+
+CREATE INDEX IF NOT EXISTS idx_salons_public_rating
+    ON public.salons (average_rating DESC) WHERE is_public;
+
+
+-- =====================================================
+-- 3. get_nearby_salons uses the flag
+-- =====================================================
+-- Same signature and result shape as 20251118184000. Filtering on is_public
+-- also drops regular_buyer accounts in the database, which the API used to
+-- do in Python after fetching them.
+CREATE OR REPLACE FUNCTION public.get_nearby_salons(
+    user_lat DOUBLE PRECISION,
+    user_lon DOUBLE PRECISION,
+    radius_km DOUBLE PRECISION DEFAULT 10.0,
+    max_results INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    id UUID,
+    business_name VARCHAR,
+    description TEXT,
+    address TEXT,
+    city VARCHAR,
+    state VARCHAR,
+    pincode VARCHAR,
+    phone VARCHAR,
+    email VARCHAR,
+    latitude NUMERIC,
+    longitude NUMERIC,
+    location GEOGRAPHY,
+    average_rating NUMERIC,
+    total_reviews INTEGER,
+    logo_url TEXT,
+    cover_images TEXT[],
+    opening_time TIME,
+    closing_time TIME,
+    working_days VARCHAR[],
+    is_active BOOLEAN,
+    is_verified BOOLEAN,
+    registration_fee_paid BOOLEAN,
+    vendor_id UUID,
+    assigned_rm UUID,
+    distance_km DOUBLE PRECISION,
+    created_at TIMESTAMPTZ
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        s.id,
+        s.business_name,
+        s.description,
+        s.address,
+        s.city,
+        s.state,
+        s.pincode,
+        s.phone,
+        s.email,
+        s.latitude,
+        s.longitude,
+        s.location,
+        s.average_rating,
+        s.total_reviews,
+        s.logo_url,
+        s.cover_images,
+        s.opening_time,
+        s.closing_time,
+        s.working_days,
+        s.is_active,
+        s.is_verified,
+        s.registration_fee_paid,
+        s.vendor_id,
+        s.assigned_rm,
+        -- Calculate distance in kilometers using PostGIS
+        ST_Distance(
+            s.location::geography,
+            ST_SetSRID(ST_MakePoint(user_lon, user_lat), 4326)::geography
+        ) / 1000.0 AS distance_km,
+        s.created_at
+    FROM
+        salons s
+    WHERE
+        s.is_public
+        AND s.location IS NOT NULL
+        -- Filter by radius using PostGIS distance function
+        AND ST_DWithin(
+            s.location::geography,
+            ST_SetSRID(ST_MakePoint(user_lon, user_lat), 4326)::geography,
+            radius_km * 1000  -- Convert km to meters
+        )
+    ORDER BY
+        distance_km ASC
+    LIMIT max_results;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION public.get_nearby_salons IS 'Find public salons within a radius using PostGIS spatial queries';
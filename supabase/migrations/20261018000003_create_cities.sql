@@ -0,0 +1,162 @@
+-- =====================================================
+-- Migration: Canonical cities + normalised salons.city_id
+-- Purpose: City filters matched salons.city with a case-insensitive string
+--          comparison on every request, and "Bangalore" / "bengaluru " /
+--          "BENGALURU" counted as different cities until Python normalised
+--          them after fetch. Give every city one integer key:
+--            * cities        - one row per canonical city
+--            * city_aliases  - normalised spelling -> city (renames included)
+--            * salons.city_id - resolved by trigger whenever city is written
+--          The API keeps the alias map in memory (app.services.city_index), so
+--          a city filter is an integer equality on an indexed column and
+--          popular-city counts (20261018000021) group by the same key.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Tables
+-- =====================================================
+CREATE TABLE IF NOT EXISTS cities (
+    id          SERIAL PRIMARY KEY,
+    name        VARCHAR(100) NOT NULL,              -- Display name: 'Bengaluru'
+    slug        VARCHAR(100) NOT NULL UNIQUE,       -- Normalised key: 'bengaluru'
+    state       VARCHAR(100),
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE cities IS
+    'Canonical cities. salons.city_id points here; new spellings are added by resolve_city_id().';
+
+CREATE TABLE IF NOT EXISTS city_aliases (
+    alias_key   VARCHAR(100) PRIMARY KEY,           -- Normalised spelling: 'bangalore'
+    city_id     INTEGER NOT NULL REFERENCES cities(id) ON DELETE CASCADE,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE city_aliases IS
+    'Every known normalised spelling of a city, including its own slug and historic names.';
+
+CREATE INDEX IF NOT EXISTS idx_city_aliases_city_id ON city_aliases(city_id);
+
+-- Service-role architecture (same as feature_flags / banners)
+ALTER TABLE cities DISABLE ROW LEVEL SECURITY;
+ALTER TABLE city_aliases DISABLE ROW LEVEL SECURITY;
+
+
+-- =====================================================
+-- 2. Normalisation + resolution
+-- =====================================================
+-- Mirrors app.utils.location_text.city_key(): trim, collapse inner
+-- whitespace, lowercase.
+CREATE OR REPLACE FUNCTION city_alias_key(p_city TEXT)
+RETURNS TEXT AS $$
+    SELECT NULLIF(LOWER(REGEXP_REPLACE(BTRIM(p_city), '\s+', ' ', 'g')), '');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Get-or-create: an unseen spelling becomes a new city (named in Title Case)
+-- with itself as its first alias. Merging it into an existing city later is
+-- one UPDATE of city_aliases + salons.
+CREATE OR REPLACE FUNCTION resolve_city_id(p_city TEXT)
+RETURNS INTEGER AS $$
+DECLARE
+    v_key TEXT := city_alias_key(p_city);
+    v_city_id INTEGER;
+BEGIN
+    IF v_key IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT city_id INTO v_city_id FROM city_aliases WHERE alias_key = v_key;
+    IF v_city_id IS NOT NULL THEN
+        RETURN v_city_id;
+    END IF;
+
+    INSERT INTO cities (name, slug)
+    VALUES (INITCAP(v_key), v_key)
+    ON CONFLICT (slug) DO NOTHING;
+
+    SELECT id INTO v_city_id FROM cities WHERE slug = v_key;
+
+    INSERT INTO city_aliases (alias_key, city_id)
+    VALUES (v_key, v_city_id)
+    ON CONFLICT (alias_key) DO NOTHING;
+
+    -- A concurrent writer may have won the alias race with another city.
+    SELECT city_id INTO v_city_id FROM city_aliases WHERE alias_key = v_key;
+    RETURN v_city_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION resolve_city_id(TEXT) IS
+    'Map a free-text city to cities.id via city_aliases, creating the city if unseen.';
+
+
+-- =====================================================
+-- 3. Seed canonical cities with their historic names
+-- =====================================================
+INSERT INTO cities (name, slug) VALUES
+    ('Mumbai', 'mumbai'),
+    ('Bengaluru', 'bengaluru'),
+    ('Kolkata', 'kolkata'),
+    ('Chennai', 'chennai'),
+    ('Gurugram', 'gurugram'),
+    ('Pune', 'pune'),
+    ('Mysuru', 'mysuru'),
+    ('Thiruvananthapuram', 'thiruvananthapuram'),
+    ('Vadodara', 'vadodara'),
+    ('Varanasi', 'varanasi'),
+    ('Kochi', 'kochi'),
+    ('Puducherry', 'puducherry'),
+    ('Prayagraj', 'prayagraj')
+ON CONFLICT (slug) DO NOTHING;
+
+INSERT INTO city_aliases (alias_key, city_id)
+SELECT a.alias_key, c.id
+FROM (VALUES
+    ('mumbai', 'mumbai'), ('bombay', 'mumbai'),
+    ('bengaluru', 'bengaluru'), ('bangalore', 'bengaluru'),
+    ('kolkata', 'kolkata'), ('calcutta', 'kolkata'),
+    ('chennai', 'chennai'), ('madras', 'chennai'),
+    ('gurugram', 'gurugram'), ('gurgaon', 'gurugram'),
+    ('pune', 'pune'), ('poona', 'pune'),
+    ('mysuru', 'mysuru'), ('mysore', 'mysuru'),
+    ('thiruvananthapuram', 'thiruvananthapuram'), ('trivandrum', 'thiruvananthapuram'),
+    ('vadodara', 'vadodara'), ('baroda', 'vadodara'),
+    ('varanasi', 'varanasi'), ('banaras', 'varanasi'), ('benares', 'varanasi'),
+    ('kochi', 'kochi'), ('cochin', 'kochi'),
+    ('puducherry', 'puducherry'), ('pondicherry', 'puducherry'),
+    ('prayagraj', 'prayagraj'), ('allahabad', 'prayagraj')
+) AS a(alias_key, slug)
+JOIN cities c ON c.slug = a.slug
+ON CONFLICT (alias_key) DO NOTHING;
+
+
+-- =====================================================
+-- 4. salons.city_id
+-- =====================================================
+ALTER TABLE public.salons
+    ADD COLUMN IF NOT EXISTS city_id INTEGER REFERENCES cities(id);
+
+COMMENT ON COLUMN public.salons.city_id IS
+    'Canonical city (auto-resolved from city by trigger)';
+
+CREATE OR REPLACE FUNCTION set_salon_city_id()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.city_id := resolve_city_id(NEW.city);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_salons_set_city_id ON public.salons;
+CREATE TRIGGER trigger_salons_set_city_id
+    BEFORE INSERT OR UPDATE OF city ON public.salons
+    FOR EACH ROW
+    EXECUTE FUNCTION set_salon_city_id();
+
+UPDATE public.salons SET city_id = resolve_city_id(city) WHERE city_id IS NULL;
+
+-- Public city filter: integer equality over public rows only (same partial
+-- predicate as the 20261018000002 listing indexes).
+CREATE INDEX IF NOT EXISTS idx_salons_public_city_id
+    ON public.salons (city_id) WHERE is_public;
@@ -0,0 +1,47 @@
+-- =====================================================
+-- Migration: Local record of cart payment orders
+-- Purpose: Cart checkout used to read the cart snapshot, applied coupon and
+--          pinned pricing back from the Razorpay order notes with a blocking
+--          HTTPS call (order.fetch) on every checkout. The API now writes the
+--          same snapshot here when it creates the Razorpay order
+--          (PaymentService.create_cart_payment_order) and checkout validates
+--          against this row with one primary-key read.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Table
+-- =====================================================
+CREATE TABLE IF NOT EXISTS payment_orders (
+    razorpay_order_id   VARCHAR(64) PRIMARY KEY,
+    customer_id         UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    salon_id            UUID REFERENCES salons(id) ON DELETE SET NULL,
+    order_type          VARCHAR(32) NOT NULL DEFAULT 'cart_checkout',
+    amount              NUMERIC(10,2) NOT NULL,         -- Rupees charged on the Razorpay order
+    currency            VARCHAR(3) NOT NULL DEFAULT 'INR',
+    coupon_code         VARCHAR(50),                    -- Coupon priced into the order, if any
+    cart_snapshot       JSONB NOT NULL,                 -- [{service_id, quantity, unit_price}]
+    pricing             JSONB NOT NULL,                 -- Pinned breakdown (authoritative at checkout)
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE payment_orders IS
+    'Snapshot of each cart payment order, keyed by Razorpay order id. Read by checkout instead of the Razorpay API.';
+
+-- "My recent orders" / cleanup by age
+CREATE INDEX IF NOT EXISTS idx_payment_orders_customer_created
+    ON payment_orders (customer_id, created_at DESC);
+
+
+-- =====================================================
+-- 2. Access
+-- =====================================================
+-- Written and read only by the API with the service role.
+ALTER TABLE payment_orders ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage payment orders" ON payment_orders;
+CREATE POLICY "Service role can manage payment orders"
+    ON payment_orders FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
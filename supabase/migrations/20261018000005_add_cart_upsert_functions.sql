@@ -0,0 +1,376 @@
+-- =====================================================
+-- Migration: Single round-trip cart mutations
+-- Purpose: CustomerService.add_to_cart read the service, the salon, the
+--          customer's current cart salon and the existing line, then updated
+--          or inserted - five sequential round-trips, and two concurrent taps
+--          could both miss the existing line (unique violation -> 500) or
+--          both pass the single-salon check for different salons. The product
+--          cart had the same read-then-write shape around its stock check.
+--
+--          Each mutation is now one function call that validates and writes
+--          in one transaction:
+--            * cart_add_service / cart_set_quantity / cart_remove_item
+--              (cart_items, serialised per customer)
+--            * product_cart_add / product_cart_set_quantity
+--              (product_cart_items, stock checked in the upsert itself)
+--          Functions return (success, reason, ...) like redeem_coupon(); the
+--          API maps reason codes to its existing HTTP errors. The service cart
+--          functions also return the customer's updated cart lines
+--          (cart_snapshot), so the API rebuilds its cached cart without a
+--          second read.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Service cart (cart_items)
+-- =====================================================
+-- cart_items already has UNIQUE (user_id, service_id)
+-- (cart_items_user_id_service_id_key), which is the ON CONFLICT target.
+--
+-- All three functions take a transaction-scoped advisory lock on the customer
+-- so the "one salon per cart" rule holds under concurrent adds/removes.
+
+-- The customer's cart lines in the shape of CustomerService._load_cart's
+-- cart_items select (line + services(...) + salons(...) embeds).
+CREATE OR REPLACE FUNCTION cart_snapshot(p_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'id', ci.id,
+        'service_id', ci.service_id,
+        'salon_id', ci.salon_id,
+        'quantity', ci.quantity,
+        'metadata', ci.metadata,
+        'created_at', ci.created_at,
+        'services', jsonb_build_object(
+            'id', sv.id,
+            'name', sv.name,
+            'price', sv.price,
+            'discounted_price', sv.discounted_price,
+            'discount_percentage', sv.discount_percentage,
+            'duration_minutes', sv.duration_minutes,
+            'image_url', sv.image_url,
+            'is_active', sv.is_active
+        ),
+        'salons', jsonb_build_object(
+            'id', sa.id,
+            'business_name', sa.business_name,
+            'city', sa.city,
+            'state', sa.state
+        )
+    ) ORDER BY ci.created_at, ci.id), '[]'::JSONB)
+    FROM cart_items ci
+    JOIN services sv ON sv.id = ci.service_id
+    JOIN salons sa ON sa.id = ci.salon_id
+    WHERE ci.user_id = p_user_id;
+$$;
+
+COMMENT ON FUNCTION cart_snapshot(UUID) IS
+'The customer''s cart lines with service and salon details, as returned by the cart_* functions.';
+
+
+CREATE OR REPLACE FUNCTION cart_add_service(
+    p_user_id    UUID,
+    p_service_id UUID,
+    p_quantity   INTEGER DEFAULT 1,
+    p_metadata   JSONB DEFAULT '{}'::JSONB
+)
+RETURNS TABLE (
+    success      BOOLEAN,
+    reason       TEXT,
+    cart_item    JSONB,
+    was_existing BOOLEAN,
+    cart         JSONB
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_service    RECORD;
+    v_salon      RECORD;
+    v_cart_salon UUID;
+    v_item       JSONB;
+    v_existing   BOOLEAN;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RETURN QUERY SELECT FALSE, 'invalid_quantity'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    SELECT id, salon_id, is_active INTO v_service
+    FROM services
+    WHERE id = p_service_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'service_not_found'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+    IF NOT COALESCE(v_service.is_active, TRUE) THEN
+        RETURN QUERY SELECT FALSE, 'service_inactive'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    SELECT id, is_active, accepting_bookings INTO v_salon
+    FROM salons
+    WHERE id = v_service.salon_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'salon_not_found'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+    IF NOT COALESCE(v_salon.is_active, TRUE) THEN
+        RETURN QUERY SELECT FALSE, 'salon_inactive'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+    IF NOT COALESCE(v_salon.accepting_bookings, TRUE) THEN
+        RETURN QUERY SELECT FALSE, 'salon_not_accepting'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('cart_items:' || p_user_id::TEXT));
+
+    SELECT salon_id INTO v_cart_salon
+    FROM cart_items
+    WHERE user_id = p_user_id
+    LIMIT 1;
+
+    IF FOUND AND v_cart_salon <> v_service.salon_id THEN
+        RETURN QUERY SELECT FALSE, 'different_salon'::TEXT, NULL::JSONB, FALSE, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    -- xmax is non-zero only on the DO UPDATE branch
+    INSERT INTO cart_items (user_id, salon_id, service_id, quantity, metadata)
+    VALUES (p_user_id, v_service.salon_id, p_service_id, p_quantity,
+            COALESCE(p_metadata, '{}'::JSONB))
+    ON CONFLICT (user_id, service_id) DO UPDATE
+        SET quantity = cart_items.quantity + EXCLUDED.quantity,
+            updated_at = now()
+    RETURNING to_jsonb(cart_items.*), (cart_items.xmax <> 0)
+    INTO v_item, v_existing;
+
+    RETURN QUERY SELECT TRUE, NULL::TEXT, v_item, v_existing, cart_snapshot(p_user_id);
+END;
+$$;
+
+COMMENT ON FUNCTION cart_add_service(UUID, UUID, INTEGER, JSONB) IS
+'Validate service/salon/single-salon rule and add or increment a cart line in one call.';
+
+
+CREATE OR REPLACE FUNCTION cart_set_quantity(
+    p_user_id  UUID,
+    p_item_id  UUID,
+    p_quantity INTEGER
+)
+RETURNS TABLE (
+    success   BOOLEAN,
+    reason    TEXT,
+    cart_item JSONB,
+    cart      JSONB
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_item JSONB;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RETURN QUERY SELECT FALSE, 'invalid_quantity'::TEXT, NULL::JSONB, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('cart_items:' || p_user_id::TEXT));
+
+    UPDATE cart_items
+    SET quantity = p_quantity,
+        updated_at = now()
+    WHERE id = p_item_id
+      AND user_id = p_user_id
+    RETURNING to_jsonb(cart_items.*) INTO v_item;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'item_not_found'::TEXT, NULL::JSONB, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    RETURN QUERY SELECT TRUE, NULL::TEXT, v_item, cart_snapshot(p_user_id);
+END;
+$$;
+
+COMMENT ON FUNCTION cart_set_quantity(UUID, UUID, INTEGER) IS
+'Set the quantity of one of the customer''s cart lines.';
+
+
+CREATE OR REPLACE FUNCTION cart_remove_item(
+    p_user_id UUID,
+    p_item_id UUID
+)
+RETURNS TABLE (
+    success BOOLEAN,
+    reason  TEXT,
+    cart    JSONB
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('cart_items:' || p_user_id::TEXT));
+
+    DELETE FROM cart_items
+    WHERE id = p_item_id
+      AND user_id = p_user_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'item_not_found'::TEXT, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    RETURN QUERY SELECT TRUE, NULL::TEXT, cart_snapshot(p_user_id);
+END;
+$$;
+
+COMMENT ON FUNCTION cart_remove_item(UUID, UUID) IS
+'Remove one of the customer''s cart lines.';
+
+
+-- =====================================================
+-- 2. Product cart (product_cart_items)
+-- =====================================================
+-- UNIQUE (user_id, product_id) comes from 20260509000002. The stock limit is
+-- part of the write itself: the INSERT only happens when the quantity fits and
+-- the DO UPDATE only fires when the new total fits, so "no row written" means
+-- insufficient stock.
+
+CREATE OR REPLACE FUNCTION product_cart_add(
+    p_user_id    UUID,
+    p_product_id UUID,
+    p_quantity   INTEGER DEFAULT 1
+)
+RETURNS TABLE (
+    success      BOOLEAN,
+    reason       TEXT,
+    cart_item    JSONB,
+    was_existing BOOLEAN
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_stock    INTEGER;
+    v_item     JSONB;
+    v_existing BOOLEAN;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RETURN QUERY SELECT FALSE, 'invalid_quantity'::TEXT, NULL::JSONB, FALSE;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(stock_quantity, 0) INTO v_stock
+    FROM products
+    WHERE id = p_product_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'product_not_found'::TEXT, NULL::JSONB, FALSE;
+        RETURN;
+    END IF;
+
+    INSERT INTO product_cart_items (user_id, product_id, quantity)
+    SELECT p_user_id, p_product_id, p_quantity
+    WHERE p_quantity <= v_stock
+    ON CONFLICT (user_id, product_id) DO UPDATE
+        SET quantity = product_cart_items.quantity + EXCLUDED.quantity,
+            updated_at = now()
+        WHERE product_cart_items.quantity + EXCLUDED.quantity <= v_stock
+    RETURNING to_jsonb(product_cart_items.*), (product_cart_items.xmax <> 0)
+    INTO v_item, v_existing;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'insufficient_stock'::TEXT, NULL::JSONB, FALSE;
+        RETURN;
+    END IF;
+
+    RETURN QUERY SELECT TRUE, NULL::TEXT, v_item, v_existing;
+END;
+$$;
+
+COMMENT ON FUNCTION product_cart_add(UUID, UUID, INTEGER) IS
+'Add or increment a product cart line, refusing totals above stock_quantity.';
+
+
+CREATE OR REPLACE FUNCTION product_cart_set_quantity(
+    p_user_id  UUID,
+    p_item_id  UUID,
+    p_quantity INTEGER
+)
+RETURNS TABLE (
+    success   BOOLEAN,
+    reason    TEXT,
+    cart_item JSONB
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_item JSONB;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RETURN QUERY SELECT FALSE, 'invalid_quantity'::TEXT, NULL::JSONB;
+        RETURN;
+    END IF;
+
+    UPDATE product_cart_items c
+    SET quantity = p_quantity,
+        updated_at = now()
+    FROM products p
+    WHERE c.id = p_item_id
+      AND c.user_id = p_user_id
+      AND p.id = c.product_id
+      AND p_quantity <= COALESCE(p.stock_quantity, 0)
+    RETURNING to_jsonb(c.*) INTO v_item;
+
+    IF FOUND THEN
+        RETURN QUERY SELECT TRUE, NULL::TEXT, v_item;
+        RETURN;
+    END IF;
+
+    -- Nothing written: tell a missing line apart from a stock refusal
+    PERFORM 1 FROM product_cart_items WHERE id = p_item_id AND user_id = p_user_id;
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT FALSE, 'item_not_found'::TEXT, NULL::JSONB;
+    ELSE
+        RETURN QUERY SELECT FALSE, 'insufficient_stock'::TEXT, NULL::JSONB;
+    END IF;
+END;
+$$;
+
+COMMENT ON FUNCTION product_cart_set_quantity(UUID, UUID, INTEGER) IS
+'Set the quantity of one of the user''s product cart lines, refusing more than stock_quantity.';
+
+
+-- =====================================================
+-- 3. Access
+-- =====================================================
+-- These take the user id as an argument, so only the API (service role, which
+-- has already authenticated the caller) may execute them.
+REVOKE ALL ON FUNCTION cart_snapshot(UUID) FROM PUBLIC;
+REVOKE ALL ON FUNCTION cart_add_service(UUID, UUID, INTEGER, JSONB) FROM PUBLIC;
+REVOKE ALL ON FUNCTION cart_set_quantity(UUID, UUID, INTEGER) FROM PUBLIC;
+REVOKE ALL ON FUNCTION cart_remove_item(UUID, UUID) FROM PUBLIC;
+REVOKE ALL ON FUNCTION product_cart_add(UUID, UUID, INTEGER) FROM PUBLIC;
+REVOKE ALL ON FUNCTION product_cart_set_quantity(UUID, UUID, INTEGER) FROM PUBLIC;
+
+GRANT EXECUTE ON FUNCTION cart_snapshot(UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION cart_add_service(UUID, UUID, INTEGER, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION cart_set_quantity(UUID, UUID, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION cart_remove_item(UUID, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION product_cart_add(UUID, UUID, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION product_cart_set_quantity(UUID, UUID, INTEGER) TO service_role;
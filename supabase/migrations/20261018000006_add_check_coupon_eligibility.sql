@@ -0,0 +1,156 @@
+-- =====================================================
+-- Migration: One-call coupon eligibility check
+-- Purpose: CouponService.get_valid_coupon resolved a code with three
+--          sequential reads - the active coupon row, a first-time bookings
+--          count and a per-user coupon_redemptions count - and runs on both
+--          the payment-order and the booking path of a checkout.
+--
+--          The available-coupons list and the coupon picker's quotes
+--          (CouponService.check_coupons) applied the same rules again in
+--          Python, one coupon_redemptions read and up to two bookings counts
+--          per listing.
+--
+--          check_coupon_eligibility() is now the one implementation of the
+--          rules: it checks a batch of codes for one customer / cart and
+--          returns (coupon, reason) per code in one round-trip. Both paths
+--          call it - get_valid_coupon with one code, check_coupons with the
+--          whole candidate list.
+--
+--          Like get_valid_coupon this is a UX pre-check; redeem_coupon()
+--          (20260617000000) stays the authoritative, locked enforcement.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. check_coupon_eligibility()
+-- =====================================================
+-- Rules, in order: validity window, scope, minimum order, first-time,
+-- total limit, per-user limit. Reason codes match
+-- CouponService._REASON_MESSAGES:
+--   not_found, not_started, expired, wrong_salon, min_order_not_met,
+--   not_first_time, total_limit_reached, per_user_limit_reached
+-- One row per entry of p_codes, in order: coupon_code is the normalised
+-- code, coupon the full coupons row (as JSONB) when reason is NULL.
+-- A NULL p_service_subtotal skips the minimum-order rule (discovery lists
+-- show it as a condition instead). The customer's prior-booking counts are
+-- read at most once per first-time scope.
+CREATE OR REPLACE FUNCTION check_coupon_eligibility(
+    p_codes            TEXT[],
+    p_salon_id         UUID,
+    p_user_id          UUID,
+    p_service_subtotal NUMERIC
+)
+RETURNS TABLE (
+    coupon_code TEXT,
+    coupon      JSONB,
+    reason      TEXT
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_code             TEXT;
+    v_coupon           coupons%ROWTYPE;
+    v_now              TIMESTAMPTZ := now();
+    v_platform_prior   INTEGER;
+    v_salon_prior      INTEGER;
+    v_user_redemptions INTEGER;
+BEGIN
+    FOREACH v_code IN ARRAY COALESCE(p_codes, ARRAY[]::TEXT[]) LOOP
+        coupon_code := UPPER(BTRIM(v_code));
+        coupon := NULL;
+        reason := NULL;
+
+        -- idx_coupons_active_code: at most one active row per (uppercase) code
+        SELECT * INTO v_coupon
+        FROM coupons c
+        WHERE c.code = coupon_code
+          AND c.is_active;
+
+        IF NOT FOUND THEN
+            reason := 'not_found';
+
+        -- Validity window
+        ELSIF v_coupon.valid_from IS NOT NULL AND v_now < v_coupon.valid_from THEN
+            reason := 'not_started';
+        ELSIF v_coupon.valid_until IS NOT NULL AND v_now > v_coupon.valid_until THEN
+            reason := 'expired';
+
+        -- Scope: platform coupons work anywhere; vendor coupons only at their salon
+        ELSIF v_coupon.scope = 'vendor'
+              AND v_coupon.salon_id IS DISTINCT FROM p_salon_id THEN
+            reason := 'wrong_salon';
+
+        -- Minimum order amount (against the service subtotal)
+        ELSIF p_service_subtotal IS NOT NULL
+              AND v_coupon.min_order_amount IS NOT NULL
+              AND p_service_subtotal < v_coupon.min_order_amount THEN
+            reason := 'min_order_not_met';
+
+        -- First-time restriction: no prior non-cancelled, non-deleted bookings
+        -- (platform-wide, or at this salon for vendor scope, which needs one)
+        ELSIF v_coupon.first_time_scope = 'vendor' AND p_salon_id IS NULL THEN
+            reason := 'not_first_time';
+        ELSIF v_coupon.first_time_scope = 'vendor' THEN
+            IF v_salon_prior IS NULL THEN
+                SELECT COUNT(*) INTO v_salon_prior
+                FROM bookings b
+                WHERE b.customer_id = p_user_id
+                  AND b.salon_id = p_salon_id
+                  AND b.deleted_at IS NULL
+                  AND b.status <> 'cancelled';
+            END IF;
+            IF v_salon_prior > 0 THEN
+                reason := 'not_first_time';
+            END IF;
+        ELSIF v_coupon.first_time_scope IS NOT NULL THEN
+            IF v_platform_prior IS NULL THEN
+                SELECT COUNT(*) INTO v_platform_prior
+                FROM bookings b
+                WHERE b.customer_id = p_user_id
+                  AND b.deleted_at IS NULL
+                  AND b.status <> 'cancelled';
+            END IF;
+            IF v_platform_prior > 0 THEN
+                reason := 'not_first_time';
+            END IF;
+        END IF;
+
+        -- Usage limits (soft pre-check; redeem_coupon enforces under lock)
+        IF reason IS NULL
+           AND v_coupon.usage_limit_total IS NOT NULL
+           AND v_coupon.used_count >= v_coupon.usage_limit_total THEN
+            reason := 'total_limit_reached';
+        END IF;
+
+        IF reason IS NULL AND v_coupon.usage_limit_per_user IS NOT NULL THEN
+            SELECT COUNT(*) INTO v_user_redemptions
+            FROM coupon_redemptions r
+            WHERE r.coupon_id = v_coupon.id AND r.user_id = p_user_id;
+
+            IF v_user_redemptions >= v_coupon.usage_limit_per_user THEN
+                reason := 'per_user_limit_reached';
+            END IF;
+        END IF;
+
+        IF reason IS NULL THEN
+            coupon := to_jsonb(v_coupon);
+        END IF;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION check_coupon_eligibility(TEXT[], UUID, UUID, NUMERIC) IS
+'Check a batch of coupon codes for one customer/cart: window, scope, min-order, first-time and usage limits. One (coupon_code, coupon, reason) row per code; reason NULL when usable.';
+
+
+-- =====================================================
+-- 2. Access
+-- =====================================================
+-- Takes the customer id as an argument, so only the API may call it.
+REVOKE ALL ON FUNCTION check_coupon_eligibility(TEXT[], UUID, UUID, NUMERIC) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION check_coupon_eligibility(TEXT[], UUID, UUID, NUMERIC) TO service_role;
+
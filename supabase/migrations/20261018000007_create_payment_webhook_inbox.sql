@@ -0,0 +1,228 @@
+-- =====================================================
+-- Migration: Razorpay webhook inbox
+-- Purpose: Payment state only changed when the client came back and called
+--          a verify endpoint, so a slow or abandoned client held a request
+--          open through the signature check and every write, and a client
+--          that never came back left the payment unrecorded.
+--
+--          POST /payments/webhook now verifies the webhook signature, stores
+--          the raw event here and returns 200. A background worker
+--          (app.core.tasks -> PaymentWebhookService.process_pending) claims
+--          pending events with claim_payment_webhook_events() and applies
+--          them idempotently:
+--            * vendor registration fees -> same pending->success transition
+--              as /payments/registration/verify;
+--            * booking convenience fees  -> verify_payment_and_confirm_booking();
+--            * product orders / cart payment orders -> marked paid.
+--          Every target keys on razorpay_payment_id with a UNIQUE constraint,
+--          so replays and client/webhook races resolve to one application.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Inbox table
+-- =====================================================
+CREATE TABLE IF NOT EXISTS payment_webhook_events (
+    id                   UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    event_id             VARCHAR(64) NOT NULL UNIQUE,    -- X-Razorpay-Event-Id (dedupes redeliveries)
+    event_type           VARCHAR(64) NOT NULL,           -- payment.captured, order.paid, payment.failed, ...
+    payload              JSONB NOT NULL,                 -- Raw event body as received
+    razorpay_order_id    VARCHAR(64),
+    razorpay_payment_id  VARCHAR(64),
+    status               VARCHAR(16) NOT NULL DEFAULT 'pending'
+                         CHECK (status IN ('pending', 'processing', 'processed', 'ignored', 'failed')),
+    attempts             INTEGER NOT NULL DEFAULT 0,
+    last_error           TEXT,
+    available_at         TIMESTAMPTZ NOT NULL DEFAULT now(),  -- Retry backoff: not claimable before this
+    received_at          TIMESTAMPTZ NOT NULL DEFAULT now(),
+    claimed_at           TIMESTAMPTZ,
+    processed_at         TIMESTAMPTZ
+);
+
+COMMENT ON TABLE payment_webhook_events IS
+    'Razorpay webhook inbox. Written by POST /payments/webhook, drained by the payment webhook worker.';
+
+-- Worker queue scan: only unfinished rows, oldest first
+CREATE INDEX IF NOT EXISTS idx_payment_webhook_events_queue
+    ON payment_webhook_events (available_at)
+    WHERE status IN ('pending', 'processing');
+
+-- Support lookups ("what did Razorpay tell us about this order?")
+CREATE INDEX IF NOT EXISTS idx_payment_webhook_events_order
+    ON payment_webhook_events (razorpay_order_id)
+    WHERE razorpay_order_id IS NOT NULL;
+
+
+-- =====================================================
+-- 2. claim_payment_webhook_events()
+-- =====================================================
+-- Moves up to p_limit due events to 'processing' and returns them. SKIP
+-- LOCKED lets several workers drain the queue without handing out the same
+-- event twice; rows stuck in 'processing' longer than p_stale_after (a
+-- worker died mid-batch) become claimable again.
+CREATE OR REPLACE FUNCTION claim_payment_webhook_events(
+    p_limit       INTEGER  DEFAULT 50,
+    p_stale_after INTERVAL DEFAULT INTERVAL '5 minutes'
+)
+RETURNS SETOF payment_webhook_events
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE payment_webhook_events e
+    SET status     = 'processing',
+        attempts   = e.attempts + 1,
+        claimed_at = now()
+    WHERE e.id IN (
+        SELECT q.id
+        FROM payment_webhook_events q
+        WHERE (q.status = 'pending' AND q.available_at <= now())
+           OR (q.status = 'processing' AND q.claimed_at < now() - p_stale_after)
+        ORDER BY q.available_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING e.*;
+END;
+$$;
+
+COMMENT ON FUNCTION claim_payment_webhook_events(INTEGER, INTERVAL) IS
+'Claim a batch of due webhook events for processing (FOR UPDATE SKIP LOCKED). Stale processing rows are reclaimed.';
+
+
+-- =====================================================
+-- 3. Cart payment orders record the capture
+-- =====================================================
+-- Checkout still creates the booking (it needs the slot the customer picked);
+-- the webhook records that the money arrived so unmatched captures can be
+-- found and reconciled.
+ALTER TABLE payment_orders
+    ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT 'created',
+    ADD COLUMN IF NOT EXISTS razorpay_payment_id VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS paid_at TIMESTAMPTZ;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'payment_orders_status_check'
+    ) THEN
+        ALTER TABLE payment_orders
+            ADD CONSTRAINT payment_orders_status_check
+            CHECK (status IN ('created', 'paid'));
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'unique_payment_orders_razorpay_payment'
+    ) THEN
+        ALTER TABLE payment_orders
+            ADD CONSTRAINT unique_payment_orders_razorpay_payment
+            UNIQUE (razorpay_payment_id);
+    END IF;
+END $$;
+
+
+-- =====================================================
+-- 4. verify_payment_and_confirm_booking(): payments table
+-- =====================================================
+-- 20260122000001 read booking_payments (replaced by payments in
+-- 20251119000100), wrote status = 'completed' (not a payment status) and set
+-- bookings.convenience_fee_paid / confirmed_at (dropped / never added), so
+-- every call failed. Same signature, now completing the booking's pending
+-- convenience_fee row in payments - which is what
+-- bookings_with_payments.is_convenience_fee_paid reads - and confirming a
+-- still-pending booking. The signature is NULL-able: webhook captures carry
+-- none.
+CREATE OR REPLACE FUNCTION verify_payment_and_confirm_booking(
+    p_razorpay_order_id VARCHAR,
+    p_razorpay_payment_id VARCHAR,
+    p_razorpay_signature VARCHAR
+)
+RETURNS TABLE (
+    success BOOLEAN,
+    payment_id VARCHAR,
+    booking_id UUID,
+    salon_name VARCHAR,
+    booking_date DATE,
+    time_slots TEXT[],
+    amount_paid NUMERIC,
+    was_already_verified BOOLEAN
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_payment RECORD;
+    v_updated INTEGER;
+BEGIN
+    SELECT p.id, p.status, p.amount, p.razorpay_payment_id,
+           b.id AS booking_id, b.booking_date, b.time_slots,
+           s.business_name AS salon_name
+    INTO v_payment
+    FROM payments p
+    JOIN bookings b ON b.id = p.booking_id
+    JOIN salons s ON s.id = b.salon_id
+    WHERE p.razorpay_order_id = p_razorpay_order_id
+      AND p.payment_type = 'convenience_fee'
+      AND p.deleted_at IS NULL
+    FOR UPDATE OF p;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Payment record not found for order_id: %', p_razorpay_order_id;
+    END IF;
+
+    -- Idempotent: already applied (by the client or an earlier delivery)
+    IF v_payment.status = 'success' THEN
+        RETURN QUERY SELECT
+            TRUE, v_payment.razorpay_payment_id::VARCHAR, v_payment.booking_id,
+            v_payment.salon_name::VARCHAR, v_payment.booking_date,
+            v_payment.time_slots::TEXT[], v_payment.amount, TRUE;
+        RETURN;
+    END IF;
+
+    UPDATE payments
+    SET razorpay_payment_id = p_razorpay_payment_id,
+        razorpay_signature  = COALESCE(p_razorpay_signature, razorpay_signature),
+        status              = 'success',
+        paid_at             = now(),
+        updated_at          = now()
+    WHERE id = v_payment.id
+      AND status = 'pending';
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    IF v_updated = 0 THEN
+        RAISE EXCEPTION 'Payment for order_id % is not pending', p_razorpay_order_id;
+    END IF;
+
+    -- Same transaction: payment and booking move together or not at all
+    UPDATE bookings
+    SET status = 'confirmed',
+        updated_at = now()
+    WHERE id = v_payment.booking_id
+      AND status = 'pending';
+
+    RETURN QUERY SELECT
+        TRUE, p_razorpay_payment_id, v_payment.booking_id,
+        v_payment.salon_name::VARCHAR, v_payment.booking_date,
+        v_payment.time_slots::TEXT[], v_payment.amount, FALSE;
+END;
+$$;
+
+
+-- =====================================================
+-- 5. Access
+-- =====================================================
+-- Written and drained only by the API with the service role.
+ALTER TABLE payment_webhook_events ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage payment webhook events" ON payment_webhook_events;
+CREATE POLICY "Service role can manage payment webhook events"
+    ON payment_webhook_events FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+REVOKE ALL ON FUNCTION claim_payment_webhook_events(INTEGER, INTERVAL) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION claim_payment_webhook_events(INTEGER, INTERVAL) TO service_role;
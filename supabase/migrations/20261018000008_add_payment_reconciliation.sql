@@ -0,0 +1,173 @@
+-- =====================================================
+-- Migration: Nightly payment reconciliation
+-- Purpose: Nothing compared `payments` / `vendor_registration_payments`
+--          with Razorpay, so rows stuck in 'pending' (client closed the tab,
+--          webhook never arrived) were only found by ad-hoc scripts fetching
+--          orders one at a time.
+--
+--          PaymentReconciliationService pages through pending and recently
+--          completed rows, asks the gateway about each order with bounded
+--          concurrency, and hands the verdicts for a page to
+--          apply_payment_reconciliation() in one call. The nightly task
+--          claims the day in payment_reconciliation_runs so only one worker
+--          runs it; scripts/reconcile_payments.py runs it on demand.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Run log (one row per nightly run; doubles as the cross-worker claim)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS payment_reconciliation_runs (
+    run_date     DATE PRIMARY KEY,
+    started_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at  TIMESTAMPTZ,
+    summary      JSONB                       -- Counts + flagged mismatches
+);
+
+COMMENT ON TABLE payment_reconciliation_runs IS
+    'Nightly payment reconciliation runs. Inserting the day''s row claims the run for one worker; an unfinished claim can be taken over once stale.';
+
+ALTER TABLE payment_reconciliation_runs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage payment reconciliation runs" ON payment_reconciliation_runs;
+CREATE POLICY "Service role can manage payment reconciliation runs"
+    ON payment_reconciliation_runs FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+
+-- =====================================================
+-- 2. Gateway-confirmed captures need no checkout signature
+-- =====================================================
+-- A convenience fee could only become 'success' with the client's checkout
+-- signature. A capture confirmed by fetching the payment from Razorpay is
+-- at least as strong, and has no signature to store.
+ALTER TABLE payments DROP CONSTRAINT IF EXISTS payment_online_requires_razorpay;
+ALTER TABLE payments
+    ADD CONSTRAINT payment_online_requires_razorpay
+    CHECK (
+        (payment_type != 'convenience_fee') OR
+        (razorpay_payment_id IS NOT NULL) OR
+        (status != 'success')
+    );
+
+
+-- =====================================================
+-- 3. Page scans
+-- =====================================================
+-- Pending online payments, walked in id order
+CREATE INDEX IF NOT EXISTS idx_payments_pending_online
+    ON payments (id)
+    WHERE status = 'pending' AND razorpay_order_id IS NOT NULL AND deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_vendor_registration_payments_pending
+    ON vendor_registration_payments (id)
+    WHERE status = 'pending' AND razorpay_order_id IS NOT NULL;
+
+
+-- =====================================================
+-- 4. apply_payment_reconciliation()
+-- =====================================================
+-- p_results: [{"table": "payments" | "vendor_registration_payments",
+--              "id": uuid, "status": "success" | "failed",
+--              "razorpay_payment_id", "payment_method",
+--              "error_code", "error_description", "failure_reason"}, ...]
+--
+-- Only rows still 'pending' change, so a client verify, a webhook or another
+-- run landing first wins and this becomes a no-op for that row. A booking's
+-- convenience fee is paid when its payments row is 'success' (that is what
+-- bookings_with_payments.is_convenience_fee_paid reads), so nothing else
+-- changes for payments. Successful registration fees activate the salon
+-- created from the join request, as the verify endpoint does.
+CREATE OR REPLACE FUNCTION apply_payment_reconciliation(p_results JSONB)
+RETURNS TABLE (
+    payments_updated       INTEGER,
+    registrations_updated  INTEGER,
+    salons_activated       INTEGER
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_payments      INTEGER := 0;
+    v_registrations INTEGER := 0;
+    v_salons        INTEGER := 0;
+BEGIN
+    -- ---- payments ----
+    WITH updated AS (
+        UPDATE payments p
+        SET status              = r.status,
+            razorpay_payment_id = COALESCE(r.razorpay_payment_id, p.razorpay_payment_id),
+            payment_method      = COALESCE(r.payment_method, p.payment_method),
+            paid_at             = CASE WHEN r.status = 'success' THEN now() ELSE p.paid_at END,
+            failed_at           = CASE WHEN r.status = 'failed' THEN now() ELSE p.failed_at END,
+            error_code          = COALESCE(r.error_code, p.error_code),
+            error_description   = COALESCE(r.error_description, p.error_description),
+            updated_at          = now()
+        FROM jsonb_to_recordset(COALESCE(p_results, '[]'::jsonb)) AS r(
+            "table" TEXT, id UUID, status TEXT, razorpay_payment_id TEXT,
+            payment_method TEXT, error_code TEXT, error_description TEXT,
+            failure_reason TEXT
+        )
+        WHERE r."table" = 'payments'
+          AND p.id = r.id
+          AND p.status = 'pending'
+        RETURNING p.id
+    )
+    SELECT COUNT(*) INTO v_payments FROM updated;
+
+    -- ---- vendor_registration_payments ----
+    -- The salon is linked in the same UPDATE: a statement may not modify
+    -- one row twice.
+    WITH updated AS (
+        UPDATE vendor_registration_payments v
+        SET status               = r.status::payment_status,
+            razorpay_payment_id  = COALESCE(r.razorpay_payment_id, v.razorpay_payment_id),
+            payment_method       = COALESCE(r.payment_method, v.payment_method),
+            payment_completed_at = CASE WHEN r.status = 'success' THEN now() END,
+            payment_failed_at    = CASE WHEN r.status = 'failed' THEN now() END,
+            failure_reason       = COALESCE(r.failure_reason, v.failure_reason),
+            error_code           = COALESCE(r.error_code, v.error_code),
+            error_description    = COALESCE(r.error_description, v.error_description),
+            salon_id             = CASE
+                                       WHEN r.status = 'success' THEN COALESCE(
+                                           v.salon_id,
+                                           (SELECT s.id FROM salons s
+                                            WHERE s.join_request_id = v.vendor_request_id
+                                            LIMIT 1))
+                                       ELSE v.salon_id
+                                   END,
+            updated_at           = now()
+        FROM jsonb_to_recordset(COALESCE(p_results, '[]'::jsonb)) AS r(
+            "table" TEXT, id UUID, status TEXT, razorpay_payment_id TEXT,
+            payment_method TEXT, error_code TEXT, error_description TEXT,
+            failure_reason TEXT
+        )
+        WHERE r."table" = 'vendor_registration_payments'
+          AND v.id = r.id
+          AND v.status = 'pending'
+        RETURNING v.salon_id, v.status
+    ), activated AS (
+        UPDATE salons s
+        SET is_active = TRUE,
+            registration_fee_paid = TRUE,
+            updated_at = now()
+        FROM updated u
+        WHERE u.status = 'success'
+          AND s.id = u.salon_id
+        RETURNING s.id
+    )
+    SELECT (SELECT COUNT(*) FROM updated), (SELECT COUNT(*) FROM activated)
+    INTO v_registrations, v_salons;
+
+    RETURN QUERY SELECT v_payments, v_registrations, v_salons;
+END;
+$$;
+
+COMMENT ON FUNCTION apply_payment_reconciliation(JSONB) IS
+'Apply a page of gateway reconciliation verdicts to still-pending payments / vendor_registration_payments rows in one call.';
+
+REVOKE ALL ON FUNCTION apply_payment_reconciliation(JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION apply_payment_reconciliation(JSONB) TO service_role;
@@ -0,0 +1,63 @@
+-- =====================================================
+-- Migration: Sequence-backed booking numbers
+-- Purpose: BookingService built booking numbers as BK{YYYYMMDD}{1000-9999}
+--          in Python. 9,000 values a day collide with even odds at roughly
+--          110 bookings (birthday bound), the collision only surfaced as a
+--          failed insert on bookings_booking_number_key, and random suffixes
+--          scatter inserts across the booking_number index.
+--
+--          The API now leaves booking_number unset and the existing
+--          set_booking_number trigger fills it from a sequence:
+--
+--              BK-YYYYMMDD-NNNNNNN     e.g. BK-20261018-0001234
+--
+--          nextval() never hands out a value twice, even across concurrent
+--          transactions, so there is no collision and no retry. The date
+--          keeps numbers readable; the zero-padded, ever-increasing suffix
+--          makes them sort in creation order and land on the right-hand edge
+--          of the index.
+--
+--          The old trigger body (MAX()+1 per day) raced under concurrent
+--          inserts; it never fired because the API always sent a number.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Sequence
+-- =====================================================
+-- Global, never reset: the date prefix is cosmetic, uniqueness comes from
+-- the suffix. 7 digits keep the number at 19 characters (column is
+-- VARCHAR(20)); past 9,999,999 the suffix widens by one digit and still fits.
+CREATE SEQUENCE IF NOT EXISTS booking_number_seq AS BIGINT;
+
+COMMENT ON SEQUENCE booking_number_seq IS
+    'Suffix source for bookings.booking_number (see generate_booking_number()).';
+
+
+-- =====================================================
+-- 2. Trigger function
+-- =====================================================
+CREATE OR REPLACE FUNCTION generate_booking_number()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    NEW.booking_number := 'BK-'
+        || TO_CHAR(CURRENT_DATE, 'YYYYMMDD')
+        || '-'
+        || LPAD(nextval('booking_number_seq')::TEXT, 7, '0');
+    RETURN NEW;
+END;
+$$;
+
+-- Same trigger as the baseline schema; restated so this migration is
+-- self-contained.
+CREATE OR REPLACE TRIGGER set_booking_number
+    BEFORE INSERT ON bookings
+    FOR EACH ROW
+    WHEN (NEW.booking_number IS NULL OR NEW.booking_number = '')
+    EXECUTE FUNCTION generate_booking_number();
+
+COMMENT ON COLUMN bookings.booking_number IS
+    'Booking reference assigned on insert from booking_number_seq (BK-YYYYMMDD-NNNNNNN). Unique; sorts in creation order.';
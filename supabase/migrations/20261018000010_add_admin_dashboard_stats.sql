@@ -0,0 +1,85 @@
+-- =====================================================
+-- Migration: One-call admin dashboard statistics
+-- Purpose: AdminService.get_dashboard_stats ran seven sequential
+--          count="exact" queries, then downloaded every successful
+--          payments / vendor_registration_payments row to sum revenue in
+--          Python - a cost that grew with all-time payment volume.
+--
+--          admin_dashboard_stats() computes the same counters and both
+--          revenue figures inside the database and returns one row. The API
+--          caches it briefly and serves it stale while it refreshes.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. admin_dashboard_stats()
+-- =====================================================
+-- Same definitions as the queries it replaces:
+--   pending_requests       vendor_join_requests with status 'pending'
+--   total/active salons    all salons / is_active
+--   pending_payment_salons salons with registration_fee_paid = false
+--   total_rms              active profiles with user_role 'relationship_manager'
+--   total/today bookings   all bookings / booking_date = today
+--   revenue                successful payments (by created_at) plus successful
+--                          registration fees (by payment_completed_at);
+--                          this_month = current calendar month
+CREATE OR REPLACE FUNCTION admin_dashboard_stats()
+RETURNS TABLE (
+    pending_requests        BIGINT,
+    total_salons            BIGINT,
+    active_salons           BIGINT,
+    pending_payment_salons  BIGINT,
+    total_rms               BIGINT,
+    total_bookings          BIGINT,
+    today_bookings          BIGINT,
+    total_revenue           NUMERIC,
+    this_month_revenue      NUMERIC
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH month_start AS (
+        SELECT date_trunc('month', now()) AS ts
+    ),
+    revenue AS (
+        SELECT p.amount, p.created_at AS paid_at
+        FROM payments p
+        WHERE p.status = 'success'
+        UNION ALL
+        SELECT v.amount, v.payment_completed_at
+        FROM vendor_registration_payments v
+        WHERE v.status = 'success'
+    )
+    SELECT
+        (SELECT COUNT(*) FROM vendor_join_requests WHERE status = 'pending'),
+        s.total_salons,
+        s.active_salons,
+        s.pending_payment_salons,
+        (SELECT COUNT(*) FROM profiles
+          WHERE user_role = 'relationship_manager' AND is_active),
+        b.total_bookings,
+        b.today_bookings,
+        r.total_revenue,
+        r.this_month_revenue
+    FROM
+        (SELECT COUNT(*)                                            AS total_salons,
+                COUNT(*) FILTER (WHERE is_active)                   AS active_salons,
+                COUNT(*) FILTER (WHERE registration_fee_paid = FALSE) AS pending_payment_salons
+         FROM salons) s,
+        (SELECT COUNT(*)                                            AS total_bookings,
+                COUNT(*) FILTER (WHERE booking_date = CURRENT_DATE) AS today_bookings
+         FROM bookings) b,
+        (SELECT COALESCE(SUM(amount), 0)                            AS total_revenue,
+                COALESCE(SUM(amount) FILTER (
+                    WHERE paid_at >= (SELECT ts FROM month_start)
+                ), 0)                                               AS this_month_revenue
+         FROM revenue) r;
+$$;
+
+COMMENT ON FUNCTION admin_dashboard_stats() IS
+'Admin dashboard counters and total / month-to-date revenue in one row (GET /admin/stats).';
+
+REVOKE ALL ON FUNCTION admin_dashboard_stats() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION admin_dashboard_stats() TO service_role;
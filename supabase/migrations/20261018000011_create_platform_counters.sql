@@ -0,0 +1,440 @@
+-- =====================================================
+-- Migration: Incrementally maintained platform counters
+-- Purpose: admin_dashboard_stats() (20261018000010) fused the dashboard
+--          into one call, but it still recounted bookings, salons and
+--          profiles and re-summed every successful payment on each refresh.
+--
+--          platform_counters holds those figures as rows that triggers keep
+--          current on insert, update and (soft-)delete of the source rows,
+--          the same approach as the RM counters on rm_profiles
+--          (20251206000002). Readers fetch a handful of rows by key, so the
+--          cost no longer grows with the data.
+--
+--          Counters cover live rows only: soft-deleted bookings, salons,
+--          profiles and payments drop out when deleted_at is set.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Table
+-- =====================================================
+-- scope:  'platform', or 'salon:<salon uuid>' for per-salon booking figures
+-- counter_key (scope 'platform'):
+--   bookings.total                    live bookings
+--   bookings.status.<status>          live bookings per status
+--   bookings.date.<YYYY-MM-DD>        live bookings per booking_date
+--   salons.total / salons.active / salons.pending_payment
+--   vendor_requests.total / vendor_requests.status.<status>
+--   rms.active                        active relationship managers
+--   revenue.total                     successful payments + registration fees
+--   revenue.day.<YYYY-MM-DD>          ... bucketed by payment day (UTC)
+--   revenue.month.<YYYY-MM>           ... bucketed by payment month (UTC)
+-- counter_key (scope 'salon:<id>'):
+--   bookings.total / bookings.status.<status>
+--   bookings.completed_amount         SUM(total_amount) of completed bookings
+CREATE TABLE IF NOT EXISTS platform_counters (
+    scope        TEXT        NOT NULL,
+    counter_key  TEXT        NOT NULL,
+    value        NUMERIC     NOT NULL DEFAULT 0,
+    updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (scope, counter_key)
+);
+
+COMMENT ON TABLE platform_counters IS
+    'Dashboard counters and revenue buckets maintained by triggers (auto-updated; rebuild with rebuild_platform_counters()).';
+
+ALTER TABLE platform_counters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage platform counters" ON platform_counters;
+CREATE POLICY "Service role can manage platform counters"
+    ON platform_counters FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+
+-- =====================================================
+-- 2. Delta helper
+-- =====================================================
+-- Applies (scope, key, delta) triples in one statement. Deltas for the same
+-- key are netted first, so an UPDATE that leaves a key unchanged writes
+-- nothing for it, and rows are locked in key order so concurrent writers
+-- cannot deadlock on each other's counters.
+CREATE OR REPLACE FUNCTION apply_platform_counter_deltas(
+    p_scopes TEXT[],
+    p_keys   TEXT[],
+    p_deltas NUMERIC[]
+)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO platform_counters AS c (scope, counter_key, value)
+    SELECT d.scope, d.counter_key, SUM(d.delta)
+    FROM unnest(p_scopes, p_keys, p_deltas) AS d(scope, counter_key, delta)
+    GROUP BY d.scope, d.counter_key
+    HAVING SUM(d.delta) <> 0
+    ORDER BY d.scope, d.counter_key
+    ON CONFLICT (scope, counter_key) DO UPDATE
+        SET value = c.value + EXCLUDED.value,
+            updated_at = now();
+$$;
+
+REVOKE ALL ON FUNCTION apply_platform_counter_deltas(TEXT[], TEXT[], NUMERIC[]) FROM PUBLIC;
+
+
+-- =====================================================
+-- 3. Trigger functions
+-- =====================================================
+-- Each one retracts the OLD row's contribution and adds the NEW row's.
+
+-- ---- bookings ----
+CREATE OR REPLACE FUNCTION update_platform_counters_bookings()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_scopes TEXT[]    := '{}';
+    v_keys   TEXT[]    := '{}';
+    v_deltas NUMERIC[] := '{}';
+    v_salon  TEXT;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        v_salon  := 'salon:' || OLD.salon_id;
+        v_scopes := v_scopes || ARRAY['platform', 'platform', 'platform', v_salon, v_salon, v_salon];
+        v_keys   := v_keys   || ARRAY[
+            'bookings.total', 'bookings.status.' || OLD.status, 'bookings.date.' || to_char(OLD.booking_date, 'YYYY-MM-DD'),
+            'bookings.total', 'bookings.status.' || OLD.status, 'bookings.completed_amount'];
+        v_deltas := v_deltas || ARRAY[-1, -1, -1, -1, -1,
+            CASE WHEN OLD.status = 'completed' THEN -OLD.total_amount ELSE 0 END]::NUMERIC[];
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+        v_salon  := 'salon:' || NEW.salon_id;
+        v_scopes := v_scopes || ARRAY['platform', 'platform', 'platform', v_salon, v_salon, v_salon];
+        v_keys   := v_keys   || ARRAY[
+            'bookings.total', 'bookings.status.' || NEW.status, 'bookings.date.' || to_char(NEW.booking_date, 'YYYY-MM-DD'),
+            'bookings.total', 'bookings.status.' || NEW.status, 'bookings.completed_amount'];
+        v_deltas := v_deltas || ARRAY[1, 1, 1, 1, 1,
+            CASE WHEN NEW.status = 'completed' THEN NEW.total_amount ELSE 0 END]::NUMERIC[];
+    END IF;
+
+    PERFORM apply_platform_counter_deltas(v_scopes, v_keys, v_deltas);
+    RETURN NULL;
+END;
+$$;
+
+-- ---- salons ----
+CREATE OR REPLACE FUNCTION update_platform_counters_salons()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_keys   TEXT[]    := '{}';
+    v_deltas NUMERIC[] := '{}';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        v_keys   := v_keys   || ARRAY['salons.total', 'salons.active', 'salons.pending_payment'];
+        v_deltas := v_deltas || ARRAY[-1,
+            CASE WHEN OLD.is_active IS TRUE THEN -1 ELSE 0 END,
+            CASE WHEN OLD.registration_fee_paid IS FALSE THEN -1 ELSE 0 END]::NUMERIC[];
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+        v_keys   := v_keys   || ARRAY['salons.total', 'salons.active', 'salons.pending_payment'];
+        v_deltas := v_deltas || ARRAY[1,
+            CASE WHEN NEW.is_active IS TRUE THEN 1 ELSE 0 END,
+            CASE WHEN NEW.registration_fee_paid IS FALSE THEN 1 ELSE 0 END]::NUMERIC[];
+    END IF;
+
+    PERFORM apply_platform_counter_deltas(
+        array_fill('platform'::TEXT, ARRAY[cardinality(v_keys)]), v_keys, v_deltas);
+    RETURN NULL;
+END;
+$$;
+
+-- ---- vendor_join_requests ----
+CREATE OR REPLACE FUNCTION update_platform_counters_vendor_requests()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_keys   TEXT[]    := '{}';
+    v_deltas NUMERIC[] := '{}';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_keys   := v_keys   || ARRAY['vendor_requests.total', 'vendor_requests.status.' || OLD.status];
+        v_deltas := v_deltas || ARRAY[-1, -1]::NUMERIC[];
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_keys   := v_keys   || ARRAY['vendor_requests.total', 'vendor_requests.status.' || NEW.status];
+        v_deltas := v_deltas || ARRAY[1, 1]::NUMERIC[];
+    END IF;
+
+    PERFORM apply_platform_counter_deltas(
+        array_fill('platform'::TEXT, ARRAY[cardinality(v_keys)]), v_keys, v_deltas);
+    RETURN NULL;
+END;
+$$;
+
+-- ---- profiles (relationship managers) ----
+CREATE OR REPLACE FUNCTION update_platform_counters_rms()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_delta NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE')
+       AND OLD.user_role = 'relationship_manager' AND OLD.is_active IS TRUE AND OLD.deleted_at IS NULL THEN
+        v_delta := v_delta - 1;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE')
+       AND NEW.user_role = 'relationship_manager' AND NEW.is_active IS TRUE AND NEW.deleted_at IS NULL THEN
+        v_delta := v_delta + 1;
+    END IF;
+
+    PERFORM apply_platform_counter_deltas(ARRAY['platform'], ARRAY['rms.active'], ARRAY[v_delta]);
+    RETURN NULL;
+END;
+$$;
+
+-- ---- payments + vendor_registration_payments (revenue) ----
+-- Revenue is a successful row's amount, bucketed by the same timestamp the
+-- dashboard always used: payments.created_at, registration fees'
+-- payment_completed_at.
+CREATE OR REPLACE FUNCTION platform_revenue_keys(p_paid_at TIMESTAMPTZ)
+RETURNS TEXT[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT ARRAY[
+        'revenue.total',
+        'revenue.day.'   || to_char(p_paid_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'),
+        'revenue.month.' || to_char(p_paid_at AT TIME ZONE 'UTC', 'YYYY-MM')
+    ];
+$$;
+
+CREATE OR REPLACE FUNCTION update_platform_counters_revenue()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_keys   TEXT[]    := '{}';
+    v_deltas NUMERIC[] := '{}';
+    v_old    JSONB     := CASE WHEN TG_OP IN ('UPDATE', 'DELETE') THEN to_jsonb(OLD) END;
+    v_new    JSONB     := CASE WHEN TG_OP IN ('INSERT', 'UPDATE') THEN to_jsonb(NEW) END;
+    v_ts_col TEXT      := CASE WHEN TG_TABLE_NAME = 'payments' THEN 'created_at' ELSE 'payment_completed_at' END;
+BEGIN
+    -- payments is soft-deletable, vendor_registration_payments is not
+    IF v_old->>'status' = 'success' AND v_old->>'deleted_at' IS NULL THEN
+        v_keys   := v_keys || platform_revenue_keys((v_old->>v_ts_col)::TIMESTAMPTZ);
+        v_deltas := v_deltas || array_fill(-(v_old->>'amount')::NUMERIC, ARRAY[3]);
+    END IF;
+
+    IF v_new->>'status' = 'success' AND v_new->>'deleted_at' IS NULL THEN
+        v_keys   := v_keys || platform_revenue_keys((v_new->>v_ts_col)::TIMESTAMPTZ);
+        v_deltas := v_deltas || array_fill((v_new->>'amount')::NUMERIC, ARRAY[3]);
+    END IF;
+
+    PERFORM apply_platform_counter_deltas(
+        array_fill('platform'::TEXT, ARRAY[cardinality(v_keys)]), v_keys, v_deltas);
+    RETURN NULL;
+END;
+$$;
+
+
+-- =====================================================
+-- 4. Triggers
+-- =====================================================
+-- UPDATE triggers only fire for the columns a counter depends on.
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.bookings;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF status, booking_date, salon_id, total_amount, deleted_at
+ON public.bookings
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_bookings();
+
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.salons;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF is_active, registration_fee_paid, deleted_at
+ON public.salons
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_salons();
+
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.vendor_join_requests;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF status
+ON public.vendor_join_requests
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_vendor_requests();
+
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.profiles;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF user_role, is_active, deleted_at
+ON public.profiles
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_rms();
+
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.payments;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF status, amount, created_at, deleted_at
+ON public.payments
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_revenue();
+
+DROP TRIGGER IF EXISTS trigger_platform_counters ON public.vendor_registration_payments;
+CREATE TRIGGER trigger_platform_counters
+AFTER INSERT OR DELETE OR UPDATE OF status, amount, payment_completed_at
+ON public.vendor_registration_payments
+FOR EACH ROW
+EXECUTE FUNCTION update_platform_counters_revenue();
+
+
+-- =====================================================
+-- 5. Rebuild (initial sync + repair)
+-- =====================================================
+-- Recomputes every counter from the source tables. The SHARE locks hold off
+-- writers for the duration so no trigger delta is lost or double-counted.
+CREATE OR REPLACE FUNCTION rebuild_platform_counters()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    LOCK TABLE bookings, salons, vendor_join_requests, profiles,
+               payments, vendor_registration_payments IN SHARE MODE;
+    LOCK TABLE platform_counters IN EXCLUSIVE MODE;
+
+    DELETE FROM platform_counters;
+
+    INSERT INTO platform_counters (scope, counter_key, value)
+    SELECT scope, counter_key, SUM(value)
+    FROM (
+        -- bookings (platform)
+        SELECT 'platform' AS scope, 'bookings.total' AS counter_key, COUNT(*)::NUMERIC AS value
+        FROM bookings WHERE deleted_at IS NULL
+        UNION ALL
+        SELECT 'platform', 'bookings.status.' || status, COUNT(*)
+        FROM bookings WHERE deleted_at IS NULL GROUP BY status
+        UNION ALL
+        SELECT 'platform', 'bookings.date.' || to_char(booking_date, 'YYYY-MM-DD'), COUNT(*)
+        FROM bookings WHERE deleted_at IS NULL GROUP BY booking_date
+        -- bookings (per salon)
+        UNION ALL
+        SELECT 'salon:' || salon_id, 'bookings.total', COUNT(*)
+        FROM bookings WHERE deleted_at IS NULL GROUP BY salon_id
+        UNION ALL
+        SELECT 'salon:' || salon_id, 'bookings.status.' || status, COUNT(*)
+        FROM bookings WHERE deleted_at IS NULL GROUP BY salon_id, status
+        UNION ALL
+        SELECT 'salon:' || salon_id, 'bookings.completed_amount', SUM(total_amount)
+        FROM bookings WHERE deleted_at IS NULL AND status = 'completed' GROUP BY salon_id
+        -- salons
+        UNION ALL
+        SELECT 'platform', 'salons.total', COUNT(*)
+        FROM salons WHERE deleted_at IS NULL
+        UNION ALL
+        SELECT 'platform', 'salons.active', COUNT(*)
+        FROM salons WHERE deleted_at IS NULL AND is_active IS TRUE
+        UNION ALL
+        SELECT 'platform', 'salons.pending_payment', COUNT(*)
+        FROM salons WHERE deleted_at IS NULL AND registration_fee_paid IS FALSE
+        -- vendor requests
+        UNION ALL
+        SELECT 'platform', 'vendor_requests.total', COUNT(*)
+        FROM vendor_join_requests
+        UNION ALL
+        SELECT 'platform', 'vendor_requests.status.' || status, COUNT(*)
+        FROM vendor_join_requests GROUP BY status
+        -- relationship managers
+        UNION ALL
+        SELECT 'platform', 'rms.active', COUNT(*)
+        FROM profiles
+        WHERE user_role = 'relationship_manager' AND is_active IS TRUE AND deleted_at IS NULL
+        -- revenue
+        UNION ALL
+        SELECT 'platform', unnest(platform_revenue_keys(paid_at)), amount
+        FROM (
+            SELECT amount, created_at AS paid_at
+            FROM payments WHERE status = 'success' AND deleted_at IS NULL
+            UNION ALL
+            SELECT amount, payment_completed_at
+            FROM vendor_registration_payments WHERE status = 'success'
+        ) paid
+    ) counts
+    GROUP BY scope, counter_key
+    HAVING SUM(value) <> 0;
+END;
+$$;
+
+COMMENT ON FUNCTION rebuild_platform_counters() IS
+'Recompute platform_counters from the source tables (initial sync, or repair after manual data fixes).';
+
+REVOKE ALL ON FUNCTION rebuild_platform_counters() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION rebuild_platform_counters() TO service_role;
+
+SELECT rebuild_platform_counters();
+
+
+-- =====================================================
+-- 6. admin_dashboard_stats() reads the counters
+-- =====================================================
+-- Same result shape as 20261018000010; every figure is now a keyed lookup.
+CREATE OR REPLACE FUNCTION admin_dashboard_stats()
+RETURNS TABLE (
+    pending_requests        BIGINT,
+    total_salons            BIGINT,
+    active_salons           BIGINT,
+    pending_payment_salons  BIGINT,
+    total_rms               BIGINT,
+    total_bookings          BIGINT,
+    today_bookings          BIGINT,
+    total_revenue           NUMERIC,
+    this_month_revenue      NUMERIC
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH c AS (
+        SELECT counter_key, value
+        FROM platform_counters
+        WHERE scope = 'platform'
+          AND counter_key IN (
+              'vendor_requests.status.pending',
+              'salons.total', 'salons.active', 'salons.pending_payment',
+              'rms.active',
+              'bookings.total', 'bookings.date.' || to_char(CURRENT_DATE, 'YYYY-MM-DD'),
+              'revenue.total', 'revenue.month.' || to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM')
+          )
+    )
+    SELECT
+        COALESCE((SELECT value FROM c WHERE counter_key = 'vendor_requests.status.pending'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'salons.total'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'salons.active'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'salons.pending_payment'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'rms.active'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'bookings.total'), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'bookings.date.' || to_char(CURRENT_DATE, 'YYYY-MM-DD')), 0)::BIGINT,
+        COALESCE((SELECT value FROM c WHERE counter_key = 'revenue.total'), 0),
+        COALESCE((SELECT value FROM c WHERE counter_key LIKE 'revenue.month.%'), 0);
+$$;
+
+COMMENT ON FUNCTION admin_dashboard_stats() IS
+'Admin dashboard counters and total / month-to-date revenue in one row, read from platform_counters (GET /admin/stats).';
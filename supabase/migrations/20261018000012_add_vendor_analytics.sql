@@ -0,0 +1,160 @@
+-- =====================================================
+-- Migration: One-call vendor analytics
+-- Purpose: VendorService.get_analytics loaded the salon (plus a
+--          system_config read it did not use), ran three product_orders
+--          queries - one downloading every completed order to sum in
+--          Python - and three bookings/services queries, one downloading
+--          every completed booking's total_amount. The dashboard slowed
+--          down linearly with a salon's history.
+--
+--          vendor_analytics() returns every figure in one row:
+--            * all-time booking figures from the salon's platform_counters
+--              rows (20261018000011) - O(1) whatever the history;
+--            * active services and product-order figures with COUNT / SUM
+--              FILTER over the vendor's rows;
+--            * optionally, the same booking and product-order figures for a
+--              date range, computed in the same call.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Indexes
+-- =====================================================
+-- Date-range breakdown: a salon's bookings by booking_date
+CREATE INDEX IF NOT EXISTS idx_bookings_salon_booking_date
+    ON bookings (salon_id, booking_date)
+    WHERE deleted_at IS NULL;
+
+-- The vendor's product orders
+CREATE INDEX IF NOT EXISTS idx_product_orders_user_created
+    ON product_orders (user_id, created_at);
+
+
+-- =====================================================
+-- 2. vendor_analytics()
+-- =====================================================
+-- No row when the vendor has no salon (the API answers 404).
+-- regular_buyer salons have no bookings side: booking figures are 0.
+-- period is NULL unless both p_date_from and p_date_to are given; bookings
+-- are bucketed by booking_date, product orders by created_at (UTC date).
+CREATE OR REPLACE FUNCTION vendor_analytics(
+    p_vendor_id UUID,
+    p_date_from DATE DEFAULT NULL,
+    p_date_to   DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    salon_id               UUID,
+    is_regular_buyer       BOOLEAN,
+    total_bookings         BIGINT,
+    pending_bookings       BIGINT,
+    total_revenue          NUMERIC,
+    active_services        BIGINT,
+    average_rating         NUMERIC,
+    total_product_orders   BIGINT,
+    pending_product_orders BIGINT,
+    total_product_spending NUMERIC,
+    period                 JSONB
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_salon         salons%ROWTYPE;
+    v_regular_buyer BOOLEAN;
+    v_scope         TEXT;
+BEGIN
+    SELECT * INTO v_salon
+    FROM salons
+    WHERE vendor_id = p_vendor_id
+    ORDER BY created_at
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    v_regular_buyer := v_salon.salon_type IS NOT DISTINCT FROM 'regular_buyer';
+    v_scope := 'salon:' || v_salon.id;
+
+    RETURN QUERY
+    WITH counters AS (
+        SELECT
+            COALESCE(SUM(c.value) FILTER (WHERE c.counter_key = 'bookings.total'), 0)            AS bookings_total,
+            COALESCE(SUM(c.value) FILTER (WHERE c.counter_key = 'bookings.status.pending'), 0)   AS bookings_pending,
+            COALESCE(SUM(c.value) FILTER (WHERE c.counter_key = 'bookings.completed_amount'), 0) AS completed_amount
+        FROM platform_counters c
+        WHERE c.scope = v_scope
+          AND c.counter_key IN ('bookings.total', 'bookings.status.pending', 'bookings.completed_amount')
+          AND NOT v_regular_buyer
+    ),
+    service_stats AS (
+        SELECT COUNT(*) FILTER (WHERE s.is_active) AS active
+        FROM services s
+        WHERE s.salon_id = v_salon.id
+          AND NOT v_regular_buyer
+    ),
+    order_stats AS (
+        SELECT
+            COUNT(*)                                                         AS total,
+            COUNT(*) FILTER (WHERE o.status = 'pending')                     AS pending,
+            COALESCE(SUM(o.total_amount) FILTER (WHERE o.payment_status = 'completed'), 0) AS spending,
+            COUNT(*) FILTER (WHERE o.created_at >= p_date_from
+                               AND o.created_at < p_date_to + 1)             AS period_total,
+            COALESCE(SUM(o.total_amount) FILTER (WHERE o.payment_status = 'completed'
+                                                   AND o.created_at >= p_date_from
+                                                   AND o.created_at < p_date_to + 1), 0) AS period_spending
+        FROM product_orders o
+        WHERE o.user_id = p_vendor_id
+    ),
+    period_bookings AS (
+        SELECT
+            COUNT(*)                                                      AS total,
+            COUNT(*) FILTER (WHERE b.status = 'pending')                  AS pending,
+            COUNT(*) FILTER (WHERE b.status = 'confirmed')                AS confirmed,
+            COUNT(*) FILTER (WHERE b.status = 'completed')                AS completed,
+            COUNT(*) FILTER (WHERE b.status = 'cancelled')                AS cancelled,
+            COUNT(*) FILTER (WHERE b.status = 'no_show')                  AS no_show,
+            COALESCE(SUM(b.total_amount) FILTER (WHERE b.status = 'completed'), 0) AS revenue
+        FROM bookings b
+        WHERE b.salon_id = v_salon.id
+          AND b.deleted_at IS NULL
+          AND b.booking_date BETWEEN p_date_from AND p_date_to
+          AND NOT v_regular_buyer
+    )
+    SELECT
+        v_salon.id,
+        v_regular_buyer,
+        counters.bookings_total::BIGINT,
+        counters.bookings_pending::BIGINT,
+        counters.completed_amount,
+        COALESCE(service_stats.active, 0),
+        COALESCE(v_salon.average_rating, 0),
+        order_stats.total,
+        order_stats.pending,
+        order_stats.spending,
+        CASE WHEN p_date_from IS NOT NULL AND p_date_to IS NOT NULL THEN
+            jsonb_build_object(
+                'date_from',              p_date_from,
+                'date_to',                p_date_to,
+                'bookings',               period_bookings.total,
+                'pending_bookings',       period_bookings.pending,
+                'confirmed_bookings',     period_bookings.confirmed,
+                'completed_bookings',     period_bookings.completed,
+                'cancelled_bookings',     period_bookings.cancelled,
+                'no_show_bookings',       period_bookings.no_show,
+                'revenue',                period_bookings.revenue,
+                'product_orders',         order_stats.period_total,
+                'product_spending',       order_stats.period_spending
+            )
+        END
+    FROM counters, service_stats, order_stats, period_bookings;
+END;
+$$;
+
+COMMENT ON FUNCTION vendor_analytics(UUID, DATE, DATE) IS
+'Vendor dashboard figures in one row (GET /vendors/analytics); optional date-range breakdown in period.';
+
+REVOKE ALL ON FUNCTION vendor_analytics(UUID, DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION vendor_analytics(UUID, DATE, DATE) TO service_role;
@@ -0,0 +1,379 @@
+-- =====================================================
+-- Migration: Daily analytics rollups for time-series charts
+-- Purpose: Dashboards only had lifetime totals; a trend chart would have
+--          had to download raw bookings. analytics_daily_rollups keeps one
+--          row per (scope, day) with bookings, cancellations, revenue and
+--          new customers, and analytics_timeseries() folds those rows into
+--          day / week / month buckets - a year of daily rows per scope at
+--          most, so chart reads stay in single-digit milliseconds.
+--
+--          A trigger on bookings queues each changed (salon, customer, day)
+--          in analytics_dirty_bookings - one tiny insert, no aggregation on
+--          the write path. refresh_analytics_rollups(), run by the API's
+--          background job (app.core.tasks.refresh_analytics_rollups_task),
+--          drains the queue and recomputes only the affected days, so a
+--          refresh costs what changed, not the table size.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Rollup table + change queue
+-- =====================================================
+-- scope: 'platform', or 'salon:<salon uuid>' (same convention as
+-- platform_counters). Days are booking_date - the appointment day, as on
+-- the admin "today" counter and the vendor period breakdown:
+--   bookings       live bookings on the day
+--   cancellations  ... of which cancelled
+--   revenue        SUM(total_amount) of those completed
+--   new_customers  customers whose first live booking (in the scope) is
+--                  on the day - additive, so weeks / months are plain sums
+CREATE TABLE IF NOT EXISTS analytics_daily_rollups (
+    scope          TEXT        NOT NULL,
+    bucket_date    DATE        NOT NULL,
+    bookings       INTEGER     NOT NULL DEFAULT 0,
+    cancellations  INTEGER     NOT NULL DEFAULT 0,
+    revenue        NUMERIC     NOT NULL DEFAULT 0,
+    new_customers  INTEGER     NOT NULL DEFAULT 0,
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (scope, bucket_date)
+);
+
+COMMENT ON TABLE analytics_daily_rollups IS
+    'Per-day booking analytics per scope (platform / salon). Maintained by refresh_analytics_rollups().';
+
+-- Change queue, filled by the bookings trigger below and drained by
+-- refresh_analytics_rollups(). Both the OLD and NEW sides of an update are
+-- queued, so a moved or deleted booking also refreshes the day it left.
+CREATE TABLE IF NOT EXISTS analytics_dirty_bookings (
+    salon_id      UUID NOT NULL,
+    customer_id   UUID NOT NULL,
+    booking_date  DATE NOT NULL,
+    PRIMARY KEY (salon_id, customer_id, booking_date)
+);
+
+COMMENT ON TABLE analytics_dirty_bookings IS
+    'Booking (salon, customer, day) keys changed since the last analytics rollup refresh.';
+
+ALTER TABLE analytics_daily_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE analytics_dirty_bookings ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage analytics rollups" ON analytics_daily_rollups;
+CREATE POLICY "Service role can manage analytics rollups"
+    ON analytics_daily_rollups FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage analytics dirty bookings" ON analytics_dirty_bookings;
+CREATE POLICY "Service role can manage analytics dirty bookings"
+    ON analytics_dirty_bookings FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+
+-- =====================================================
+-- 2. Change capture + indexes
+-- =====================================================
+CREATE OR REPLACE FUNCTION queue_analytics_dirty_booking()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO analytics_dirty_bookings (salon_id, customer_id, booking_date)
+        VALUES (OLD.salon_id, OLD.customer_id, OLD.booking_date)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO analytics_dirty_bookings (salon_id, customer_id, booking_date)
+        VALUES (NEW.salon_id, NEW.customer_id, NEW.booking_date)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_queue_analytics_dirty_booking ON public.bookings;
+CREATE TRIGGER trigger_queue_analytics_dirty_booking
+AFTER INSERT OR DELETE
+OR UPDATE OF salon_id, customer_id, booking_date, status, total_amount, deleted_at
+ON public.bookings
+FOR EACH ROW
+EXECUTE FUNCTION queue_analytics_dirty_booking();
+
+-- "Is this the customer's first booking?" per salon (overall uses the
+-- existing idx_bookings_customer_date)
+CREATE INDEX IF NOT EXISTS idx_bookings_salon_customer_date
+    ON bookings (salon_id, customer_id, booking_date)
+    WHERE deleted_at IS NULL;
+
+
+-- =====================================================
+-- 3. Recompute a set of (scope, day) rollups
+-- =====================================================
+-- p_salons / p_dates: parallel arrays of (salon_id, day) pairs. Each pair
+-- refreshes the salon's row and the platform row for that day.
+CREATE OR REPLACE FUNCTION recompute_analytics_rollups(p_salons UUID[], p_dates DATE[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    WITH days AS (
+        SELECT DISTINCT d.salon_id, d.bucket_date
+        FROM unnest(p_salons, p_dates) AS d(salon_id, bucket_date)
+    ),
+    salon_rows AS (
+        SELECT
+            'salon:' || d.salon_id AS scope,
+            d.bucket_date,
+            COUNT(b.id)                                                   AS bookings,
+            COUNT(b.id) FILTER (WHERE b.status = 'cancelled')             AS cancellations,
+            COALESCE(SUM(b.total_amount) FILTER (WHERE b.status = 'completed'), 0) AS revenue,
+            COUNT(DISTINCT b.customer_id) FILTER (
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM bookings e
+                    WHERE e.salon_id = d.salon_id
+                      AND e.customer_id = b.customer_id
+                      AND e.booking_date < d.bucket_date
+                      AND e.deleted_at IS NULL
+                )
+            )                                                             AS new_customers
+        FROM days d
+        LEFT JOIN bookings b
+               ON b.salon_id = d.salon_id
+              AND b.booking_date = d.bucket_date
+              AND b.deleted_at IS NULL
+        GROUP BY d.salon_id, d.bucket_date
+    ),
+    platform_rows AS (
+        SELECT
+            'platform' AS scope,
+            d.bucket_date,
+            COUNT(b.id)                                                   AS bookings,
+            COUNT(b.id) FILTER (WHERE b.status = 'cancelled')             AS cancellations,
+            COALESCE(SUM(b.total_amount) FILTER (WHERE b.status = 'completed'), 0) AS revenue,
+            COUNT(DISTINCT b.customer_id) FILTER (
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM bookings e
+                    WHERE e.customer_id = b.customer_id
+                      AND e.booking_date < d.bucket_date
+                      AND e.deleted_at IS NULL
+                )
+            )                                                             AS new_customers
+        FROM (SELECT DISTINCT bucket_date FROM days) d
+        LEFT JOIN bookings b
+               ON b.booking_date = d.bucket_date
+              AND b.deleted_at IS NULL
+        GROUP BY d.bucket_date
+    )
+    INSERT INTO analytics_daily_rollups AS r
+        (scope, bucket_date, bookings, cancellations, revenue, new_customers)
+    SELECT scope, bucket_date, bookings, cancellations, revenue, new_customers
+    FROM salon_rows
+    UNION ALL
+    SELECT scope, bucket_date, bookings, cancellations, revenue, new_customers
+    FROM platform_rows
+    ON CONFLICT (scope, bucket_date) DO UPDATE
+        SET bookings      = EXCLUDED.bookings,
+            cancellations = EXCLUDED.cancellations,
+            revenue       = EXCLUDED.revenue,
+            new_customers = EXCLUDED.new_customers,
+            updated_at    = now();
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION recompute_analytics_rollups(UUID[], DATE[]) FROM PUBLIC;
+
+
+-- =====================================================
+-- 4. Incremental refresh (background job)
+-- =====================================================
+-- Drains the queue and recomputes, for every queued (salon, customer, day):
+--   * the queued day itself (salon row + platform row);
+--   * the customer's two earliest booking days, per salon and overall.
+-- "New customer" only moves between those: a booking added before the
+-- first day demotes the old first day to second; removing or moving the
+-- first booking promotes the second (the day it left is queued anyway).
+--
+-- One worker at a time: others return -1 straight away. Rows queued by
+-- transactions that commit after the drain are picked up on the next run.
+CREATE OR REPLACE FUNCTION refresh_analytics_rollups()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_salons UUID[];
+    v_dates  DATE[];
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_analytics_rollups')) THEN
+        RETURN -1;
+    END IF;
+
+    WITH drained AS (
+        DELETE FROM analytics_dirty_bookings
+        RETURNING salon_id, customer_id, booking_date
+    ),
+    customers AS (
+        SELECT DISTINCT customer_id FROM drained
+    ),
+    salon_customers AS (
+        SELECT DISTINCT salon_id, customer_id FROM drained
+    ),
+    earliest_in_salon AS (
+        SELECT salon_id, booking_date
+        FROM (
+            SELECT b.salon_id, b.booking_date,
+                   dense_rank() OVER (PARTITION BY b.salon_id, b.customer_id
+                                      ORDER BY b.booking_date) AS day_rank
+            FROM salon_customers sc
+            JOIN bookings b
+              ON b.salon_id = sc.salon_id
+             AND b.customer_id = sc.customer_id
+             AND b.deleted_at IS NULL
+        ) ranked
+        WHERE day_rank <= 2
+    ),
+    earliest_overall AS (
+        SELECT salon_id, booking_date
+        FROM (
+            SELECT b.salon_id, b.booking_date,
+                   dense_rank() OVER (PARTITION BY b.customer_id
+                                      ORDER BY b.booking_date) AS day_rank
+            FROM customers c
+            JOIN bookings b
+              ON b.customer_id = c.customer_id
+             AND b.deleted_at IS NULL
+        ) ranked
+        WHERE day_rank <= 2
+    ),
+    touched AS (
+        SELECT salon_id, booking_date FROM drained
+        UNION
+        SELECT salon_id, booking_date FROM earliest_in_salon
+        UNION
+        SELECT salon_id, booking_date FROM earliest_overall
+    )
+    SELECT array_agg(salon_id), array_agg(booking_date)
+    INTO v_salons, v_dates
+    FROM touched;
+
+    IF v_salons IS NULL THEN
+        RETURN 0;
+    END IF;
+    RETURN recompute_analytics_rollups(v_salons, v_dates);
+END;
+$$;
+
+COMMENT ON FUNCTION refresh_analytics_rollups() IS
+'Fold queued booking changes into analytics_daily_rollups. Returns rollup rows written, or -1 when another refresh holds the lock.';
+
+REVOKE ALL ON FUNCTION refresh_analytics_rollups() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION refresh_analytics_rollups() TO service_role;
+
+
+-- =====================================================
+-- 5. Full rebuild (initial backfill + repair)
+-- =====================================================
+CREATE OR REPLACE FUNCTION rebuild_analytics_rollups()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_salons UUID[];
+    v_dates  DATE[];
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('refresh_analytics_rollups'));
+
+    DELETE FROM analytics_daily_rollups;
+    DELETE FROM analytics_dirty_bookings;
+
+    SELECT array_agg(salon_id), array_agg(booking_date)
+    INTO v_salons, v_dates
+    FROM (SELECT DISTINCT salon_id, booking_date FROM bookings WHERE deleted_at IS NULL) d;
+
+    IF v_salons IS NULL THEN
+        RETURN 0;
+    END IF;
+    RETURN recompute_analytics_rollups(v_salons, v_dates);
+END;
+$$;
+
+COMMENT ON FUNCTION rebuild_analytics_rollups() IS
+'Recompute every analytics_daily_rollups row from bookings (initial backfill, or repair).';
+
+REVOKE ALL ON FUNCTION rebuild_analytics_rollups() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION rebuild_analytics_rollups() TO service_role;
+
+SELECT rebuild_analytics_rollups();
+
+
+-- =====================================================
+-- 6. analytics_timeseries() (chart reads)
+-- =====================================================
+-- One row per bucket from p_from to p_to inclusive, gaps filled with 0.
+-- Weeks start on Monday (ISO). bucket_start is the first day of the bucket.
+CREATE OR REPLACE FUNCTION analytics_timeseries(
+    p_scope       TEXT,
+    p_granularity TEXT,
+    p_from        DATE,
+    p_to          DATE
+)
+RETURNS TABLE (
+    bucket_start   DATE,
+    bookings       BIGINT,
+    cancellations  BIGINT,
+    revenue        NUMERIC,
+    new_customers  BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH buckets AS (
+        SELECT generate_series(
+                   date_trunc(p_granularity, p_from::TIMESTAMP),
+                   date_trunc(p_granularity, p_to::TIMESTAMP),
+                   ('1 ' || p_granularity)::INTERVAL
+               )::DATE AS bucket_start
+    ),
+    rolled AS (
+        SELECT date_trunc(p_granularity, r.bucket_date::TIMESTAMP)::DATE AS bucket_start,
+               SUM(r.bookings)      AS bookings,
+               SUM(r.cancellations) AS cancellations,
+               SUM(r.revenue)       AS revenue,
+               SUM(r.new_customers) AS new_customers
+        FROM analytics_daily_rollups r
+        WHERE r.scope = p_scope
+          AND r.bucket_date BETWEEN p_from AND p_to
+        GROUP BY 1
+    )
+    SELECT b.bucket_start,
+           COALESCE(r.bookings, 0)::BIGINT,
+           COALESCE(r.cancellations, 0)::BIGINT,
+           COALESCE(r.revenue, 0),
+           COALESCE(r.new_customers, 0)::BIGINT
+    FROM buckets b
+    LEFT JOIN rolled r USING (bucket_start)
+    ORDER BY b.bucket_start;
+$$;
+
+COMMENT ON FUNCTION analytics_timeseries(TEXT, TEXT, DATE, DATE) IS
+'Bookings / cancellations / revenue / new customers per day, week or month for a scope (platform or salon:<id>).';
+
+REVOKE ALL ON FUNCTION analytics_timeseries(TEXT, TEXT, DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION analytics_timeseries(TEXT, TEXT, DATE, DATE) TO service_role;
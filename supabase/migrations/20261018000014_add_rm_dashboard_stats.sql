@@ -0,0 +1,65 @@
+-- =====================================================
+-- Migration: One-call RM dashboard statistics
+-- Purpose: RMService.get_rm_stats ran four count="exact" queries on
+--          vendor_join_requests (total / pending / approved / rejected) plus
+--          an rm_profiles read, and get_rm_dashboard then loaded up to 50
+--          full salon rows only to len() them.
+--
+--          rm_dashboard_stats() returns the request counts from one
+--          GROUP BY status over idx_vendor_join_requests_rm_status, the
+--          performance score and a COUNT of the RM's active salons in one
+--          row. The API fetches it alongside the profile and recent score
+--          history and caches the dashboard briefly per RM.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Index
+-- =====================================================
+-- Active-salon count per RM
+CREATE INDEX IF NOT EXISTS idx_salons_assigned_rm_active
+    ON salons (assigned_rm)
+    WHERE is_active;
+
+
+-- =====================================================
+-- 2. rm_dashboard_stats()
+-- =====================================================
+-- Always one row (zeros for an RM with no requests, salons or profile);
+-- the dashboard's profile read answers the 404.
+--   total_requests   every vendor_join_requests row of the RM (drafts too)
+--   active_salons    salons with assigned_rm = the RM and is_active
+CREATE OR REPLACE FUNCTION rm_dashboard_stats(p_rm_id UUID)
+RETURNS TABLE (
+    total_requests    BIGINT,
+    pending_requests  BIGINT,
+    approved_requests BIGINT,
+    rejected_requests BIGINT,
+    total_score       INTEGER,
+    active_salons     BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH by_status AS (
+        SELECT r.status, COUNT(*) AS n
+        FROM vendor_join_requests r
+        WHERE r.rm_id = p_rm_id
+        GROUP BY r.status
+    )
+    SELECT
+        COALESCE((SELECT SUM(n) FROM by_status), 0)::BIGINT,
+        COALESCE((SELECT n FROM by_status WHERE status = 'pending'), 0),
+        COALESCE((SELECT n FROM by_status WHERE status = 'approved'), 0),
+        COALESCE((SELECT n FROM by_status WHERE status = 'rejected'), 0),
+        COALESCE((SELECT p.performance_score FROM rm_profiles p WHERE p.id = p_rm_id), 0),
+        (SELECT COUNT(*) FROM salons s WHERE s.assigned_rm = p_rm_id AND s.is_active);
+$$;
+
+COMMENT ON FUNCTION rm_dashboard_stats(UUID) IS
+'RM request counts by status, performance score and active salon count in one row (GET /rm/dashboard).';
+
+REVOKE ALL ON FUNCTION rm_dashboard_stats(UUID) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION rm_dashboard_stats(UUID) TO service_role;
@@ -0,0 +1,130 @@
+-- =====================================================
+-- Migration: Materialise the RM leaderboard
+-- Purpose: GET /rm/leaderboard is public and ran
+--          select("*, profiles(full_name)") on rm_profiles ordered by
+--          performance_score on every call, returning whole profile rows.
+--          Its `period` argument was accepted but ignored.
+--
+--          rm_leaderboard_mv holds the ranking for three periods:
+--            week      points earned since the start of the current week
+--                      (Monday, UTC), summed from rm_score_history;
+--            month     the same since the first of the current month;
+--            all_time  performance_score, the running total the RM
+--                      dashboard shows (it is clamped at zero, so it is the
+--                      authoritative total rather than a history sum).
+--          Each row is just (period, rank, rm_id, full_name, score). The view
+--          is refreshed on every score change (RMService.update_rm_score) and
+--          on the API's schedule (app.core.tasks.refresh_rm_leaderboard_task),
+--          which also rolls the week / month windows over.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Index
+-- =====================================================
+-- Per-RM history sums since a date
+CREATE INDEX IF NOT EXISTS idx_rm_score_history_rm_created
+    ON rm_score_history (rm_id, created_at);
+
+
+-- =====================================================
+-- 2. Materialised view
+-- =====================================================
+-- Every RM appears in every period (score 0 when they earned nothing).
+-- Ties are broken by name, then id, so ranks are stable between refreshes.
+CREATE MATERIALIZED VIEW IF NOT EXISTS rm_leaderboard_mv AS
+WITH periods (period, since) AS (
+    VALUES
+        ('week',     date_trunc('week', now())),
+        ('month',    date_trunc('month', now())),
+        ('all_time', NULL::TIMESTAMPTZ)
+),
+scores AS (
+    SELECT
+        p.period,
+        r.id AS rm_id,
+        CASE
+            WHEN p.since IS NULL THEN COALESCE(r.performance_score, 0)
+            ELSE COALESCE((
+                SELECT SUM(h.points)
+                FROM rm_score_history h
+                WHERE h.rm_id = r.id
+                  AND h.created_at >= p.since
+            ), 0)
+        END::BIGINT AS score
+    FROM periods p
+    CROSS JOIN rm_profiles r
+)
+SELECT
+    s.period::TEXT AS period,
+    ROW_NUMBER() OVER (
+        PARTITION BY s.period
+        ORDER BY s.score DESC, pr.full_name ASC NULLS LAST, s.rm_id
+    )::INTEGER AS rank,
+    s.rm_id,
+    pr.full_name::TEXT AS full_name,
+    s.score
+FROM scores s
+LEFT JOIN profiles pr ON pr.id = s.rm_id;
+
+COMMENT ON MATERIALIZED VIEW rm_leaderboard_mv IS
+    'RM ranking per period (week / month / all_time). Refreshed by refresh_rm_leaderboard().';
+
+-- REFRESH ... CONCURRENTLY needs a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rm_leaderboard_mv_period_rm
+    ON rm_leaderboard_mv (period, rm_id);
+
+CREATE INDEX IF NOT EXISTS idx_rm_leaderboard_mv_rank
+    ON rm_leaderboard_mv (period, rank);
+
+-- Read through get_rm_leaderboard() only
+REVOKE ALL ON rm_leaderboard_mv FROM anon, authenticated;
+
+
+-- =====================================================
+-- 3. Refresh function (update_rm_score + scheduled API task)
+-- =====================================================
+CREATE OR REPLACE FUNCTION refresh_rm_leaderboard()
+RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY public.rm_leaderboard_mv;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION refresh_rm_leaderboard() IS
+    'Recompute rm_leaderboard_mv without blocking readers.';
+
+REVOKE ALL ON FUNCTION refresh_rm_leaderboard() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION refresh_rm_leaderboard() TO service_role;
+
+
+-- =====================================================
+-- 4. get_rm_leaderboard()
+-- =====================================================
+CREATE OR REPLACE FUNCTION get_rm_leaderboard(
+    p_period TEXT DEFAULT 'all_time',
+    p_limit  INT  DEFAULT 100
+)
+RETURNS TABLE (
+    rank      INTEGER,
+    rm_id     UUID,
+    full_name TEXT,
+    score     BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT mv.rank, mv.rm_id, mv.full_name, mv.score
+    FROM rm_leaderboard_mv mv
+    WHERE mv.period = p_period
+    ORDER BY mv.rank
+    LIMIT p_limit;
+$$;
+
+COMMENT ON FUNCTION get_rm_leaderboard(TEXT, INT) IS
+'Top RMs for a period (week / month / all_time), read from rm_leaderboard_mv (GET /rm/leaderboard).';
+
+REVOKE ALL ON FUNCTION get_rm_leaderboard(TEXT, INT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION get_rm_leaderboard(TEXT, INT) TO service_role;
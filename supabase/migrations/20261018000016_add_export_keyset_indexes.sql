@@ -0,0 +1,24 @@
+-- =====================================================
+-- Migration: Keyset indexes for admin exports
+-- Purpose: The admin CSV / NDJSON exports (GET /admin/bookings/export,
+--          /admin/product-orders/export, /admin/users/export) page through
+--          their tables in (created_at, id) order, continuing after the last
+--          row sent (app.utils.keyset). With a matching index every page is
+--          one range scan, however deep into the export it is, instead of
+--          an OFFSET that re-reads all earlier rows.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Indexes
+-- =====================================================
+-- bookings_with_payments only shows live bookings
+CREATE INDEX IF NOT EXISTS idx_bookings_created_id
+    ON bookings (created_at, id)
+    WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_product_orders_created_id
+    ON product_orders (created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_profiles_created_id
+    ON profiles (created_at, id);
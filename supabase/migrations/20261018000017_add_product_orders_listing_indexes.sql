@@ -0,0 +1,26 @@
+-- =====================================================
+-- Migration: Indexes for the paginated admin product orders listing
+-- Purpose: GET /admin/product-orders/ returned every order in one response,
+--          then read all of their profiles and line items through two
+--          unbounded IN lists. It now returns one keyset page at a time,
+--          newest first in (created_at, id) order, optionally filtered by
+--          status, customer and a created_at range, with the line items
+--          embedded in the same query.
+--
+--          Unfiltered and date-only pages use idx_product_orders_created_id
+--          (20261018000016) scanned backwards; customer pages use
+--          idx_product_orders_user_created (20261018000012). This adds the
+--          status variant and the order_id index the item embed joins on.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Indexes
+-- =====================================================
+-- Status-filtered pages: equality on status, then the keyset order
+CREATE INDEX IF NOT EXISTS idx_product_orders_status_created_id
+    ON product_orders (status, created_at, id);
+
+-- Embedded product_order_items(...) per order of a page
+CREATE INDEX IF NOT EXISTS idx_product_order_items_order_id
+    ON product_order_items (order_id);
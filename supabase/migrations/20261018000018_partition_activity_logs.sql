@@ -0,0 +1,262 @@
+-- =====================================================
+-- Migration: Monthly partitions and feed indexes for activity_logs (expand)
+-- Purpose: The admin dashboard feed (GET /admin/recent-activity) reads the
+--          newest activity_logs rows except login events, and the per-entity
+--          history reads one entity's newest rows. activity_logs has no
+--          retention, so both got slower as the table grew: the login
+--          exclusion was a filter applied after walking
+--          idx_activity_logs_created_at, and login events are most of the
+--          rows.
+--
+--          activity_logs moves to a table partitioned by month on created_at:
+--            * the feed reads a partial index that leaves the login actions
+--              out (app.services.activity_log_service.DASHBOARD_EXCLUDED_ACTIONS
+--              must match its predicate) and pages with a (created_at, id)
+--              cursor, so a page is one index range scan at any depth;
+--            * maintain_activity_log_partitions(), run daily by the API
+--              (app.core.tasks.maintain_activity_logs_task), creates the next
+--              months' partitions and archives partitions past the retention
+--              window by detaching them into the activity_log_archive
+--              schema - a metadata change, no row-by-row DELETE.
+--
+--          Expand / migrate / contract (docs/MIGRATION_SAFETY.md), so no
+--          step holds a lock that blocks the inserts every login and admin
+--          action makes:
+--            1. this migration (additive): the partitioned table is created
+--               as activity_logs_partitioned and a trigger copies every new
+--               activity_logs row into it;
+--            2. 20261018000020: backfills the existing rows (reads
+--               activity_logs, so inserts carry on);
+--            3. later deploy, swap: in one short transaction rename
+--               activity_logs -> activity_logs_unpartitioned and
+--               activity_logs_partitioned -> activity_logs (plus the pkey
+--               constraints) and drop the copy trigger. The API only names
+--               activity_logs, so running code follows the swap, and the
+--               partition functions below find the parent by name;
+--            4. later deploy, contract: DROP TABLE activity_logs_unpartitioned
+--               (its indexes, idx_activity_logs_action included, go with it).
+--
+--          Rows with no matching partition land in activity_logs_default;
+--          creating their month's partition moves them out of it.
+--          The primary key is (id, created_at): a partitioned table's
+--          unique constraints must include the partition key. id is still
+--          generated by gen_random_uuid().
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Partitioned table
+-- =====================================================
+CREATE TABLE IF NOT EXISTS activity_logs_partitioned (
+    id          UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id     UUID REFERENCES profiles(id) ON DELETE SET NULL,
+    action      VARCHAR(100) NOT NULL,
+    entity_type VARCHAR(50),
+    entity_id   VARCHAR(100),
+    details     JSONB,
+    ip_address  VARCHAR(45),
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT activity_logs_partitioned_pkey PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+COMMENT ON TABLE activity_logs_partitioned IS
+    'Audit trail for critical admin actions and system events. Partitioned by month; see maintain_activity_log_partitions().';
+
+CREATE TABLE IF NOT EXISTS activity_logs_default PARTITION OF activity_logs_partitioned DEFAULT;
+
+-- Same access model as activity_logs (RLS off, backend uses service_role)
+ALTER TABLE activity_logs_partitioned DISABLE ROW LEVEL SECURITY;
+
+
+-- =====================================================
+-- 2. Partition management
+-- =====================================================
+CREATE SCHEMA IF NOT EXISTS activity_log_archive;
+REVOKE ALL ON SCHEMA activity_log_archive FROM PUBLIC, anon, authenticated;
+
+-- The partitioned parent: activity_logs_partitioned until the swap renames
+-- it to activity_logs.
+CREATE OR REPLACE FUNCTION activity_log_partition_parent()
+RETURNS REGCLASS
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT COALESCE(to_regclass('public.activity_logs_partitioned'), 'public.activity_logs'::regclass);
+$$;
+
+REVOKE ALL ON FUNCTION activity_log_partition_parent() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION activity_log_partition_parent() TO service_role;
+
+
+-- Create the partition for the month containing p_month (no-op if it
+-- exists). Rows already in the default partition for that month are moved
+-- into it before it is attached.
+CREATE OR REPLACE FUNCTION create_activity_log_partition(p_month DATE)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_start  DATE := date_trunc('month', p_month)::DATE;
+    v_end    DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::DATE;
+    v_name   TEXT := format('activity_logs_%s', to_char(p_month, 'YYYY_MM'));
+    v_parent REGCLASS := activity_log_partition_parent();
+BEGIN
+    IF to_regclass(format('public.%I', v_name)) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS)', v_name, v_parent);
+    EXECUTE format(
+        'WITH moved AS (
+             DELETE FROM activity_logs_default
+             WHERE created_at >= %L AND created_at < %L
+             RETURNING *
+         )
+         INSERT INTO %I SELECT * FROM moved',
+        v_start, v_end, v_name
+    );
+    EXECUTE format(
+        'ALTER TABLE %s ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        v_parent, v_name, v_start, v_end
+    );
+    RETURN TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION create_activity_log_partition(DATE) IS
+'Create (and attach) the activity_logs partition of one month, moving its rows out of activity_logs_default.';
+
+REVOKE ALL ON FUNCTION create_activity_log_partition(DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION create_activity_log_partition(DATE) TO service_role;
+
+
+-- Ensure partitions exist for this month and the next p_months_ahead, then
+-- detach every monthly partition that ended more than p_retain_months ago
+-- and move it to activity_log_archive (kept for export / drop by hand).
+-- One worker at a time: others return -1 straight away.
+CREATE OR REPLACE FUNCTION maintain_activity_log_partitions(
+    p_months_ahead  INT DEFAULT 3,
+    p_retain_months INT DEFAULT 12
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_cutoff   DATE := (date_trunc('month', now()) - make_interval(months => p_retain_months))::DATE;
+    v_archived INTEGER := 0;
+    v_part     RECORD;
+    v_parent   REGCLASS := activity_log_partition_parent();
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('maintain_activity_log_partitions')) THEN
+        RETURN -1;
+    END IF;
+
+    FOR i IN 0..GREATEST(p_months_ahead, 0) LOOP
+        PERFORM create_activity_log_partition((date_trunc('month', now()) + make_interval(months => i))::DATE);
+    END LOOP;
+
+    FOR v_part IN
+        SELECT c.relname
+        FROM pg_inherits inh
+        JOIN pg_class c ON c.oid = inh.inhrelid
+        WHERE inh.inhparent = v_parent
+          AND c.relname ~ '^activity_logs_[0-9]{4}_[0-9]{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < v_cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %s DETACH PARTITION %I', v_parent, v_part.relname);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA activity_log_archive', v_part.relname);
+        v_archived := v_archived + 1;
+    END LOOP;
+
+    RETURN v_archived;
+END;
+$$;
+
+COMMENT ON FUNCTION maintain_activity_log_partitions(INT, INT) IS
+'Create upcoming monthly activity_logs partitions and archive those past retention. Returns partitions archived, or -1 when another run holds the lock.';
+
+REVOKE ALL ON FUNCTION maintain_activity_log_partitions(INT, INT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION maintain_activity_log_partitions(INT, INT) TO service_role;
+
+
+-- =====================================================
+-- 3. Partitions for the existing months
+-- =====================================================
+-- Every month activity_logs has rows for, plus the months ahead, so the
+-- backfill lands in monthly partitions rather than the default one. The
+-- table is still empty here, so attaching them is instant.
+DO $$
+DECLARE
+    v_month DATE;
+BEGIN
+    FOR v_month IN
+        SELECT generate_series(
+            date_trunc('month', LEAST(COALESCE(first_at, now()), now())),
+            date_trunc('month', now()) + INTERVAL '3 months',
+            INTERVAL '1 month'
+        )::DATE
+        FROM (SELECT MIN(created_at) AS first_at FROM activity_logs) oldest
+    LOOP
+        PERFORM create_activity_log_partition(v_month);
+    END LOOP;
+END;
+$$;
+
+
+-- =====================================================
+-- 4. Indexes (created on every partition, current and future)
+-- =====================================================
+-- Dashboard feed: newest first, login events left out. INCLUDE covers the
+-- filter / embed columns; details is read for the page's rows only.
+CREATE INDEX IF NOT EXISTS idx_activity_logs_feed
+    ON activity_logs_partitioned (created_at DESC, id DESC)
+    INCLUDE (user_id, action, entity_type, entity_id)
+    WHERE action NOT IN ('phone_login', 'email_login');
+
+-- Unfiltered feed
+CREATE INDEX IF NOT EXISTS idx_activity_logs_created_id
+    ON activity_logs_partitioned (created_at DESC, id DESC);
+
+-- One entity's history, newest first
+CREATE INDEX IF NOT EXISTS idx_activity_logs_entity_created
+    ON activity_logs_partitioned (entity_type, entity_id, created_at DESC, id DESC);
+
+-- ON DELETE SET NULL from profiles (activity_logs' own index holds
+-- idx_activity_logs_user_id until the contract step drops it)
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user
+    ON activity_logs_partitioned (user_id);
+
+
+-- =====================================================
+-- 5. Copy new rows across
+-- =====================================================
+-- Every row the API inserts into activity_logs from now on is written to
+-- activity_logs_partitioned as well. ON CONFLICT lets the backfill and this
+-- trigger overlap. Dropped by the swap.
+CREATE OR REPLACE FUNCTION copy_activity_log_to_partitioned()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO activity_logs_partitioned
+        (id, user_id, action, entity_type, entity_id, details, ip_address, created_at)
+    VALUES
+        (NEW.id, NEW.user_id, NEW.action, NEW.entity_type, NEW.entity_id,
+         NEW.details, NEW.ip_address, COALESCE(NEW.created_at, now()))
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_copy_activity_log_to_partitioned ON activity_logs;
+CREATE TRIGGER trg_copy_activity_log_to_partitioned
+    AFTER INSERT ON activity_logs
+    FOR EACH ROW EXECUTE FUNCTION copy_activity_log_to_partitioned();
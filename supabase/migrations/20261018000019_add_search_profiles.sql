@@ -0,0 +1,108 @@
+-- =====================================================
+-- Migration: Trigram-indexed admin user search
+-- Purpose: UserService.list_users (GET /admin/users/) searched by running
+--          one ilike '%term%' query per column (email, full_name, phone) to
+--          collect matching ids - each a sequential scan of profiles - and
+--          then a fourth query with IN (every matched id) and
+--          count="exact" for the page.
+--
+--          search_profiles() answers the whole listing in one statement:
+--          the substring match across the three columns (served by pg_trgm
+--          GIN indexes, OR-ed as a bitmap scan), the role / active /
+--          internal-staff filters, the newest-first page and the total.
+--          The filter is assembled from the arguments and run with
+--          EXECUTE, so each call is planned for its own search term and
+--          filters instead of one generic plan full of "x IS NULL OR ..."
+--          branches.
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Extension + indexes
+-- =====================================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE INDEX IF NOT EXISTS idx_profiles_email_trgm
+    ON profiles USING gin (email extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_profiles_full_name_trgm
+    ON profiles USING gin (full_name extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_profiles_phone_trgm
+    ON profiles USING gin (phone extensions.gin_trgm_ops);
+
+
+-- =====================================================
+-- 2. search_profiles()
+-- =====================================================
+-- Returns {"total": <matches>, "data": [<profile row>, ...]}, newest first
+-- (id breaks created_at ties so pages don't overlap). The search term is
+-- matched literally: LIKE wildcards in it are escaped. Internal staff
+-- accounts are left out unless p_include_internal.
+CREATE OR REPLACE FUNCTION search_profiles(
+    p_search           TEXT    DEFAULT NULL,
+    p_role             TEXT    DEFAULT NULL,
+    p_is_active        BOOLEAN DEFAULT NULL,
+    p_include_internal BOOLEAN DEFAULT FALSE,
+    p_limit            INT     DEFAULT 20,
+    p_offset           INT     DEFAULT 0
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_where   TEXT[] := ARRAY['TRUE'];
+    v_term    TEXT   := NULLIF(btrim(p_search), '');
+    v_pattern TEXT;
+    v_result  JSONB;
+BEGIN
+    IF NOT COALESCE(p_include_internal, FALSE) THEN
+        v_where := v_where || 'NOT p.is_internal';
+    END IF;
+    IF p_role IS NOT NULL THEN
+        v_where := v_where || format('p.user_role::TEXT = %L', p_role);
+    END IF;
+    IF p_is_active IS NOT NULL THEN
+        v_where := v_where || format('p.is_active = %L', p_is_active);
+    END IF;
+    IF v_term IS NOT NULL THEN
+        v_pattern := '%' || replace(replace(replace(v_term, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+        v_where := v_where || format(
+            '(p.email ILIKE %1$L OR p.full_name ILIKE %1$L OR p.phone ILIKE %1$L)',
+            v_pattern
+        );
+    END IF;
+
+    EXECUTE format(
+        $q$
+        SELECT jsonb_build_object(
+            'total', (SELECT COUNT(*) FROM profiles p WHERE %1$s),
+            'data', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pg) ORDER BY pg.created_at DESC, pg.id DESC)
+                FROM (
+                    SELECT p.*
+                    FROM profiles p
+                    WHERE %1$s
+                    ORDER BY p.created_at DESC, p.id DESC
+                    LIMIT %2$s OFFSET %3$s
+                ) pg
+            ), '[]'::jsonb)
+        )
+        $q$,
+        array_to_string(v_where, ' AND '),
+        GREATEST(COALESCE(p_limit, 20), 0),
+        GREATEST(COALESCE(p_offset, 0), 0)
+    ) INTO v_result;
+
+    RETURN v_result;
+END;
+$$;
+
+COMMENT ON FUNCTION search_profiles(TEXT, TEXT, BOOLEAN, BOOLEAN, INT, INT) IS
+'Admin user listing: substring search over email / full_name / phone plus role, active and internal filters, one page and the total (GET /admin/users/).';
+
+REVOKE ALL ON FUNCTION search_profiles(TEXT, TEXT, BOOLEAN, BOOLEAN, INT, INT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION search_profiles(TEXT, TEXT, BOOLEAN, BOOLEAN, INT, INT) TO service_role;
@@ -0,0 +1,18 @@
+-- =====================================================
+-- Migration: Backfill activity_logs_partitioned
+-- Purpose: Step 2 of the activity_logs partitioning (see
+--          20261018000018_partition_activity_logs.sql). Copies the rows that
+--          existed before the copy trigger into the partitioned table.
+--
+--          Kept out of 20261018000018 so it runs in its own transaction:
+--          this only reads activity_logs, so the inserts logins and admin
+--          actions make (and the trigger copying them) carry on while it
+--          runs. Rows the trigger already copied are skipped by the
+--          primary key.
+-- =====================================================
+
+INSERT INTO activity_logs_partitioned
+    (id, user_id, action, entity_type, entity_id, details, ip_address, created_at)
+SELECT id, user_id, action, entity_type, entity_id, details, ip_address, COALESCE(created_at, now())
+FROM activity_logs
+ON CONFLICT DO NOTHING;
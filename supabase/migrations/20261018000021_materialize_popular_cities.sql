@@ -0,0 +1,117 @@
+-- =====================================================
+-- Migration: Materialise the popular-cities aggregate
+-- Purpose: /salons/popular-cities runs on every home page load, and
+--          get_popular_cities() re-aggregated the whole salons table each
+--          time. The counts only move when a salon is approved, deactivated,
+--          deleted or changes city, so keep them in a materialised view that
+--          is refreshed on exactly those writes (statement-level trigger) and
+--          on the API's schedule (app.core.tasks.refresh_popular_cities_task).
+--
+-- The view counts public salons (salons.is_public, 20261018000002) per
+-- canonical city (salons.city_id, 20261018000003), so soft-deleted salons and
+-- regular_buyer (product-only) accounts no longer inflate a city's count and
+-- spellings of one city are counted together. It runs after both so the view
+-- is defined once, in this form.
+--
+-- idx_salons_city_lower (20260107000000) only served the old aggregate and is
+-- unused once this ships; dropping it is left to a later contract migration
+-- (docs/MIGRATION_SAFETY.md).
+-- =====================================================
+
+
+-- =====================================================
+-- 1. Materialised view
+-- =====================================================
+CREATE MATERIALIZED VIEW IF NOT EXISTS popular_cities_mv AS
+SELECT
+    c.id AS city_id,
+    c.name::TEXT AS city,
+    COUNT(*)::BIGINT AS salon_count
+FROM salons s
+JOIN cities c ON c.id = s.city_id
+WHERE s.is_public
+GROUP BY c.id, c.name;
+
+COMMENT ON MATERIALIZED VIEW popular_cities_mv IS
+    'Public salon count per canonical city. Refreshed by refresh_popular_cities().';
+
+-- REFRESH ... CONCURRENTLY needs a unique index; it lets readers keep hitting
+-- the old contents while a refresh is running.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_popular_cities_mv_city_id
+    ON popular_cities_mv (city_id);
+
+CREATE INDEX IF NOT EXISTS idx_popular_cities_mv_rank
+    ON popular_cities_mv (salon_count DESC, city ASC);
+
+
+-- =====================================================
+-- 2. Refresh function (called by trigger + scheduled API task)
+-- =====================================================
+CREATE OR REPLACE FUNCTION refresh_popular_cities()
+RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY public.popular_cities_mv;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION refresh_popular_cities() IS
+    'Recompute popular_cities_mv without blocking readers.';
+
+REVOKE ALL ON FUNCTION refresh_popular_cities() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION refresh_popular_cities() TO service_role;
+
+
+-- =====================================================
+-- 3. Refresh on visibility-changing salon writes
+-- =====================================================
+-- FOR EACH STATEMENT so a bulk update refreshes once. The column list keeps
+-- high-frequency writes (rating recalculation, profile edits) from
+-- triggering a refresh at all. city_id can change without city (alias
+-- merges), so it is listed too.
+CREATE OR REPLACE FUNCTION trigger_refresh_popular_cities()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_popular_cities();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_salons_refresh_popular_cities ON salons;
+CREATE TRIGGER trigger_salons_refresh_popular_cities
+    AFTER INSERT OR DELETE
+    OR UPDATE OF is_active, is_verified, registration_fee_paid, city, city_id, salon_type, deleted_at
+    ON salons
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_refresh_popular_cities();
+
+
+-- =====================================================
+-- 4. get_popular_cities reads the view
+-- =====================================================
+-- The result gains a city_id column, so the 20260107000000 function has to
+-- be dropped rather than replaced; callers reading city / salon_count keep
+-- working. It is now an index scan over a few hundred rows at most.
+DROP FUNCTION IF EXISTS get_popular_cities(INT);
+
+CREATE OR REPLACE FUNCTION get_popular_cities(result_limit INT DEFAULT 8)
+RETURNS TABLE(
+  city_id INT,
+  city TEXT,
+  salon_count BIGINT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT mv.city_id, mv.city, mv.salon_count
+  FROM popular_cities_mv mv
+  ORDER BY mv.salon_count DESC, mv.city ASC
+  LIMIT result_limit;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_popular_cities(INT) IS
+'Returns top canonical cities by public salon count, read from popular_cities_mv.';
+
+GRANT SELECT ON popular_cities_mv TO anon;
+GRANT SELECT ON popular_cities_mv TO authenticated;
+GRANT EXECUTE ON FUNCTION get_popular_cities(INT) TO anon;
+GRANT EXECUTE ON FUNCTION get_popular_cities(INT) TO authenticated;
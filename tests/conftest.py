@@ -47,6 +47,38 @@ def _disable_app_rate_limiter():
     yield
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_caches():
+    """
+    Profile lookups (app.services.profile_lookup), the Razorpay gateway
+    (app.services.payment), cart aggregates (app.services.customer_service)
+    the active-coupon catalogue (app.services.coupon_service), admin
+    dashboard stats (app.services.admin_service) and RM dashboards and
+    leaderboards (app.services.rm_service) are cached per process. Mocked suites reuse ids
+    like "vendor-1" or "cust-1" with different data, so every test starts (and
+    ends) cold.
+    """
+    from app.services.admin_service import invalidate_dashboard_stats_cache
+    from app.services.coupon_service import invalidate_coupon_catalogue
+    from app.services.customer_service import invalidate_cart_cache
+    from app.services.payment import invalidate_razorpay_gateway
+    from app.services.profile_lookup import invalidate_profile_lookup
+    from app.services.rm_service import invalidate_rm_dashboard, invalidate_rm_leaderboard
+
+    def _reset():
+        invalidate_profile_lookup()
+        invalidate_razorpay_gateway()
+        invalidate_cart_cache()
+        invalidate_coupon_catalogue()
+        invalidate_dashboard_stats_cache()
+        invalidate_rm_dashboard()
+        invalidate_rm_leaderboard()
+
+    _reset()
+    yield
+    _reset()
+
+
 # =====================================================================
 # SMOKE TIER (no running stack required)
 # =====================================================================
@@ -0,0 +1,245 @@
+"""
+Mocked tests for the activity_log_service module (app/services/activity_log_service.py
++ GET /admin/recent-activity in app/api/admin/dashboard.py).
+
+These run WITHOUT a real Supabase stack. ActivityLogService reads through
+app.core.database.get_db, which is patched to an in-memory fake that honors the
+filters the feed uses (not.in, eq, the keyset range + or-continuation) and the
+`profiles(...)` embed.
+
+Scope: the cursor-paginated dashboard feed (login events excluded, timestamp
+ties split by id), the per-entity history, invalid cursors, and the partition
+maintenance RPC.
+
+No marker -> these run in the fast (no-stack) job alongside the smoke suite.
+"""
+import asyncio
+import re
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.auth import require_admin, TokenData
+from app.services.activity_log_service import ActivityLogService
+
+API = settings.API_PREFIX
+FEED = f"{API}/admin/recent-activity"
+
+
+# =====================================================================
+# In-memory fake Supabase client
+# =====================================================================
+class _Resp:
+    def __init__(self, data):
+        self.data = data
+
+
+# Keyset continuation built by app.utils.keyset.after_row_filter
+_KEYSET_OR = re.compile(r'(\w+)\.(gt|lt)\."([^"]*)",and\(\1\.eq\."\3",id\.\2\."([^"]*)"\)')
+
+
+class _Query:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._cols = "*"
+        self._filters = []   # (op, col, val)
+        self._order = []
+        self._limit = None
+        self._negate = False
+
+    def select(self, cols="*"):
+        self._cols = cols
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def eq(self, col, val):
+        self._filters.append(("eq", col, val))
+        return self
+
+    def in_(self, col, vals):
+        op = "not_in" if self._negate else "in"
+        self._negate = False
+        self._filters.append((op, col, list(vals)))
+        return self
+
+    def lte(self, col, val):
+        self._filters.append(("lte", col, val))
+        return self
+
+    def or_(self, expr):
+        col, op, value, row_id = _KEYSET_OR.fullmatch(expr).groups()
+        self._filters.append(("after", col, (op, value, row_id)))
+        return self
+
+    def order(self, col, desc=False):
+        self._order.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def _match(self, row):
+        for op, c, v in self._filters:
+            rv = row.get(c)
+            if op == "eq" and rv != v:
+                return False
+            if op == "in" and rv not in v:
+                return False
+            if op == "not_in" and rv in v:
+                return False
+            if op == "lte" and not (rv is not None and rv <= v):
+                return False
+            if op == "after":
+                cmp, value, row_id = v
+                key, bound = (rv, row["id"]), (value, row_id)
+                if not (key > bound if cmp == "gt" else key < bound):
+                    return False
+        return True
+
+    def execute(self):
+        self._db.queries += 1
+        matched = [dict(r) for r in self._db.rows(self._table) if self._match(r)]
+        for col, desc in reversed(self._order):
+            matched.sort(key=lambda r: r.get(col), reverse=desc)
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        m = re.search(r"profiles\(([^)]*)\)", self._cols)
+        if m:
+            cols = [c.strip() for c in m.group(1).split(",")]
+            profiles = {p["id"]: p for p in self._db.rows("profiles")}
+            for r in matched:
+                prof = profiles.get(r.get("user_id"))
+                r["profiles"] = {c: prof.get(c) for c in cols} if prof else None
+        return _Resp(matched)
+
+
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self._tables = {}
+        self.queries = 0
+        self.rpc_calls = []
+
+    def rows(self, name):
+        return self._tables.setdefault(name, [])
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(2)
+
+
+# =====================================================================
+# Fixture
+# =====================================================================
+class Handle:
+    def __init__(self, db, app):
+        self.db = db
+        self.app = app
+        self.client = TestClient(app)
+
+    def seed_log(self, action, created_at, entity=("salon", "salon-1"), **fields):
+        row = {
+            "id": fields.pop("id", str(uuid.uuid4())), "user_id": "admin-1",
+            "action": action, "entity_type": entity[0], "entity_id": entity[1],
+            "details": None, "ip_address": None, "created_at": created_at,
+        }
+        row.update(fields)
+        self.db.rows("activity_logs").append(row)
+        return row
+
+    def login_admin(self):
+        td = TokenData(user_id="admin-1", email="admin@example.com", user_role="admin",
+                       jti="jti", exp=datetime.utcnow() + timedelta(hours=1))
+        self.app.dependency_overrides[require_admin] = lambda: td
+
+
+@pytest.fixture()
+def al(app, monkeypatch):
+    db = FakeSupabase()
+    db.rows("profiles").append({"id": "admin-1", "full_name": "Admin", "email": "admin@example.com"})
+    monkeypatch.setattr("app.services.activity_log_service.get_db", lambda: db)
+    handle = Handle(db=db, app=app)
+    yield handle
+    app.dependency_overrides.pop(require_admin, None)
+
+
+# =====================================================================
+# GET /admin/recent-activity
+# =====================================================================
+def test_feed_pages_with_cursor_and_skips_logins(al):
+    # Two rows share a timestamp: the id tiebreak keeps them on distinct pages
+    kept = [
+        al.seed_log("salon_approved", "2026-07-01T10:00:00", id="a"),
+        al.seed_log("config_updated", "2026-07-01T10:00:01", id="b"),
+        al.seed_log("rm_assigned", "2026-07-01T10:00:01", id="c"),
+        al.seed_log("user_created", "2026-07-01T10:00:02", id="d"),
+    ]
+    al.seed_log("phone_login", "2026-07-01T10:00:03")
+    al.seed_log("email_login", "2026-07-01T10:00:04")
+    al.login_admin()
+
+    r = al.client.get(FEED, params={"limit": 2})
+    assert r.status_code == 200, r.text
+    first = r.json()
+    assert [a["id"] for a in first["data"]] == ["d", "c"]
+    assert first["data"][0]["profiles"]["full_name"] == "Admin"
+
+    r = al.client.get(FEED, params={"limit": 2, "cursor": first["next_cursor"]})
+    second = r.json()
+    assert [a["id"] for a in second["data"]] == ["b", "a"]
+    assert second["next_cursor"] is None
+    assert len(kept) == first["count"] + second["count"]
+
+
+def test_feed_rejects_invalid_cursor(al):
+    al.login_admin()
+    r = al.client.get(FEED, params={"cursor": "bm90LWEtY3Vyc29y"})
+    assert r.status_code == 400, r.text
+
+
+def test_feed_requires_admin(al):
+    r = al.client.get(FEED)
+    assert r.status_code in (401, 403), r.text
+
+
+# =====================================================================
+# ActivityLogService
+# =====================================================================
+def test_entity_history_pages_one_query_each(al):
+    for i in range(3):
+        al.seed_log("salon_updated", f"2026-07-01T10:00:0{i}", id=f"s{i}")
+    al.seed_log("salon_updated", "2026-07-01T10:00:09", entity=("salon", "salon-2"))
+
+    rows, cursor = asyncio.run(ActivityLogService.get_by_entity("salon", "salon-1", limit=2))
+    assert [r["id"] for r in rows] == ["s2", "s1"]
+    rows, cursor = asyncio.run(ActivityLogService.get_by_entity("salon", "salon-1", limit=2, cursor=cursor))
+    assert [r["id"] for r in rows] == ["s0"]
+    assert cursor is None
+    assert al.db.queries == 2
+
+
+def test_maintain_partitions_calls_rpc(al):
+    archived = asyncio.run(ActivityLogService.maintain_partitions(months_ahead=2, retain_months=6))
+    assert archived == 2
+    assert al.db.rpc_calls == [
+        ("maintain_activity_log_partitions", {"p_months_ahead": 2, "p_retain_months": 6})
+    ]
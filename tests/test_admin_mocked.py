@@ -10,7 +10,7 @@ They exercise the full HTTP path:
     HTTP -> FastAPI (require_admin overridden, limiter off) -> route ->
     AdminService -> FakeSupabase.
 
-Scope: GET /admin/stats (dashboard aggregation incl. revenue) and
+Scope: GET /admin/stats (admin_dashboard_stats RPC + stale-while-revalidate cache) and
 GET /admin/vendor-requests (now with batched RM enrichment), plus a regression
 that the removed GET /admin/vendor-requests/{id} is gone. (approve/reject ->
 vendor_approval_service and recent-activity -> activity_log_service are other
@@ -18,6 +18,7 @@ modules.)
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import asyncio
 import re
 import uuid
 from datetime import date, datetime, timedelta
@@ -134,13 +135,63 @@ class _Table:
         return _Query(self).select(cols, count=count)
 
 
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
 class FakeSupabase:
     def __init__(self):
         self._tables = {}
+        self.rpc_calls = []
 
     def table(self, name):
         return self._tables.setdefault(name, _Table(self))
 
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(getattr(self, f"_rpc_{name}")(params or {}))
+
+    # Python stand-in for the SQL function
+    def _rpc_admin_dashboard_stats(self, params):
+        def rows(name, **where):
+            return [r for r in self.table(name).rows
+                    if all(r.get(k) == v for k, v in where.items())]
+
+        month = date.today().strftime("%Y-%m")
+        revenue = [(p["amount"], p.get("created_at")) for p in rows("payments", status="success")]
+        revenue += [(p["amount"], p.get("payment_completed_at"))
+                    for p in rows("vendor_registration_payments", status="success")]
+        return [{
+            "pending_requests": len(rows("vendor_join_requests", status="pending")),
+            "total_salons": len(rows("salons")),
+            "active_salons": len(rows("salons", is_active=True)),
+            "pending_payment_salons": len(rows("salons", registration_fee_paid=False)),
+            "total_rms": len(rows("profiles", user_role="relationship_manager", is_active=True)),
+            "total_bookings": len(rows("bookings")),
+            "today_bookings": len(rows("bookings", booking_date=date.today().isoformat())),
+            "total_revenue": sum(a for a, _ in revenue),
+            "this_month_revenue": sum(a for a, ts in revenue if (ts or "").startswith(month)),
+        }]
+
+    # Day-granularity stand-in for analytics_timeseries(): seeded rollup rows
+    # of the scope, one per day in range
+    def _rpc_analytics_timeseries(self, params):
+        rollups = {r["bucket_date"]: r for r in self.table("analytics_daily_rollups").rows
+                   if r["scope"] == params["p_scope"]}
+        day, end = date.fromisoformat(params["p_from"]), date.fromisoformat(params["p_to"])
+        out = []
+        while day <= end:
+            row = rollups.get(day.isoformat(), {})
+            out.append({"bucket_start": day.isoformat(),
+                        **{k: row.get(k, 0) for k in
+                           ("bookings", "cancellations", "revenue", "new_customers")}})
+            day += timedelta(days=1)
+        return out
+
 
 # =====================================================================
 # Test handle + fixture
@@ -240,6 +291,71 @@ def test_dashboard_stats_requires_admin(ad):
     assert r.status_code in (401, 403), r.text
 
 
+def test_dashboard_stats_one_rpc_then_cached(ad):
+    ad.add("salons", is_active=True, registration_fee_paid=True)
+    ad.login_admin()
+
+    assert ad.client.get(STATS).json()["total_salons"] == 1
+    ad.add("salons", is_active=True, registration_fee_paid=True)
+    # Within the TTL the cached row is served; nothing else is queried.
+    assert ad.client.get(STATS).json()["total_salons"] == 1
+    assert [name for name, _ in ad.db.rpc_calls] == ["admin_dashboard_stats"]
+
+
+def test_dashboard_stats_stale_while_revalidate(ad, monkeypatch):
+    from app.services import admin_service as admin_module
+    from app.services.admin_service import AdminService
+
+    service = AdminService(ad.db)
+    ad.add("salons", is_active=True, registration_fee_paid=True)
+    clock = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: clock[0])
+
+    async def scenario():
+        first = await service.get_dashboard_stats()
+        ad.add("salons", is_active=True, registration_fee_paid=True)
+
+        # Past the TTL: the stale value comes back at once, a refresh starts.
+        clock[0] += admin_module.DASHBOARD_STATS_TTL_SECONDS + 1
+        stale = await service.get_dashboard_stats()
+        await admin_module._DASHBOARD_STATS_CACHE._refresh
+        fresh = await service.get_dashboard_stats()
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+    assert (first.total_salons, stale.total_salons, fresh.total_salons) == (1, 1, 2)
+    assert len(ad.db.rpc_calls) == 2
+
+
+# =====================================================================
+# GET /admin/analytics/timeseries
+# =====================================================================
+TIMESERIES = f"{API}/admin/analytics/timeseries"
+
+
+def test_analytics_timeseries_platform_and_salon_scopes(ad):
+    ad.add("analytics_daily_rollups", scope="platform", bucket_date="2026-10-01",
+           bookings=7, cancellations=1, revenue=2100, new_customers=3)
+    ad.add("analytics_daily_rollups", scope="salon:s-1", bucket_date="2026-10-01",
+           bookings=2, cancellations=0, revenue=600, new_customers=1)
+    ad.login_admin()
+    params = {"date_from": "2026-10-01", "date_to": "2026-10-02"}
+
+    platform = ad.client.get(TIMESERIES, params=params)
+    assert platform.status_code == 200, platform.text
+    assert [(b["bucket_start"], b["bookings"]) for b in platform.json()["buckets"]] == [
+        ("2026-10-01", 7), ("2026-10-02", 0)]
+
+    salon = ad.client.get(TIMESERIES, params={**params, "salon_id": "s-1"})
+    assert salon.json()["buckets"][0]["revenue"] == 600.0
+    assert [p["p_scope"] for _, p in ad.db.rpc_calls] == ["platform", "salon:s-1"]
+
+
+def test_analytics_timeseries_requires_admin(ad):
+    r = ad.client.get(TIMESERIES)
+    assert r.status_code in (401, 403), r.text
+
+
 # =====================================================================
 # GET /admin/vendor-requests
 # =====================================================================
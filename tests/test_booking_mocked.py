@@ -17,7 +17,13 @@ Coverage (the surface that ships in prod for this module):
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
 import asyncio
+import csv
+import io
+import itertools
+import re
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import pytest
@@ -27,7 +33,7 @@ from app.core.config import settings
 from app.core.database import get_db_client
 from app.core.auth import get_current_user, TokenData
 from app.core.exceptions import AppException, ValidationError
-from app.services.booking_service import BookingService
+from app.services.booking_service import BookingService, ADMIN_BOOKING_EXPORT_COLUMNS
 from app.services import booking_service as booking_service_module
 from app.services.activity_log_service import ActivityLogService
 from app.schemas import BookingCreate
@@ -46,6 +52,10 @@ class _Resp:
         self.count = count
 
 
+# Keyset continuation built by app.utils.keyset.after_row_filter
+_KEYSET_OR = re.compile(r'(\w+)\.(gt|lt)\."([^"]*)",and\(\1\.eq\."\3",id\.\2\."([^"]*)"\)')
+
+
 class _Query:
     def __init__(self, table):
         self._table = table
@@ -56,6 +66,7 @@ class _Query:
         self._order = []            # list of (col, desc)
         self._range = None          # (start, end) inclusive
         self._count = None
+        self._limit = None
 
     # --- builder ops ---
     def select(self, cols="*", count=None):
@@ -99,6 +110,15 @@ class _Query:
         self._range = (start, end)
         return self
 
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def or_(self, expr):
+        col, op, value, row_id = _KEYSET_OR.fullmatch(expr).groups()
+        self._filters.append(("after", col, (op, value, row_id)))
+        return self
+
     def single(self):
         self._single = True
         return self
@@ -118,6 +138,11 @@ class _Query:
                 return False
             if op == "in" and rv not in v:
                 return False
+            if op == "after":
+                cmp, value, row_id = v
+                key, bound = (rv, row["id"]), (value, row_id)
+                if not (key > bound if cmp == "gt" else key < bound):
+                    return False
         return True
 
     def execute(self):
@@ -134,6 +159,8 @@ class _Query:
             if self._range is not None:
                 s, e = self._range
                 matched = matched[s:e + 1]
+            if self._limit is not None:
+                matched = matched[:self._limit]
             if self._single:
                 if len(matched) != 1:
                     raise Exception("PGRST116: results contain 0 or multiple rows")
@@ -151,6 +178,8 @@ class _Query:
                 row.setdefault("id", str(uuid.uuid4()))
                 row.setdefault("created_at", datetime.utcnow().isoformat())
                 row.setdefault("updated_at", datetime.utcnow().isoformat())
+                if self._table.on_insert is not None:
+                    self._table.on_insert(row)
                 rows.append(row)
                 added.append(dict(row))
             return _Resp(added)
@@ -172,8 +201,9 @@ class _Query:
 
 
 class _Table:
-    def __init__(self):
+    def __init__(self, on_insert=None):
         self.rows = []
+        self.on_insert = on_insert      # BEFORE INSERT trigger stand-in
 
     def select(self, cols="*", count=None):
         return _Query(self).select(cols, count=count)
@@ -190,11 +220,21 @@ class _Table:
 
 class FakeSupabase:
     def __init__(self):
-        self._tables = {}
+        self._tables = {"bookings": _Table(on_insert=self._set_booking_number)}
+        self._booking_number_seq = itertools.count(1)
+        self._seq_lock = threading.Lock()
 
     def table(self, name):
         return self._tables.setdefault(name, _Table())
 
+    def _set_booking_number(self, row):
+        """set_booking_number trigger: BK-YYYYMMDD-NNNNNNN from booking_number_seq."""
+        if row.get("booking_number"):
+            return
+        with self._seq_lock:
+            n = next(self._booking_number_seq)
+        row["booking_number"] = f"BK-{date.today():%Y%m%d}-{n:07d}"
+
     # booking_service reads the admin list from a view via .from_()
     def from_(self, name):
         return self.table(name)
@@ -437,6 +477,28 @@ def test_create_booking_idempotent_on_payment_id(bk):
     assert len(bk.db.table("bookings").rows) == 1
 
 
+def test_create_booking_numbers_unique_under_concurrency(bk):
+    """Thousands of parallel creates get distinct, creation-ordered numbers."""
+    customer = bk.seed_profile()
+    salon = bk.seed_salon()
+    service = bk.seed_service(salon["id"])
+    bk.seed_fee_config("6")
+
+    def _create(_):
+        return asyncio.run(bk.service().create_booking(
+            _make_booking_create(salon["id"], service["id"]),
+            current_user_id=customer["id"],
+        ))["booking_number"]
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        numbers = list(pool.map(_create, range(2000)))
+
+    assert len(set(numbers)) == 2000
+    assert all(n.startswith(f"BK-{date.today():%Y%m%d}-") for n in numbers)
+    # Text order is sequence order, so the index is appended to, not scattered
+    assert sorted(numbers) == sorted(numbers, key=lambda n: int(n.rsplit("-", 1)[1]))
+
+
 # =====================================================================
 # PUT /customers/bookings/{id}/cancel  (route + guards)
 # =====================================================================
@@ -606,3 +668,41 @@ def test_admin_bookings_requires_admin(bk):
     bk.login_as(str(uuid.uuid4()), role="customer")
     r = bk.client.get(f"{API}/admin/bookings/")
     assert r.status_code == 403, r.text
+
+
+# =====================================================================
+# GET /admin/bookings/export  (streamed CSV / NDJSON, keyset paging)
+# =====================================================================
+def test_admin_booking_export_keyset_pages_cover_every_row_once(bk):
+    _seed_admin_rows(bk, 25)
+    # Same created_at on both sides of a page boundary: the id tie-break
+    # must neither skip nor repeat them.
+    for row in bk.db.from_("bookings_with_payments").rows[8:12]:
+        row["created_at"] = "2026-06-01T00:08:00"
+
+    pages = list(BookingService(bk.db).iter_admin_booking_export(page_size=10))
+    assert [len(p) for p in pages] == [10, 10, 5]
+    ids = [b["id"] for p in pages for b in p]
+    assert len(set(ids)) == 25
+    assert [b["created_at"] for p in pages for b in p] == sorted(
+        b["created_at"] for p in pages for b in p)
+
+
+def test_admin_booking_export_csv(bk):
+    _seed_admin_rows(bk, 3)
+    bk.db.from_("bookings_with_payments").rows[0]["status"] = "completed"
+    bk.login_as(str(uuid.uuid4()), role="admin")
+
+    r = bk.client.get(f"{API}/admin/bookings/export", params={"status": "pending"})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/csv")
+    assert "attachment; filename=\"bookings-" in r.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0] == list(ADMIN_BOOKING_EXPORT_COLUMNS)
+    assert [row[1] for row in rows[1:]] == ["BK0001", "BK0002"]
+
+
+def test_admin_booking_export_requires_admin(bk):
+    bk.login_as(str(uuid.uuid4()), role="customer")
+    r = bk.client.get(f"{API}/admin/bookings/export")
+    assert r.status_code == 403, r.text
@@ -5,7 +5,9 @@ Two layers, no Supabase stack required:
   1. PricingService.compute_booking_pricing — pure math, with CouponService stubbed
      (service %/flat, caps, best-of vs salon sale, convenience-fee waivers).
   2. CouponService.get_valid_coupon — eligibility rules against a small in-memory
-     fake DB (scope, window, min-order, first-time, usage limits).
+     fake DB whose check_coupon_eligibility stand-in mirrors the SQL function
+     (scope, window, min-order, first-time, usage limits), plus the
+     batch quote path (PricingService.quote_coupons) the coupon picker uses.
 
 No marker -> runs in the fast (no-stack) job.
 """
@@ -267,13 +269,81 @@ class _CTable:
         return _CQuery(self.rows).select(cols, count=count)
 
 
+class _CRpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _CResp(self._data)
+
+
+def _parse(ts):
+    return datetime.fromisoformat(ts) if ts else None
+
+
 class _CDB:
     def __init__(self):
         self._tables = {}
+        self.reads = []
 
     def table(self, name):
+        self.reads.append(name)
         return self._tables.setdefault(name, _CTable())
 
+    def rpc(self, name, params):
+        self.reads.append(name)
+        assert name == "check_coupon_eligibility"
+        return _CRpc(self._check_coupon_eligibility(**params))
+
+    def _check_coupon_eligibility(self, p_codes, p_salon_id, p_user_id, p_service_subtotal):
+        """Python mirror of the check_coupon_eligibility() SQL function."""
+        return [
+            {"coupon_code": code.strip().upper(),
+             **self._check_code(code.strip().upper(), p_salon_id, p_user_id, p_service_subtotal)}
+            for code in p_codes
+        ]
+
+    def _check_code(self, code, p_salon_id, p_user_id, p_service_subtotal):
+        rows = self._tables.setdefault("coupons", _CTable()).rows
+        c = next((r for r in rows if r["is_active"] and r["code"] == code), None)
+
+        def no(reason):
+            return {"coupon": None, "reason": reason}
+
+        if c is None:
+            return no("not_found")
+        now = datetime.now(timezone.utc)
+        if c["valid_from"] and now < _parse(c["valid_from"]):
+            return no("not_started")
+        if c["valid_until"] and now > _parse(c["valid_until"]):
+            return no("expired")
+        if c["scope"] == "vendor" and c["salon_id"] != p_salon_id:
+            return no("wrong_salon")
+        if (p_service_subtotal is not None and c["min_order_amount"] is not None
+                and p_service_subtotal < c["min_order_amount"]):
+            return no("min_order_not_met")
+        if c["first_time_scope"]:
+            if c["first_time_scope"] == "vendor" and not p_salon_id:
+                return no("not_first_time")
+            prior = [
+                b for b in self._tables.setdefault("bookings", _CTable()).rows
+                if b["customer_id"] == p_user_id and b.get("deleted_at") is None
+                and b.get("status") != "cancelled"
+                and (c["first_time_scope"] != "vendor" or b["salon_id"] == p_salon_id)
+            ]
+            if prior:
+                return no("not_first_time")
+        if c["usage_limit_total"] is not None and c["used_count"] >= c["usage_limit_total"]:
+            return no("total_limit_reached")
+        if c["usage_limit_per_user"] is not None:
+            used = [
+                r for r in self._tables.setdefault("coupon_redemptions", _CTable()).rows
+                if r["coupon_id"] == c["id"] and r["user_id"] == p_user_id
+            ]
+            if len(used) >= c["usage_limit_per_user"]:
+                return no("per_user_limit_reached")
+        return {"coupon": dict(c), "reason": None}
+
 
 def _db_with_coupon(**overrides):
     db = _CDB()
@@ -385,6 +455,39 @@ async def test_first_time_blocks_on_active_booking():
     assert coupon is None and "first-time" in reason
 
 
+async def test_valid_coupon_is_one_round_trip():
+    db = _db_with_coupon(first_time_scope="platform", usage_limit_per_user=1)
+    db.reads.clear()
+    coupon, _ = await CouponService(db).get_valid_coupon("SAVE", "s1", "u1", 1000)
+    assert coupon is not None
+    assert db.reads.count("check_coupon_eligibility") == 1
+
+
+async def test_valid_coupon_memoised_within_request_scope():
+    from app.core.request_scope import begin_request_scope, end_request_scope
+
+    db = _db_with_coupon()
+    svc = CouponService(db)
+    token = begin_request_scope()
+    try:
+        db.reads.clear()
+        first = await svc.get_valid_coupon("SAVE", "s1", "u1", 1000)
+        again = await svc.get_valid_coupon(" save ", "s1", "u1", 1000)
+        assert first == again and first[0] is not None
+        assert db.reads.count("check_coupon_eligibility") == 1
+        # A different cart total is a different question
+        await svc.get_valid_coupon("SAVE", "s1", "u1", 900)
+        assert db.reads.count("check_coupon_eligibility") == 2
+    finally:
+        end_request_scope(token)
+
+    # Outside a request scope nothing is memoised
+    db.reads.clear()
+    await svc.get_valid_coupon("SAVE", "s1", "u1", 1000)
+    await svc.get_valid_coupon("SAVE", "s1", "u1", 1000)
+    assert db.reads.count("check_coupon_eligibility") == 2
+
+
 # =====================================================================
 # 2b. CouponService.list_available_coupons (customer discovery)
 # =====================================================================
@@ -465,6 +568,41 @@ async def test_available_fee_coupon_summary():
     assert out[0]["summary"] == "₹50 OFF on booking fee"
 
 
+async def test_available_served_from_catalogue():
+    db = _db_with_coupon()
+    svc = CouponService(db)
+    assert [c["code"] for c in await svc.list_available_coupons("u1", "s1")] == ["SAVE"]
+
+    db.reads.clear()
+    await svc.list_available_coupons("u1", "s1")
+    assert db.reads == ["check_coupon_eligibility"]   # catalogue hit, one eligibility call
+
+    # Coupon CRUD invalidates the catalogue; the next listing reloads it
+    db.table("coupons").rows[0]["is_active"] = False
+    from app.services.coupon_service import invalidate_coupon_catalogue
+    invalidate_coupon_catalogue()
+    assert await svc.list_available_coupons("u1", "s1") == []
+
+
+async def test_catalogue_orders_by_validity_and_skips_expired():
+    now = datetime.now(timezone.utc)
+    db = _db_with_coupons(
+        _coupon(id="open", code="OPEN", scope="vendor", salon_id="s1"),
+        _coupon(id="late", code="LATE", scope="vendor", salon_id="s1",
+                valid_until=(now + timedelta(days=9)).isoformat()),
+        _coupon(id="soon", code="SOON", scope="vendor", salon_id="s1",
+                valid_until=(now + timedelta(days=1)).isoformat()),
+        _coupon(id="gone", code="GONE", scope="vendor", salon_id="s1",
+                valid_until=(now - timedelta(days=1)).isoformat()),
+        _coupon(id="todo", code="TODO", scope="vendor", salon_id="s1",
+                valid_from=(now + timedelta(days=1)).isoformat()),
+        _coupon(id="else", code="ELSE", scope="vendor", salon_id="s2"),
+    )
+    grouped = CouponService(db).public_vendor_coupons_by_salon(["s1", "s3"])
+    assert [c["code"] for c in grouped["s1"]] == ["SOON", "LATE", "OPEN"]
+    assert "s3" not in grouped
+
+
 # =====================================================================
 # 3. Gross coupon discount exposed for settlement (H6)
 # =====================================================================
@@ -501,6 +639,74 @@ async def test_gross_discount_over_sale_is_full_coupon_value():
     assert r["discount_amount"] == 100
 
 
+# =====================================================================
+# 3b. Batch quotes (one cart, many coupons)
+# =====================================================================
+def _db_with_coupons(*coupons):
+    db = _CDB()
+    db.table("coupons").rows.extend(coupons)
+    return db
+
+
+async def test_quote_coupons_prices_every_candidate_in_one_pass():
+    db = _db_with_coupons(
+        _coupon(id="c-pct", code="PCT", discount_value=20, first_time_scope="platform"),
+        _coupon(id="c-flat", code="FLAT", discount_type="flat_amount", discount_value=50,
+                first_time_scope="platform"),
+        _coupon(id="c-fee", code="FEE", applies_to="convenience_fee", discount_value=100),
+        _coupon(id="c-min", code="MIN", min_order_amount=5000),
+    )
+    db.reads.clear()
+    ps = PricingService(db)
+    quotes = await ps.quote_coupons(
+        line_items=[LineItem(1000, 1000, 1)],
+        convenience_fee_percentage=10,
+        salon_id="s1", customer_id="u1",
+        coupons=list(db.table("coupons").rows),
+    )
+    assert quotes["c-pct"]["savings"] == 200
+    assert quotes["c-flat"]["savings"] == 50
+    assert quotes["c-fee"]["savings"] == 100
+    assert quotes["c-fee"]["pricing"]["pay_now"] == 0
+    assert quotes["c-min"]["reason_code"] == "min_order_not_met"
+    assert quotes["c-min"]["savings"] == 0
+    # Every candidate checked in one eligibility call
+    assert db.reads.count("check_coupon_eligibility") == 1
+
+
+async def test_quote_matches_single_coupon_pricing():
+    coupon = _coupon(discount_type="percentage", discount_value=30)
+    db = _db_with_coupons(coupon)
+    line_items = [LineItem(1000, 800, 1)]
+    single = await PricingService(db).compute_booking_pricing(
+        line_items=line_items, convenience_fee_percentage=10,
+        salon_id="s1", customer_id="u1", coupon_code="SAVE",
+    )
+    quotes = await PricingService(db).quote_coupons(
+        line_items=line_items, convenience_fee_percentage=10,
+        salon_id="s1", customer_id="u1", coupons=[coupon],
+    )
+    assert quotes["coupon-1"]["pricing"] == single
+
+
+async def test_available_with_cart_carries_savings():
+    db = _db_with_coupons(
+        _coupon(id="c-pct", code="PCT", discount_value=10),
+        _coupon(id="c-min", code="MIN", min_order_amount=5000),
+        _coupon(id="c-used", code="USED", usage_limit_per_user=1),
+    )
+    db.table("coupon_redemptions").rows.append({"id": "r1", "coupon_id": "c-used", "user_id": "u1"})
+    out = await CouponService(db).list_available_coupons(
+        customer_id="u1", salon_id="s1",
+        line_items=[LineItem(1000, 1000, 2)], convenience_fee_percentage=10,
+    )
+    by_code = {c["code"]: c for c in out}
+    assert set(by_code) == {"PCT", "MIN"}          # min-order stays listed
+    assert by_code["PCT"]["estimated_savings"] == 200
+    assert by_code["PCT"]["breakdown"]["total_amount"] == 2000
+    assert by_code["MIN"]["estimated_savings"] == 0
+
+
 # =====================================================================
 # 4. Schema validation (vendor fee-coupon block, past valid_until)
 # =====================================================================
@@ -116,6 +116,7 @@ class _Query:
         op, payload = self._op
         rows = self._t.rows
         if op == "select":
+            self._db.selects.append(self._t.name)
             matched = [r for r in rows if self._match(r)]
             total = len(matched)
             for c, desc in reversed(self._order):
@@ -154,16 +155,92 @@ class _Query:
 
 
 class _Table:
-    def __init__(self, db): self.db = db; self.rows = []
+    def __init__(self, db, name): self.db = db; self.name = name; self.rows = []
     def select(self, cols="*", count=None): return _Query(self).select(cols, count=count)
     def insert(self, p): return _Query(self).insert(p)
     def update(self, p): return _Query(self).update(p)
     def delete(self): return _Query(self).delete()
 
 
+class _Rpc:
+    def __init__(self, fn, params): self._fn = fn; self._params = params
+    def execute(self): return _Resp(self._fn(**self._params))
+
+
 class FakeSupabase:
-    def __init__(self): self._t = {}
-    def table(self, name): return self._t.setdefault(name, _Table(self))
+    """Tables plus Python stand-ins for the cart_* database functions."""
+
+    def __init__(self): self._t = {}; self.rpc_calls = []; self.selects = []
+    def table(self, name): return self._t.setdefault(name, _Table(self, name))
+
+    def rpc(self, name, params):
+        self.rpc_calls.append(name)
+        return _Rpc(getattr(self, f"_rpc_{name}"), params)
+
+    def _find(self, table, **match):
+        return next((r for r in self.table(table).rows
+                     if all(r.get(k) == v for k, v in match.items())), None)
+
+    def _cart_snapshot(self, user_id):
+        lines = []
+        for item in self.table("cart_items").rows:
+            if item["user_id"] != user_id:
+                continue
+            svc = self._find("services", id=item["service_id"])
+            salon = self._find("salons", id=item["salon_id"])
+            lines.append({**{k: item.get(k) for k in ("id", "service_id", "salon_id", "quantity",
+                                                      "metadata", "created_at")},
+                          "services": dict(svc), "salons": dict(salon)})
+        return lines
+
+    def _rpc_cart_add_service(self, p_user_id, p_service_id, p_quantity=1, p_metadata=None):
+        fail = lambda reason: [{"success": False, "reason": reason,
+                                "cart_item": None, "was_existing": False, "cart": None}]
+        if not p_quantity or p_quantity <= 0:
+            return fail("invalid_quantity")
+        svc = self._find("services", id=p_service_id)
+        if svc is None:
+            return fail("service_not_found")
+        if not svc.get("is_active", True):
+            return fail("service_inactive")
+        salon = self._find("salons", id=svc["salon_id"])
+        if salon is None:
+            return fail("salon_not_found")
+        if not salon.get("is_active", True):
+            return fail("salon_inactive")
+        if not salon.get("accepting_bookings", True):
+            return fail("salon_not_accepting")
+        current = self._find("cart_items", user_id=p_user_id)
+        if current and current["salon_id"] != svc["salon_id"]:
+            return fail("different_salon")
+        item = self._find("cart_items", user_id=p_user_id, service_id=p_service_id)
+        existed = item is not None
+        if existed:
+            item["quantity"] += p_quantity
+        else:
+            item = {"id": str(uuid.uuid4()), "user_id": p_user_id, "salon_id": svc["salon_id"],
+                    "service_id": p_service_id, "quantity": p_quantity,
+                    "metadata": p_metadata or {}, "created_at": datetime.utcnow().isoformat()}
+            self.table("cart_items").rows.append(item)
+        return [{"success": True, "reason": None, "cart_item": dict(item),
+                 "was_existing": existed, "cart": self._cart_snapshot(p_user_id)}]
+
+    def _rpc_cart_set_quantity(self, p_user_id, p_item_id, p_quantity):
+        if not p_quantity or p_quantity <= 0:
+            return [{"success": False, "reason": "invalid_quantity", "cart_item": None, "cart": None}]
+        item = self._find("cart_items", id=p_item_id, user_id=p_user_id)
+        if item is None:
+            return [{"success": False, "reason": "item_not_found", "cart_item": None, "cart": None}]
+        item["quantity"] = p_quantity
+        return [{"success": True, "reason": None, "cart_item": dict(item),
+                 "cart": self._cart_snapshot(p_user_id)}]
+
+    def _rpc_cart_remove_item(self, p_user_id, p_item_id):
+        item = self._find("cart_items", id=p_item_id, user_id=p_user_id)
+        if item is None:
+            return [{"success": False, "reason": "item_not_found", "cart": None}]
+        self.table("cart_items").rows.remove(item)
+        return [{"success": True, "reason": None, "cart": self._cart_snapshot(p_user_id)}]
 
 
 # =====================================================================
@@ -189,7 +266,7 @@ class Handle:
         return self.add("salons", business_name="Salon X", city="Townsville",
                         state="ST", address="1 St", phone="999", logo_url=None,
                         is_active=is_active, is_verified=True, registration_fee_paid=True,
-                        accepting_bookings=accepting_bookings, **o)
+                        is_public=is_active, accepting_bookings=accepting_bookings, **o)
 
     def seed_cart_item(self, user_id, service_id, salon_id, quantity=1):
         return self.add("cart_items", user_id=user_id, service_id=service_id,
@@ -304,6 +381,22 @@ def test_add_to_cart_different_salon_400(cs):
     assert "different salon" in r.text.lower()
 
 
+def test_add_to_cart_is_one_rpc(cs):
+    # Validation + upsert happen inside cart_add_service; the service issues no
+    # table reads of its own before writing.
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"])
+    cs.login()
+    r = cs.client.post(f"{CUST}/cart", json={"service_id": svc["id"], "quantity": 1})
+    assert r.status_code == 200, r.text
+    assert r.json()["message"] == "Item added to cart"
+    assert cs.db.rpc_calls == ["cart_add_service"]
+
+    r = cs.client.post(f"{CUST}/cart", json={"service_id": svc["id"], "quantity": 1})
+    assert r.json()["message"] == "Cart item quantity updated"
+    assert r.json()["cart_item"]["quantity"] == 2
+
+
 def test_update_cart_item_happy(cs):
     salon = cs.seed_salon()
     svc = cs.seed_service(salon["id"])
@@ -357,6 +450,73 @@ def test_clear_cart(cs):
     assert cs.db.table("cart_items").rows == []
 
 
+def test_get_cart_served_from_cache(cs):
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"], price=500.0)
+    cs.seed_cart_item("cust-1", svc["id"], salon["id"])
+    cs.login()
+
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 1
+
+    # A write that bypasses CustomerService isn't seen until the entry expires.
+    cs.db.table("cart_items").rows.clear()
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 1
+
+
+def test_cart_mutations_return_and_cache_new_aggregate(cs):
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"], price=500.0)
+    cs.login()
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 0   # warm the cache
+
+    r = cs.client.post(f"{CUST}/cart", json={"service_id": svc["id"], "quantity": 2})
+    assert r.status_code == 200, r.text
+    assert r.json()["cart"]["total_amount"] == 1000.0
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 2
+
+    item_id = r.json()["cart_item"]["id"]
+    r = cs.client.put(f"{CUST}/cart/{item_id}", json={"quantity": 3})
+    assert r.status_code == 200, r.text
+    assert r.json()["cart"]["item_count"] == 3
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 3
+
+    r = cs.client.delete(f"{CUST}/cart/{item_id}")
+    assert r.status_code == 200, r.text
+    assert r.json()["cart"]["items"] == []
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 0
+
+
+def test_cart_mutation_is_one_round_trip(cs):
+    # The new aggregate comes back from the cart_* function itself; no
+    # follow-up cart_items read.
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"], price=500.0)
+    cs.login()
+
+    r = cs.client.post(f"{CUST}/cart", json={"service_id": svc["id"], "quantity": 2})
+    assert r.status_code == 200, r.text
+    item_id = r.json()["cart_item"]["id"]
+    cs.client.put(f"{CUST}/cart/{item_id}", json={"quantity": 3})
+    r = cs.client.delete(f"{CUST}/cart/{item_id}")
+    assert r.status_code == 200, r.text
+
+    assert cs.db.rpc_calls == ["cart_add_service", "cart_set_quantity", "cart_remove_item"]
+    assert "cart_items" not in cs.db.selects
+
+
+def test_clear_cart_resets_cached_cart(cs):
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"])
+    cs.seed_cart_item("cust-1", svc["id"], salon["id"])
+    cs.login()
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 1
+
+    r = cs.client.delete(f"{CUST}/cart/clear/all")
+    assert r.status_code == 200, r.text
+    assert r.json()["cart"]["item_count"] == 0
+    assert cs.client.get(f"{CUST}/cart").json()["item_count"] == 0
+
+
 def test_checkout_empty_cart_400(cs):
     cs.login()
     r = cs.client.post(f"{CUST}/cart/checkout",
@@ -365,6 +525,47 @@ def test_checkout_empty_cart_400(cs):
     assert "empty" in r.text.lower()
 
 
+def _checkout_ready_cart(cs, quantity=1):
+    cs.add("system_config", config_key="convenience_fee_percentage", config_value="10")
+    salon = cs.seed_salon()
+    svc = cs.seed_service(salon["id"], price=500.0)
+    cs.seed_cart_item("cust-1", svc["id"], salon["id"], quantity=quantity)
+    return salon, svc
+
+
+def _stored_order(cs, svc, customer_id="cust-1", quantity=1):
+    return cs.add("payment_orders", razorpay_order_id="order_1", customer_id=customer_id,
+                  coupon_code=None, pricing={"convenience_fee_due": 50.0},
+                  cart_snapshot=[{"service_id": svc["id"], "quantity": quantity,
+                                  "unit_price": 500.0}])
+
+
+def test_checkout_rejects_cart_changed_since_order(cs):
+    _, svc = _checkout_ready_cart(cs, quantity=2)
+    _stored_order(cs, svc, quantity=1)
+    cs.login()
+
+    r = cs.client.post(f"{CUST}/cart/checkout", json={
+        "booking_date": "2026-07-01", "time_slots": ["10:00"],
+        "razorpay_order_id": "order_1",
+    })
+    assert r.status_code == 400, r.text
+    assert "changed" in r.text.lower()
+
+
+def test_checkout_rejects_someone_elses_order(cs):
+    _, svc = _checkout_ready_cart(cs)
+    _stored_order(cs, svc, customer_id="other-customer")
+    cs.login()
+
+    r = cs.client.post(f"{CUST}/cart/checkout", json={
+        "booking_date": "2026-07-01", "time_slots": ["10:00"],
+        "razorpay_order_id": "order_1",
+    })
+    assert r.status_code == 400, r.text
+    assert "does not match" in r.text.lower()
+
+
 def test_cart_requires_auth(cs):
     r = cs.client.get(f"{CUST}/cart")
     assert r.status_code in (401, 403), r.text
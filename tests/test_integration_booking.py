@@ -14,6 +14,7 @@ covered over HTTP. Payment (Razorpay) is intentionally out of scope.
 """
 import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import pytest
@@ -87,6 +88,47 @@ def test_booking_unknown_service_rejected(service_client, make_user, make_salon)
         ))
 
 
+def test_parallel_bookings_get_unique_numbers(service_client, make_user, make_service):
+    """booking_number comes from the DB sequence: no collisions under load."""
+    customer = make_user(role="customer")
+    service = make_service(price=100.0)
+    svc = BookingService(db_client=service_client)
+
+    def _create(_):
+        return asyncio.run(svc.create_booking(
+            _booking_payload(service["salon_id"], service["id"]),
+            current_user_id=customer["id"],
+        ))["booking_number"]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        numbers = list(pool.map(_create, range(2000)))
+
+    assert len(set(numbers)) == len(numbers)
+    assert all(n.startswith("BK-") for n in numbers)
+
+
+def test_booking_maintains_platform_counters(service_client, make_user, make_service):
+    """The platform_counters triggers track a new booking per salon and status."""
+    customer = make_user(role="customer")
+    service = make_service(price=100.0)
+    scope = f"salon:{service['salon_id']}"
+
+    def _counters():
+        rows = service_client.table("platform_counters").select(
+            "counter_key, value"
+        ).eq("scope", scope).execute().data
+        return {r["counter_key"]: float(r["value"]) for r in rows}
+
+    asyncio.run(BookingService(db_client=service_client).create_booking(
+        _booking_payload(service["salon_id"], service["id"]),
+        current_user_id=customer["id"],
+    ))
+
+    counters = _counters()
+    assert counters["bookings.total"] == 1
+    assert counters["bookings.status.pending"] == 1
+
+
 def test_cancel_endpoint_requires_authentication(integration_client):
     """The cancel endpoint must reject unauthenticated callers."""
     resp = integration_client.put(f"{API}/customers/bookings/{uuid.uuid4()}/cancel")
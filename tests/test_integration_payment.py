@@ -0,0 +1,115 @@
+"""
+Integration tests for the payment RPCs — the SQL the mocked payment tests stub.
+
+tests/test_payment_mocked.py replaces every Supabase RPC with a Python fake, so
+a function that fails to plan against the real schema (e.g. one writing a
+dropped column) passes there. These call the real functions on the live local
+stack with a booking whose convenience fee is still pending.
+"""
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from app.schemas import BookingCreate
+from app.schemas.request.booking import ServiceItem
+from app.services.booking_service import BookingService
+from app.utils.rpc import rpc_result
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture()
+def pending_fee(service_client, make_user, make_service):
+    """A booking plus its pending convenience_fee payments row (removed on teardown)."""
+    customer = make_user(role="customer")
+    service = make_service(price=200.0)
+    booking = asyncio.run(BookingService(db_client=service_client).create_booking(
+        BookingCreate(
+            salon_id=service["salon_id"],
+            booking_date=(date.today() + timedelta(days=7)).isoformat(),
+            booking_time="10:00",
+            time_slots=["10:00"],
+            services=[ServiceItem(service_id=service["id"], quantity=1)],
+        ),
+        current_user_id=customer["id"],
+    ))
+    payment = service_client.table("payments").insert({
+        "booking_id": booking["id"],
+        "customer_id": customer["id"],
+        "payment_type": "convenience_fee",
+        "amount": booking["convenience_fee"],
+        "razorpay_order_id": f"order_it_{uuid.uuid4().hex[:12]}",
+        "status": "pending",
+    }).execute().data[0]
+
+    yield payment
+
+    service_client.table("payments").delete().eq("booking_id", booking["id"]).execute()
+
+
+def _payment(service_client, payment_id):
+    return service_client.table("payments").select(
+        "status, razorpay_payment_id, payment_method, paid_at"
+    ).eq("id", payment_id).execute().data[0]
+
+
+def test_reconciliation_marks_pending_fee_paid(service_client, pending_fee):
+    """apply_payment_reconciliation() runs against the real schema and records a capture."""
+    payment_id = f"pay_it_{uuid.uuid4().hex[:12]}"
+    counts = rpc_result(service_client.rpc("apply_payment_reconciliation", {"p_results": [
+        {"table": "payments", "id": pending_fee["id"], "status": "success",
+         "razorpay_payment_id": payment_id, "payment_method": "upi"},
+        # A registration verdict in the same page; no such row, so no update
+        {"table": "vendor_registration_payments", "id": str(uuid.uuid4()), "status": "failed"},
+    ]}).execute())
+
+    assert counts == {"payments_updated": 1, "registrations_updated": 0, "salons_activated": 0}
+    row = _payment(service_client, pending_fee["id"])
+    assert row["status"] == "success"
+    assert row["razorpay_payment_id"] == payment_id
+    assert row["payment_method"] == "upi"
+    assert row["paid_at"] is not None
+
+    fee_paid = service_client.table("bookings_with_payments").select(
+        "is_convenience_fee_paid"
+    ).eq("id", pending_fee["booking_id"]).execute().data[0]
+    assert fee_paid["is_convenience_fee_paid"] is True
+
+
+def test_reconciliation_leaves_settled_rows_alone(service_client, pending_fee):
+    """Only 'pending' rows move: a second verdict for the same row is a no-op."""
+    verdict = {"table": "payments", "id": pending_fee["id"], "status": "success",
+               "razorpay_payment_id": f"pay_it_{uuid.uuid4().hex[:12]}"}
+    service_client.rpc("apply_payment_reconciliation", {"p_results": [verdict]}).execute()
+
+    counts = rpc_result(service_client.rpc("apply_payment_reconciliation", {"p_results": [
+        {**verdict, "status": "failed", "error_description": "late failure"},
+    ]}).execute())
+
+    assert counts["payments_updated"] == 0
+    assert _payment(service_client, pending_fee["id"])["status"] == "success"
+
+
+def test_webhook_capture_rpc_completes_fee_and_confirms_booking(service_client, pending_fee):
+    """verify_payment_and_confirm_booking() runs against payments and is idempotent."""
+    payment_id = f"pay_it_{uuid.uuid4().hex[:12]}"
+    params = {
+        "p_razorpay_order_id": pending_fee["razorpay_order_id"],
+        "p_razorpay_payment_id": payment_id,
+        "p_razorpay_signature": None,
+    }
+
+    first = rpc_result(service_client.rpc("verify_payment_and_confirm_booking", params).execute())
+    assert first["success"] is True
+    assert first["was_already_verified"] is False
+    assert first["booking_id"] == pending_fee["booking_id"]
+    assert _payment(service_client, pending_fee["id"])["status"] == "success"
+    booking = service_client.table("bookings").select("status").eq(
+        "id", pending_fee["booking_id"]).execute().data[0]
+    assert booking["status"] == "confirmed"
+
+    again = rpc_result(service_client.rpc("verify_payment_and_confirm_booking", params).execute())
+    assert again["was_already_verified"] is True
+    assert again["payment_id"] == payment_id
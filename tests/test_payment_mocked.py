@@ -14,13 +14,21 @@ Scope: the surviving payment surface after the module cleanup —
     POST /payments/cart/create-order
     POST /payments/registration/create-order
     POST /payments/registration/verify
-(The booking/verify, booking/create-order, history, vendor/earnings and
-webhook endpoints were removed during the audit and are intentionally absent.)
+    POST /payments/webhook (+ the background PaymentWebhookService worker)
+(The booking/verify, booking/create-order, history, vendor/earnings and old
+webhook/razorpay endpoints were removed during the audit and are
+intentionally absent.)
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import pytest
 from fastapi.testclient import TestClient
@@ -29,6 +37,10 @@ from app.core.config import settings
 from app.core.database import get_db_client
 from app.core.auth import get_current_user, get_current_user_id, TokenData
 from app.services.payment_service import PaymentService
+from app.services.payment_webhook_service import PaymentWebhookService, WEBHOOK_MAX_ATTEMPTS
+from app.services.payment_reconciliation_service import PaymentReconciliationService
+from app.services import payment as payment_gateway
+from app.services.config_service import ConfigService
 
 API = settings.API_PREFIX
 PAYMENTS = f"{API}/payments"
@@ -71,6 +83,33 @@ class _Query:
         self._filters.append(("eq", col, val))
         return self
 
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def is_(self, col, val):
+        op = "not_null" if getattr(self, "_negate", False) else "null"
+        self._negate = False
+        self._filters.append((op, col, None))
+        return self
+
+    def gt(self, col, val):
+        self._filters.append(("gt", col, val))
+        return self
+
+    def gte(self, col, val):
+        self._filters.append(("gte", col, val))
+        return self
+
+    def lt(self, col, val):
+        self._filters.append(("lt", col, val))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
     def order(self, col, desc=False):
         self._order.append((col, desc))
         return self
@@ -87,6 +126,18 @@ class _Query:
         for op, c, v in self._filters:
             if op == "eq" and row.get(c) != v:
                 return False
+            if op == "null" and row.get(c) is not None:
+                return False
+            if op == "not_null" and row.get(c) is None:
+                return False
+            if op in ("gt", "gte", "lt") and row.get(c) is None:
+                return False
+            if op == "gt" and not row[c] > v:
+                return False
+            if op == "gte" and not row[c] >= v:
+                return False
+            if op == "lt" and not row[c] < v:
+                return False
         return True
 
     def execute(self):
@@ -97,6 +148,8 @@ class _Query:
             matched = [dict(r) for r in rows if self._match(r)]
             for col, desc in reversed(self._order):
                 matched.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            if getattr(self, "_limit", None) is not None:
+                matched = matched[:self._limit]
             if self._single:
                 if len(matched) != 1:
                     raise Exception("PGRST116: results contain 0 or multiple rows")
@@ -107,6 +160,11 @@ class _Query:
             new_rows = payload if isinstance(payload, list) else [payload]
             added = []
             for nr in new_rows:
+                unique_col = self._table.unique
+                if unique_col and nr.get(unique_col) is not None and any(
+                    r.get(unique_col) == nr[unique_col] for r in rows
+                ):
+                    raise Exception(f'duplicate key value violates unique constraint "{unique_col}"')
                 row = dict(nr)
                 row.setdefault("id", str(uuid.uuid4()))
                 row.setdefault("created_at", datetime.utcnow().isoformat())
@@ -131,8 +189,9 @@ class _Query:
 
 
 class _Table:
-    def __init__(self):
+    def __init__(self, unique=None):
         self.rows = []
+        self.unique = unique  # one UNIQUE column, enforced on insert
 
     def select(self, cols="*", count=None):
         return _Query(self).select(cols, count=count)
@@ -147,12 +206,75 @@ class _Table:
         return _Query(self).delete()
 
 
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
 class FakeSupabase:
+    # UNIQUE columns the webhook path relies on
+    _UNIQUE = {"payment_webhook_events": "event_id"}
+
     def __init__(self):
         self._tables = {}
+        self.rpc_calls = []
 
     def table(self, name):
-        return self._tables.setdefault(name, _Table())
+        return self._tables.setdefault(name, _Table(self._UNIQUE.get(name)))
+
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(getattr(self, f"_rpc_{name}")(params or {}))
+
+    # Python stand-ins for the SQL functions
+    def _rpc_claim_payment_webhook_events(self, params):
+        now = datetime.now(timezone.utc)
+        claimed = []
+        for row in self.table("payment_webhook_events").rows:
+            if len(claimed) >= params.get("p_limit", 50):
+                break
+            due = row.get("available_at") is None or datetime.fromisoformat(row["available_at"]) <= now
+            if row.get("status", "pending") == "pending" and due:
+                row["status"] = "processing"
+                row["attempts"] = row.get("attempts", 0) + 1
+                claimed.append(dict(row))
+        return claimed
+
+    def _rpc_apply_payment_reconciliation(self, params):
+        counts = {"payments_updated": 0, "registrations_updated": 0, "salons_activated": 0}
+        for verdict in params["p_results"]:
+            table = verdict["table"]
+            (row,) = [r for r in self.table(table).rows if r["id"] == verdict["id"]]
+            if row["status"] != "pending":
+                continue
+            row["status"] = verdict["status"]
+            for col in ("razorpay_payment_id", "payment_method", "error_code",
+                        "error_description", "failure_reason"):
+                if verdict.get(col) is not None:
+                    row[col] = verdict[col]
+            if table == "payments":
+                counts["payments_updated"] += 1
+                continue
+            counts["registrations_updated"] += 1
+            if verdict["status"] == "success":
+                for salon in self.table("salons").rows:
+                    if salon.get("join_request_id") == row.get("vendor_request_id"):
+                        salon.update(is_active=True, registration_fee_paid=True)
+                        row["salon_id"] = salon["id"]
+                        counts["salons_activated"] += 1
+        return [counts]
+
+    def _rpc_verify_payment_and_confirm_booking(self, params):
+        for p in self.table("payments").rows:
+            if p["razorpay_order_id"] == params["p_razorpay_order_id"] and p["status"] == "pending":
+                p.update(status="success", razorpay_payment_id=params["p_razorpay_payment_id"])
+                for b in self.table("bookings").rows:
+                    if b["id"] == p["booking_id"] and b["status"] == "pending":
+                        b.update(status="confirmed")
+        return [{"success": True}]
 
 
 # =====================================================================
@@ -290,6 +412,24 @@ def test_cart_create_order_happy(pm):
     assert body["breakdown"]["pay_at_salon"] == 1000.0
 
 
+def test_cart_create_order_stores_snapshot_locally(pm):
+    pm.seed_cart_item(user_id="u1", price=1000.0, quantity=2, salon_id="salon-1",
+                      service_id="svc-1")
+    pm.seed_config("convenience_fee_percentage", "10")
+    pm.login_as("u1")
+
+    r = pm.client.post(f"{PAYMENTS}/cart/create-order")
+    assert r.status_code == 200, r.text
+    order_id = r.json()["order_id"]
+
+    (row,) = pm.db.table("payment_orders").rows
+    assert row["razorpay_order_id"] == order_id
+    assert row["customer_id"] == "u1"
+    assert row["salon_id"] == "salon-1"
+    assert row["cart_snapshot"] == [{"service_id": "svc-1", "quantity": 2, "unit_price": 1000.0}]
+    assert row["pricing"]["convenience_fee_due"] == row["amount"] == 200.0
+
+
 def test_cart_create_order_uses_discounted_price_for_pay_at_salon(pm):
     pm.seed_cart_item(user_id="u1", price=1000.0, discounted_price=800.0, quantity=2)
     pm.seed_config("convenience_fee_percentage", "5")
@@ -426,6 +566,347 @@ def test_registration_verify_requires_auth(pm):
     assert r.status_code in (401, 403), r.text
 
 
+# =====================================================================
+# Shared gateway + cached credentials
+# =====================================================================
+class _CountingConfig:
+    def __init__(self, values):
+        self.values = values
+        self.reads = 0
+
+    async def get_config_value(self, key, default=None):
+        self.reads += 1
+        return self.values.get(key, default)
+
+
+def test_gateway_shared_until_credentials_change():
+    first = payment_gateway.get_razorpay_gateway("rzp_test_aaaa1111", "secret-1")
+    again = payment_gateway.get_razorpay_gateway("rzp_test_aaaa1111", "secret-1")
+    assert again is first
+    assert first.client.session is not None
+
+    rotated = payment_gateway.get_razorpay_gateway("rzp_test_bbbb2222", "secret-2")
+    assert rotated is not first
+
+
+def test_credentials_cached_and_invalidated_by_config_write():
+    cfg = _CountingConfig({"razorpay_key_id": "rzp_test_1", "razorpay_key_secret": "s1"})
+
+    creds = asyncio.run(payment_gateway.resolve_razorpay_credentials(cfg))
+    assert creds == ("rzp_test_1", "s1")
+    asyncio.run(payment_gateway.resolve_razorpay_credentials(cfg))
+    assert cfg.reads == 2   # one id + one secret read, then served from cache
+
+    # An admin rotating the key drops the cache for this worker.
+    cfg.values["razorpay_key_id"] = "rzp_test_2"
+    ConfigService._invalidate_dependents("razorpay_key_id")
+    creds = asyncio.run(payment_gateway.resolve_razorpay_credentials(cfg))
+    assert creds == ("rzp_test_2", "s1")
+    assert cfg.reads == 4
+
+
+def test_missing_credentials_not_cached():
+    cfg = _CountingConfig({})
+    assert asyncio.run(payment_gateway.resolve_razorpay_credentials(cfg)) == (None, None)
+
+    cfg.values.update({"razorpay_key_id": "rzp_test_1", "razorpay_key_secret": "s1"})
+    assert asyncio.run(payment_gateway.resolve_razorpay_credentials(cfg)) == ("rzp_test_1", "s1")
+
+
+def test_credentials_cache_peek_never_loads_and_expires(monkeypatch):
+    from app.core import cache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    c = cache_module.TTLCache(ttl_seconds=60)
+    assert c.peek() is None
+
+    c.set(("rzp_test_1", "s1"))
+    assert c.peek() == ("rzp_test_1", "s1")
+    now[0] += 60
+    assert c.peek() is None
+
+
+# =====================================================================
+# POST /payments/webhook + background application
+# =====================================================================
+WEBHOOK_SECRET = "whsec_test"
+
+
+def _webhook_event(event="payment.captured", order_id="order_reg", payment_id="pay_wh_1", **entity):
+    payment = {"id": payment_id, "order_id": order_id, "status": "captured"}
+    payment.update(entity)
+    return {"event": event, "payload": {"payment": {"entity": payment}}}
+
+
+def _post_webhook(pm, event, secret=WEBHOOK_SECRET, event_id="evt_1"):
+    body = json.dumps(event).encode()
+    signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return pm.client.post(
+        f"{PAYMENTS}/webhook", content=body,
+        headers={"X-Razorpay-Signature": signature, "X-Razorpay-Event-Id": event_id,
+                 "Content-Type": "application/json"},
+    )
+
+
+def _drain(pm):
+    return asyncio.run(PaymentWebhookService(pm.db).process_pending())
+
+
+def test_webhook_queues_event_without_applying_it(pm):
+    pm.seed_config("razorpay_webhook_secret", WEBHOOK_SECRET, config_type="string")
+    pm.seed_reg_payment(razorpay_order_id="order_reg", status="pending")
+
+    r = _post_webhook(pm, _webhook_event())
+    assert r.status_code == 200, r.text
+
+    (event,) = pm.db.table("payment_webhook_events").rows
+    assert event["event_id"] == "evt_1"
+    assert event["event_type"] == "payment.captured"
+    assert event["razorpay_order_id"] == "order_reg"
+    assert event["razorpay_payment_id"] == "pay_wh_1"
+    # Acknowledged only; the payment is applied by the worker
+    assert pm.db.table("vendor_registration_payments").rows[0]["status"] == "pending"
+
+
+def test_webhook_bad_signature_is_400_and_not_stored(pm):
+    pm.seed_config("razorpay_webhook_secret", WEBHOOK_SECRET, config_type="string")
+    r = _post_webhook(pm, _webhook_event(), secret="wrong")
+    assert r.status_code == 400, r.text
+    assert pm.db.table("payment_webhook_events").rows == []
+
+
+def test_webhook_without_configured_secret_is_503(pm):
+    r = _post_webhook(pm, _webhook_event())
+    assert r.status_code == 503, r.text
+
+
+def test_webhook_redelivery_is_acknowledged_once(pm):
+    pm.seed_config("razorpay_webhook_secret", WEBHOOK_SECRET, config_type="string")
+    assert _post_webhook(pm, _webhook_event()).status_code == 200
+    assert _post_webhook(pm, _webhook_event()).status_code == 200
+    assert len(pm.db.table("payment_webhook_events").rows) == 1
+
+
+def test_worker_completes_registration_and_is_idempotent(pm):
+    pm.seed_config("razorpay_webhook_secret", WEBHOOK_SECRET, config_type="string")
+    pm.seed_reg_payment(razorpay_order_id="order_reg", status="pending", vendor_request_id="vr1")
+    pm.seed_vendor_request("vr1", status="approved")
+    pm.seed_salon("s1", join_request_id="vr1")
+
+    _post_webhook(pm, _webhook_event(event="payment.captured"), event_id="evt_1")
+    _post_webhook(pm, _webhook_event(event="order.paid"), event_id="evt_2")
+    assert _drain(pm) == 2
+
+    pay = pm.db.table("vendor_registration_payments").rows[0]
+    assert pay["status"] == "success"
+    assert pay["razorpay_payment_id"] == "pay_wh_1"
+    assert pay["salon_id"] == "s1"
+    assert pm.db.table("salons").rows[0]["is_active"] is True
+    assert [e["status"] for e in pm.db.table("payment_webhook_events").rows] == ["processed", "processed"]
+    assert _drain(pm) == 0
+
+
+def test_worker_confirms_booking_convenience_fee_through_rpc(pm):
+    pm.db.table("payments").rows.append(
+        {"id": "p1", "booking_id": "b1", "payment_type": "convenience_fee",
+         "razorpay_order_id": "order_bk", "status": "pending", "deleted_at": None})
+    pm.db.table("bookings").rows.append({"id": "b1", "status": "pending"})
+    pm.db.table("payment_webhook_events").rows.append({
+        "id": "e1", "event_id": "evt_bk", "event_type": "payment.captured",
+        "razorpay_order_id": "order_bk", "razorpay_payment_id": "pay_bk", "status": "pending",
+        "payload": {}})
+
+    assert _drain(pm) == 1
+    assert ("verify_payment_and_confirm_booking", {
+        "p_razorpay_order_id": "order_bk", "p_razorpay_payment_id": "pay_bk",
+        "p_razorpay_signature": None}) in pm.db.rpc_calls
+    assert pm.db.table("bookings").rows[0]["status"] == "confirmed"
+    assert pm.db.table("payments").rows[0]["status"] == "success"
+
+
+def test_worker_marks_cart_order_paid_and_ignores_unknown_orders(pm):
+    pm.db.table("payment_orders").rows.append({"razorpay_order_id": "order_cart", "status": "created"})
+    events = pm.db.table("payment_webhook_events").rows
+    events.append({"id": "e1", "event_id": "evt_c", "event_type": "payment.captured",
+                   "razorpay_order_id": "order_cart", "razorpay_payment_id": "pay_c",
+                   "status": "pending", "payload": {}})
+    events.append({"id": "e2", "event_id": "evt_x", "event_type": "payment.captured",
+                   "razorpay_order_id": "order_elsewhere", "razorpay_payment_id": "pay_x",
+                   "status": "pending", "payload": {}})
+
+    assert _drain(pm) == 2
+    order = pm.db.table("payment_orders").rows[0]
+    assert order["status"] == "paid" and order["razorpay_payment_id"] == "pay_c"
+    assert [e["status"] for e in events] == ["processed", "ignored"]
+
+
+def test_worker_retries_with_backoff_then_parks_event(pm, monkeypatch):
+    async def _boom(self, order_id, payment_id):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(PaymentWebhookService, "_apply_capture", _boom)
+    events = pm.db.table("payment_webhook_events").rows
+    events.append({"id": "e1", "event_id": "evt_r", "event_type": "payment.captured",
+                   "razorpay_order_id": "order_reg", "razorpay_payment_id": "pay_r",
+                   "status": "pending", "payload": {}})
+
+    assert _drain(pm) == 1
+    assert events[0]["status"] == "pending"
+    assert events[0]["last_error"] == "db down"
+    assert _drain(pm) == 0   # backing off
+
+    events[0].update(available_at=None, attempts=WEBHOOK_MAX_ATTEMPTS - 1)
+    _drain(pm)
+    assert events[0]["status"] == "failed"
+
+
+# =====================================================================
+# Nightly reconciliation (stub gateway, no network)
+# =====================================================================
+class StubGateway:
+    """fetch_order_payments backed by a dict; records peak concurrency."""
+
+    def __init__(self, orders, delay=0.0):
+        self.orders = orders
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch_order_payments(self, order_id):
+        with self._lock:
+            self.calls.append(order_id)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if order_id not in self.orders:
+            raise RuntimeError("BAD_REQUEST_ERROR: order not found")
+        return self.orders[order_id]
+
+
+def _ago(**kwargs):
+    return (datetime.now(timezone.utc) - timedelta(**kwargs)).isoformat()
+
+
+def _reconcile(pm, gateway, **options):
+    options.setdefault("rate_per_second", 0)
+    service = PaymentReconciliationService(pm.db, gateway, **options)
+    return asyncio.run(service.run(since=datetime.now(timezone.utc) - timedelta(days=2)))
+
+
+def test_reconciliation_applies_gateway_verdicts_to_pending_rows(pm):
+    pm.seed_reg_payment(razorpay_order_id="order_cap", created_at=_ago(hours=2), vendor_request_id="vr1")
+    pm.seed_salon("s1", join_request_id="vr1")
+    pm.seed_reg_payment(razorpay_order_id="order_dead", created_at=_ago(days=3), vendor_request_id="vr2")
+    pm.seed_reg_payment(razorpay_order_id="order_fresh", created_at=_ago(minutes=5))
+    pm.seed_reg_payment(razorpay_order_id="order_young", created_at=_ago(hours=2))
+    pm.db.table("payments").rows.append({
+        "id": "p1", "booking_id": "b1", "payment_type": "convenience_fee", "status": "pending",
+        "razorpay_order_id": "order_fee", "razorpay_payment_id": None,
+        "deleted_at": None, "created_at": _ago(hours=5)})
+
+    gateway = StubGateway({
+        "order_cap": [{"id": "pay_f", "status": "failed"}, {"id": "pay_c", "status": "captured", "method": "upi"}],
+        "order_dead": [{"id": "pay_x", "status": "failed", "error_code": "BAD_REQUEST_ERROR",
+                        "error_description": "Card declined"}],
+        "order_young": [],
+        "order_fee": [{"id": "pay_fee", "status": "captured", "method": "card"}],
+    })
+    summary = _reconcile(pm, gateway)
+
+    regs = {r["razorpay_order_id"]: r for r in pm.db.table("vendor_registration_payments").rows}
+    assert regs["order_cap"]["status"] == "success"
+    assert regs["order_cap"]["razorpay_payment_id"] == "pay_c"
+    assert regs["order_cap"]["salon_id"] == "s1"
+    assert pm.db.table("salons").rows[0]["is_active"] is True
+    assert regs["order_dead"]["status"] == "failed"
+    assert regs["order_dead"]["error_description"] == "Card declined"
+    assert regs["order_young"]["status"] == "pending"   # not abandoned yet
+    assert "order_fresh" not in gateway.calls            # inside the grace period
+    assert pm.db.table("payments").rows[0]["status"] == "success"
+    assert summary["captured"] == 2 and summary["failed"] == 1
+    assert summary["registrations_updated"] == 2 and summary["payments_updated"] == 1
+
+
+def test_reconciliation_flags_completed_rows_not_captured_at_gateway(pm):
+    pm.seed_reg_payment(razorpay_order_id="order_ok", status="success",
+                        razorpay_payment_id="pay_ok", created_at=_ago(hours=3))
+    pm.seed_reg_payment(razorpay_order_id="order_ref", status="success",
+                        razorpay_payment_id="pay_ref", created_at=_ago(hours=3))
+    gateway = StubGateway({
+        "order_ok": [{"id": "pay_ok", "status": "captured"}],
+        "order_ref": [{"id": "pay_ref", "status": "refunded"}],
+    })
+
+    summary = _reconcile(pm, gateway)
+    assert [(m["razorpay_order_id"], m["gateway_status"]) for m in summary["mismatches"]] == [
+        ("order_ref", "refunded")]
+    # Reported only
+    assert all(r["status"] == "success" for r in pm.db.table("vendor_registration_payments").rows)
+    assert not [c for c in pm.db.rpc_calls if c[0] == "apply_payment_reconciliation"]
+
+
+def test_reconciliation_pages_with_bounded_concurrency(pm):
+    for i in range(7):
+        pm.seed_reg_payment(id=f"00000000-0000-0000-0000-00000000000{i}",
+                            razorpay_order_id=f"order_{i}", created_at=_ago(hours=2))
+    gateway = StubGateway({f"order_{i}": [{"id": f"pay_{i}", "status": "captured"}] for i in range(7)},
+                          delay=0.02)
+
+    summary = _reconcile(pm, gateway, concurrency=2, page_size=3)
+    assert summary["registrations_updated"] == 7
+    assert sorted(gateway.calls) == [f"order_{i}" for i in range(7)]
+    assert gateway.peak <= 2
+    # One batched write per page of verdicts: 3 + 3 + 1
+    applies = [c for c in pm.db.rpc_calls if c[0] == "apply_payment_reconciliation"]
+    assert [len(c[1]["p_results"]) for c in applies] == [3, 3, 1]
+
+
+def test_reconciliation_gateway_error_and_dry_run_leave_rows_alone(pm):
+    pm.seed_reg_payment(razorpay_order_id="order_missing", created_at=_ago(days=3))
+    pm.seed_reg_payment(razorpay_order_id="order_cap", created_at=_ago(hours=2))
+    gateway = StubGateway({"order_cap": [{"id": "pay_c", "status": "captured"}]})
+
+    summary = _reconcile(pm, gateway, dry_run=True)
+    assert summary["gateway_errors"] == 1
+    assert summary["captured"] == 1
+    assert all(r["status"] == "pending" for r in pm.db.table("vendor_registration_payments").rows)
+    assert pm.db.rpc_calls == []
+
+
+def test_nightly_reconciliation_runs_once_per_day(pm):
+    pm.db.table("payment_reconciliation_runs").unique = "run_date"
+    service = PaymentReconciliationService(pm.db, StubGateway({}), rate_per_second=0)
+
+    first = asyncio.run(service.run_nightly())
+    assert first is not None and first["checked"] == 0
+    assert asyncio.run(service.run_nightly()) is None
+    (run,) = pm.db.table("payment_reconciliation_runs").rows
+    assert run["summary"] == first and run["finished_at"]
+
+
+def test_nightly_reconciliation_retries_a_crashed_run(pm):
+    runs = pm.db.table("payment_reconciliation_runs")
+    runs.unique = "run_date"
+    service = PaymentReconciliationService(pm.db, StubGateway({}), rate_per_second=0)
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    # Claimed recently and still running: left to its worker
+    runs.rows.append({"run_date": today, "started_at": _ago(minutes=10), "finished_at": None})
+    assert asyncio.run(service.run_nightly()) is None
+
+    # Claimed long ago and never finished: the worker died, run it again
+    runs.rows[0]["started_at"] = _ago(hours=3)
+    summary = asyncio.run(service.run_nightly())
+    assert summary is not None
+    (run,) = runs.rows
+    assert run["summary"] == summary and run["finished_at"]
+
+
 # =====================================================================
 # Removed endpoints stay removed (regression guard for the cleanup)
 # =====================================================================
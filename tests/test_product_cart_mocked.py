@@ -5,7 +5,8 @@ endpoints in app/api/customers.py + app/services/product_cart_service.py).
 These run WITHOUT a real Supabase stack. The Supabase DB client is replaced with
 a small in-memory fake (the supabase-py builder stand-in used by the other mocked
 suites: select/insert/update/delete + eq/maybe_single + an embedded-resource join
-`select("*, products(*)")` that get_cart relies on). They exercise the full HTTP
+`select("*, products(*)")` that get_cart relies on, plus Python stand-ins for the
+product_cart_add / product_cart_set_quantity database functions). They exercise the full HTTP
 path:
 
     HTTP -> FastAPI (auth dep overridden, rate limiter disabled) -> route ->
@@ -156,13 +157,74 @@ class _Table:
         return _Query(self).delete()
 
 
+class _Rpc:
+    def __init__(self, fn, params):
+        self._fn = fn
+        self._params = params
+
+    def execute(self):
+        return _Resp(self._fn(**self._params))
+
+
 class FakeSupabase:
+    """Tables plus Python stand-ins for the product_cart_* database functions."""
+
     def __init__(self):
         self._tables = {}
+        self.rpc_calls = []
 
     def table(self, name):
         return self._tables.setdefault(name, _Table(self))
 
+    def rpc(self, name, params):
+        self.rpc_calls.append(name)
+        return _Rpc(getattr(self, f"_rpc_{name}"), params)
+
+    def _find(self, table, **match):
+        return next(
+            (r for r in self.table(table).rows
+             if all(r.get(k) == v for k, v in match.items())),
+            None,
+        )
+
+    def _rpc_product_cart_add(self, p_user_id, p_product_id, p_quantity=1):
+        def fail(reason):
+            return [{"success": False, "reason": reason, "cart_item": None, "was_existing": False}]
+
+        if not p_quantity or p_quantity <= 0:
+            return fail("invalid_quantity")
+        product = self._find("products", id=p_product_id)
+        if product is None:
+            return fail("product_not_found")
+        stock = product.get("stock_quantity") or 0
+        item = self._find("product_cart_items", user_id=p_user_id, product_id=p_product_id)
+        existed = item is not None
+        new_qty = (item["quantity"] if existed else 0) + p_quantity
+        if new_qty > stock:
+            return fail("insufficient_stock")
+        if existed:
+            item["quantity"] = new_qty
+        else:
+            item = {"id": str(uuid.uuid4()), "user_id": p_user_id,
+                    "product_id": p_product_id, "quantity": new_qty}
+            self.table("product_cart_items").rows.append(item)
+        return [{"success": True, "reason": None, "cart_item": dict(item), "was_existing": existed}]
+
+    def _rpc_product_cart_set_quantity(self, p_user_id, p_item_id, p_quantity):
+        def fail(reason):
+            return [{"success": False, "reason": reason, "cart_item": None}]
+
+        if not p_quantity or p_quantity <= 0:
+            return fail("invalid_quantity")
+        item = self._find("product_cart_items", id=p_item_id, user_id=p_user_id)
+        if item is None:
+            return fail("item_not_found")
+        product = self._find("products", id=item["product_id"]) or {}
+        if p_quantity > (product.get("stock_quantity") or 0):
+            return fail("insufficient_stock")
+        item["quantity"] = p_quantity
+        return [{"success": True, "reason": None, "cart_item": dict(item)}]
+
 
 # =====================================================================
 # Test handle + fixture
@@ -343,6 +405,14 @@ def test_add_increment_exceeding_stock_is_400(cart):
     assert r.status_code == 400, r.text
 
 
+def test_add_is_one_rpc(cart):
+    p = cart.seed_product(stock_quantity=10)
+    cart.login_as("u1")
+    r = cart.client.post(CART, json={"product_id": p["id"], "quantity": 1})
+    assert r.status_code == 200, r.text
+    assert cart.db.rpc_calls == ["product_cart_add"]
+
+
 def test_add_requires_auth(cart):
     r = cart.client.post(CART, json={"product_id": str(uuid.uuid4()), "quantity": 1})
     assert r.status_code in (401, 403), r.text
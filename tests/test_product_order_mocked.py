@@ -4,8 +4,8 @@ app/api/admin/product_orders.py + app/services/product_order_service.py).
 
 These run WITHOUT a real Supabase stack or Razorpay account. The DB client is a
 small in-memory fake; ProductOrderService._get_razorpay_creds is stubbed to force
-"dev/simulation" mode for create_order, and app.services.payment.RazorpayService
-is replaced with a fake whose signature check is controllable. They exercise the
+"dev/simulation" mode for create_order, and app.services.payment.get_razorpay_gateway
+returns a fake whose signature check is controllable. They exercise the
 full HTTP path:
 
     HTTP -> FastAPI (auth deps overridden, rate limiter disabled) -> route ->
@@ -17,6 +17,8 @@ module — the verify_payment 400/404 fixes (were 500s) and the admin status enu
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import json
+import re
 import uuid
 from datetime import datetime, timedelta
 
@@ -42,6 +44,14 @@ class _Resp:
         self.count = count
 
 
+# Keyset continuation built by app.utils.keyset.after_row_filter
+_KEYSET_OR = re.compile(r'(\w+)\.(gt|lt)\."([^"]*)",and\(\1\.eq\."\3",id\.\2\."([^"]*)"\)')
+
+# Embedded child selects, e.g. "*, product_order_items(id, product_name)"
+_EMBED = re.compile(r"(\w+)\(([^)]*)\)")
+_EMBED_FKS = {"product_order_items": "order_id"}
+
+
 class _Query:
     def __init__(self, table):
         self._table = table
@@ -49,6 +59,7 @@ class _Query:
         self._op = ("select", "*")
         self._single = False
         self._order = []
+        self._limit = None
 
     def select(self, cols="*", count=None):
         self._op = ("select", cols)
@@ -74,10 +85,31 @@ class _Query:
         self._filters.append(("in", col, list(vals)))
         return self
 
+    def gte(self, col, val):
+        self._filters.append(("gte", col, val))
+        return self
+
+    def lt(self, col, val):
+        self._filters.append(("lt", col, val))
+        return self
+
+    def lte(self, col, val):
+        self._filters.append(("lte", col, val))
+        return self
+
     def order(self, col, desc=False):
         self._order.append((col, desc))
         return self
 
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def or_(self, expr):
+        col, op, value, row_id = _KEYSET_OR.fullmatch(expr).groups()
+        self._filters.append(("after", col, (op, value, row_id)))
+        return self
+
     def single(self):
         self._single = True
         return self
@@ -89,6 +121,17 @@ class _Query:
                 return False
             if op == "in" and rv not in v:
                 return False
+            if op == "gte" and (rv is None or rv < v):
+                return False
+            if op == "lt" and (rv is None or rv >= v):
+                return False
+            if op == "lte" and (rv is None or rv > v):
+                return False
+            if op == "after":
+                cmp, value, row_id = v
+                key, bound = (rv, row["id"]), (value, row_id)
+                if not (key > bound if cmp == "gt" else key < bound):
+                    return False
         return True
 
     def execute(self):
@@ -99,6 +142,16 @@ class _Query:
             matched = [dict(r) for r in rows if self._match(r)]
             for col, desc in reversed(self._order):
                 matched.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            if self._limit is not None:
+                matched = matched[:self._limit]
+            for child, cols in _EMBED.findall(payload):
+                fields = [c.strip() for c in cols.split(",")]
+                children = self._table.db.rows(child)
+                for r in matched:
+                    r[child] = [
+                        {f: c.get(f) for f in fields}
+                        for c in children if c.get(_EMBED_FKS[child]) == r["id"]
+                    ]
             if self._single:
                 if len(matched) != 1:
                     raise Exception("PGRST116: results contain 0 or multiple rows")
@@ -133,7 +186,8 @@ class _Query:
 
 
 class _Table:
-    def __init__(self):
+    def __init__(self, db):
+        self.db = db
         self.rows = []
 
     def select(self, cols="*", count=None):
@@ -152,9 +206,17 @@ class _Table:
 class FakeSupabase:
     def __init__(self):
         self._tables = {}
+        self.table_calls = []
 
     def table(self, name):
-        return self._tables.setdefault(name, _Table())
+        self.table_calls.append(name)
+        if name not in self._tables:
+            self._tables[name] = _Table(self)
+        return self._tables[name]
+
+    def rows(self, name):
+        # Direct read, not recorded in table_calls (used for embeds)
+        return self._tables[name].rows if name in self._tables else []
 
 
 # =====================================================================
@@ -251,9 +313,12 @@ def od(app, monkeypatch):
         return "dev_key", "dev_secret", True
     monkeypatch.setattr(ProductOrderService, "_get_razorpay_creds", _dev_creds)
 
-    # Replace the Razorpay client used by verify_payment.
+    # Replace the shared Razorpay gateway used by verify_payment.
     FakeRazorpay.valid = True
-    monkeypatch.setattr("app.services.payment.RazorpayService", FakeRazorpay)
+    monkeypatch.setattr(
+        "app.services.payment.get_razorpay_gateway",
+        lambda key_id, key_secret: FakeRazorpay(),
+    )
 
     yield handle
 
@@ -457,12 +522,68 @@ def test_admin_list_orders_with_profiles_and_items(od):
 
     r = od.client.get(f"{ADMIN_ORDERS}/")
     assert r.status_code == 200, r.text
-    orders = r.json()
-    assert len(orders) == 2
-    by_id = {o["id"]: o for o in orders}
+    body = r.json()
+    assert len(body["data"]) == 2
+    assert body["pagination"] == {"limit": 50, "next_cursor": None, "has_next": False}
+    by_id = {o["id"]: o for o in body["data"]}
     assert by_id[o1["id"]]["profiles"]["full_name"] == "Alice"
     assert len(by_id[o1["id"]]["items"]) == 1
     assert by_id[o2["id"]]["items"] == []
+    assert "product_order_items" not in by_id[o1["id"]]
+
+
+def test_admin_list_orders_cursor_pages(od):
+    for i in range(5):
+        od.seed_profile(f"u{i}")
+    # Two orders share a timestamp: the id tiebreak keeps them on distinct pages
+    orders = [od.seed_order(f"u{i}", id=f"o{i}", created_at=f"2026-07-01T10:00:0{min(i, 3)}")
+              for i in range(5)]
+    od.login_admin()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        od.db.table_calls.clear()
+        r = od.client.get(f"{ADMIN_ORDERS}/", params=params)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        pages += 1
+        # one orders read (items embedded) + one profiles read, whatever the page
+        assert od.db.table_calls == ["product_orders", "profiles"]
+        seen += [o["id"] for o in body["data"]]
+        cursor = body["pagination"]["next_cursor"]
+        assert body["pagination"]["has_next"] is (cursor is not None)
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert seen == [o["id"] for o in reversed(orders)]   # newest first, no duplicates
+
+
+def test_admin_list_orders_filters(od):
+    od.seed_profile("u1")
+    od.seed_profile("u2")
+    keep = od.seed_order("u1", status="paid", created_at="2026-07-02T23:59:59")
+    od.seed_order("u1", status="pending", created_at="2026-07-02T10:00:00")
+    od.seed_order("u2", status="paid", created_at="2026-07-02T10:00:00")
+    od.seed_order("u1", status="paid", created_at="2026-07-03T00:00:00")
+    od.login_admin()
+
+    r = od.client.get(f"{ADMIN_ORDERS}/", params={
+        "status": "paid", "user_id": "u1", "date_from": "2026-07-01", "date_to": "2026-07-02",
+    })
+    assert r.status_code == 200, r.text
+    assert [o["id"] for o in r.json()["data"]] == [keep["id"]]
+
+
+def test_admin_list_orders_rejects_bad_cursor_and_range(od):
+    od.login_admin()
+    r = od.client.get(f"{ADMIN_ORDERS}/", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400, r.text
+    r = od.client.get(f"{ADMIN_ORDERS}/", params={"date_from": "2026-07-02", "date_to": "2026-07-01"})
+    assert r.status_code == 400, r.text
 
 
 def test_admin_list_requires_admin(od):
@@ -470,6 +591,40 @@ def test_admin_list_requires_admin(od):
     assert r.status_code in (401, 403), r.text
 
 
+# =====================================================================
+# GET /admin/product-orders/export
+# =====================================================================
+def test_admin_export_orders_ndjson_hydrates_each_page(od):
+    od.seed_profile("u1", full_name="Alice")
+    orders = [od.seed_order("u1", created_at=f"2026-07-01T10:00:0{i}") for i in range(3)]
+    od.seed_order_item(orders[0]["id"], product_name="Serum", quantity=2)
+    od.login_admin()
+
+    r = od.client.get(f"{ADMIN_ORDERS}/export", params={"format": "ndjson"})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [o["id"] for o in lines] == [o["id"] for o in orders]   # oldest first
+    assert lines[0]["customer_name"] == "Alice"
+    assert lines[0]["items"][0]["product_name"] == "Serum"
+    assert lines[1]["items"] == []
+
+
+def test_admin_export_orders_pages_lookups_per_page(od):
+    for i in range(5):
+        od.seed_profile(f"u{i}")
+        od.seed_order(f"u{i}", created_at=f"2026-07-01T10:00:0{i}")
+
+    pages = list(ProductOrderService(od.db).iter_order_export(page_size=2))
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [o["customer_name"] for p in pages for o in p] == [f"User u{i}" for i in range(5)]
+
+
+def test_admin_export_orders_requires_admin(od):
+    r = od.client.get(f"{ADMIN_ORDERS}/export")
+    assert r.status_code in (401, 403), r.text
+
+
 # =====================================================================
 # PATCH /admin/product-orders/{order_id}/status
 # =====================================================================
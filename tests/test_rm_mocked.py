@@ -18,6 +18,7 @@ the orphaned GET endpoints are gone.
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import asyncio
 import re
 import uuid
 from datetime import datetime, timedelta
@@ -185,13 +186,66 @@ class _Table:
         return _Query(self).delete()
 
 
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
 class FakeSupabase:
     def __init__(self):
         self._tables = {}
+        self.rpc_calls = []
+        self._leaderboard = None   # rm_leaderboard_mv contents
 
     def table(self, name):
         return self._tables.setdefault(name, _Table(self))
 
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(getattr(self, f"_rpc_{name}")(params or {}))
+
+    # Python stand-ins for the materialised view and its two functions
+    def _rpc_refresh_rm_leaderboard(self, params):
+        now = datetime.utcnow()
+        week = (now - timedelta(days=now.weekday())).date().isoformat()
+        since = {"week": week, "month": now.date().replace(day=1).isoformat()}
+        names = {p["id"]: p.get("full_name") for p in self.table("profiles").rows}
+        self._leaderboard = {}
+        for period in ("week", "month", "all_time"):
+            scores = []
+            for rp in self.table("rm_profiles").rows:
+                if period == "all_time":
+                    score = rp.get("performance_score") or 0
+                else:
+                    score = sum(h["points"] for h in self.table("rm_score_history").rows
+                                if h["rm_id"] == rp["id"] and h["created_at"] >= since[period])
+                scores.append({"rm_id": rp["id"], "full_name": names.get(rp["id"]), "score": score})
+            scores.sort(key=lambda r: (-r["score"], r["full_name"] or "", r["rm_id"]))
+            self._leaderboard[period] = [{"rank": i, **r} for i, r in enumerate(scores, start=1)]
+        return None
+
+    def _rpc_get_rm_leaderboard(self, params):
+        if self._leaderboard is None:   # the view is populated when created
+            self._rpc_refresh_rm_leaderboard({})
+        return [dict(r) for r in self._leaderboard[params["p_period"]][:params["p_limit"]]]
+
+    # Python stand-in for the SQL function
+    def _rpc_rm_dashboard_stats(self, params):
+        rm_id = params["p_rm_id"]
+        requests = [r for r in self.table("vendor_join_requests").rows if r.get("rm_id") == rm_id]
+        profile = next((p for p in self.table("rm_profiles").rows if p["id"] == rm_id), {})
+        return [{
+            "total_requests": len(requests),
+            **{f"{st}_requests": sum(r["status"] == st for r in requests)
+               for st in ("pending", "approved", "rejected")},
+            "total_score": profile.get("performance_score") or 0,
+            "active_salons": sum(s.get("assigned_rm") == rm_id and bool(s.get("is_active"))
+                                 for s in self.table("salons").rows),
+        }]
+
 
 # =====================================================================
 # Test handle + fixture
@@ -501,6 +555,30 @@ def test_dashboard(rm):
     assert stats["rejected_requests"] == 1
     assert stats["active_salons"] == 1
     assert stats["total_salons_added"] == 3   # total requests
+    assert [name for name, _ in rm.db.rpc_calls] == ["rm_dashboard_stats"]
+
+
+def test_dashboard_cached_per_rm_until_own_write(rm):
+    rm_id = rm.seed_rm()
+    rm.seed_vendor_request(rm_id, status="pending")
+    rm.login_rm(rm_id)
+    assert rm.client.get(f"{RM}/dashboard").json()["statistics"]["pending_requests"] == 1
+
+    # Someone else's write is picked up after the TTL; the cached copy is served
+    rm.seed_vendor_request(rm_id, status="pending")
+    assert rm.client.get(f"{RM}/dashboard").json()["statistics"]["pending_requests"] == 1
+    assert len(rm.db.rpc_calls) == 1
+
+    # The RM's own request submission drops the entry
+    r = rm.client.post(f"{RM}/vendor-requests", json=_vr_payload())
+    assert r.status_code in (200, 201), r.text
+    assert rm.client.get(f"{RM}/dashboard").json()["statistics"]["pending_requests"] == 3
+
+
+def test_dashboard_missing_profile_404(rm):
+    rm.login_rm(str(uuid.uuid4()))
+    r = rm.client.get(f"{RM}/dashboard")
+    assert r.status_code == 404, r.text
 
 
 # =====================================================================
@@ -516,9 +594,47 @@ def test_leaderboard_public_no_email(rm):
     body = r.json()
     assert body["total"] == 2
     top = body["data"][0]
-    assert top["rank"] == 1
-    assert top["profiles"]["full_name"] == "Top RM"
-    assert "email" not in top["profiles"]   # PII dropped
+    assert top == {"rank": 1, "rm_id": a, "full_name": "Top RM", "score": 100, "period": "all_time"}
+    assert "top@example.com" not in r.text   # PII dropped
+
+
+def test_leaderboard_periods_from_score_history(rm):
+    a = rm.seed_rm(performance_score=100, full_name="Veteran")
+    b = rm.seed_rm(performance_score=30, full_name="Newcomer")
+    rm.seed_score(b, points=30)
+    rm.db.table("rm_score_history").rows.append({
+        "id": str(uuid.uuid4()), "rm_id": a, "action": "x", "points": 100,
+        "description": "x", "created_at": "2020-01-01T00:00:00",
+    })
+
+    week = rm.client.get(f"{RM}/leaderboard", params={"period": "week"}).json()["data"]
+    assert [(e["full_name"], e["score"]) for e in week] == [("Newcomer", 30), ("Veteran", 0)]
+    all_time = rm.client.get(f"{RM}/leaderboard").json()["data"]
+    assert [e["full_name"] for e in all_time] == ["Veteran", "Newcomer"]
+
+    r = rm.client.get(f"{RM}/leaderboard", params={"period": "year"})
+    assert r.status_code == 422, r.text
+
+
+def test_leaderboard_served_from_memory_until_score_update(rm):
+    from app.services.rm_service import RMService
+
+    a = rm.seed_rm(performance_score=10, full_name="A")
+    b = rm.seed_rm(performance_score=20, full_name="B")
+    first = rm.client.get(f"{RM}/leaderboard").json()["data"]
+    assert [e["rm_id"] for e in first] == [b, a]
+
+    rm.client.get(f"{RM}/leaderboard")
+    assert [name for name, _ in rm.db.rpc_calls] == ["get_rm_leaderboard"]
+
+    # A score change re-materialises the ranking and re-warms the cache
+    result = asyncio.run(RMService(rm.db).update_rm_score(a, 50, "Salon approved"))
+    assert result.success
+    calls_after_update = len(rm.db.rpc_calls)
+    after = rm.client.get(f"{RM}/leaderboard").json()["data"]
+    assert [(e["rm_id"], e["score"]) for e in after] == [(a, 60), (b, 20)]
+    assert len(rm.db.rpc_calls) == calls_after_update
+    assert ("refresh_rm_leaderboard", {}) in rm.db.rpc_calls
 
 
 # =====================================================================
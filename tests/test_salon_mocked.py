@@ -26,6 +26,7 @@ P1-P4 cleanup invariants for this module:
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import asyncio
 import uuid
 from datetime import datetime, timedelta
 
@@ -35,6 +36,8 @@ from fastapi.testclient import TestClient
 from app.core.config import settings
 from app.core.database import get_db_client
 from app.core.auth import require_admin, TokenData
+from app.services.salon_service import invalidate_popular_cities_cache
+from app.services.city_index import invalidate_city_cache
 
 API = settings.API_PREFIX
 SALONS = f"{API}/salons"
@@ -51,6 +54,26 @@ class _Resp:
         self.count = count
 
 
+def _selected_fields(cols):
+    """
+    Top-level names of a PostgREST select ("a, b, emb(x)" -> {a, b, emb}), or
+    None for "*" — so a column left out of a projection is missing here too.
+    """
+    names, depth, token = set(), 0, ""
+    for ch in (cols or "*") + ",":
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            names.add(token.strip().split("(")[0].split(":")[-1].strip())
+            token = ""
+            continue
+        if depth == 0 and ch not in "()":
+            token += ch
+    return None if "*" in names else names
+
+
 class _Query:
     def __init__(self, table):
         self._table = table
@@ -157,6 +180,9 @@ class _Query:
                 matched = matched[s:e + 1]
             if self._limit is not None:
                 matched = matched[:self._limit]
+            fields = _selected_fields(payload)
+            if fields is not None:
+                matched = [{k: v for k, v in r.items() if k in fields} for r in matched]
             if self._single:
                 if len(matched) != 1:
                     raise Exception("PGRST116: results contain 0 or multiple rows")
@@ -220,11 +246,13 @@ class FakeSupabase:
     def __init__(self):
         self._tables = {}
         self.rpc_results = {}   # name -> list[dict]
+        self.rpc_calls = []     # list of (name, params)
 
     def table(self, name):
         return self._tables.setdefault(name, _Table())
 
     def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
         return _Rpc(self.rpc_results.get(name, []))
 
 
@@ -261,6 +289,11 @@ class Handle:
             "updated_at": datetime.utcnow().isoformat(),
         }
         row.update(fields)
+        # Mirror the generated salons.is_public column unless a test pins it.
+        row.setdefault("is_public", bool(
+            row["is_active"] and row["is_verified"] and row["registration_fee_paid"]
+            and not row.get("deleted_at") and row["salon_type"] != "regular_buyer"
+        ))
         self.db.table("salons").rows.append(row)
         return row
 
@@ -329,11 +362,17 @@ def sa(app):
     db = FakeSupabase()
     handle = Handle(db=db, app=app)
     app.dependency_overrides[get_db_client] = lambda: db
+    # The popular-cities ranking and city alias map are cached per process;
+    # start every test cold.
+    invalidate_popular_cities_cache()
+    invalidate_city_cache()
 
     yield handle
 
     handle.clear_overrides()
     app.dependency_overrides.pop(get_db_client, None)
+    invalidate_popular_cities_cache()
+    invalidate_city_cache()
 
 
 # =====================================================================
@@ -352,6 +391,17 @@ def test_public_list_happy(sa):
     assert all("has_discounted_services" in s for s in body["salons"])
 
 
+def test_public_list_returns_card_fields(sa):
+    sa.seed_salon(facilities={"wifi": True, "parking": False}, outlet="franchisee", is_gst=True)
+
+    r = sa.client.get(f"{SALONS}/public")
+    assert r.status_code == 200, r.text
+    salon = r.json()["salons"][0]
+    assert salon["facilities"] == {"wifi": True, "parking": False}
+    assert salon["outlet"] == "franchisee"
+    assert salon["is_gst"] is True
+
+
 def test_public_list_hides_non_public(sa):
     sa.seed_salon(business_name="Live")
     sa.seed_salon(business_name="Inactive", public=False)
@@ -385,6 +435,47 @@ def test_public_list_city_filter(sa):
     assert names == ["Mumbai One"]
 
 
+def test_public_list_city_filter_uses_canonical_city_id(sa):
+    sa.db.table("city_aliases").rows.extend([
+        {"alias_key": "mumbai", "city_id": 1},
+        {"alias_key": "bombay", "city_id": 1},
+    ])
+    # Stored spelling differs from the query; only the id has to match.
+    sa.seed_salon(business_name="Mumbai One", city="Bombay ", city_id=1,
+                  cities={"name": "Mumbai"})
+    sa.seed_salon(business_name="Delhi One", city="Delhi", city_id=2)
+
+    r = sa.client.get(f"{SALONS}/public", params={"city": "  BOMBAY"})
+    assert r.status_code == 200, r.text
+    salons = r.json()["salons"]
+    assert [s["business_name"] for s in salons] == ["Mumbai One"]
+    # The canonical name from the cities join is what the card shows.
+    assert salons[0]["city"] == "Mumbai"
+
+
+def test_city_resolver_caches_aliases_and_looks_up_misses(sa):
+    from app.services.city_index import CityResolver
+
+    sa.db.table("city_aliases").rows.append({"alias_key": "pune", "city_id": 6})
+    resolver = CityResolver(sa.db)
+    assert resolver.resolve("PUNE") == 6
+
+    # A city created after the map was loaded is found by a point lookup.
+    sa.db.table("city_aliases").rows.append({"alias_key": "ranchi", "city_id": 40})
+    assert resolver.resolve("ranchi") == 40
+    assert resolver.resolve("nowhere") is None
+
+
+def test_city_resolver_caps_remembered_misses(sa, monkeypatch):
+    from app.services import city_index
+
+    monkeypatch.setattr(city_index, "MAX_CACHED_CITY_MISSES", 3)
+    resolver = city_index.CityResolver(sa.db)
+    for i in range(10):
+        assert resolver.resolve(f"nowhere {i}") is None
+    assert len(resolver._index().missing) == 3
+
+
 def test_public_list_business_type_flattened(sa):
     sa.seed_salon(business_name="Spa", vendor_join_requests={"business_type": "spa"})
 
@@ -396,33 +487,40 @@ def test_public_list_business_type_flattened(sa):
     assert "vendor_join_requests" not in salon
 
 
-def test_public_list_discount_flag_true_when_service_discounted(sa):
-    s = sa.seed_salon(business_name="On Sale")
-    sa.seed_service(s["id"], discounted_price=300.0)
+def test_public_list_discount_flag_true_when_salon_discounted(sa):
+    # has_discount / max_discount_pct are maintained on the salon row by a
+    # trigger on services; the listing only reads them.
+    sa.seed_salon(business_name="On Sale", has_discount=True, max_discount_pct=None)
 
     r = sa.client.get(f"{SALONS}/public")
     assert r.status_code == 200, r.text
-    assert r.json()["salons"][0]["has_discounted_services"] is True
+    salon = r.json()["salons"][0]
+    assert salon["has_discounted_services"] is True
+    assert salon["max_discount_percentage"] is None
 
 
 def test_public_list_max_discount_percentage(sa):
-    s = sa.seed_salon(business_name="Big Sale")
-    sa.seed_service(s["id"], name="Small", discount_percentage=10.0)
-    sa.seed_service(s["id"], name="Big", discount_percentage=25.0)
+    sa.seed_salon(business_name="Big Sale", has_discount=True, max_discount_pct="24.60")
 
     r = sa.client.get(f"{SALONS}/public")
     assert r.status_code == 200, r.text
-    assert r.json()["salons"][0]["max_discount_percentage"] == 25
+    salon = r.json()["salons"][0]
+    assert salon["max_discount_percentage"] == 25
+    # the raw summary columns are folded into the public field names
+    assert "max_discount_pct" not in salon and "has_discount" not in salon
 
 
-def test_public_list_max_discount_from_discounted_price(sa):
-    # No explicit %, only an absolute discounted_price -> % is derived.
-    s = sa.seed_salon(business_name="Derived")
-    sa.seed_service(s["id"], price=400.0, discounted_price=300.0)  # 25% off
+def test_public_list_does_not_scan_services_for_discounts(sa):
+    s = sa.seed_salon(business_name="No Scan")
+    # A discounted service the summary has not (yet) picked up is ignored:
+    # listings never aggregate service rows themselves.
+    sa.seed_service(s["id"], discount_percentage=50.0, discounted_price=250.0)
 
     r = sa.client.get(f"{SALONS}/public")
     assert r.status_code == 200, r.text
-    assert r.json()["salons"][0]["max_discount_percentage"] == 25
+    salon = r.json()["salons"][0]
+    assert salon["has_discounted_services"] is False
+    assert salon["max_discount_percentage"] is None
 
 
 def test_public_list_attaches_vendor_coupons(sa):
@@ -486,6 +584,36 @@ def test_popular_cities(sa):
     assert body["cities"][0]["city"] == "Mumbai"
 
 
+def test_popular_cities_served_from_cache(sa):
+    sa.db.rpc_results["get_popular_cities"] = [
+        {"city": "mumbai", "salon_count": 5},
+        {"city": "delhi", "salon_count": 3},
+        {"city": "pune", "salon_count": 1},
+    ]
+    first = sa.client.get(f"{SALONS}/popular-cities", params={"limit": 2})
+    second = sa.client.get(f"{SALONS}/popular-cities", params={"limit": 3})
+    assert first.status_code == 200 and second.status_code == 200
+    assert [c["city"] for c in first.json()["cities"]] == ["mumbai", "delhi"]
+    assert second.json()["total"] == 3
+
+    # One RPC (for the max size) serves every limit until invalidated.
+    calls = [c for c in sa.db.rpc_calls if c[0] == "get_popular_cities"]
+    assert calls == [("get_popular_cities", {"result_limit": 20})]
+
+
+def test_popular_cities_cache_invalidated_on_status_toggle(sa):
+    s = sa.seed_salon(business_name="Toggle Me")
+    sa.db.rpc_results["get_popular_cities"] = [{"city": "testville", "salon_count": 1}]
+    assert sa.client.get(f"{SALONS}/popular-cities").json()["total"] == 1
+
+    sa.login_admin()
+    r = sa.client.put(f"{ADMIN_SALONS}/{s['id']}/status", json={"is_active": False})
+    assert r.status_code == 200, r.text
+
+    sa.db.rpc_results["get_popular_cities"] = []
+    assert sa.client.get(f"{SALONS}/popular-cities").json()["total"] == 0
+
+
 # =====================================================================
 # GET /salons/{salon_id}
 # =====================================================================
@@ -720,21 +848,36 @@ def test_nearby_happy(sa):
     assert body["query"]["latitude"] == 19.0
 
 
-def test_nearby_excludes_regular_buyer(sa):
-    s1 = sa.seed_salon(business_name="Near Salon")
-    s2 = sa.seed_salon(business_name="Near Buyer", salon_type="regular_buyer")
+def test_nearby_trusts_rpc_visibility_and_attaches_badges(sa):
+    # get_nearby_salons filters on salons.is_public in SQL (regular_buyer
+    # included), so the service no longer re-filters rows after fetch; it only
+    # attaches the business_type + discount badges from one secondary lookup.
+    s1 = sa.seed_salon(
+        business_name="Near Spa", vendor_join_requests={"business_type": "spa"},
+        has_discount=True, max_discount_pct=15,
+    )
     sa.db.rpc_results["get_nearby_salons"] = [
-        {"id": s1["id"], "business_name": "Near Salon", "distance_km": 1.0,
-         "is_active": True, "is_verified": True},
-        {"id": s2["id"], "business_name": "Near Buyer", "distance_km": 2.0,
+        {"id": s1["id"], "business_name": "Near Spa", "distance_km": 1.0,
          "is_active": True, "is_verified": True},
     ]
 
     r = sa.client.get(f"{LOCATION}/salons/nearby",
                       params={"lat": 19.0, "lon": 72.8})
     assert r.status_code == 200, r.text
+    salon = r.json()["salons"][0]
+    assert salon["business_type"] == "spa"
+    assert salon["has_discounted_services"] is True
+    assert salon["max_discount_percentage"] == 15
+
+
+def test_public_list_hides_soft_deleted(sa):
+    sa.seed_salon(business_name="Live")
+    sa.seed_salon(business_name="Deleted", deleted_at=datetime.utcnow().isoformat())
+
+    r = sa.client.get(f"{SALONS}/public")
+    assert r.status_code == 200, r.text
     names = [s["business_name"] for s in r.json()["salons"]]
-    assert names == ["Near Salon"]
+    assert names == ["Live"]
 
 
 # =====================================================================
@@ -768,6 +911,86 @@ def test_admin_list_enriches_vendor_profile(sa):
     assert salon["profiles"]["full_name"] == "Owner Jane"
 
 
+def test_admin_list_enriches_assigned_rm(sa):
+    sa.seed_salon(business_name="Managed", vendor_id="vendor-1", assigned_rm="rm-1")
+    sa.db.table("profiles").rows.extend([
+        {"id": "vendor-1", "full_name": "Owner Jane"},
+        {"id": "rm-1", "full_name": "RM Ravi", "email": "ravi@example.com"},
+    ])
+    sa.db.table("rm_profiles").rows.append({"id": "rm-1", "employee_id": "EMP-7"})
+    sa.login_admin()
+
+    r = sa.client.get(f"{ADMIN_SALONS}/")
+    assert r.status_code == 200, r.text
+    rm = r.json()["data"][0]["rm_profiles"]
+    assert rm["employee_id"] == "EMP-7"
+    assert rm["profiles"]["full_name"] == "RM Ravi"
+
+
+def test_admin_list_profiles_read_once_and_cached(sa, monkeypatch):
+    from app.services.profile_lookup import invalidate_profile_lookup
+
+    # Two salons share an owner who is also the other's RM.
+    sa.seed_salon(business_name="A", vendor_id="person-1", assigned_rm="person-2")
+    sa.seed_salon(business_name="B", vendor_id="person-2", assigned_rm="person-1")
+    sa.db.table("profiles").rows.extend([
+        {"id": "person-1", "full_name": "One"},
+        {"id": "person-2", "full_name": "Two"},
+    ])
+    sa.db.table("rm_profiles").rows.extend([{"id": "person-1"}, {"id": "person-2"}])
+    sa.login_admin()
+
+    profile_reads = []
+    real_table = sa.db.table
+
+    def counting_table(name):
+        if name == "profiles":
+            profile_reads.append(name)
+        return real_table(name)
+
+    monkeypatch.setattr(sa.db, "table", counting_table)
+
+    assert sa.client.get(f"{ADMIN_SALONS}/").status_code == 200
+    assert len(profile_reads) == 1
+
+    # Served from the process cache on the next page load...
+    assert sa.client.get(f"{ADMIN_SALONS}/").status_code == 200
+    assert len(profile_reads) == 1
+
+    # ...until a profile write invalidates it.
+    invalidate_profile_lookup("person-1")
+    assert sa.client.get(f"{ADMIN_SALONS}/").status_code == 200
+    assert len(profile_reads) == 2
+
+
+def test_admin_list_returns_detail_fields(sa):
+    sa.seed_salon(
+        description="Full service salon", gst_number="29ABCDE1234F1Z5",
+        pan_number="ABCDE1234F", opening_time="09:00", closing_time="21:00",
+        working_days=["mon", "tue"], latitude=12.97, longitude=77.59,
+        facilities={"wifi": True}, outlet="franchisee", is_gst=True,
+        verified_by="admin-1", registration_payment_id="pay-1",
+        agreement_document_url="https://example.com/agreement.pdf",
+    )
+    sa.login_admin()
+
+    r = sa.client.get(f"{ADMIN_SALONS}/")
+    assert r.status_code == 200, r.text
+    salon = r.json()["data"][0]
+    assert salon["description"] == "Full service salon"
+    assert salon["gst_number"] == "29ABCDE1234F1Z5"
+    assert salon["pan_number"] == "ABCDE1234F"
+    assert (salon["opening_time"], salon["closing_time"]) == ("09:00", "21:00")
+    assert salon["working_days"] == ["mon", "tue"]
+    assert (salon["latitude"], salon["longitude"]) == (12.97, 77.59)
+    assert salon["facilities"] == {"wifi": True}
+    assert salon["outlet"] == "franchisee"
+    assert salon["is_gst"] is True
+    assert salon["verified_by"] == "admin-1"
+    assert salon["registration_payment_id"] == "pay-1"
+    assert salon["agreement_document_url"] == "https://example.com/agreement.pdf"
+
+
 def test_admin_list_filters(sa):
     sa.seed_salon(business_name="Verified", is_verified=True)
     sa.seed_salon(business_name="Pending", is_verified=False)
@@ -822,6 +1045,25 @@ def test_admin_toggle_status(sa):
     assert sa.db.table("salons").rows[0]["is_active"] is False
 
 
+def test_admin_toggle_status_clears_dashboard_stats(sa):
+    from app.services.admin_service import _DASHBOARD_STATS_CACHE
+
+    loads = []
+
+    async def load():
+        loads.append(len(loads) + 1)
+        return loads[-1]
+
+    s = sa.seed_salon(is_active=True)
+    sa.login_admin()
+    assert asyncio.run(_DASHBOARD_STATS_CACHE.get(load)) == 1
+
+    r = sa.client.put(f"{ADMIN_SALONS}/{s['id']}/status", json={"is_active": False})
+    assert r.status_code == 200, r.text
+    # The active-salon counter is reloaded instead of served from cache
+    assert asyncio.run(_DASHBOARD_STATS_CACHE.get(load)) == 2
+
+
 # =====================================================================
 # DELETE /admin/salons/{salon_id}
 # =====================================================================
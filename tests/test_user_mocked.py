@@ -8,7 +8,7 @@ the refactored UserService now uses. ActivityLogger is stubbed. They exercise th
 full HTTP path:
 
     HTTP -> FastAPI (require_admin overridden, rate limiter disabled) -> route ->
-    UserService -> FakeSupabase (tables + auth.admin).
+    UserService -> FakeSupabase (tables + search_profiles RPC + auth.admin).
 
 Scope: every admin user endpoint (happy path + key error cases), including the
 cleanup applied this module — the role field is no longer accepted on update, and
@@ -16,6 +16,10 @@ the routes now translate the service's ValueErrors into 404/400 instead of 500.
 
 No marker -> these run in the fast (no-stack) job alongside the smoke suite.
 """
+import csv
+import io
+import json
+import re
 import uuid
 from types import SimpleNamespace
 from datetime import datetime, timedelta
@@ -41,6 +45,10 @@ class _Resp:
         self.count = count
 
 
+# Keyset continuation built by app.utils.keyset.after_row_filter
+_KEYSET_OR = re.compile(r'(\w+)\.(gt|lt)\."([^"]*)",and\(\1\.eq\."\3",id\.\2\."([^"]*)"\)')
+
+
 class _Query:
     def __init__(self, table):
         self._table = table
@@ -50,6 +58,7 @@ class _Query:
         self._order = []
         self._range = None
         self._negate_is = False
+        self._limit = None
 
     def select(self, cols="*", count=None):
         self._op = ("select", cols)
@@ -80,6 +89,10 @@ class _Query:
         self._filters.append(("ilike", col, pattern))
         return self
 
+    def gte(self, col, val):
+        self._filters.append(("gte", col, val))
+        return self
+
     @property
     def not_(self):
         self._negate_is = True
@@ -99,6 +112,15 @@ class _Query:
         self._range = (start, end)
         return self
 
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def or_(self, expr):
+        col, op, value, row_id = _KEYSET_OR.fullmatch(expr).groups()
+        self._filters.append(("after", col, (op, value, row_id)))
+        return self
+
     def _match(self, row):
         for op, c, v in self._filters:
             rv = row.get(c)
@@ -106,6 +128,8 @@ class _Query:
                 return False
             if op == "in" and rv not in v:
                 return False
+            if op == "gte" and not (rv is not None and rv >= v):
+                return False
             if op == "ilike":
                 needle = v.strip("%").lower()
                 if rv is None or needle not in str(rv).lower():
@@ -114,6 +138,11 @@ class _Query:
                 return False
             if op == "isnotnull" and rv is None:
                 return False
+            if op == "after":
+                cmp, value, row_id = v
+                key, bound = (rv, row["id"]), (value, row_id)
+                if not (key > bound if cmp == "gt" else key < bound):
+                    return False
         return True
 
     def execute(self):
@@ -128,6 +157,8 @@ class _Query:
             if self._range is not None:
                 s, e = self._range
                 matched = matched[s:e + 1]
+            if self._limit is not None:
+                matched = matched[:self._limit]
             count = total if self._count == "exact" else None
             return _Resp(matched, count=count)
 
@@ -198,14 +229,46 @@ class _FakeAuthAdmin:
         prof.rows[:] = [r for r in prof.rows if r.get("id") != uid]
 
 
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
 class FakeSupabase:
     def __init__(self):
         self._tables = {}
         self.auth = SimpleNamespace(admin=_FakeAuthAdmin(self))
+        self.rpc_calls = []
 
     def table(self, name):
         return self._tables.setdefault(name, _Table())
 
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(getattr(self, f"_rpc_{name}")(params or {}))
+
+    # Python stand-in for the SQL function (literal substring match)
+    def _rpc_search_profiles(self, params):
+        term = (params.get("p_search") or "").lower()
+
+        def keep(p):
+            if not params.get("p_include_internal") and p.get("is_internal"):
+                return False
+            if params.get("p_role") is not None and p.get("user_role") != params["p_role"]:
+                return False
+            if params.get("p_is_active") is not None and p.get("is_active") != params["p_is_active"]:
+                return False
+            return not term or any(term in str(p.get(c) or "").lower()
+                                   for c in ("email", "full_name", "phone"))
+
+        matched = sorted((dict(p) for p in self.table("profiles").rows if keep(p)),
+                         key=lambda p: (p["created_at"], p["id"]), reverse=True)
+        offset, limit = params["p_offset"], params["p_limit"]
+        return {"total": len(matched), "data": matched[offset:offset + limit]}
+
 
 # =====================================================================
 # Test handle + fixture
@@ -508,8 +571,8 @@ def test_list_hides_internal_staff_from_client_admins(us):
 
 def test_search_cannot_surface_an_internal_account(us):
     """
-    The search branch runs its own id lookup that bypasses the main query, so
-    it needs the filter independently or search becomes a way around the hide.
+    The internal-staff filter has to apply to search matches too, or search
+    becomes a way around the hide.
     """
     us.seed_profile(role="admin", email="dev@agency.example", is_internal=True)
     us.login_admin()
@@ -542,6 +605,26 @@ def test_list_search_by_email(us):
     assert body["data"][0]["email"] == "alice@example.com"
 
 
+def test_list_search_matches_name_and_phone_in_one_call(us):
+    us.seed_profile(role="customer", email="a@example.com", full_name="Priya Sharma", phone="9000000001")
+    us.seed_profile(role="customer", email="b@example.com", full_name="Ravi Kumar", phone="9111222333")
+    us.seed_profile(role="vendor", email="c@example.com", full_name="Priya Salon", phone="9000000002")
+    us.login_admin()
+
+    r = us.client.get(f"{USERS}/", params={"search": " priya ", "role": "customer"})
+    assert r.status_code == 200, r.text
+    assert [u["email"] for u in r.json()["data"]] == ["a@example.com"]
+
+    r = us.client.get(f"{USERS}/", params={"search": "1222"})
+    assert [u["email"] for u in r.json()["data"]] == ["b@example.com"]
+
+    assert [name for name, _ in us.db.rpc_calls] == ["search_profiles", "search_profiles"]
+    assert us.db.rpc_calls[0][1] == {
+        "p_search": "priya", "p_role": "customer", "p_is_active": None,
+        "p_include_internal": False, "p_limit": 20, "p_offset": 0,
+    }
+
+
 def test_list_search_no_match_empty(us):
     us.seed_profile(role="customer", email="alice@example.com")
     us.login_admin()
@@ -569,3 +652,41 @@ def test_list_pagination(us):
 def test_list_requires_admin(us):
     r = us.client.get(f"{USERS}/")
     assert r.status_code in (401, 403), r.text
+
+
+# =====================================================================
+# GET /admin/users/export
+# =====================================================================
+def test_export_users_csv_filters_and_hides_internal(us):
+    us.seed_profile(role="customer", email="a@example.com", created_at="2026-01-01T00:00:00")
+    us.seed_profile(role="customer", email="b@example.com", created_at="2026-01-02T00:00:00")
+    us.seed_profile(role="vendor", email="v@example.com")
+    us.seed_profile(role="customer", email="dev@agency.example", is_internal=True)
+    us.login_admin()
+
+    r = us.client.get(f"{USERS}/export", params={"role": "customer"})
+    assert r.status_code == 200, r.text
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["email"] for row in rows] == ["a@example.com", "b@example.com"]
+    assert "is_internal" not in rows[0]
+
+
+def test_export_users_csv_escapes_formulas(us):
+    us.seed_profile(role="customer", email="a@example.com", full_name='=HYPERLINK("http://x","y")')
+    us.seed_profile(role="customer", email="b@example.com", full_name="-Ann", phone="+919876543210")
+    us.login_admin()
+
+    r = us.client.get(f"{USERS}/export", params={"role": "customer"})
+    assert r.status_code == 200, r.text
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["full_name"] for row in rows] == ['\'=HYPERLINK("http://x","y")', "'-Ann"]
+    assert rows[1]["phone"] == "'+919876543210"
+
+    # NDJSON is data, not a spreadsheet: values stay as stored
+    r = us.client.get(f"{USERS}/export", params={"role": "customer", "format": "ndjson"})
+    assert [json.loads(line)["full_name"] for line in r.text.splitlines()][1] == "-Ann"
+
+
+def test_export_users_requires_admin(us):
+    r = us.client.get(f"{USERS}/export")
+    assert r.status_code in (401, 403), r.text
@@ -498,6 +498,22 @@ def test_reject_happy(va):
     assert any(k == "rejection" for k, _ in va.spy.emails)
 
 
+def test_approve_and_reject_clear_dashboard_stats(va, monkeypatch):
+    cleared = []
+    monkeypatch.setattr(approval_mod, "invalidate_dashboard_stats_cache", lambda: cleared.append(1))
+    rm_id = str(uuid.uuid4())
+    va.seed_config()
+    va.seed_rm(rm_id)
+    approved = va.seed_request(rm_id)
+    rejected = va.seed_request(rm_id)
+
+    assert va.client.post(f"{VREQS}/{approved['id']}/approve", json={}).status_code == 200
+    assert len(cleared) == 1
+    assert va.client.post(f"{VREQS}/{rejected['id']}/reject",
+                          json={"admin_notes": "No"}).status_code == 200
+    assert len(cleared) == 2
+
+
 def test_reject_missing_rm_profile_still_succeeds(va):
     # Regression for the dedup change (P3b): a missing RM profile must NOT break
     # rejection — the request is still rejected, the notification email is just
@@ -206,9 +206,18 @@ class _Table:
         return _Query(self).delete()
 
 
+class _Rpc:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resp(self._data)
+
+
 class FakeSupabase:
     def __init__(self):
         self._tables = {}
+        self.rpc_calls = []
 
     def table(self, name):
         return self._tables.setdefault(name, _Table())
@@ -217,6 +226,93 @@ class FakeSupabase:
     def from_(self, name):
         return self.table(name)
 
+    def rpc(self, name, params=None):
+        self.rpc_calls.append((name, params))
+        return _Rpc(getattr(self, f"_rpc_{name}")(params or {}))
+
+    # Python stand-in for the SQL function (counters computed from the rows)
+    def _rpc_vendor_analytics(self, params):
+        vendor_id = params["p_vendor_id"]
+        salon = next((s for s in self.table("salons").rows if s.get("vendor_id") == vendor_id), None)
+        if salon is None:
+            return []
+        buyer = salon.get("salon_type") == "regular_buyer"
+        bookings = [] if buyer else [b for b in self.table("bookings").rows
+                                     if b["salon_id"] == salon["id"] and not b.get("deleted_at")]
+        services = [] if buyer else [sv for sv in self.table("services").rows
+                                     if sv["salon_id"] == salon["id"] and sv.get("is_active")]
+        orders = [o for o in self.table("product_orders").rows if o.get("user_id") == vendor_id]
+
+        def completed_sum(rows, key):
+            return sum(r["total_amount"] for r in rows if r.get(key) == "completed")
+
+        row = {
+            "salon_id": salon["id"],
+            "is_regular_buyer": buyer,
+            "total_bookings": len(bookings),
+            "pending_bookings": sum(b["status"] == "pending" for b in bookings),
+            "total_revenue": completed_sum(bookings, "status"),
+            "active_services": len(services),
+            "average_rating": salon.get("average_rating") or 0,
+            "total_product_orders": len(orders),
+            "pending_product_orders": sum(o.get("status") == "pending" for o in orders),
+            "total_product_spending": completed_sum(orders, "payment_status"),
+            "period": None,
+        }
+        start, end = params.get("p_date_from"), params.get("p_date_to")
+        if start and end:
+            in_range = [b for b in bookings if start <= b.get("booking_date", "") <= end]
+            period_orders = [o for o in orders if start <= o.get("created_at", "")[:10] <= end]
+            row["period"] = {
+                "date_from": start, "date_to": end,
+                "bookings": len(in_range),
+                **{f"{st}_bookings": sum(b["status"] == st for b in in_range)
+                   for st in ("pending", "confirmed", "completed", "cancelled", "no_show")},
+                "revenue": completed_sum(in_range, "status"),
+                "product_orders": len(period_orders),
+                "product_spending": completed_sum(period_orders, "payment_status"),
+            }
+        return [row]
+
+    # Stand-in for analytics_timeseries() over salon-scoped rollups: the same
+    # figures, computed straight from the booking rows and gap-filled.
+    def _rpc_analytics_timeseries(self, params):
+        salon_id = params["p_scope"].split(":", 1)[1]
+        gran = params["p_granularity"]
+
+        def bucket(day):
+            if gran == "week":
+                return day - timedelta(days=day.weekday())
+            if gran == "month":
+                return day.replace(day=1)
+            return day
+
+        start, end = date.fromisoformat(params["p_from"]), date.fromisoformat(params["p_to"])
+        bookings = [b for b in self.table("bookings").rows
+                    if b["salon_id"] == salon_id and not b.get("deleted_at")]
+        first_day = {}
+        for b in bookings:
+            d = date.fromisoformat(b["booking_date"])
+            first_day[b["customer_id"]] = min(d, first_day.get(b["customer_id"], d))
+
+        buckets, cur = {}, bucket(start)
+        while cur <= end:
+            buckets[cur] = {"bucket_start": cur.isoformat(), "bookings": 0,
+                            "cancellations": 0, "revenue": 0, "new_customers": 0}
+            cur = bucket(cur + timedelta(days=32 if gran == "month" else 7 if gran == "week" else 1))
+        for b in bookings:
+            d = date.fromisoformat(b["booking_date"])
+            if not start <= d <= end:
+                continue
+            row = buckets[bucket(d)]
+            row["bookings"] += 1
+            row["cancellations"] += b["status"] == "cancelled"
+            row["revenue"] += b["total_amount"] if b["status"] == "completed" else 0
+        for d in first_day.values():
+            if start <= d <= end:
+                buckets[bucket(d)]["new_customers"] += 1
+        return list(buckets.values())
+
 
 # =====================================================================
 # Test handle + fixture
@@ -677,6 +773,100 @@ def test_analytics_happy(vd):
     assert body["pending_bookings"] == 1
     assert body["total_revenue"] == 500.0
     assert body["average_rating"] == 4.5
+    assert body["period"] is None
+    # One RPC; no per-metric queries, no row downloads
+    assert [name for name, _ in vd.db.rpc_calls] == ["vendor_analytics"]
+
+
+def test_analytics_period_breakdown(vd):
+    s = vd.seed_salon()
+    vd.seed_booking(s["id"], status="completed", total_amount=500.0, booking_date="2026-07-01")
+    vd.seed_booking(s["id"], status="cancelled", total_amount=300.0, booking_date="2026-07-02")
+    vd.seed_booking(s["id"], status="completed", total_amount=900.0, booking_date="2026-08-01")
+    vd.db.table("product_orders").rows.append({
+        "id": "po-1", "user_id": VENDOR_ID, "status": "paid", "payment_status": "completed",
+        "total_amount": 120.0, "created_at": "2026-07-05T10:00:00",
+    })
+
+    r = vd.client.get(f"{VENDORS}/analytics",
+                      params={"date_from": "2026-07-01", "date_to": "2026-07-31"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["total_bookings"] == 3
+    assert body["total_revenue"] == 1400.0
+    period = body["period"]
+    assert period["bookings"] == 2
+    assert period["completed_bookings"] == 1
+    assert period["cancelled_bookings"] == 1
+    assert period["revenue"] == 500.0
+    assert period["product_orders"] == 1
+    assert period["product_spending"] == 120.0
+
+
+def test_analytics_inverted_range_400(vd):
+    vd.seed_salon()
+    r = vd.client.get(f"{VENDORS}/analytics",
+                      params={"date_from": "2026-07-31", "date_to": "2026-07-01"})
+    assert r.status_code == 400, r.text
+
+
+def test_analytics_no_salon_404(vd):
+    r = vd.client.get(f"{VENDORS}/analytics")
+    assert r.status_code == 404, r.text
+
+
+# =====================================================================
+# GET /vendors/analytics/timeseries
+# =====================================================================
+def test_analytics_timeseries_weekly_buckets(vd):
+    s = vd.seed_salon()
+    vd.seed_booking(s["id"], customer_id="c-1", status="completed", total_amount=500.0,
+                    booking_date="2026-09-14")
+    vd.seed_booking(s["id"], customer_id="c-1", status="completed", total_amount=200.0,
+                    booking_date="2026-09-16")
+    vd.seed_booking(s["id"], customer_id="c-2", status="cancelled", total_amount=300.0,
+                    booking_date="2026-09-29")
+
+    r = vd.client.get(f"{VENDORS}/analytics/timeseries", params={
+        "granularity": "week", "date_from": "2026-09-14", "date_to": "2026-10-04"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["granularity"] == "week"
+    assert [b["bucket_start"] for b in body["buckets"]] == ["2026-09-14", "2026-09-21", "2026-09-28"]
+    first, empty, last = body["buckets"]
+    assert (first["bookings"], first["revenue"], first["new_customers"]) == (2, 700.0, 1)
+    assert empty["bookings"] == 0
+    assert (last["cancellations"], last["revenue"], last["new_customers"]) == (1, 0.0, 1)
+    # Served by one rollup read scoped to the vendor's salon
+    assert vd.db.rpc_calls == [("analytics_timeseries", {
+        "p_scope": f"salon:{s['id']}", "p_granularity": "week",
+        "p_from": "2026-09-14", "p_to": "2026-10-04"})]
+
+
+def test_analytics_timeseries_defaults_to_last_30_days(vd):
+    vd.seed_salon()
+    r = vd.client.get(f"{VENDORS}/analytics/timeseries")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["date_to"] == date.today().isoformat()
+    assert len(body["buckets"]) == 30
+
+
+@pytest.mark.parametrize("params, code", [
+    ({"granularity": "hour"}, 422),
+    ({"date_from": "2026-07-31", "date_to": "2026-07-01"}, 400),
+    ({"date_from": "2024-01-01", "date_to": "2026-07-01"}, 400),
+])
+def test_analytics_timeseries_rejects_bad_ranges(vd, params, code):
+    vd.seed_salon()
+    r = vd.client.get(f"{VENDORS}/analytics/timeseries", params=params)
+    assert r.status_code == code, r.text
+    assert vd.db.rpc_calls == []
+
+
+def test_analytics_timeseries_no_salon_404(vd):
+    r = vd.client.get(f"{VENDORS}/analytics/timeseries")
+    assert r.status_code == 404, r.text
 
 
 # =====================================================================